@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# -----------------------------------------------------------------------------
+
+'''Benchmark of the collection of variable-access information. The
+accesses of every region of consecutive loop nests of a synthetic NEMO
+routine are collected, as a transformation script validating candidate
+regions would do. This is done without any cached information (by calling
+reference_accesses()) and with the accesses cached by each node (by using
+collect_accesses()): the first time (when the accesses of each loop nest
+are cached), a second time and after one loop nest has been modified.
+Run it from anywhere once PSyclone is installed:
+
+    > python access_benchmark.py [-n NESTS] [-s SIZE]
+
+'''
+
+from __future__ import print_function
+
+import time
+
+from benchmark_utils import create_parser, nemo_schedule
+from psyclone.core.access_info import VariablesAccessInfo
+
+# One loop nest of the synthetic routine
+NEST = '''
+  do jk = 1, jpkm1
+    do jj = 2, jpjm1
+      do ji = 2, jpim1
+        zwx(ji,jj,jk) = umask(ji,jj,jk) * ( ptb(ji+1,jj,jk) - ptb(ji,jj,jk) )
+        ztu = 0.5 * ( zwx(ji,jj,jk) + zwx(ji-1,jj,jk) ) * r1_e1e2t(ji,jj)
+        if ( ztu > 0.0 ) then
+          pta(ji,jj,jk) = pta(ji,jj,jk) - ztu * rdt
+        else
+          pta(ji,jj,jk) = pta(ji,jj,jk) + ztu * rdt
+        end if
+      end do
+    end do
+  end do
+'''
+
+
+def regions(schedule, size):
+    '''
+    :returns: every sequence of size consecutive children of the schedule.
+    :rtype: generator of list of :py:class:`psyclone.psyGen.Node`
+    '''
+    for start in range(len(schedule.children) - size + 1):
+        yield schedule.children[start:start + size]
+
+
+def main():
+    ''' Run the benchmark and print the timings. '''
+    parser = create_parser(__doc__)
+    parser.add_argument("-n", "--nests", type=int, default=500,
+                        help="number of loop nests in the routine")
+    parser.add_argument("-s", "--size", type=int, default=8,
+                        help="number of loop nests in each region")
+    args = parser.parse_args()
+
+    schedule = nemo_schedule(NEST * args.nests)
+
+    def collect(cached):
+        ''' Collect the accesses of every region.
+
+        :param bool cached: whether to use the accesses cached by the nodes.
+
+        :returns: the accesses of each region.
+        :rtype: generator of \
+            :py:class:`psyclone.core.access_info.VariablesAccessInfo`
+        '''
+        for region in regions(schedule, args.size):
+            var_accesses = VariablesAccessInfo()
+            for node in region:
+                if cached:
+                    # Request the accesses of the node so that they are kept
+                    _ = node.var_accesses
+                    node.collect_accesses(var_accesses)
+                else:
+                    node.reference_accesses(var_accesses)
+            yield var_accesses
+
+    def timed(cached):
+        ''' :returns: the time taken to collect all of the accesses. '''
+        start = time.time()
+        for _ in collect(cached):
+            pass
+        return time.time() - start
+
+    uncached_time = timed(False)
+    first_time = timed(True)
+    second_time = timed(True)
+    # Modify a loop nest in the middle of the routine and collect again
+    loop = schedule.children[len(schedule.children) // 2]
+    loop.loop_body.children.append(loop.loop_body.children[0])
+    modified_time = timed(True)
+    for cached, uncached in zip(collect(True), collect(False)):
+        assert str(cached) == str(uncached)
+        assert cached.location == uncached.location
+
+    print("Accesses of {0} regions of {1} loop nests (s)".format(
+        len(schedule.children) - args.size + 1, args.size))
+    for name, value in [("reference_accesses", uncached_time),
+                        ("cached (first time)", first_time),
+                        ("cached", second_time),
+                        ("cached (after a change)", modified_time)]:
+        print("{0:<28} {1:>12.5f} {2:>8.1f}x".format(
+            name, value, uncached_time / value))
+
+
+if __name__ == "__main__":
+    main()
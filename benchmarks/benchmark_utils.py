@@ -0,0 +1,218 @@
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# -----------------------------------------------------------------------------
+
+'''Utilities shared by the benchmarks in this directory: their command-line
+options, the timing of the measurements and the synthetic inputs that they
+use.
+
+'''
+
+from __future__ import print_function
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+
+from fparser.common.readfortran import FortranStringReader
+from fparser.two.parser import ParserFactory
+
+# The kernel used by every call in a synthetic Dynamo0.3 invoke. It has a
+# scalar argument, writes the first field and reads the other three.
+KERNEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                      "src", "psyclone", "tests", "test_files", "dynamo0p3",
+                      "testkern.F90")
+
+
+def create_parser(doc, repeats=None, baseline=False):
+    '''
+    :param str doc: the docstring of the benchmark (its first line is \
+                    used as the description).
+    :param repeats: the default number of times to repeat each \
+                    measurement or None if the benchmark does not repeat \
+                    its measurements.
+    :type repeats: int or NoneType
+    :param bool baseline: whether the benchmark can compare with another \
+                          version of PSyclone.
+
+    :returns: a parser of the command-line options of a benchmark, to \
+              which the benchmark adds its own options.
+    :rtype: :py:class:`argparse.ArgumentParser`
+
+    '''
+    parser = argparse.ArgumentParser(description=doc.split("\n")[0])
+    if repeats:
+        parser.add_argument("-r", "--repeats", type=int, default=repeats,
+                            help="number of times to repeat each "
+                            "measurement")
+    if baseline:
+        parser.add_argument("--baseline",
+                            help="directory containing the psyclone "
+                            "package to compare with")
+    return parser
+
+
+def best_time(function, repeats):
+    '''
+    :param function: the function to time.
+    :type function: callable with no arguments
+    :param int repeats: the number of times to call the function.
+
+    :returns: the shortest time (in seconds) taken by a call.
+    :rtype: float
+
+    '''
+    return min(timeit.repeat(function, number=1, repeat=repeats))
+
+
+def run_script(script, args, src_dir=None):
+    '''
+    Run a measurement in a new Python process so that it is not affected
+    by what this process has done (or imported).
+
+    :param str script: the Python code to run.
+    :param args: the command-line arguments of the code.
+    :type args: list of str
+    :param src_dir: the directory containing the psyclone package to \
+                    use or None to use the one that is installed.
+    :type src_dir: str or NoneType
+
+    :returns: the words printed by the code.
+    :rtype: list of str
+
+    '''
+    env = dict(os.environ)
+    if src_dir:
+        env["PYTHONPATH"] = os.pathsep.join(
+            [os.path.abspath(src_dir)] +
+            [path for path in [env.get("PYTHONPATH")] if path])
+    output = subprocess.check_output(
+        [sys.executable, "-c", script] + [str(arg) for arg in args], env=env)
+    return output.decode().split()
+
+
+def nemo_source(body):
+    '''
+    :param str body: the statements of the routine.
+
+    :returns: a NEMO routine with the supplied statements and the \
+              declarations that they need.
+    :rtype: str
+
+    '''
+    return ("subroutine tra_adv(ptb, pta)\n"
+            "  use oce\n"
+            "  integer :: ji, jj, jk\n"
+            "  real :: ztu\n" + body +
+            "end subroutine tra_adv\n")
+
+
+def nemo_schedule(body, ignore_comments=True):
+    '''
+    :param str body: the statements of the routine.
+    :param bool ignore_comments: whether fparser discards comments.
+
+    :returns: the schedule of a NEMO routine with the supplied statements.
+    :rtype: :py:class:`psyclone.nemo.NemoInvokeSchedule`
+
+    '''
+    from psyclone.psyGen import PSyFactory
+    parser = ParserFactory().create()
+    ast = parser(FortranStringReader(nemo_source(body),
+                                     ignore_comments=ignore_comments))
+    psy = PSyFactory("nemo").create(ast)
+    return psy.invokes.invoke_list[0].schedule
+
+
+def parse_invoke(kernels, fields, stride=1):
+    '''
+    Parse a synthetic Dynamo0.3 algorithm file with a single invoke.
+    Call number idx is passed the fields with the indices
+    stride*idx, ..., stride*idx+3 (modulo the number of fields).
+
+    :param int kernels: the number of kernel calls in the invoke.
+    :param int fields: the number of distinct fields used by the calls.
+    :param int stride: the offset of the fields passed to one call from \
+                       those passed to the previous one.
+
+    :returns: the information about the invoke found by the parser.
+    :rtype: :py:class:`psyclone.parse.algorithm.FileInfo`
+
+    '''
+    from psyclone.parse.algorithm import parse
+    names = ["f{0}".format(idx) for idx in range(fields)]
+    calls = []
+    for idx in range(kernels):
+        args = [names[(stride * idx + offset) % fields]
+                for offset in range(4)]
+        calls.append("testkern_type(a, {0})".format(", ".join(args)))
+    code = ("program big_invoke\n"
+            "  use testkern, only: testkern_type\n"
+            "  use inf, only: field_type\n"
+            "  type(field_type) :: {0}\n"
+            "  real(r_def) :: a\n"
+            "  call invoke({1})\n"
+            "end program big_invoke\n".format(
+                ", ".join(names), ", &\n    ".join(calls)))
+    directory = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(directory, "big_invoke.f90")
+        with open(filename, "w") as afile:
+            afile.write(code)
+        shutil.copy(KERNEL, directory)
+        _, info = parse(filename, api="dynamo0.3", kernel_path=directory)
+    finally:
+        shutil.rmtree(directory)
+    return info
+
+
+def print_comparison(title, rows):
+    '''
+    Print the times taken by the original and the new implementations of
+    some operations.
+
+    :param str title: the heading of the column of operations.
+    :param rows: the name of each operation and its original and new \
+                 times (in seconds).
+    :type rows: list of (str, float, float)
+
+    '''
+    print("{0:<28} {1:>12} {2:>12} {3:>8}".format(
+        title, "original (s)", "new (s)", "speedup"))
+    for name, old_time, new_time in rows:
+        print("{0:<28} {1:>12.5f} {2:>12.5f} {3:>7.1f}x".format(
+            name, old_time, new_time, old_time / new_time))
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# -----------------------------------------------------------------------------
+
+'''Benchmark of the dependence analysis used to place halo exchanges in
+a large Dynamo0.3 invoke. It compares the creation of the PSy layer
+(which calls create_halo_exchanges() for every loop) and the queries of
+the dependencies of every kernel argument when using the per-tree
+DependencyGraph with the original implementation, which examined every
+node before or after an argument. Run it from anywhere once PSyclone is
+installed:
+
+    > python dependency_benchmark.py [-k KERNELS] [-f FIELDS] [-r REPEATS]
+
+'''
+
+from __future__ import print_function
+
+from benchmark_utils import create_parser, best_time, parse_invoke, \
+    print_comparison
+from psyclone.psyGen import PSyFactory, Argument, Kern, Node
+
+
+class OriginalDependencies(object):
+    ''' Context manager that restores the original implementation of the
+    dependence queries of Argument. '''
+    methods = {
+        "backward_dependence":
+        lambda self: self._find_argument(self._call.preceding(reverse=True)),
+        "forward_dependence":
+        lambda self: self._find_argument(self._call.following()),
+        "forward_read_dependencies":
+        lambda self: self._find_read_arguments(self._call.following()),
+        "backward_write_dependencies":
+        lambda self, ignore_halos=False: self._find_write_arguments(
+            self._call.preceding(reverse=True), ignore_halos=ignore_halos),
+    }
+
+    def __enter__(self):
+        self._saved = {name: getattr(Argument, name)
+                       for name in self.methods}
+        for name, method in self.methods.items():
+            setattr(Argument, name, method)
+
+    def __exit__(self, *_):
+        for name, method in self._saved.items():
+            setattr(Argument, name, method)
+
+
+def query_all(schedule):
+    '''
+    Find the dependencies of every kernel argument in a schedule.
+
+    :returns: the DAG names of the nodes that each argument depends on.
+    :rtype: list of list of str
+
+    '''
+    result = []
+    for kern in schedule.walk(Kern):
+        for arg in kern.args:
+            deps = [arg.backward_dependence(), arg.forward_dependence()]
+            deps.extend(arg.backward_write_dependencies())
+            deps.extend(arg.forward_read_dependencies())
+            result.append([dep.call.dag_name if dep else None
+                           for dep in deps])
+    return result
+
+
+def main():
+    ''' Run the benchmark and print the timings. '''
+    parser = create_parser(__doc__, repeats=3)
+    parser.add_argument("-k", "--kernels", type=int, default=100,
+                        help="number of kernel calls in the invoke")
+    parser.add_argument("-f", "--fields", type=int, default=20,
+                        help="number of distinct fields")
+    args = parser.parse_args()
+
+    info = parse_invoke(args.kernels, args.fields)
+
+    def create():
+        ''' Create the PSy layer, including its halo exchanges. '''
+        psy = PSyFactory("dynamo0.3",
+                         distributed_memory=True).create(info)
+        return psy.invokes.invoke_list[0].schedule
+
+    schedule = create()
+    print("Invoke with {0} kernels and {1} nodes".format(
+        len(schedule.walk(Kern)), len(schedule.walk(Node))))
+
+    with OriginalDependencies():
+        original = create()
+        old_psy = best_time(create, args.repeats)
+        old_results = query_all(original)
+        old_query = best_time(lambda: query_all(original), args.repeats)
+    new_psy = best_time(create, args.repeats)
+    new_results = query_all(schedule)
+    new_query = best_time(lambda: query_all(schedule), args.repeats)
+    assert old_results == new_results
+
+    print_comparison("operation", [
+        ("create PSy layer", old_psy, new_psy),
+        ("query all dependencies", old_query, new_query)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# -----------------------------------------------------------------------------
+
+
+'''Benchmark of the f2pygen generation of a PSy layer with many
+declarations. It times the addition of increasing numbers of
+declarations and use statements to a subroutine (which should grow
+linearly with their number) and the generation of the Dynamo0.3 PSy
+layer for an invoke with many kernels and fields. Run it from anywhere
+once PSyclone is installed:
+
+    > python f2pygen_benchmark.py [-k KERNELS] [-f FIELDS] [-r REPEATS]
+
+'''
+
+from __future__ import print_function
+
+from benchmark_utils import create_parser, best_time, parse_invoke
+from psyclone.f2pygen import ModuleGen, SubroutineGen, DeclGen, \
+    TypeDeclGen, UseGen
+from psyclone.psyGen import PSyFactory
+
+
+def add_declarations(number):
+    '''
+    Add declarations and use statements to a subroutine in the way that
+    the PSy layer does, i.e. with many repeated names.
+
+    :param int number: the number of distinct variables to declare.
+
+    :returns: the generated subroutine.
+    :rtype: :py:class:`psyclone.f2pygen.SubroutineGen`
+
+    '''
+    module = ModuleGen(name="bench_mod")
+    sub = SubroutineGen(module, name="bench_code")
+    module.add(sub)
+    for idx in range(number):
+        sub.add(TypeDeclGen(sub, datatype="field_type",
+                            entity_decls=["f{0}".format(idx)],
+                            intent="in"))
+        sub.add(TypeDeclGen(sub, datatype="field_proxy_type",
+                            entity_decls=["f{0}_proxy".format(idx)]))
+        sub.add(DeclGen(sub, datatype="integer",
+                        entity_decls=["ndf_w{0}".format(idx % 10),
+                                      "undf_w{0}".format(idx)]))
+        sub.add(DeclGen(sub, datatype="real", kind="r_def",
+                        pointer=True,
+                        entity_decls=["basis_w{0}(:,:,:) => null()".
+                                      format(idx % 10)]))
+        sub.add(UseGen(sub, name="mod{0}".format(idx % 10), only=True,
+                       funcnames=["name{0}".format(idx % 20)]))
+    return sub
+
+
+def main():
+    ''' Run the benchmark and print the timings. '''
+    parser = create_parser(__doc__, repeats=3)
+    parser.add_argument("-k", "--kernels", type=int, default=200,
+                        help="number of kernel calls in the invoke")
+    parser.add_argument("-f", "--fields", type=int, default=400,
+                        help="number of distinct fields")
+    args = parser.parse_args()
+
+    print("{0:<28} {1:>12} {2:>16}".format(
+        "variables", "time (s)", "per variable (us)"))
+    for number in [250, 500, 1000, 2000]:
+        elapsed = best_time(lambda: add_declarations(number),
+                            args.repeats)
+        print("{0:<28} {1:>12.5f} {2:>16.2f}".format(
+            number, elapsed, 1.0e6 * elapsed / number))
+
+    info = parse_invoke(args.kernels, args.fields, stride=4)
+
+    def generate():
+        ''' Create and generate the PSy layer. '''
+        psy = PSyFactory("dynamo0.3", distributed_memory=True).create(info)
+        return str(psy.gen)
+
+    code = generate()
+    elapsed = best_time(generate, args.repeats)
+    print("Generated PSy layer for {0} kernels and {1} fields "
+          "({2} lines) in {3:.5f} s".format(
+              args.kernels, args.fields, len(code.split("\n")), elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# -----------------------------------------------------------------------------
+
+'''Benchmark of the memory used to process a large NEMO source file. A
+synthetic routine of the requested length is written to a temporary
+file and processed (parsed by fparser and converted to the PSyIR) in a
+separate process whose peak resident set size (RSS) is reported. To
+compare with another version of PSyclone (e.g. a checkout of an earlier
+release) give the directory containing its psyclone package with
+--baseline:
+
+    > python memory_benchmark.py [-l LINES] [--baseline SRC_DIR]
+
+'''
+
+from __future__ import print_function
+
+import os
+import tempfile
+
+from benchmark_utils import create_parser, nemo_source, run_script
+
+# One block of the synthetic routine: a loop nest containing array
+# assignments and a conditional, followed by an unsupported statement
+# (which becomes a CodeBlock).
+BLOCK = '''
+  do jk = 1, jpkm1
+    do jj = 2, jpjm1
+      do ji = 2, jpim1
+        zwx(ji,jj,jk) = umask(ji,jj,jk) * ( ptb(ji+1,jj,jk) - ptb(ji,jj,jk) )
+        zwy(ji,jj,jk) = vmask(ji,jj,jk) * ( ptb(ji,jj+1,jk) - ptb(ji,jj,jk) )
+        ztu = 0.5 * ( zwx(ji,jj,jk) + zwx(ji-1,jj,jk) ) * r1_e1e2t(ji,jj)
+        if ( ztu > 0.0 ) then
+          pta(ji,jj,jk) = pta(ji,jj,jk) - ztu * rdt + zwy(ji,jj,jk)
+        else
+          pta(ji,jj,jk) = pta(ji,jj,jk) + ztu * rdt - zwy(ji,jj,jk)
+        end if
+      end do
+    end do
+  end do
+  write(*,*) "block done", jk
+'''
+
+# Run in a separate process so that its peak RSS is that of processing
+# the file alone.
+MEASURE = '''
+import gc, resource, sys
+from fparser.common.readfortran import FortranFileReader
+from fparser.two.parser import ParserFactory
+from psyclone.psyGen import PSyFactory, Node
+
+def peak_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+parser = ParserFactory().create()
+ast = parser(FortranFileReader(sys.argv[1], ignore_comments=False))
+parsed = peak_rss()
+psy = PSyFactory("nemo").create(ast)
+# Include the nodes in the schedules of the kernels
+nodes = sum(1 for obj in gc.get_objects() if isinstance(obj, Node))
+print(nodes, parsed, peak_rss())
+'''
+
+
+def create_source(filename, lines):
+    '''
+    Write a synthetic NEMO routine to a file.
+
+    :param str filename: the name of the file.
+    :param int lines: the (approximate) number of lines in the routine.
+
+    '''
+    blocks = max(1, lines // BLOCK.count("\n"))
+    with open(filename, "w") as sfile:
+        sfile.write(nemo_source(BLOCK * blocks))
+
+
+def measure(filename, src_dir=None):
+    '''
+    Process a file in a new Python process.
+
+    :param str filename: the NEMO source file.
+    :param src_dir: the directory containing the psyclone package to \
+                    use or None to use the one that is installed.
+    :type src_dir: str or NoneType
+
+    :returns: the number of PSyIR nodes created and the peak RSS (in \
+              kB) after parsing and after creating the PSyIR.
+    :rtype: 3-tuple of int
+
+    '''
+    return tuple(int(value)
+                 for value in run_script(MEASURE, [filename], src_dir))
+
+
+def report(name, result):
+    ''' Print the measurements of one version of PSyclone. '''
+    nodes, parsed, final = result
+    print("{0:<10} {1:>8} {2:>12} {3:>12} {4:>12}".format(
+        name, nodes, parsed // 1024, final // 1024,
+        (final - parsed) // 1024))
+
+
+def main():
+    ''' Run the benchmark and print the results. '''
+    parser = create_parser(__doc__, baseline=True)
+    parser.add_argument("-l", "--lines", type=int, default=50000,
+                        help="number of lines in the NEMO routine")
+    args = parser.parse_args()
+
+    handle, filename = tempfile.mkstemp(suffix=".f90")
+    os.close(handle)
+    try:
+        create_source(filename, args.lines)
+        results = []
+        if args.baseline:
+            results.append(("baseline", measure(filename, args.baseline)))
+        results.append(("current", measure(filename)))
+    finally:
+        os.remove(filename)
+
+    print("Peak RSS (MB) processing a {0}-line NEMO routine".format(
+        args.lines))
+    print("{0:<10} {1:>8} {2:>12} {3:>12} {4:>12}".format(
+        "version", "nodes", "after parse", "after PSyIR", "PSyIR"))
+    for name, result in results:
+        report(name, result)
+
+
+if __name__ == "__main__":
+    main()
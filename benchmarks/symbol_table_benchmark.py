@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# -----------------------------------------------------------------------------
+
+'''Benchmark of the kernel symbol table. The PSyIR of a synthetic kernel
+with many arguments and local variables is created and the views of its
+symbol table that are used by the back-ends and transformations (the
+argument list and the local symbols) are then queried repeatedly. Each
+measurement is made in a separate process. To compare with another
+version of PSyclone give the directory containing its psyclone package
+with --baseline:
+
+    > python symbol_table_benchmark.py [-d DECLARATIONS] [-q QUERIES]
+                                       [--baseline SRC_DIR]
+
+'''
+
+from __future__ import print_function
+
+from benchmark_utils import create_parser, run_script
+
+MEASURE = '''
+import sys, time
+from fparser.common.readfortran import FortranStringReader
+from fparser.two.parser import ParserFactory
+from psyclone.psyGen import Fparser2ASTProcessor
+
+declarations, queries = int(sys.argv[1]), int(sys.argv[2])
+args = ["arg{0}".format(idx) for idx in range(declarations // 2)]
+local = ["var{0}".format(idx) for idx in range(declarations // 2)]
+code = ("module big_mod\\n"
+        "contains\\n"
+        "subroutine big_kernel(" + ", ".join(args) + ")\\n" +
+        "".join("  real, intent(inout) :: {0}\\n".format(name)
+                for name in args) +
+        "".join("  real :: {0}\\n".format(name) for name in local) +
+        "".join("  {0} = {1} * 2.0\\n".format(name, arg)
+                for name, arg in zip(local, args)) +
+        "end subroutine big_kernel\\n"
+        "end module big_mod\\n")
+parse_tree = ParserFactory().create(std="f2003")(FortranStringReader(code))
+start = time.time()
+schedule = Fparser2ASTProcessor().generate_schedule("big_kernel",
+                                                    parse_tree)
+built = time.time()
+symbol_table = schedule.symbol_table
+for _ in range(queries):
+    assert len(symbol_table.argument_list) == len(args)
+    assert len(symbol_table.local_symbols) == len(local)
+print(built - start, time.time() - built)
+'''
+
+
+def measure(declarations, queries, src_dir=None):
+    '''
+    Create and query a symbol table in a new Python process.
+
+    :param int declarations: the number of variables in the kernel.
+    :param int queries: the number of times to query the symbol table.
+    :param src_dir: the directory containing the psyclone package to \
+                    use or None to use the one that is installed.
+    :type src_dir: str or NoneType
+
+    :returns: the time taken to create the PSyIR of the kernel and to \
+              query its symbol table.
+    :rtype: 2-tuple of float
+
+    '''
+    return tuple(float(value) for value in
+                 run_script(MEASURE, [declarations, queries], src_dir))
+
+
+def main():
+    ''' Run the benchmark and print the results. '''
+    parser = create_parser(__doc__, baseline=True)
+    parser.add_argument("-d", "--declarations", type=int, default=2000,
+                        help="number of variables in the kernel")
+    parser.add_argument("-q", "--queries", type=int, default=200,
+                        help="number of times to query the symbol table")
+    args = parser.parse_args()
+
+    results = []
+    if args.baseline:
+        results.append(("baseline", measure(args.declarations, args.queries,
+                                            args.baseline)))
+    results.append(("current", measure(args.declarations, args.queries)))
+
+    print("Times (s) for a kernel with {0} variables".format(
+        args.declarations))
+    print("{0:<10} {1:>12} {2:>12}".format("version", "create PSyIR",
+                                           "queries"))
+    for name, (build, query) in results:
+        print("{0:<10} {1:>12.5f} {2:>12.5f}".format(name, build, query))
+
+
+if __name__ == "__main__":
+    main()
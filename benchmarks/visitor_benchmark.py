@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# -----------------------------------------------------------------------------
+
+'''Benchmark of the PSyIR back-ends. It writes a large kernel schedule
+as Fortran with the dispatch table used by PSyIRVisitor and with the
+original implementation, which searched for the method to call for
+every node visited. It does so with a single writer and with a new
+writer for each statement of the kernel (as back-ends are often created
+for a single use). Run it from anywhere once PSyclone is installed:
+
+    > python visitor_benchmark.py [-n NESTS] [-r REPEATS]
+
+'''
+
+from __future__ import print_function
+
+import inspect
+
+from fparser.common.readfortran import FortranStringReader
+from fparser.two.parser import ParserFactory
+
+from benchmark_utils import create_parser, best_time, print_comparison
+from psyclone.psyGen import Fparser2ASTProcessor, Node
+from psyclone.psyir.backend.base import PSyIRVisitor, VisitorError
+from psyclone.psyir.backend.fortran import FortranWriter
+
+# One loop nest of the synthetic kernel
+NEST = '''
+  do k = 1, n
+    do j = 1, n
+      do i = 1, n
+        a(i,j,k) = b(i,j,k) * 0.5 + c(i,j,k) - b(i,j,k) / (c(i,j,k) + 1.0)
+        if (a(i,j,k) > 0.0) then
+          b(i,j,k) = -a(i,j,k) * c(i,j,k)
+        else
+          b(i,j,k) = max(a(i,j,k), c(i,j,k)) + 2.0 * sqrt(c(i,j,k))
+        end if
+      end do
+    end do
+  end do
+'''
+
+
+def create_schedule(nests):
+    '''
+    :param int nests: the number of loop nests in the kernel.
+
+    :returns: the PSyIR of a kernel containing the specified number of \
+              loop nests.
+    :rtype: :py:class:`psyclone.psyGen.KernelSchedule`
+
+    '''
+    code = ("module big_mod\n"
+            "contains\n"
+            "subroutine big_kernel(n, a, b, c)\n"
+            "  integer, intent(in) :: n\n"
+            "  real, intent(inout), dimension(n,n,n) :: a, b\n"
+            "  real, intent(in), dimension(n,n,n) :: c\n"
+            "  integer :: i, j, k\n" + NEST * nests +
+            "end subroutine big_kernel\n"
+            "end module big_mod\n")
+    parser = ParserFactory().create(std="f2003")
+    parse_tree = parser(FortranStringReader(code))
+    return Fparser2ASTProcessor().generate_schedule("big_kernel",
+                                                    parse_tree)
+
+
+def original_visit(self, node):
+    ''' The original implementation of PSyIRVisitor._visit(). '''
+    # pylint: disable=eval-used
+    if not isinstance(node, Node):
+        raise VisitorError(
+            "Expected argument to be of type 'Node' but found '{0}'."
+            "".format(type(node).__name__))
+    possible_method_names = [curr_class.__name__.lower()+"_node"
+                             for curr_class in inspect.getmro(type(node))]
+    possible_method_names.remove("object_node")
+    for method_name in possible_method_names:
+        try:
+            return eval("self.{0}(node)".format(method_name))
+        except AttributeError as excinfo:
+            if "attribute '{0}'".format(method_name) in str(excinfo):
+                pass
+            else:
+                raise AttributeError(excinfo)
+    if self._skip_nodes:
+        for child in node.children:
+            self._visit(child)
+    else:
+        raise VisitorError(
+            "Unsupported node '{0}' found: method names attempted were "
+            "{1}.".format(type(node).__name__, str(possible_method_names)))
+
+
+def main():
+    ''' Run the benchmark and print the timings. '''
+    parser = create_parser(__doc__, repeats=3)
+    parser.add_argument("-n", "--nests", type=int, default=200,
+                        help="number of loop nests in the kernel")
+    args = parser.parse_args()
+
+    schedule = create_schedule(args.nests)
+    print("Kernel schedule with {0} nodes".format(
+        len(schedule.walk(Node))))
+    writer = FortranWriter()
+
+    def write():
+        ''' Write the schedule as Fortran. '''
+        return writer(schedule)
+
+    def write_statements():
+        ''' Write each statement with a new writer. '''
+        return [FortranWriter()(child) for child in schedule.children]
+
+    rows = []
+    for name, function in [("one writer", write),
+                           ("writer per statement", write_statements)]:
+        new_visit = PSyIRVisitor._visit
+        try:
+            PSyIRVisitor._visit = original_visit
+            old_code = function()
+            old_time = best_time(function, args.repeats)
+        finally:
+            PSyIRVisitor._visit = new_visit
+        assert function() == old_code
+        rows.append((name, old_time, best_time(function, args.repeats)))
+    print_comparison("write kernel", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# -----------------------------------------------------------------------------
+
+'''Benchmark of the traversal of a large NEMO schedule. It compares
+Node.walk() and the queries built on it (following(), searching for the
+first match) with the original recursive, list-concatenating
+implementation. Run it from anywhere once PSyclone is installed:
+
+    > python walk_benchmark.py [-n NESTS] [-r REPEATS]
+
+'''
+
+from __future__ import print_function
+
+import itertools
+
+from benchmark_utils import create_parser, best_time, nemo_schedule, \
+    print_comparison
+from psyclone.psyGen import Node, Loop, Kern
+from psyclone.nemo import NemoKern
+
+# One loop nest of the synthetic routine
+NEST = '''
+  do jk = 1, jpk
+    do jj = 1, jpj
+      do ji = 1, jpi
+        zwx(ji,jj,jk) = umask(ji,jj,jk) * ( ptb(ji+1,jj,jk) - ptb(ji,jj,jk) )
+        zwy(ji,jj,jk) = vmask(ji,jj,jk) * ( ptb(ji,jj+1,jk) - ptb(ji,jj,jk) )
+      end do
+    end do
+  end do
+'''
+
+
+def recursive_walk(node, my_type):
+    ''' The original implementation of Node.walk(). '''
+    local_list = []
+    if isinstance(node, my_type):
+        local_list.append(node)
+    for child in node.children:
+        local_list += recursive_walk(child, my_type)
+    return local_list
+
+
+def recursive_following(node):
+    ''' The original implementation of Node.following(). '''
+    all_nodes = recursive_walk(node.root, Node)
+    position = all_nodes.index(node)
+    return all_nodes[position+1:]
+
+
+def main():
+    ''' Run the benchmark and print the timings. '''
+    parser = create_parser(__doc__, repeats=5)
+    parser.add_argument("-n", "--nests", type=int, default=500,
+                        help="number of loop nests in the routine")
+    args = parser.parse_args()
+
+    sched = nemo_schedule(NEST * args.nests, ignore_comments=False)
+    loops = sched.walk(Loop)
+    first_loop = sched.children[0]
+    print("Schedule with {0} nodes ({1} loops)".format(
+        len(sched.walk(Node)), len(loops)))
+
+    cases = [
+        ("walk(Node)",
+         lambda: recursive_walk(sched, Node),
+         lambda: sched.walk(Node)),
+        ("walk(Kern)",
+         lambda: recursive_walk(sched, Kern),
+         lambda: sched.walk(Kern)),
+        ("outer loops (stop at Loop)",
+         lambda: [loop for loop in recursive_walk(sched, Loop)
+                  if not loop.ancestor(Loop)],
+         lambda: sched.walk(Loop, stop_type=Loop)),
+        ("first NemoKern",
+         lambda: recursive_walk(sched, NemoKern)[:1],
+         lambda: list(itertools.islice(sched.iter_walk(NemoKern), 1))),
+        ("following() of first loop",
+         lambda: recursive_following(first_loop),
+         first_loop.following),
+    ]
+    for _, old, new in cases:
+        assert old() == new()
+    print_comparison("query", [
+        (name, best_time(old, args.repeats), best_time(new, args.repeats))
+        for name, old, new in cases])
+
+
+if __name__ == "__main__":
+    main()
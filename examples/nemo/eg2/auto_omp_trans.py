@@ -0,0 +1,68 @@
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2018, Science and Technology Facilities Council
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# -----------------------------------------------------------------------------
+
+'''A transformation script that parallelises all loop nests of a NEMO
+routine with OpenMP, using PSyclone's dependence analysis to select the
+loops. In order to use it you must first install PSyclone. See README.md
+in the top-level psyclone directory.
+
+Once you have PSyclone installed, this script may be used by doing:
+
+ >>> psyclone -api "nemo" -s ./auto_omp_trans.py traldf_iso.F90
+
+This prints a report of the loops that were (and were not) parallelised,
+followed by the generated Fortran.
+'''
+
+from __future__ import print_function
+
+
+def trans(psy):
+    ''' Parallelise all loop nests in all Schedules with OpenMP.
+
+    :param psy: the object holding all information on the PSy layer \
+                to be modified.
+    :type psy: :py:class:`psyclone.psyGen.PSy`
+
+    :returns: the transformed PSy object
+    :rtype:  :py:class:`psyclone.psyGen.PSy`
+
+    '''
+    from psyclone.transformations import NemoAutoOMPTrans
+    auto_trans = NemoAutoOMPTrans()
+    for invoke in psy.invokes.invoke_list:
+        auto_trans.apply(invoke.schedule)
+        print("Report for '{0}':".format(invoke.name))
+        print("\n".join(auto_trans.report))
+    return psy
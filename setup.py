@@ -105,6 +105,6 @@ if __name__ == '__main__':
             'test': ["pytest<5.0"], # TODO: Issue 438. Fix > 5.0 broken tests.
         },
         include_package_data=True,
-        scripts=['bin/psyclone', 'bin/genkernelstub'],
+        scripts=['bin/psyclone', 'bin/psyclonec', 'bin/genkernelstub'],
         data_files=[('share/psyclone', ['config/psyclone.cfg'])]
     )
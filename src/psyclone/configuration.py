@@ -54,6 +54,11 @@ _FILE_NAME = "psyclone.cfg"
 #          applied and only one version of the transformed kernel is created.
 VALID_KERNEL_NAMING_SCHEMES = ["multiple", "single"]
 
+# The ways of writing the PSy layer. "fparser1" builds the f2pygen tree
+# from fparser1 statements while "direct" uses the light-weight
+# statements in psyclone.fortran_text, which produce the same code.
+VALID_PSY_LAYER_WRITERS = ["fparser1", "direct"]
+
 
 class ConfigurationError(Exception):
     '''
@@ -106,6 +111,13 @@ class Config(object):
     # is set in the Config.kernel_output_dir getter.
     _default_kernel_naming = "multiple"
 
+    # The default maximum size (in MB) of the on-disk cache of parsed
+    # kernels (if one is enabled).
+    _default_kernel_cache_size = 256
+
+    # The default way of writing the PSy layer.
+    _default_psy_layer_writer = "fparser1"
+
     @staticmethod
     def get(do_not_load_file=False):
         '''Static function that if necessary creates and returns the singleton
@@ -188,6 +200,19 @@ class Config(object):
         # The list of directories to search for Fortran include files
         self._include_paths = []
 
+        # Directory in which to cache parsed kernels. No caching is
+        # performed if this is not set.
+        self._kernel_cache_dir = None
+
+        # Maximum size (in MB) of the kernel cache
+        self._kernel_cache_size = Config._default_kernel_cache_size
+
+        # True if generated code is also to be cached
+        self._cache_generated_code = False
+
+        # How the PSy layer is written (one of VALID_PSY_LAYER_WRITERS)
+        self._psy_layer_writer = Config._default_psy_layer_writer
+
     # -------------------------------------------------------------------------
     def load(self, config_file=None):
         '''Loads a configuration file.
@@ -293,6 +318,38 @@ class Config(object):
                 "error while parsing REPROD_PAD_SIZE: {0}".format(str(err)),
                 config=self)
 
+        # Location and size of the (optional) on-disk cache of parsed
+        # kernels.
+        cache_dir = self._config['DEFAULT'].get('KERNEL_CACHE_DIR', "")
+        self._kernel_cache_dir = os.path.expandvars(
+            os.path.expanduser(cache_dir.strip()))
+        try:
+            self._kernel_cache_size = self._config['DEFAULT'].getint(
+                'KERNEL_CACHE_SIZE', Config._default_kernel_cache_size)
+        except ValueError as err:
+            raise ConfigurationError(
+                "error while parsing KERNEL_CACHE_SIZE: {0}".format(str(err)),
+                config=self)
+        if self._kernel_cache_size < 0:
+            raise ConfigurationError(
+                "KERNEL_CACHE_SIZE must be non-negative but got {0}".
+                format(self._kernel_cache_size), config=self)
+        try:
+            self._cache_generated_code = self._config['DEFAULT'].getboolean(
+                'CACHE_GENERATED_CODE', False)
+        except ValueError as err:
+            raise ConfigurationError(
+                "error while parsing CACHE_GENERATED_CODE: {0}".
+                format(str(err)), config=self)
+
+        self._psy_layer_writer = self._config['DEFAULT'].get(
+            'PSY_LAYER_WRITER', Config._default_psy_layer_writer).strip()
+        if self._psy_layer_writer not in VALID_PSY_LAYER_WRITERS:
+            raise ConfigurationError(
+                "PSY_LAYER_WRITER must be one of {0} but got '{1}'".
+                format(VALID_PSY_LAYER_WRITERS, self._psy_layer_writer),
+                config=self)
+
         # Now we deal with the API-specific sections of the config file. We
         # create a dictionary to hold the API-specifc Config objects.
         self._api_conf = {}
@@ -601,6 +658,78 @@ class Config(object):
             raise ValueError("include_paths must be a list but got: {0}".
                              format(type(path_list)))
 
+    @property
+    def kernel_cache_dir(self):
+        '''
+        :returns: the directory in which to cache parsed kernels or an \
+                  empty string if caching is disabled.
+        :rtype: str
+        '''
+        return self._kernel_cache_dir
+
+    @kernel_cache_dir.setter
+    def kernel_cache_dir(self, value):
+        '''
+        Setter for the kernel-cache directory.
+
+        :param str value: directory in which to cache parsed kernels. An \
+                          empty string or None disables caching.
+        '''
+        self._kernel_cache_dir = value
+
+    @property
+    def kernel_cache_size(self):
+        '''
+        :returns: the maximum size (in MB) of the kernel cache. Zero means \
+                  that the size is not limited.
+        :rtype: int
+        '''
+        return self._kernel_cache_size
+
+    @property
+    def cache_generated_code(self):
+        '''
+        :returns: whether the generated algorithm and PSy code (and any \
+                  transformed kernels) are to be stored in the kernel \
+                  cache so that unchanged inputs need not be processed \
+                  again.
+        :rtype: bool
+        '''
+        return self._cache_generated_code
+
+    @cache_generated_code.setter
+    def cache_generated_code(self, value):
+        '''
+        Setter for whether generated code is to be cached.
+
+        :param bool value: whether generated code is to be cached.
+        '''
+        self._cache_generated_code = value
+
+    @property
+    def psy_layer_writer(self):
+        '''
+        :returns: how the PSy layer is written, one of \
+                  VALID_PSY_LAYER_WRITERS.
+        :rtype: str
+        '''
+        return self._psy_layer_writer
+
+    @psy_layer_writer.setter
+    def psy_layer_writer(self, value):
+        '''
+        Setter for how the PSy layer is written.
+
+        :param str value: one of VALID_PSY_LAYER_WRITERS.
+
+        :raises ValueError: if the supplied value is not recognised.
+        '''
+        if value not in VALID_PSY_LAYER_WRITERS:
+            raise ValueError(
+                "psy_layer_writer must be one of {0} but got '{1}'".
+                format(VALID_PSY_LAYER_WRITERS, value))
+        self._psy_layer_writer = value
+
     def get_default_keys(self):
         '''Returns all keys from the default section.
         :returns list: List of all keys of the default section as strings.
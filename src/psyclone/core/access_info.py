@@ -64,6 +64,10 @@ class AccessInfo(object):
     :type node: :py:class:`psyclone.psyGen.Node` instance.
 
     '''
+    # There is an instance for every access to every variable so use
+    # __slots__ rather than a __dict__ to reduce their size.
+    __slots__ = ("_location", "_access_type", "_node", "_indices")
+
     def __init__(self, access_type, location, node, indices=None):
         self._location = location
         self._access_type = access_type
@@ -133,6 +137,8 @@ class VariableAccessInfo(object):
     :param str var_name: Name of the variable.
 
     '''
+    __slots__ = ("_var_name", "_accesses")
+
     def __init__(self, var_name):
         self._var_name = var_name
         # This is the list of AccessInfo instances for this variable.
@@ -379,6 +385,35 @@ class VariablesAccessInfo(object):
         # locations just merged in
         self._location = self._location + max_new_location
 
+    def extend(self, other_access_info):
+        '''Adds the accesses stored in another VariablesAccessInfo instance
+        as if they had been added to this instance directly, i.e. the
+        locations of the accesses are shifted by the current location of
+        this instance and this location is then advanced by the current
+        location of the other instance. Unlike merge() this makes the
+        result independent of whether the other accesses were collected
+        separately.
+
+        :param other_access_info: The other VariablesAccessInfo instance.
+        :type other_access_info: \
+            :py:class:`psyclone.core.access_info.VariablesAccessInfo`
+        '''
+        # pylint: disable=protected-access
+        # This is used to re-use the accesses cached by the nodes of large
+        # trees, so the AccessInfo instances are created directly.
+        offset = self._location
+        for var_name, other_var_info in other_access_info._var_to_varinfo.\
+                items():
+            var_info = self._var_to_varinfo.get(var_name)
+            if var_info is None:
+                var_info = VariableAccessInfo(var_name)
+                self._var_to_varinfo[var_name] = var_info
+            var_info._accesses.extend(
+                [AccessInfo(access._access_type, access._location + offset,
+                            access._node, access._indices)
+                 for access in other_var_info._accesses])
+        self._location = offset + other_access_info.location
+
     def is_written(self, var_name):
         '''Checks if the specified variable name is at least written once.
 
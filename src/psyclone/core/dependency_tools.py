@@ -0,0 +1,661 @@
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# -----------------------------------------------------------------------------
+
+'''This module provides a dependence analysis of the loops in the PSyIR.
+It decides whether a loop carries a dependence between its iterations
+(and can therefore not be executed in parallel) using the variable-access
+information of the loop, and the GCD test, the Banerjee test and the
+computation of dependence distances on affine array indices.'''
+
+from __future__ import print_function, absolute_import
+
+from psyclone.core.access_type import AccessType
+
+# Result of the analysis of one array dimension of a pair of accesses:
+# the two accesses never refer to the same element ...
+_INDEPENDENT = 0
+# ... they can only refer to the same element in the same iteration of
+# the analysed loop ...
+_SAME_ITERATION = 1
+# ... or nothing is known.
+_UNKNOWN = 2
+
+
+def _gcd(first, second):
+    '''
+    :returns: the greatest common divisor of two non-negative integers.
+    :rtype: int
+    '''
+    while second:
+        first, second = second, first % second
+    return first
+
+
+def affine_expression(expr):
+    '''Converts a PSyIR expression into an affine (linear) expression of the
+    variables it references, i.e. sum(coeff_i * var_i) + constant. It
+    supports integer literals, references to scalar variables, unary minus
+    and plus, additions, subtractions and multiplications in which one
+    side is a constant. Variable names are converted to lower case.
+
+    :param expr: the expression to convert.
+    :type expr: :py:class:`psyclone.psyGen.Node`
+
+    :returns: a dictionary mapping the name of each variable to its \
+        (non-zero) coefficient, with the key None mapping to the constant \
+        term, or None if the expression is not affine.
+    :rtype: dict or NoneType
+
+    '''
+    # Avoid circular import
+    # pylint: disable=import-outside-toplevel
+    from psyclone.psyGen import Array, BinaryOperation, Literal, \
+        Reference, UnaryOperation
+
+    if isinstance(expr, Literal):
+        try:
+            return {None: int(expr.value)}
+        except ValueError:
+            return None
+    if isinstance(expr, Array):
+        # Indirect addressing
+        return None
+    if isinstance(expr, Reference):
+        return {None: 0, expr.name.lower(): 1}
+    if isinstance(expr, UnaryOperation):
+        operand = affine_expression(expr.children[0])
+        if operand is None:
+            return None
+        if expr.operator == UnaryOperation.Operator.PLUS:
+            return operand
+        if expr.operator == UnaryOperation.Operator.MINUS:
+            return _scale(operand, -1)
+        return None
+    if isinstance(expr, BinaryOperation):
+        if expr.operator not in [BinaryOperation.Operator.ADD,
+                                 BinaryOperation.Operator.SUB,
+                                 BinaryOperation.Operator.MUL]:
+            return None
+        lhs = affine_expression(expr.children[0])
+        rhs = affine_expression(expr.children[1])
+        if lhs is None or rhs is None:
+            return None
+        if expr.operator == BinaryOperation.Operator.MUL:
+            if len(lhs) == 1:
+                return _scale(rhs, lhs[None])
+            if len(rhs) == 1:
+                return _scale(lhs, rhs[None])
+            # A product of two variables is not affine
+            return None
+        if expr.operator == BinaryOperation.Operator.SUB:
+            rhs = _scale(rhs, -1)
+        result = dict(lhs)
+        for name, coeff in rhs.items():
+            result[name] = result.get(name, 0) + coeff
+        return dict((name, coeff) for name, coeff in result.items()
+                    if coeff or name is None)
+    return None
+
+
+def _scale(expression, factor):
+    '''
+    :param dict expression: an affine expression as returned by \
+        affine_expression().
+    :param int factor: the factor to multiply the expression with.
+
+    :returns: the affine expression multiplied by the factor.
+    :rtype: dict
+
+    '''
+    return dict((name, coeff * factor) for name, coeff in expression.items()
+                if (coeff and factor) or name is None)
+
+
+def _ancestors(node):
+    '''Generator returning all ancestors of the given node, starting with
+    its parent. The statements of a kernel (e.g. a NemoKern) are stored in
+    a separate KernelSchedule, so the search continues with the kernel that
+    owns such a schedule.
+
+    :param node: the node whose ancestors are returned.
+    :type node: :py:class:`psyclone.psyGen.Node`
+
+    '''
+    while True:
+        node = node.parent if node.parent else getattr(node, "_kernel",
+                                                       None)
+        if node is None:
+            return
+        yield node
+
+
+def _innermost_loop(node):
+    '''
+    :param node: a node inside a loop.
+    :type node: :py:class:`psyclone.psyGen.Node`
+
+    :returns: the innermost loop enclosing the node and whether the node \
+        is executed conditionally (inside an IfBlock) in that loop.
+    :rtype: (:py:class:`psyclone.psyGen.Loop`, bool)
+
+    '''
+    # Avoid circular import
+    # pylint: disable=import-outside-toplevel
+    from psyclone.psyGen import IfBlock, Loop
+    conditional = False
+    for ancestor in _ancestors(node):
+        if isinstance(ancestor, Loop):
+            return ancestor, conditional
+        if isinstance(ancestor, IfBlock):
+            conditional = True
+    return None, conditional
+
+
+def _is_unconditional(node, statement):
+    '''
+    :param node: a node inside (or equal to) a statement.
+    :type node: :py:class:`psyclone.psyGen.Node`
+    :param statement: the statement.
+    :type statement: :py:class:`psyclone.psyGen.Node`
+
+    :returns: whether the node is always executed when the statement is \
+        (i.e. it is not inside an IfBlock within the statement). As in \
+        the rest of the analysis, loops are assumed to be executed at \
+        least once.
+    :rtype: bool
+
+    '''
+    # Avoid circular import
+    # pylint: disable=import-outside-toplevel
+    from psyclone.psyGen import IfBlock
+    if node is statement:
+        return True
+    for ancestor in _ancestors(node):
+        if isinstance(ancestor, IfBlock):
+            return False
+        if ancestor is statement:
+            return True
+    return False
+
+
+def _read_after(loop, names):
+    '''Finds the variables whose values on exit from a loop may be read
+    by the statements executed after it: those following the loop in
+    its schedule and in the schedules enclosing it, as well as those
+    preceding it in an enclosing loop (that are executed in the next
+    iteration). A variable that is unconditionally written before it is
+    read is not affected by its value on exit from the loop.
+
+    :param loop: the loop.
+    :type loop: :py:class:`psyclone.psyGen.Loop`
+    :param names: the (lower case) names of the variables to check.
+    :type names: list of str
+
+    :returns: the (lower case) names of the variables that may be read.
+    :rtype: set of str
+
+    '''
+    # Avoid circular import
+    # pylint: disable=import-outside-toplevel
+    from psyclone.psyGen import Loop, Schedule
+    remaining = set(names)
+    result = set()
+    node = loop
+    while remaining and node.parent is not None:
+        parent = node.parent
+        if isinstance(parent, Schedule):
+            # Only the statements of a schedule are executed in sequence
+            # (e.g. not the if and else bodies of an IfBlock)
+            statements = parent.children[node.position + 1:]
+            if isinstance(parent.parent, Loop):
+                statements.extend(parent.children[:node.position])
+            for statement in statements:
+                var_accesses = statement.var_accesses
+                for var_name in var_accesses.all_vars:
+                    if var_name.lower() not in remaining:
+                        continue
+                    remaining.discard(var_name.lower())
+                    first = var_accesses[var_name].all_accesses[0]
+                    if first.access_type != AccessType.WRITE or \
+                       not _is_unconditional(first.node, statement):
+                        result.add(var_name.lower())
+        node = parent
+    return result
+
+
+class DependencyTools(object):
+    '''This class provides the dependence analysis of loops. The method
+    can_loop_be_parallelised() returns whether a loop carries a dependence
+    and records messages describing the reasons if so. Scalar variables
+    that are always written before they are read in an iteration are not
+    considered to carry a dependence, they can be declared private. Array
+    accesses are compared pairwise (a write against all accesses of the
+    same array) in each dimension, using affine index expressions:
+
+    * the GCD test proves that an index equation has no integer solution,
+    * the Banerjee test proves that an equation has no solution within \
+      the bounds of the loops (if the bounds are known constants),
+    * if an index uses the loop variable with the same coefficient in \
+      both accesses and the same symbolic terms, the dependence distance \
+      is computed. A distance of 0 means that both accesses can only refer \
+      to the same element in the same iteration.
+
+    Anything that can not be analysed (e.g. indirect addressing, code
+    blocks or implicit loops inside the loop) is conservatively considered
+    to carry a dependence. So is a private scalar whose value on exit from
+    the loop may be read after the loop, as each thread has its own copy.
+
+    '''
+    def __init__(self):
+        self._messages = []
+        self._private_variables = []
+
+    def get_all_messages(self):
+        '''
+        :returns: the messages describing all dependences found in the \
+            last call to can_loop_be_parallelised().
+        :rtype: list of str
+        '''
+        return self._messages[:]
+
+    @property
+    def private_variables(self):
+        '''
+        :returns: the names of the scalar variables that must be private \
+            to each iteration of the loop last analysed by \
+            can_loop_be_parallelised().
+        :rtype: list of str
+        '''
+        return self._private_variables[:]
+
+    def can_loop_be_parallelised(self, loop):
+        '''Returns whether the iterations of the given loop are independent
+        of each other. The reasons for any dependence found are available
+        using get_all_messages() afterwards.
+
+        :param loop: the loop to analyse.
+        :type loop: :py:class:`psyclone.psyGen.Loop`
+
+        :returns: whether the loop does not carry any dependence.
+        :rtype: bool
+
+        :raises TypeError: if the supplied node is not a Loop.
+
+        '''
+        # Avoid circular import
+        # pylint: disable=import-outside-toplevel
+        from psyclone.psyGen import CodeBlock, Loop
+        if not isinstance(loop, Loop):
+            raise TypeError("Dependence analysis can only be applied to a "
+                            "Loop but got '{0}'.".format(type(loop).__name__))
+        self._messages = []
+        self._private_variables = []
+
+        inner_loops = [node for node in loop.walk(Loop) if node is not loop]
+        for inner in inner_loops:
+            if not inner.variable_name:
+                self._messages.append(
+                    "The loop contains an implicit loop (using array "
+                    "syntax) whose accesses are not analysed.")
+                return False
+        if loop.walk(CodeBlock):
+            self._messages.append(
+                "The loop contains code that is not represented in the "
+                "PSyIR (a CodeBlock), its accesses are not known.")
+            return False
+
+        loop_var = loop.variable_name.lower()
+        # The bounds of all loop variables inside this loop (where they
+        # are known), used by the Banerjee test. The accesses are not
+        # associated with the loops that contain them, so a variable used
+        # by several loops gets the smallest range containing the bounds
+        # of all of them, and none if any of them is not known.
+        bounds = {}
+        for node in [loop] + inner_loops:
+            name = node.variable_name.lower()
+            bound = self._get_bounds(node)
+            if name not in bounds:
+                bounds[name] = bound
+            elif bound and bounds[name]:
+                bounds[name] = (min(bound[0], bounds[name][0]),
+                                max(bound[1], bounds[name][1]))
+            else:
+                bounds[name] = None
+        iteration_vars = set(node.variable_name.lower()
+                             for node in inner_loops)
+        iteration_vars.add(loop_var)
+
+        var_accesses = loop.var_accesses
+        # All scalars written inside the loop body: a subscript that uses
+        # any of these is not analysed.
+        written = set()
+        arrays = []
+        for var_name in var_accesses.all_vars:
+            accesses = var_accesses[var_name].all_accesses
+            if any(access.indices is not None for access in accesses):
+                arrays.append(var_name)
+            elif any(access.access_type != AccessType.READ and
+                     access.node is not loop for access in accesses):
+                written.add(var_name.lower())
+
+        for var_name in var_accesses.all_vars:
+            accesses = var_accesses[var_name].all_accesses
+            if var_name in arrays:
+                self._check_array(var_name, accesses, loop_var,
+                                  iteration_vars, written, bounds)
+            else:
+                self._check_scalar(var_name, accesses, loop, inner_loops)
+
+        live = _read_after(loop, [var_name.lower() for var_name in
+                                  self._private_variables])
+        for var_name in self._private_variables:
+            if var_name.lower() in live:
+                self._messages.append(
+                    "The scalar variable '{0}' is written in each iteration "
+                    "and its value may be read after the loop, so it can not "
+                    "be private.".format(var_name))
+
+        return not self._messages
+
+    @staticmethod
+    def _get_bounds(loop):
+        '''
+        :param loop: a loop.
+        :type loop: :py:class:`psyclone.psyGen.Loop`
+
+        :returns: the smallest and largest value the loop variable can \
+            take, or None if these are not known constants.
+        :rtype: (int, int) or NoneType
+
+        '''
+        if len(loop.children) < 3:
+            return None
+        limits = [affine_expression(expr) for expr in
+                  [loop.start_expr, loop.stop_expr, loop.step_expr]]
+        if any(limit is None or len(limit) > 1 for limit in limits):
+            return None
+        start, stop, step = [limit[None] for limit in limits]
+        if step > 0 and start <= stop:
+            return (start, stop)
+        if step < 0 and stop <= start:
+            return (stop, start)
+        # A loop that is never executed (or an infinite loop)
+        return None
+
+    def _check_scalar(self, var_name, accesses, loop, inner_loops):
+        '''Checks if a scalar variable causes a dependence between the
+        iterations of the loop. A scalar that is only read is fine, and so
+        is a scalar that is always written before it is read in each
+        iteration (which is then a private variable).
+
+        :param str var_name: the name of the variable.
+        :param accesses: all accesses to the variable in the loop.
+        :type accesses: \
+            list of :py:class:`psyclone.core.access_info.AccessInfo`
+        :param loop: the loop being analysed.
+        :type loop: :py:class:`psyclone.psyGen.Loop`
+        :param inner_loops: all loops inside the analysed loop.
+        :type inner_loops: list of :py:class:`psyclone.psyGen.Loop`
+
+        '''
+        body_accesses = [access for access in accesses
+                         if access.node is not loop]
+        if all(access.access_type == AccessType.READ
+               for access in body_accesses):
+            return
+        if var_name.lower() == loop.variable_name.lower():
+            self._messages.append("The loop variable '{0}' is modified "
+                                  "inside the loop.".format(var_name))
+            return
+        if any(node.variable_name.lower() == var_name.lower()
+               for node in inner_loops):
+            self._private_variables.append(var_name)
+            return
+
+        first = body_accesses[0]
+        if first.access_type == AccessType.WRITE:
+            # The variable is private if the first write is unconditional
+            # and all accesses are inside the loop containing it (so they
+            # are in the same iteration of that loop).
+            first_loop, conditional = _innermost_loop(first.node)
+            if not conditional and \
+               all(any(ancestor is first_loop
+                       for ancestor in _ancestors(access.node))
+                   for access in body_accesses):
+                self._private_variables.append(var_name)
+                return
+        self._messages.append(
+            "The scalar variable '{0}' is not always written before it is "
+            "read in each iteration (e.g. a reduction), so it may carry a "
+            "dependence.".format(var_name))
+
+    def _check_array(self, var_name, accesses, loop_var, iteration_vars,
+                     written, bounds):
+        '''Checks if the accesses to an array variable cause a dependence
+        between the iterations of the loop. Each write access is compared
+        with all accesses (including itself, since the same statement is
+        executed in different iterations). At most one message is recorded
+        per array.
+
+        :param str var_name: the name of the array.
+        :param accesses: all accesses to the array in the loop.
+        :type accesses: \
+            list of :py:class:`psyclone.core.access_info.AccessInfo`
+        :param str loop_var: the (lower case) variable of the analysed loop.
+        :param iteration_vars: the (lower case) variables of the analysed \
+            loop and all loops inside it.
+        :type iteration_vars: set of str
+        :param written: the (lower case) names of all other scalars that \
+            are modified in the loop.
+        :type written: set of str
+        :param bounds: the known bounds of the loop variables.
+        :type bounds: dict of str: (int, int)
+
+        '''
+        # Avoid circular import
+        # pylint: disable=import-outside-toplevel
+        from psyclone.psyGen import Node
+        # Convert the indices of each access only once
+        subscripts = []
+        for access in accesses:
+            if access.indices is None or \
+               not all(isinstance(index, Node) for index in access.indices):
+                # The whole array is accessed, or the indices are not
+                # available (e.g. for kernel arguments)
+                subscripts.append(None)
+                continue
+            subscripts.append([affine_expression(index)
+                               for index in access.indices])
+
+        for write_idx, write in enumerate(accesses):
+            if write.access_type == AccessType.READ:
+                continue
+            for other_idx, other in enumerate(accesses):
+                if other.access_type != AccessType.READ and \
+                   other_idx < write_idx:
+                    # This pair of writes has already been tested
+                    continue
+                if self._may_carry_dependence(
+                        subscripts[write_idx], subscripts[other_idx],
+                        loop_var, iteration_vars, written, bounds):
+                    self._messages.append(
+                        "The array '{0}' is written at {1} and accessed at "
+                        "{2}, which may refer to the same element in "
+                        "different iterations of the loop.".format(
+                            var_name, _access_str(var_name, write),
+                            _access_str(var_name, other)))
+                    return
+
+    @staticmethod
+    def _may_carry_dependence(subscripts1, subscripts2, loop_var,
+                              iteration_vars, written, bounds):
+        '''
+        :param subscripts1: the affine expressions of the indices of the \
+            first access, None for an index that is not affine, or None if \
+            the indices are not known.
+        :type subscripts1: list of (dict or NoneType) or NoneType
+        :param subscripts2: the same for the second access.
+        :type subscripts2: list of (dict or NoneType) or NoneType
+        :param str loop_var: the (lower case) variable of the analysed loop.
+        :param iteration_vars: the variables of the analysed loop and all \
+            loops inside it.
+        :type iteration_vars: set of str
+        :param written: the names of all other scalars modified in the loop.
+        :type written: set of str
+        :param bounds: the known bounds of the loop variables.
+        :type bounds: dict of str: (int, int)
+
+        :returns: whether the two accesses may refer to the same element \
+            of the array in different iterations of the analysed loop.
+        :rtype: bool
+
+        '''
+        if subscripts1 is None or subscripts2 is None or \
+           len(subscripts1) != len(subscripts2):
+            return True
+        same_iteration = False
+        for index1, index2 in zip(subscripts1, subscripts2):
+            result = DependencyTools._test_dimension(
+                index1, index2, loop_var, iteration_vars, written, bounds)
+            if result == _INDEPENDENT:
+                return False
+            if result == _SAME_ITERATION:
+                same_iteration = True
+        return not same_iteration
+
+    @staticmethod
+    def _test_dimension(index1, index2, loop_var, iteration_vars, written,
+                        bounds):
+        '''Tests whether two affine index expressions can have the same
+        value. Loop variables in the two expressions are independent of
+        each other (they describe different iterations), while any other
+        variable must have the same value in both, i.e. the symbolic terms
+        must cancel out. This gives the equation
+        sum(a_k * x_k) - sum(b_k * y_k) = c2 - c1, which is tested with the
+        GCD test and (if all bounds are known) with the Banerjee test.
+
+        :param index1: the affine expression of the first index.
+        :type index1: dict or NoneType
+        :param index2: the affine expression of the second index.
+        :type index2: dict or NoneType
+        :param str loop_var: the variable of the analysed loop.
+        :param iteration_vars: the variables of the analysed loop and all \
+            loops inside it.
+        :type iteration_vars: set of str
+        :param written: the names of all other scalars modified in the loop.
+        :type written: set of str
+        :param bounds: the known bounds of the loop variables.
+        :type bounds: dict of str: (int, int)
+
+        :returns: _INDEPENDENT, _SAME_ITERATION or _UNKNOWN.
+        :rtype: int
+
+        '''
+        # pylint: disable=too-many-return-statements, too-many-arguments
+        if index1 is None or index2 is None:
+            return _UNKNOWN
+        symbols1 = dict((name, coeff) for name, coeff in index1.items()
+                        if name is not None and name not in iteration_vars)
+        symbols2 = dict((name, coeff) for name, coeff in index2.items()
+                        if name is not None and name not in iteration_vars)
+        if symbols1 != symbols2 or any(name in written for name in symbols1):
+            return _UNKNOWN
+
+        # The coefficients of all terms of the left-hand side of the
+        # equation, together with the bounds of the corresponding variable
+        terms = [(coeff, bounds.get(name)) for name, coeff in index1.items()
+                 if name in iteration_vars]
+        terms.extend((-coeff, bounds.get(name))
+                     for name, coeff in index2.items()
+                     if name in iteration_vars)
+        constant = index2[None] - index1[None]
+        if not terms:
+            return _INDEPENDENT if constant else _UNKNOWN
+
+        # GCD test
+        divisor = 0
+        for coeff, _ in terms:
+            divisor = _gcd(divisor, abs(coeff))
+        if constant % divisor:
+            return _INDEPENDENT
+
+        # Banerjee test
+        if all(bound is not None for _, bound in terms):
+            lowest = sum(min(coeff * bound[0], coeff * bound[1])
+                         for coeff, bound in terms)
+            highest = sum(max(coeff * bound[0], coeff * bound[1])
+                          for coeff, bound in terms)
+            if constant < lowest or constant > highest:
+                return _INDEPENDENT
+
+        # Dependence distance: if the analysed loop variable is the only
+        # iteration variable used, with the same coefficient in both
+        # accesses, its distance is constant / coeff.
+        iteration1 = dict((name, coeff) for name, coeff in index1.items()
+                          if name in iteration_vars)
+        iteration2 = dict((name, coeff) for name, coeff in index2.items()
+                          if name in iteration_vars)
+        if list(iteration1.keys()) == [loop_var] and iteration1 == iteration2 \
+           and constant == 0:
+            return _SAME_ITERATION
+        return _UNKNOWN
+
+
+def _access_str(var_name, access):
+    '''
+    :param str var_name: the name of the accessed variable.
+    :param access: an access to the variable.
+    :type access: :py:class:`psyclone.core.access_info.AccessInfo`
+
+    :returns: a textual representation of the access for messages.
+    :rtype: str
+
+    '''
+    # Avoid circular import
+    # pylint: disable=import-outside-toplevel
+    from psyclone.psyGen import Node
+    from psyclone.psyir.backend.fortran import FortranWriter
+    if access.indices is None:
+        return "'{0}'".format(var_name)
+    writer = FortranWriter()
+    indices = []
+    for index in access.indices:
+        if isinstance(index, Node):
+            try:
+                indices.append(writer(index))
+            except Exception:  # pylint: disable=broad-except
+                indices.append("?")
+        else:
+            indices.append(str(index))
+    return "'{0}({1})'".format(var_name, ",".join(indices))
@@ -242,3 +242,41 @@ def test_variables_access_info_merge():
     # 1 to 2:
     # pylint: disable=protected-access
     assert var_accesses1._location == 2
+
+
+# -----------------------------------------------------------------------------
+def test_variables_access_info_extend():
+    '''Tests that extend() adds accesses as if they had been added to the
+    instance directly.
+    '''
+    node = Node()
+    # Collect accesses for 'a=b; c=a' directly
+    direct = VariablesAccessInfo()
+    direct.add_access("a", AccessType.WRITE, node)
+    direct.add_access("b", AccessType.READ, node)
+    direct.next_location()
+    direct.add_access("c", AccessType.WRITE, node, [1])
+    direct.add_access("a", AccessType.READ, node)
+    direct.next_location()
+
+    # and with the accesses of 'c=a' collected separately
+    var_accesses = VariablesAccessInfo()
+    var_accesses.add_access("a", AccessType.WRITE, node)
+    var_accesses.add_access("b", AccessType.READ, node)
+    var_accesses.next_location()
+    other = VariablesAccessInfo()
+    other.add_access("c", AccessType.WRITE, node, [1])
+    other.add_access("a", AccessType.READ, node)
+    other.next_location()
+    var_accesses.extend(other)
+
+    assert var_accesses.location == direct.location == 2
+    assert var_accesses.all_vars == direct.all_vars
+    for var_name in direct.all_vars:
+        assert ([(access.access_type, access.location, access.indices)
+                 for access in var_accesses[var_name].all_accesses] ==
+                [(access.access_type, access.location, access.indices)
+                 for access in direct[var_name].all_accesses])
+    # The other instance is not changed
+    assert other.location == 1
+    assert other["a"][0].location == 0
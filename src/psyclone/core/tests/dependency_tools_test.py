@@ -0,0 +1,335 @@
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# -----------------------------------------------------------------------------
+
+'''This module contains the tests for the dependence analysis of loops.'''
+
+from __future__ import absolute_import
+import pytest
+
+from fparser.common.readfortran import FortranStringReader
+from fparser.two.parser import ParserFactory
+from psyclone.core.dependency_tools import DependencyTools, \
+    affine_expression
+from psyclone.psyGen import Assignment, Loop, PSyFactory
+
+
+@pytest.fixture(scope="module", name="parser")
+def parser_fixture():
+    '''Creates and returns an fparser object (once per module).'''
+    return ParserFactory().create()
+
+
+def get_loops(parser, body):
+    '''Creates the PSyIR of a NEMO program with the given body.
+
+    :param parser: the fparser object.
+    :param str body: the statements of the program.
+
+    :returns: all outermost loops of the program.
+    :rtype: list of :py:class:`psyclone.psyGen.Loop`
+
+    '''
+    code = '''program test
+              integer :: ji, jj, jk, n
+              real :: a(10,10), b(10,10), s, t, u
+              {0}
+              end program test'''.format(body)
+    psy = PSyFactory("nemo", distributed_memory=False).create(
+        parser(FortranStringReader(code)))
+    schedule = psy.invokes.invoke_list[0].schedule
+    return [node for node in schedule.children if isinstance(node, Loop)]
+
+
+def test_affine_expression(parser):
+    '''Tests the conversion of index expressions into affine expressions.'''
+    code = '''
+    a(1, 1) = 0
+    a(ji, 1) = 0
+    a(2*ji - 3, 1) = 0
+    a(-(jj+ji)*2 + ji*3, 1) = 0
+    a(ji - ji + n, 1) = 0
+    a(ji*jj, 1) = 0
+    a(b(ji, 1), 1) = 0
+    a(ji/2, 1) = 0
+    a(abs(ji), 1) = 0
+    a(+ji, 1) = 0
+    '''
+    psy = PSyFactory("nemo", distributed_memory=False).create(
+        parser(FortranStringReader("program test\n" + code +
+                                   "end program test\n")))
+    schedule = psy.invokes.invoke_list[0].schedule
+    indices = [node.lhs.children[0] for node in schedule.walk(Assignment)]
+    assert affine_expression(indices[0]) == {None: 1}
+    assert affine_expression(indices[1]) == {None: 0, "ji": 1}
+    assert affine_expression(indices[2]) == {None: -3, "ji": 2}
+    assert affine_expression(indices[3]) == {None: 0, "ji": 1, "jj": -2}
+    assert affine_expression(indices[4]) == {None: 0, "n": 1}
+    # Not affine: product of variables, indirection, division, intrinsic
+    for index in indices[5:9]:
+        assert affine_expression(index) is None
+    assert affine_expression(indices[9]) == {None: 0, "ji": 1}
+
+
+def test_independent_loops(parser):
+    '''Tests loops that do not carry a dependence.'''
+    loops = get_loops(parser, '''
+        do jj = 1, n
+          do ji = 1, n
+            a(ji, jj) = b(ji, jj) + a(ji, jj)
+          end do
+        end do
+        do ji = 1, 5
+          a(2*ji, 1) = a(2*ji+1, 1)
+        end do
+        do ji = 1, 5
+          a(ji, 1) = a(ji+5, 1)
+        end do
+        do ji = 1, n
+          a(ji, 1) = b(ji, 1) + n
+          a(ji, 2) = a(ji, 1)
+        end do''')
+    dep_tools = DependencyTools()
+    for loop in loops:
+        assert dep_tools.can_loop_be_parallelised(loop)
+        assert dep_tools.get_all_messages() == []
+    # The inner loop variable is private to the outer loop
+    dep_tools.can_loop_be_parallelised(loops[0])
+    assert dep_tools.private_variables == ["ji"]
+
+
+def test_array_dependences(parser):
+    '''Tests loops in which array accesses carry a dependence.'''
+    loops = get_loops(parser, '''
+        do ji = 2, 10
+          a(ji, 1) = a(ji-1, 1)
+        end do
+        do ji = 1, 6
+          a(ji, 1) = a(ji+5, 1)
+        end do
+        do ji = 1, n
+          a(ji, 1) = 0
+          a(ji+1, 1) = 1
+        end do
+        do jk = 1, n
+          do ji = 1, n
+            a(ji, jk) = b(ji, jk)
+          end do
+          a(1, 1) = 0
+        end do
+        do ji = 1, n
+          a(jj, 1) = a(ji, 1)
+          jj = jj + 1
+        end do''')
+    dep_tools = DependencyTools()
+    for loop in loops:
+        assert not dep_tools.can_loop_be_parallelised(loop)
+    dep_tools.can_loop_be_parallelised(loops[0])
+    assert dep_tools.get_all_messages() == [
+        "The array 'a' is written at 'a(ji,1)' and accessed at "
+        "'a(ji - 1,1)', which may refer to the same element in different "
+        "iterations of the loop."]
+    # The Banerjee test can not disprove the dependence with ji=6
+    dep_tools.can_loop_be_parallelised(loops[1])
+    assert "'a(ji + 5,1)'" in dep_tools.get_all_messages()[0]
+    # Two writes to the same array
+    dep_tools.can_loop_be_parallelised(loops[2])
+    assert "written at 'a(ji,1)' and accessed at 'a(ji + 1,1)'" in \
+        dep_tools.get_all_messages()[0]
+    # The index jj is modified in the loop
+    dep_tools.can_loop_be_parallelised(loops[4])
+    messages = " ".join(dep_tools.get_all_messages())
+    assert "'a(jj,1)'" in messages
+    assert "scalar variable 'jj'" in messages
+
+
+
+def test_inner_loops_sharing_variable(parser):
+    '''Tests that the Banerjee test uses the bounds of all inner loops
+    that use the same loop variable rather than those of the last one.'''
+    loops = get_loops(parser, '''
+        do ji = 2, 10
+          do jj = 1, 20
+            a(jj, ji) = 1.0
+          end do
+          do jj = 1, 5
+            s = a(jj+10, ji-1)
+          end do
+        end do
+        do ji = 2, 10
+          do jj = 1, 5
+            a(jj, ji) = 1.0
+          end do
+          do jj = 1, n
+            s = a(jj+10, ji-1)
+          end do
+        end do
+        do ji = 2, 10
+          do jj = 1, 5
+            a(jj, ji) = 1.0
+          end do
+          do jj = 1, 4
+            s = a(jj+5, ji-1)
+          end do
+        end do''')
+    dep_tools = DependencyTools()
+    # a(11:15, ji-1) is read after a(1:20, ji) is written
+    assert not dep_tools.can_loop_be_parallelised(loops[0])
+    assert "'a(jj + 10,ji - 1)'" in dep_tools.get_all_messages()[0]
+    # The bounds of the second inner loop are not known
+    assert not dep_tools.can_loop_be_parallelised(loops[1])
+    # a(6:9, ji-1) is read and a(1:5, ji) is written: jj is in 1:5 in both
+    # loops, which still proves that there is no dependence
+    assert dep_tools.can_loop_be_parallelised(loops[2])
+
+def test_scalar_dependences(parser):
+    '''Tests the handling of scalar variables.'''
+    loops = get_loops(parser, '''
+        do ji = 1, n
+          u = b(ji, 1)
+          a(ji, 1) = u * u
+        end do
+        do ji = 1, n
+          t = t + b(ji, 1)
+        end do
+        do ji = 1, n
+          if (b(ji, 1) > 0) then
+            s = 1
+          end if
+          a(ji, 1) = s
+        end do
+        do jj = 1, n
+          do ji = 1, n
+            s = b(ji, jj)
+          end do
+          a(1, jj) = s
+        end do
+        do ji = 1, n
+          ji = ji + 1
+        end do
+        do jj = 1, n
+          t = b(1, jj)
+          do ji = 1, n
+            a(ji, jj) = t
+          end do
+        end do''')
+    dep_tools = DependencyTools()
+    assert dep_tools.can_loop_be_parallelised(loops[0])
+    assert dep_tools.private_variables == ["u"]
+    assert not dep_tools.can_loop_be_parallelised(loops[1])
+    assert dep_tools.get_all_messages() == [
+        "The scalar variable 't' is not always written before it is read "
+        "in each iteration (e.g. a reduction), so it may carry a "
+        "dependence."]
+    # Conditional write
+    assert not dep_tools.can_loop_be_parallelised(loops[2])
+    # Written in an inner loop, but read outside of it
+    assert not dep_tools.can_loop_be_parallelised(loops[3])
+    assert "'s'" in dep_tools.get_all_messages()[0]
+    assert not dep_tools.can_loop_be_parallelised(loops[4])
+    assert dep_tools.get_all_messages() == [
+        "The loop variable 'ji' is modified inside the loop."]
+    # Written in the outer loop and read in an inner loop
+    assert dep_tools.can_loop_be_parallelised(loops[5])
+    assert sorted(dep_tools.private_variables) == ["ji", "t"]
+
+
+
+def test_private_read_after_loop(parser):
+    '''Tests that a scalar that would be private is not accepted if its
+    value on exit from the loop may be read after the loop.'''
+    loops = get_loops(parser, '''
+        do jj = 1, n
+          do ji = 1, n
+            s = b(ji, jj)
+            a(ji, jj) = s
+          end do
+          a(1, jj) = s
+        end do
+        do jj = 1, n
+          a(1, jj) = t
+          do ji = 1, n
+            t = b(ji, jj)
+            a(ji, jj) = t
+          end do
+        end do
+        do ji = 1, n
+          u = b(ji, 1)
+          a(ji, 1) = u
+        end do
+        if (n > 0) then
+          u = 1.0
+        end if
+        a(1, 1) = u
+        do ji = 1, n
+          s = b(ji, 1)
+          a(ji, 1) = s
+        end do
+        s = 1.0
+        a(1, 1) = s''')
+    dep_tools = DependencyTools()
+    # Read after the inner loop
+    assert not dep_tools.can_loop_be_parallelised(loops[0].loop_body[0])
+    assert dep_tools.get_all_messages() == [
+        "The scalar variable 's' is written in each iteration and its "
+        "value may be read after the loop, so it can not be private."]
+    # Read before the inner loop in the next iteration of the outer loop
+    assert not dep_tools.can_loop_be_parallelised(loops[1].loop_body[1])
+    assert "'t'" in dep_tools.get_all_messages()[0]
+    # Only written conditionally before it is read
+    assert not dep_tools.can_loop_be_parallelised(loops[2])
+    # Written before it is read
+    assert dep_tools.can_loop_be_parallelised(loops[3])
+    assert dep_tools.private_variables == ["s"]
+
+def test_unknown_accesses(parser):
+    '''Tests that loops containing code that is not analysed are reported
+    to carry a dependence.'''
+    loops = get_loops(parser, '''
+        do ji = 1, n
+          a(ji, 1) = 0
+          call foo(a)
+        end do
+        do jj = 1, n
+          a(:, jj) = 0
+        end do''')
+    dep_tools = DependencyTools()
+    assert not dep_tools.can_loop_be_parallelised(loops[0])
+    assert "(a CodeBlock)" in dep_tools.get_all_messages()[0]
+    assert not dep_tools.can_loop_be_parallelised(loops[1])
+    assert "implicit loop" in dep_tools.get_all_messages()[0]
+
+    with pytest.raises(TypeError) as err:
+        dep_tools.can_loop_be_parallelised(loops[0].loop_body)
+    assert "Dependence analysis can only be applied to a Loop but got " \
+        "'Schedule'" in str(err.value)
@@ -56,8 +56,8 @@ from psyclone.core.access_type import AccessType
 from psyclone.psyGen import PSy, Invokes, Invoke, InvokeSchedule, Loop, \
     Arguments, KernelArgument, NameSpaceFactory, GenerationError, \
     InternalError, FieldNotFoundError, HaloExchange, GlobalSum, \
-    FORTRAN_INTENT_NAMES, DataAccess, Literal, Reference, Schedule, \
-    CodedKern, Schedule
+    FORTRAN_INTENT_NAMES, DataAccess, DependencyGraph, Literal, Reference, \
+    Schedule, CodedKern, Schedule
 
 # First section : Parser specialisations and classes
 
@@ -4980,7 +4980,8 @@ class DynHaloExchangeStart(DynHaloExchange):
         '''
         # Look at all nodes following this one in schedule order
         # (which is PSyIRe node order)
-        for node in self.following():
+        graph = DependencyGraph.get(self)
+        for node in graph.following(self, self.field.name):
             if self.sameParent(node) and isinstance(node, DynHaloExchange):
                 # Found a following `haloexchange`,
                 # `haloexchangestart` or `haloexchangeend` PSyIRe node
@@ -47,6 +47,7 @@ from fparser.one.block_statements import SelectCase, SelectType, EndSelect
 # cannot be used for imports (as that involves looking for the
 # specified name in sys.modules).
 from fparser import one as fparser1
+from psyclone import fortran_text
 
 # Module-wide utility methods
 
@@ -62,6 +63,20 @@ def bubble_up_type(obj):
     return isinstance(obj, (UseGen, BaseDeclGen))
 
 
+def writes_text(parent):
+    '''
+    :param parent: the object to which a new object is being added.
+    :type parent: :py:class:`psyclone.f2pygen.BaseGen`
+
+    :returns: True if the tree containing `parent` is built from the \
+              light-weight statements of fortran_text (because the \
+              "direct" PSy-layer writer was selected when it was \
+              created) rather than from fparser1 statements.
+    :rtype: bool
+    '''
+    return isinstance(parent.root, fortran_text.Statement)
+
+
 def index_of_object(alist, obj):
     '''Effectively implements list.index(obj) but returns the index of
     the first item in the list that *is* the supplied object (rather than
@@ -137,8 +152,8 @@ class OMPDirective(Directive):
                          'parallel do').
     '''
     def __init__(self, root, line, position, dir_type):
-        self._types = ["parallel do", "parallel", "do", "master"]
-        self._positions = ["begin", "end"]
+        self._types = fortran_text.OMPDirective.TYPES
+        self._positions = fortran_text.OMPDirective.POSITIONS
 
         super(OMPDirective, self).__init__(root, line, position, dir_type)
 
@@ -159,8 +174,8 @@ class ACCDirective(Directive):
                          'loop').
     '''
     def __init__(self, root, line, position, dir_type):
-        self._types = ["parallel", "kernels", "enter data", "loop"]
-        self._positions = ["begin", "end"]
+        self._types = fortran_text.ACCDirective.TYPES
+        self._positions = fortran_text.ACCDirective.POSITIONS
 
         super(ACCDirective, self).__init__(root, line, position, dir_type)
 
@@ -254,7 +269,7 @@ class BaseGen(object):
         siblings of this node '''
         from fparser.one.block_statements import Do
         for sibling in reversed(self.root.content):
-            if isinstance(sibling, Do):
+            if isinstance(sibling, (Do, fortran_text.Do)):
                 return sibling
         raise RuntimeError("Error, no loop found - there is no previous loop")
 
@@ -265,7 +280,8 @@ class BaseGen(object):
         '''
         from fparser.one.typedecl_statements import TypeDeclarationStatement
         for sibling in reversed(self.root.content):
-            if isinstance(sibling, TypeDeclarationStatement):
+            if isinstance(sibling, (TypeDeclarationStatement,
+                                    fortran_text.TypeDeclaration)):
                 return sibling
 
         raise RuntimeError("Error, no variable declarations found")
@@ -281,16 +297,18 @@ class BaseGen(object):
             print(("If the current node is a Do loop then move up to the "
                    "top of the do loop nest"))
 
+        do_types = (Do, fortran_text.Do)
         # First off, check that we do actually have an enclosing Do loop
         current = self.root
-        while not isinstance(current, Do) and getattr(current, 'parent', None):
+        while not isinstance(current, do_types) and \
+                getattr(current, 'parent', None):
             current = current.parent
-        if not isinstance(current, Do):
+        if not isinstance(current, do_types):
             raise RuntimeError("This node has no enclosing Do loop")
 
         current = self.root
         local_current = self
-        while isinstance(current.parent, Do):
+        while isinstance(current.parent, do_types):
             if debug:
                 print("Parent is a do loop so moving to the parent")
             current = current.parent
@@ -311,7 +329,8 @@ class BaseGen(object):
         if index == 0:
             if debug:
                 print("current index is 0 so finish")
-        elif isinstance(parent.content[index-1], Directive):
+        elif isinstance(parent.content[index-1],
+                        (Directive, fortran_text.Directive)):
             if debug:
                 print(
                     "preceding node is a directive so find out what type ...\n"
@@ -339,6 +358,101 @@ class ProgUnitGen(BaseGen):
     subroutines)'''
     def __init__(self, parent, sub):
         BaseGen.__init__(self, parent, sub)
+        # The (lower-case) names declared by the children of this unit,
+        # keyed by the type of the declarations. This avoids examining
+        # every existing declaration when a new one is added.
+        self._declared = {}
+        # The use statements of the children of this unit keyed by the
+        # module name. Each entry holds whether there is a generic (not
+        # 'only') use of the module and the (lower-case) names imported
+        # by the 'only' uses.
+        self._used = {}
+        self._has_implicit_none = False
+        # The index in the content of the AST at which the last
+        # declaration was inserted and the object preceding it. This
+        # allows the search for the insertion point of the next
+        # declaration to resume from there.
+        self._decl_anchor = None
+
+    @staticmethod
+    def _declaration_key(decl):
+        '''
+        :param decl: a declaration.
+        :type decl: :py:class:`psyclone.f2pygen.BaseDeclGen`
+
+        :returns: the key under which the names declared by the \
+                  declaration are indexed, or None if it is not indexed.
+        :rtype: tuple of str or NoneType
+
+        '''
+        if isinstance(decl, (DeclGen, CharDeclGen)):
+            return ("intrinsic", decl.root.name)
+        if isinstance(decl, TypeDeclGen):
+            return ("derived", decl.root.selector[1])
+        return None
+
+    def _register_child(self, content):
+        '''
+        Record a new child of this program unit in the indexes used to
+        avoid duplicated declarations and use statements.
+
+        :param content: the new child.
+        :type content: :py:class:`psyclone.f2pygen.BaseGen`
+
+        '''
+        self._children.append(content)
+        if isinstance(content, BaseDeclGen):
+            key = self._declaration_key(content)
+            if key:
+                self._declared.setdefault(key, set()).update(
+                    name.lower() for name in content.root.entity_decls)
+        elif isinstance(content, UseGen):
+            used = self._used.setdefault(content.root.name, [False, set()])
+            if content.root.isonly:
+                used[1].update(name.lower() for name in content.root.items)
+            else:
+                used[0] = True
+        elif isinstance(content, ImplicitNoneGen):
+            self._has_implicit_none = True
+
+    def _declaration_index(self):
+        '''
+        Find the position at which to insert a new declaration in the
+        content of the AST of this program unit. This is after any use
+        statements, implicit none and declarations with an intent. The
+        search resumes from the position found for the previous
+        declaration if nothing has been inserted before it since.
+
+        :returns: the index at which to insert a new declaration.
+        :rtype: int
+
+        '''
+        content = self.root.content
+        anchor = self._decl_anchor
+        if anchor and anchor[0] <= len(content) and \
+           content[anchor[0]-1] is anchor[1]:
+            index = anchor[0]
+        else:
+            index = 0
+            # skip over any use statements
+            index = self._skip_use_and_comments(index)
+            # skip over implicit none if it exists
+            index = self._skip_imp_none_and_comments(index)
+        # skip over any declarations which have an intent
+        try:
+            intent = True
+            while intent:
+                intent = False
+                for attr in content[index].attrspec:
+                    if attr.find("intent") == 0:
+                        intent = True
+                        index += 1
+                        break
+        except AttributeError:
+            pass
+        if index > 0:
+            self._decl_anchor = (index, content[index-1])
+        return index
 
     def add(self, content, position=None, bubble_up=False):
         '''
@@ -401,134 +515,76 @@ class ProgUnitGen(BaseGen):
         if position[0] != "auto":
             # position[0] is not 'auto' so the baseclass can deal with it
             BaseGen.add(self, content, position)
+            # BaseGen.add has appended the new child so index it
+            self._children.pop()
+            self._register_child(content)
         else:
             # position[0] == "auto" so insert in a context sensitive way
             if isinstance(content, BaseDeclGen):
 
-                if isinstance(content, (DeclGen, CharDeclGen)):
-                    # have I already been declared?
-                    for child in self._children:
-                        if isinstance(child, (DeclGen, CharDeclGen)):
-                            # is this declaration the same type as me?
-                            if child.root.name == content.root.name:
-                                # we are modifying the list so we need
-                                # to iterate over a copy
-                                for var_name in content.root.entity_decls[:]:
-                                    for child_name in child.root.entity_decls:
-                                        if var_name.lower() == \
-                                           child_name.lower():
-                                            content.root.entity_decls.\
-                                                remove(var_name)
-                                            if not content.root.entity_decls:
-                                                # return as all variables in
-                                                # this declaration already
-                                                # exist
-                                                return
-                if isinstance(content, TypeDeclGen):
-                    # have I already been declared?
-                    for child in self._children:
-                        if isinstance(child, TypeDeclGen):
-                            # is this declaration the same type as me?
-                            if child.root.selector[1] == \
-                               content.root.selector[1]:
-                                # we are modifying the list so we need
-                                # to iterate over a copy
-                                for var_name in content.root.entity_decls[:]:
-                                    for child_name in child.root.entity_decls:
-                                        if var_name.lower() == \
-                                           child_name.lower():
-                                            content.root.entity_decls.\
-                                                remove(var_name)
-                                            if not content.root.entity_decls:
-                                                # return as all variables in
-                                                # this declaration already
-                                                # exist
-                                                return
-
-                index = 0
-                # skip over any use statements
-                index = self._skip_use_and_comments(index)
-                # skip over implicit none if it exists
-                index = self._skip_imp_none_and_comments(index)
-                # skip over any declarations which have an intent
-                try:
-                    intent = True
-                    while intent:
-                        intent = False
-                        for attr in self.root.content[index].attrspec:
-                            if attr.find("intent") == 0:
-                                intent = True
-                                index += 1
-                                break
-                except AttributeError:
-                    pass
-            elif isinstance(content.root, fparser1.statements.Use):
+                key = self._declaration_key(content)
+                if key in self._declared:
+                    # remove any variables that are already declared
+                    # with the same type
+                    declared = self._declared[key]
+                    content.root.entity_decls[:] = [
+                        name for name in content.root.entity_decls
+                        if name.lower() not in declared]
+                    if not content.root.entity_decls:
+                        # return as all variables in this declaration
+                        # already exist
+                        return
+                index = self._declaration_index()
+            elif isinstance(content, UseGen):
                 # have I already been declared?
-                for child in self._children:
-                    if isinstance(child, UseGen):
-                        if child.root.name == content.root.name:
-                            # found an existing use with the same name
-                            if not child.root.isonly and not \
-                               content.root.isonly:
-                                # both are generic use statements so
-                                # skip this declaration
-                                return
-                            if child.root.isonly and not content.root.isonly:
-                                # new use is generic and existing use
-                                # is specific so we can safely add
-                                pass
-                            if not child.root.isonly and content.root.isonly:
-                                # existing use is generic and new use
-                                # is specific so we can skip this
-                                # declaration
-                                return
-                            if child.root.isonly and content.root.isonly:
-                                # we are modifying the list so we need
-                                # to iterate over a copy
-                                for new_name in content.root.items[:]:
-                                    for existing_name in child.root.items:
-                                        if existing_name.lower() == \
-                                           new_name.lower():
-                                            content.root.items.remove(new_name)
-                                            if not content.root.items:
-                                                return
+                if content.root.name in self._used:
+                    generic, only_names = self._used[content.root.name]
+                    if generic:
+                        # there is already a generic use of this module
+                        # so this one is not needed
+                        return
+                    if content.root.isonly:
+                        # remove any names that are already imported
+                        content.root.items[:] = [
+                            name for name in content.root.items
+                            if name.lower() not in only_names]
+                        if not content.root.items:
+                            return
                 index = 0
             elif isinstance(content, ImplicitNoneGen):
                 # does implicit none already exist?
-                for child in self._children:
-                    if isinstance(child, ImplicitNoneGen):
-                        return
+                if self._has_implicit_none:
+                    return
                 # skip over any use statements
                 index = 0
                 index = self._skip_use_and_comments(index)
             else:
                 index = len(self.root.content) - 1
             self.root.content.insert(index, content.root)
-            self._children.append(content)
+            self._register_child(content)
 
     def _skip_use_and_comments(self, index):
         ''' skip over any use statements and comments in the ast '''
         while isinstance(self.root.content[index],
-                         fparser1.statements.Use) or\
-            isinstance(self.root.content[index],
-                       fparser1.statements.Comment):
+                         (fparser1.statements.Use, fortran_text.Use,
+                          fparser1.statements.Comment, fortran_text.Comment)):
             index += 1
         # now roll back to previous Use
         while isinstance(self.root.content[index-1],
-                         fparser1.statements.Comment):
+                         (fparser1.statements.Comment, fortran_text.Comment)):
             index -= 1
         return index
 
     def _skip_imp_none_and_comments(self, index):
         ''' skip over an implicit none statement if it exists and any
         comments before it '''
+        implicit_types = (fparser1.typedecl_statements.Implicit,
+                          fortran_text.Implicit)
         end_index = index
         while isinstance(self.root.content[index],
-                         fparser1.typedecl_statements.Implicit) or\
-            isinstance(self.root.content[index],
-                       fparser1.statements.Comment):
-            if isinstance(self.root.content[index],
-                          fparser1.typedecl_statements.Implicit):
+                         implicit_types + (fparser1.statements.Comment,
+                                           fortran_text.Comment)):
+            if isinstance(self.root.content[index], implicit_types):
                 end_index = index + 1
                 break
             else:
@@ -537,25 +593,36 @@ class ProgUnitGen(BaseGen):
 
 
 class ModuleGen(ProgUnitGen):
-    ''' create a fortran module '''
+    ''' create a fortran module. Whether the module (and everything
+    subsequently added to it) is built from fparser1 statements or from
+    the light-weight statements of fortran_text depends on the
+    PSY_LAYER_WRITER setting in the configuration file. '''
     def __init__(self, name="", contains=True, implicitnone=True):
-        from fparser import api
-
-        code = '''\
+        from psyclone.configuration import Config
+
+        if Config.get().psy_layer_writer == "direct":
+            source = fortran_text.Source()
+            module = fortran_text.Module(source, name)
+            source.content.append(module)
+            if contains:
+                module.content.insert(0, fortran_text.Contains(module))
+        else:
+            from fparser import api
+            code = '''\
 module vanilla
 '''
-        if contains:
-            code += '''\
+            if contains:
+                code += '''\
 contains
 '''
-        code += '''\
+            code += '''\
 end module vanilla
 '''
-        tree = api.parse(code, ignore_comments=False)
-        module = tree.content[0]
-        module.name = name
-        endmod = module.content[len(module.content)-1]
-        endmod.name = name
+            tree = api.parse(code, ignore_comments=False)
+            module = tree.content[0]
+            module.name = name
+            endmod = module.content[len(module.content)-1]
+            endmod.name = name
         ProgUnitGen.__init__(self, None, module)
         if implicitnone:
             self.add(ImplicitNoneGen(self))
@@ -569,10 +636,16 @@ end module vanilla
             raise Exception(
                 "Expecting a KernelProcedure type but received " +
                 str(type(content)))
-        content.ast.parent = self.root
+        if writes_text(self):
+            # fparser1 statements cannot be children of fortran_text ones
+            # so wrap the subroutine
+            ast = fortran_text.Raw(self.root, content.ast)
+        else:
+            content.ast.parent = self.root
+            ast = content.ast
         # add content after any existing subroutines
         index = len(self.root.content) - 1
-        self.root.content.insert(index, content.ast)
+        self.root.content.insert(index, ast)
 
 
 class CommentGen(BaseGen):
@@ -583,12 +656,16 @@ class CommentGen(BaseGen):
         :type parent: :py:class:`psyclone.f2pygen.BaseGen`
         :param str content: the content of the comment
         '''
-        reader = FortranStringReader("! content\n", ignore_comments=False)
-        reader.set_format(FortranFormat(True, True))  # free form, strict
-        subline = reader.next()
+        if writes_text(parent):
+            my_comment = fortran_text.Comment(parent.root, content)
+        else:
+            reader = FortranStringReader("! content\n",
+                                         ignore_comments=False)
+            reader.set_format(FortranFormat(True, True))  # free form, strict
+            subline = reader.next()
 
-        my_comment = Comment(parent.root, subline)
-        my_comment.content = content
+            my_comment = Comment(parent.root, subline)
+            my_comment.content = content
 
         BaseGen.__init__(self, parent, my_comment)
 
@@ -612,23 +689,25 @@ class DirectiveGen(BaseGen):
         self._language = language
         self._directive_type = directive_type
 
-        reader = FortranStringReader("! content\n", ignore_comments=False)
-        reader.set_format(FortranFormat(True, True))  # free form, strict
-        subline = reader.next()
-
         if language == "omp":
-            my_comment = OMPDirective(parent.root, subline, position,
-                                      directive_type)
-            my_comment.content = "$omp"
+            classes = (OMPDirective, fortran_text.OMPDirective)
         elif language == "acc":
-            my_comment = ACCDirective(parent.root, subline, position,
-                                      directive_type)
-            my_comment.content = "$acc"
+            classes = (ACCDirective, fortran_text.ACCDirective)
         else:
             raise RuntimeError(
                 "Error, unsupported directive language. Expecting one of "
                 "{0} but found '{1}'".format(str(self._supported_languages),
                                              language))
+        if writes_text(parent):
+            my_comment = classes[1](parent.root, position, directive_type)
+        else:
+            reader = FortranStringReader("! content\n",
+                                         ignore_comments=False)
+            reader.set_format(FortranFormat(True, True))  # free form, strict
+            subline = reader.next()
+            my_comment = classes[0](parent.root, subline, position,
+                                    directive_type)
+        my_comment.content = "$" + language
         if position == "end":
             my_comment.content += " end"
         my_comment.content += " " + directive_type
@@ -653,12 +732,15 @@ class ImplicitNoneGen(BaseGen):
             raise Exception(
                 "The parent of ImplicitNoneGen must be a module or a "
                 "subroutine, but found {0}".format(type(parent)))
-        reader = FortranStringReader("IMPLICIT NONE\n")
-        reader.set_format(FortranFormat(True, True))  # free form, strict
-        subline = reader.next()
+        if writes_text(parent):
+            my_imp_none = fortran_text.Implicit(parent.root)
+        else:
+            reader = FortranStringReader("IMPLICIT NONE\n")
+            reader.set_format(FortranFormat(True, True))  # free form, strict
+            subline = reader.next()
 
-        from fparser.one.typedecl_statements import Implicit
-        my_imp_none = Implicit(parent.root, subline)
+            from fparser.one.typedecl_statements import Implicit
+            my_imp_none = Implicit(parent.root, subline)
 
         BaseGen.__init__(self, parent, my_imp_none)
 
@@ -675,20 +757,24 @@ class SubroutineGen(ProgUnitGen):
                                   "implicit none" for the body of this
                                   subroutine
         '''
-        reader = FortranStringReader(
-            "subroutine vanilla(vanilla_arg)\nend subroutine")
-        reader.set_format(FortranFormat(True, True))  # free form, strict
-        subline = reader.next()
-        endsubline = reader.next()
-
-        from fparser.one.block_statements import Subroutine, EndSubroutine
-        self._sub = Subroutine(parent.root, subline)
-        self._sub.name = name
         if args is None:
             args = []
-        self._sub.args = args
-        endsub = EndSubroutine(self._sub, endsubline)
-        self._sub.content.append(endsub)
+        if writes_text(parent):
+            self._sub = fortran_text.Subroutine(parent.root, name, args)
+        else:
+            reader = FortranStringReader(
+                "subroutine vanilla(vanilla_arg)\nend subroutine")
+            reader.set_format(FortranFormat(True, True))  # free form, strict
+            subline = reader.next()
+            endsubline = reader.next()
+
+            from fparser.one.block_statements import Subroutine, \
+                EndSubroutine
+            self._sub = Subroutine(parent.root, subline)
+            self._sub.name = name
+            self._sub.args = args
+            endsub = EndSubroutine(self._sub, endsubline)
+            self._sub.content.append(endsub)
         ProgUnitGen.__init__(self, parent, self._sub)
         if implicitnone:
             self.add(ImplicitNoneGen(self))
@@ -713,16 +799,19 @@ class CallGen(BaseGen):
         :param str name: the name of the routine to call
         :param list args: list of arguments to pass to the call
         '''
-        reader = FortranStringReader("call vanilla(vanilla_arg)")
-        reader.set_format(FortranFormat(True, True))  # free form, strict
-        myline = reader.next()
-
-        from fparser.one.block_statements import Call
-        self._call = Call(parent.root, myline)
-        self._call.designator = name
         if args is None:
             args = []
-        self._call.items = args
+        if writes_text(parent):
+            self._call = fortran_text.Call(parent.root, name, args)
+        else:
+            reader = FortranStringReader("call vanilla(vanilla_arg)")
+            reader.set_format(FortranFormat(True, True))  # free form, strict
+            myline = reader.next()
+
+            from fparser.one.block_statements import Call
+            self._call = Call(parent.root, myline)
+            self._call.designator = name
+            self._call.items = args
 
         BaseGen.__init__(self, parent, self._call)
 
@@ -737,19 +826,23 @@ class UseGen(BaseGen):
         :param bool only: whether this USE has an ONLY clause
         :param list funcnames: list of names to follow ONLY clause
         '''
-        reader = FortranStringReader("use kern,only : func1_kern=>func1")
-        reader.set_format(FortranFormat(True, True))  # free form, strict
-        myline = reader.next()
-        root = parent.root
-        from fparser.one.block_statements import Use
-        use = Use(root, myline)
-        use.name = name
-        use.isonly = only
         if funcnames is None:
             funcnames = []
-            use.isonly = False
+            only = False
         local_funcnames = funcnames[:]
-        use.items = local_funcnames
+        if writes_text(parent):
+            use = fortran_text.Use(parent.root, name, only, local_funcnames)
+        else:
+            reader = FortranStringReader(
+                "use kern,only : func1_kern=>func1")
+            reader.set_format(FortranFormat(True, True))  # free form, strict
+            myline = reader.next()
+            root = parent.root
+            from fparser.one.block_statements import Use
+            use = Use(root, myline)
+            use.name = name
+            use.isonly = only
+            use.items = local_funcnames
         BaseGen.__init__(self, parent, use)
 
 
@@ -761,30 +854,37 @@ def adduse(name, parent, only=False, funcnames=None):
     scratch (for the PSy layer).
 
     :param str name: name of module to USE
-    :param parent: node in fparser1 AST to which to add this USE as a child
-    :type parent: :py:class:`fparser.one.block_statements.*`
+    :param parent: node in fparser1 AST (or in a tree of fortran_text \
+                   statements) to which to add this USE as a child
+    :type parent: :py:class:`fparser.one.block_statements.*` or \
+                  :py:class:`psyclone.fortran_text.Statement`
     :param bool only: whether this USE has an "ONLY" clause
     :param list funcnames: list of quantities to follow the "ONLY" clause
 
-    :returns: an fparser1 Use object
-    :rtype: :py:class:`fparser.one.block_statements.Use`
+    :returns: the new use statement.
+    :rtype: :py:class:`fparser.one.block_statements.Use` or \
+            :py:class:`psyclone.fortran_text.Use`
     '''
-    reader = FortranStringReader("use kern,only : func1_kern=>func1")
-    reader.set_format(FortranFormat(True, True))  # free form, strict
-    myline = reader.next()
-
     # find an appropriate place to add in our use statement
-    while not isinstance(parent, (fparser1.block_statements.Program, 
+    while not isinstance(parent, (fparser1.block_statements.Program,
                                   fparser1.block_statements.Module,
-                                  fparser1.block_statements.Subroutine)):
+                                  fparser1.block_statements.Subroutine,
+                                  fortran_text.Module,
+                                  fortran_text.Subroutine)):
         parent = parent.parent
-    use = fparser1.block_statements.Use(parent, myline)
-    use.name = name
-    use.isonly = only
     if funcnames is None:
         funcnames = []
-        use.isonly = False
-    use.items = funcnames
+        only = False
+    if isinstance(parent, fortran_text.Statement):
+        use = fortran_text.Use(parent, name, only, funcnames)
+    else:
+        reader = FortranStringReader("use kern,only : func1_kern=>func1")
+        reader.set_format(FortranFormat(True, True))  # free form, strict
+        myline = reader.next()
+        use = fparser1.block_statements.Use(parent, myline)
+        use.name = name
+        use.isonly = only
+        use.items = funcnames
 
     parent.content.insert(0, use)
     return use
@@ -801,18 +901,22 @@ class AllocateGen(BaseGen):
 
         :raises RuntimeError: if `content` is not of correct type
         '''
-        reader = FortranStringReader("allocate(dummy)")
-        reader.set_format(FortranFormat(True, False))  # free form, strict
-        myline = reader.next()
-        self._decl = fparser1.statements.Allocate(parent.root, myline)
         if isinstance(content, str):
-            self._decl.items = [content]
+            items = [content]
         elif isinstance(content, list):
-            self._decl.items = content
+            items = content
         else:
             raise RuntimeError(
                 "AllocateGen expected the content argument to be a str or"
                 " a list, but found {0}".format(type(content)))
+        if writes_text(parent):
+            self._decl = fortran_text.Allocate(parent.root, items)
+        else:
+            reader = FortranStringReader("allocate(dummy)")
+            reader.set_format(FortranFormat(True, False))  # free form
+            myline = reader.next()
+            self._decl = fparser1.statements.Allocate(parent.root, myline)
+            self._decl.items = items
         BaseGen.__init__(self, parent, self._decl)
 
 
@@ -827,18 +931,22 @@ class DeallocateGen(BaseGen):
 
         :raises RuntimeError: if `content` is not of correct type
         '''
-        reader = FortranStringReader("deallocate(dummy)")
-        reader.set_format(FortranFormat(True, False))  # free form, strict
-        myline = reader.next()
-        self._decl = fparser1.statements.Deallocate(parent.root, myline)
         if isinstance(content, str):
-            self._decl.items = [content]
+            items = [content]
         elif isinstance(content, list):
-            self._decl.items = content
+            items = content
         else:
             raise RuntimeError(
                 "DeallocateGen expected the content argument to be a str"
                 " or a list, but found {0}".format(type(content)))
+        if writes_text(parent):
+            self._decl = fortran_text.Deallocate(parent.root, items)
+        else:
+            reader = FortranStringReader("deallocate(dummy)")
+            reader.set_format(FortranFormat(True, False))  # free form
+            myline = reader.next()
+            self._decl = fparser1.statements.Deallocate(parent.root, myline)
+            self._decl.items = items
         BaseGen.__init__(self, parent, self._decl)
 
 
@@ -1013,7 +1121,9 @@ class DeclGen(BaseDeclGen):
                 .format(self.SUPPORTED_TYPES, datatype))
 
         fort_fmt = FortranFormat(True, False)  # free form, strict
-        if dtype == "integer":
+        if writes_text(parent):
+            self._decl = fortran_text.TypeDeclaration(parent.root, dtype)
+        elif dtype == "integer":
             reader = FortranStringReader("integer :: vanilla")
             reader.set_format(fort_fmt)
             myline = reader.next()
@@ -1127,12 +1237,16 @@ class CharDeclGen(BaseDeclGen):
                  pointer=False, kind="", dimension="", allocatable=False,
                  save=False, target=False, length="", initial_values=None):
 
-        reader = FortranStringReader(
-            "character(len=vanilla_len) :: vanilla")
-        reader.set_format(FortranFormat(True, False))
-        myline = reader.next()
-        self._decl = fparser1.typedecl_statements.Character(parent.root,
-                                                            myline)
+        if writes_text(parent):
+            self._decl = fortran_text.TypeDeclaration(parent.root,
+                                                      "character")
+        else:
+            reader = FortranStringReader(
+                "character(len=vanilla_len) :: vanilla")
+            reader.set_format(FortranFormat(True, False))
+            myline = reader.next()
+            self._decl = fparser1.typedecl_statements.Character(parent.root,
+                                                                myline)
         # Add character- and kind-selectors
         self._decl.selector = (length, kind)
 
@@ -1189,11 +1303,14 @@ class TypeDeclGen(BaseDeclGen):
                  pointer=False, dimension="", allocatable=False,
                  save=False, target=False):
 
-        reader = FortranStringReader("type(vanillatype) :: vanilla")
-        reader.set_format(FortranFormat(True, False))  # free form, strict
-        myline = reader.next()
-
-        self._decl = fparser1.typedecl_statements.Type(parent.root, myline)
+        if writes_text(parent):
+            self._decl = fortran_text.TypeDeclaration(parent.root, "type")
+        else:
+            reader = FortranStringReader("type(vanillatype) :: vanilla")
+            reader.set_format(FortranFormat(True, False))  # free form
+            myline = reader.next()
+            self._decl = fparser1.typedecl_statements.Type(parent.root,
+                                                           myline)
         self._decl.selector = ('', datatype)
 
         super(TypeDeclGen, self).__init__(parent=parent, datatype=datatype,
@@ -1254,27 +1371,32 @@ class SelectionGen(BaseGen):
                                 than a SELECT CASE
         '''
         self._typeselect = typeselect
-        reader = FortranStringReader(
-            "SELECT CASE (x)\nCASE (1)\nCASE DEFAULT\nEND SELECT")
-        reader.set_format(FortranFormat(True, True))  # free form, strict
-        select_line = reader.next()
-        self._case_line = reader.next()
-        self._case_default_line = reader.next()
-        end_select_line = reader.next()
-        if self._typeselect:
-            select = SelectType(parent.root, select_line)
+        if writes_text(parent):
+            select = fortran_text.Select(parent.root, expr, typeselect)
         else:
-            select = SelectCase(parent.root, select_line)
-        endselect = EndSelect(select, end_select_line)
-        select.expr = expr
-        select.content.append(endselect)
+            reader = FortranStringReader(
+                "SELECT CASE (x)\nCASE (1)\nCASE DEFAULT\nEND SELECT")
+            reader.set_format(FortranFormat(True, True))  # free form, strict
+            select_line = reader.next()
+            self._case_line = reader.next()
+            self._case_default_line = reader.next()
+            end_select_line = reader.next()
+            if self._typeselect:
+                select = SelectType(parent.root, select_line)
+            else:
+                select = SelectCase(parent.root, select_line)
+            endselect = EndSelect(select, end_select_line)
+            select.expr = expr
+            select.content.append(endselect)
         BaseGen.__init__(self, parent, select)
 
     def addcase(self, casenames, content=None):
         ''' Add a case to this select block '''
         if content is None:
             content = []
-        if self._typeselect:
+        if writes_text(self):
+            case = fortran_text.Case(self.root)
+        elif self._typeselect:
             case = TypeCase(self.root, self._case_line)
         else:
             case = Case(self.root, self._case_line)
@@ -1287,7 +1409,9 @@ class SelectionGen(BaseGen):
 
     def adddefault(self):
         ''' Add the default case to this select block '''
-        if self._typeselect:
+        if writes_text(self):
+            case_default = fortran_text.Case(self.root)
+        elif self._typeselect:
             case_default = TypeCase(self.root, self._case_default_line)
         else:
             case_default = Case(self.root, self._case_default_line)
@@ -1305,16 +1429,20 @@ class DoGen(BaseGen):
         :param str end: upper-limit of Do loop
         :param str step: increment to use in Do loop
         '''
-        reader = FortranStringReader("do i=1,n\nend do")
-        reader.set_format(FortranFormat(True, True))  # free form, strict
-        doline = reader.next()
-        enddoline = reader.next()
-        dogen = fparser1.block_statements.Do(parent.root, doline)
-        dogen.loopcontrol = variable_name + "=" + start + "," + end
+        loopcontrol = variable_name + "=" + start + "," + end
         if step is not None:
-            dogen.loopcontrol = dogen.loopcontrol + "," + step
-        enddo = fparser1.block_statements.EndDo(dogen, enddoline)
-        dogen.content.append(enddo)
+            loopcontrol = loopcontrol + "," + step
+        if writes_text(parent):
+            dogen = fortran_text.Do(parent.root, loopcontrol)
+        else:
+            reader = FortranStringReader("do i=1,n\nend do")
+            reader.set_format(FortranFormat(True, True))  # free form, strict
+            doline = reader.next()
+            enddoline = reader.next()
+            dogen = fparser1.block_statements.Do(parent.root, doline)
+            dogen.loopcontrol = loopcontrol
+            enddo = fparser1.block_statements.EndDo(dogen, enddoline)
+            dogen.content.append(enddo)
 
         BaseGen.__init__(self, parent, dogen)
 
@@ -1353,15 +1481,18 @@ class IfThenGen(BaseGen):
         :type parent: :py:class:`psyclone.f2pygen.BaseGen`
         :param str clause: the condition, xx, to evaluate in the if(xx)then
         '''
-        reader = FortranStringReader("if (dummy) then\nend if")
-        reader.set_format(FortranFormat(True, True))  # free form, strict
-        ifthenline = reader.next()
-        endifline = reader.next()
+        if writes_text(parent):
+            my_if = fortran_text.IfThen(parent.root, clause)
+        else:
+            reader = FortranStringReader("if (dummy) then\nend if")
+            reader.set_format(FortranFormat(True, True))  # free form, strict
+            ifthenline = reader.next()
+            endifline = reader.next()
 
-        my_if = fparser1.block_statements.IfThen(parent.root, ifthenline)
-        my_if.expr = clause
-        my_endif = fparser1.block_statements.EndIfThen(my_if, endifline)
-        my_if.content.append(my_endif)
+            my_if = fparser1.block_statements.IfThen(parent.root, ifthenline)
+            my_if.expr = clause
+            my_endif = fparser1.block_statements.EndIfThen(my_if, endifline)
+            my_if.content.append(my_endif)
 
         BaseGen.__init__(self, parent, my_if)
 
@@ -1395,17 +1526,22 @@ class AssignGen(BaseGen):
         :param str rhs: the RHS of the assignment expression
         :param bool pointer: whether or not this is a pointer assignment
         '''
-        if pointer:
-            reader = FortranStringReader("lhs=>rhs")
+        if writes_text(parent):
+            self._assign = fortran_text.Assignment(parent.root, lhs, rhs,
+                                                   pointer=pointer)
         else:
-            reader = FortranStringReader("lhs=rhs")
-        reader.set_format(FortranFormat(True, True))  # free form, strict
-        myline = reader.next()
-        if pointer:
-            self._assign = fparser1.statements.PointerAssignment(parent.root,
-                                                                 myline)
-        else:
-            self._assign = fparser1.statements.Assignment(parent.root, myline)
-        self._assign.expr = rhs
-        self._assign.variable = lhs
+            if pointer:
+                reader = FortranStringReader("lhs=>rhs")
+            else:
+                reader = FortranStringReader("lhs=rhs")
+            reader.set_format(FortranFormat(True, True))  # free form, strict
+            myline = reader.next()
+            if pointer:
+                self._assign = fparser1.statements.PointerAssignment(
+                    parent.root, myline)
+            else:
+                self._assign = fparser1.statements.Assignment(parent.root,
+                                                              myline)
+            self._assign.expr = rhs
+            self._assign.variable = lhs
         BaseGen.__init__(self, parent, self._assign)
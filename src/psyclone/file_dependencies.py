@@ -0,0 +1,238 @@
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''Module providing a means of recording the files that are read and
+written by PSyclone while it processes an algorithm file (kernel
+sources, transformation scripts and the modules they import,
+transformed kernels). This information is used to cache generated code
+(see :py:mod:`psyclone.generation_cache`).
+
+'''
+
+from __future__ import absolute_import
+
+import os
+import sys
+import types
+
+
+class FileDependencies(object):
+    '''Records the files that are read and written while it is active.
+    Recorders are activated using a `with` statement and may be nested,
+    in which case every active recorder sees every file.
+
+    For example:
+
+    >>> with FileDependencies() as deps:
+    ...     alg, psy = generate("alg.f90")
+    >>> print(deps.inputs, deps.outputs)
+
+    '''
+    # The recorders that are currently active
+    _active = []
+
+    def __init__(self):
+        self._inputs = []
+        self._outputs = []
+
+    def __enter__(self):
+        FileDependencies._active.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        FileDependencies._active.remove(self)
+
+    @property
+    def inputs(self):
+        '''
+        :returns: the absolute paths of the files read, in the order in \
+                  which they were first recorded.
+        :rtype: list of str
+
+        '''
+        return self._inputs
+
+    @property
+    def outputs(self):
+        '''
+        :returns: the absolute paths of the files written, in the order \
+                  in which they were first recorded.
+        :rtype: list of str
+
+        '''
+        return self._outputs
+
+    def write_dependency_file(self, path, targets):
+        '''Write the recorded files as a Makefile rule (in the same form
+        as the dependency files created by `gcc -MD -MP`). The supplied
+        targets and the files written depend on all of the files read.
+        Each of the files read, other than the first, is also given an
+        empty rule so that Make does not fail if it is removed.
+
+        :param str path: the dependency file to write.
+        :param targets: the files (other than those recorded as written) \
+                        that depend on the files read.
+        :type targets: list of str
+
+        '''
+        rule_targets = [_make_path(target) for target in targets]
+        for output in self.outputs:
+            if _make_path(output) not in rule_targets:
+                rule_targets.append(_make_path(output))
+        inputs = [_make_path(inp) for inp in self.inputs]
+        lines = [" ".join(rule_targets) + ":"]
+        for inp in inputs:
+            lines[-1] += " \\"
+            lines.append(" " + inp)
+        for inp in inputs[1:]:
+            lines.append("")
+            lines.append(inp + ":")
+        with open(path, "w") as dep_file:
+            dep_file.write("\n".join(lines) + "\n")
+
+    @staticmethod
+    def add_input(path):
+        '''Record that a file has been read.
+
+        :param str path: the file.
+
+        '''
+        path = os.path.abspath(path)
+        for recorder in FileDependencies._active:
+            if path not in recorder.inputs:
+                recorder.inputs.append(path)
+
+    @staticmethod
+    def add_output(path):
+        '''Record that a file has been written.
+
+        :param str path: the file.
+
+        '''
+        path = os.path.abspath(path)
+        for recorder in FileDependencies._active:
+            if path not in recorder.outputs:
+                recorder.outputs.append(path)
+
+
+def _make_path(path):
+    '''
+    :param str path: a file.
+
+    :returns: the file relative to the current working directory (if it \
+              is within it), escaped for use in a Makefile rule.
+    :rtype: str
+
+    '''
+    if os.path.isabs(path):
+        relative = os.path.relpath(path)
+        if not relative.startswith(os.pardir):
+            path = relative
+    for char in " #":
+        path = path.replace(char, "\\" + char)
+    return path.replace("$", "$$")
+
+
+def is_user_module(name, module):
+    '''
+    :param str name: the name of an imported module.
+    :param module: the module.
+    :type module: :py:class:`types.ModuleType`
+
+    :returns: whether the module is neither part of PSyclone or fparser \
+              nor installed with Python (and so may be a user script).
+    :rtype: bool
+
+    '''
+    if name.split(".")[0] in ["psyclone", "fparser"]:
+        return False
+    module_file = getattr(module, "__file__", None)
+    if not module_file:
+        return False
+    module_file = os.path.abspath(module_file)
+    for prefix in set([sys.prefix, sys.exec_prefix,
+                       getattr(sys, "base_prefix", sys.prefix)]):
+        if module_file.startswith(os.path.abspath(prefix) + os.sep):
+            return False
+    return True
+
+
+def user_modules(module):
+    '''Find the user modules (see `is_user_module`) that are reachable from
+    the supplied module through its global names: the modules it imports
+    and the modules that define any functions, classes etc. that it
+    imports from them. The modules reachable from each user module found
+    are included too.
+
+    :param module: the module from which to start.
+    :type module: :py:class:`types.ModuleType`
+
+    :returns: the user modules reachable from the supplied module (not \
+              including the module itself).
+    :rtype: list of :py:class:`types.ModuleType`
+
+    '''
+    found = []
+    seen = set([module.__name__])
+    todo = [module]
+    while todo:
+        current = todo.pop()
+        for value in list(vars(current).values()):
+            if isinstance(value, types.ModuleType):
+                name = value.__name__
+            else:
+                name = getattr(value, "__module__", None)
+            if not isinstance(name, str) or name in seen:
+                continue
+            seen.add(name)
+            imported = sys.modules.get(name)
+            if imported is not None and is_user_module(name, imported):
+                found.append(imported)
+                todo.append(imported)
+    return found
+
+
+def source_file(module):
+    '''
+    :param module: an imported module.
+    :type module: :py:class:`types.ModuleType`
+
+    :returns: the source file of the module (rather than any compiled \
+              version of it).
+    :rtype: str
+
+    '''
+    path = module.__file__
+    if path.endswith((".pyc", ".pyo")) and os.path.isfile(path[:-1]):
+        return path[:-1]
+    return path
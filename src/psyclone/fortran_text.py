@@ -0,0 +1,505 @@
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# -----------------------------------------------------------------------------
+
+''' Light-weight Fortran statements from which f2pygen can build a tree
+    when the "direct" PSy-layer writer is selected in the configuration
+    file. Unlike the fparser1 statements they replace, they are created
+    without parsing a template line of Fortran and they simply hold the
+    parts of the statement that f2pygen sets. Their tofortran() methods
+    produce exactly the same text as the corresponding fparser1
+    statements. '''
+
+from __future__ import absolute_import
+
+
+class Statement(object):
+    '''
+    Base class for all statements.
+
+    :param parent: the statement containing this one (or None).
+    :type parent: :py:class:`psyclone.fortran_text.Statement` or NoneType
+
+    '''
+    def __init__(self, parent):
+        self.parent = parent
+
+    def get_indent_tab(self, deindent=False):
+        '''
+        :param bool deindent: whether to remove one level of indentation \
+                              (as for the end of a block).
+
+        :returns: the indentation of this statement, which is two spaces \
+                  for each statement that contains it.
+        :rtype: str
+
+        '''
+        tab = ''
+        parent = self.parent
+        while isinstance(parent, Statement):
+            tab += '  '
+            parent = parent.parent
+        if deindent:
+            tab = tab[:-2]
+        return tab
+
+    def tostr(self):
+        '''
+        :returns: the text of this statement without any indentation.
+        :rtype: str
+        '''
+        raise NotImplementedError(
+            "tostr() is not implemented for '{0}'".format(
+                type(self).__name__))
+
+    def tofortran(self, isfix=None):
+        '''
+        :param isfix: unused, only free-format Fortran is supported.
+
+        :returns: the Fortran for this statement.
+        :rtype: str
+        '''
+        # pylint: disable=unused-argument
+        return self.get_indent_tab() + self.tostr()
+
+    def __str__(self):
+        return self.tofortran()
+
+
+class BeginStatement(Statement):
+    '''
+    Base class for a statement that begins a block of statements. The
+    last statement in the block is an EndStatement.
+
+    :param parent: the statement containing this one (or None).
+    :type parent: :py:class:`psyclone.fortran_text.Statement` or NoneType
+    :param str blocktype: the type of block (e.g. 'do').
+    :param str name: the name of the block, which is repeated in its \
+                     end statement.
+
+    '''
+    def __init__(self, parent, blocktype, name=''):
+        super(BeginStatement, self).__init__(parent)
+        self.name = name
+        self.content = [EndStatement(self, blocktype, name)]
+
+    def tofortran(self, isfix=None):
+        lines = [self.get_indent_tab() + self.tostr()]
+        for child in self.content:
+            lines.append(child.tofortran(isfix=isfix))
+        return '\n'.join(lines)
+
+
+class EndStatement(Statement):
+    '''
+    The end statement of a block.
+
+    :param parent: the statement that begins the block.
+    :type parent: :py:class:`psyclone.fortran_text.BeginStatement`
+    :param str blocktype: the type of block (e.g. 'do').
+    :param str name: the name of the block.
+
+    '''
+    def __init__(self, parent, blocktype, name=''):
+        super(EndStatement, self).__init__(parent)
+        self.blocktype = blocktype
+        self.name = name
+
+    def get_indent_tab(self, deindent=False):
+        # pylint: disable=unused-argument
+        return Statement.get_indent_tab(self, deindent=True)
+
+    def tostr(self):
+        return 'END {0} {1}'.format(self.blocktype.upper(), self.name or '')
+
+
+class Source(Statement):
+    ''' The root of a tree. It holds the statements of a source file but,
+    unlike the other statements, is not itself written out. '''
+    def __init__(self):
+        super(Source, self).__init__(None)
+        self.content = []
+
+
+class Module(BeginStatement):
+    '''
+    A Fortran module.
+
+    :param parent: the source containing the module.
+    :type parent: :py:class:`psyclone.fortran_text.Source`
+    :param str name: the name of the module.
+
+    '''
+    def __init__(self, parent, name):
+        super(Module, self).__init__(parent, 'module', name)
+
+    def tostr(self):
+        return 'MODULE ' + self.name
+
+
+class Subroutine(BeginStatement):
+    '''
+    A Fortran subroutine.
+
+    :param parent: the statement containing the subroutine.
+    :type parent: :py:class:`psyclone.fortran_text.Statement`
+    :param str name: the name of the subroutine.
+    :param args: the names of the arguments of the subroutine.
+    :type args: list of str
+
+    '''
+    def __init__(self, parent, name, args):
+        super(Subroutine, self).__init__(parent, 'subroutine', name)
+        self.args = args
+
+    def tostr(self):
+        return 'SUBROUTINE {0}({1})'.format(self.name, ', '.join(self.args))
+
+
+class Contains(Statement):
+    ''' A Fortran contains statement. '''
+    def tostr(self):
+        return 'CONTAINS'
+
+
+class Implicit(Statement):
+    ''' A Fortran implicit none statement. '''
+    def tostr(self):
+        return 'IMPLICIT NONE'
+
+
+class Comment(Statement):
+    '''
+    A Fortran comment.
+
+    :param parent: the statement containing the comment.
+    :type parent: :py:class:`psyclone.fortran_text.Statement`
+    :param str content: the text of the comment (following the '!').
+
+    '''
+    def __init__(self, parent, content):
+        super(Comment, self).__init__(parent)
+        self.content = content
+
+    def tostr(self):
+        return '!' + self.content
+
+
+class Directive(Comment):
+    '''
+    Base class for directives so that we can reason about them when
+    walking the tree. Each sub-class lists the directive types it supports
+    in TYPES.
+
+    :param parent: the statement containing the directive.
+    :type parent: :py:class:`psyclone.fortran_text.Statement`
+    :param str position: 'begin' or 'end'.
+    :param str dir_type: the type of the directive (e.g. 'parallel do').
+
+    :raises RuntimeError: if the type or position is not supported.
+
+    '''
+    TYPES = []
+    POSITIONS = ["begin", "end"]
+
+    def __init__(self, parent, position, dir_type):
+        if dir_type not in self.TYPES:
+            raise RuntimeError("Error, unrecognised directive type '{0}'. "
+                               "Should be one of {1}".
+                               format(dir_type, self.TYPES))
+        if position not in self.POSITIONS:
+            raise RuntimeError("Error, unrecognised position '{0}'. "
+                               "Should be one of {1}".
+                               format(position, self.POSITIONS))
+        super(Directive, self).__init__(parent, '')
+        self.type = dir_type
+        self.position = position
+
+
+class OMPDirective(Directive):
+    ''' An OpenMP directive. '''
+    TYPES = ["parallel do", "parallel", "do", "master"]
+
+
+class ACCDirective(Directive):
+    ''' An OpenACC directive. '''
+    TYPES = ["parallel", "kernels", "enter data", "loop"]
+
+
+class Use(Statement):
+    '''
+    A Fortran use statement.
+
+    :param parent: the statement containing the use statement.
+    :type parent: :py:class:`psyclone.fortran_text.Statement`
+    :param str name: the name of the module.
+    :param bool isonly: whether the statement has an 'only' clause.
+    :param items: the names that follow the module name.
+    :type items: list of str
+
+    '''
+    def __init__(self, parent, name, isonly, items):
+        super(Use, self).__init__(parent)
+        self.name = name
+        self.isonly = isonly
+        self.items = items
+
+    def tostr(self):
+        text = 'USE ' + self.name
+        if self.isonly:
+            text += ', ONLY:'
+        elif self.items:
+            text += ','
+        if self.items:
+            text += ' ' + ', '.join(self.items)
+        return text
+
+
+class TypeDeclaration(Statement):
+    '''
+    A declaration of variables of an intrinsic or derived type.
+
+    :param parent: the statement containing the declaration.
+    :type parent: :py:class:`psyclone.fortran_text.Statement`
+    :param str name: the (lower-case) type, e.g. 'integer' or 'type'.
+    :param selector: the length and kind selectors. For a derived type \
+                     the second element is the name of the type.
+    :type selector: 2-tuple of str
+
+    '''
+    def __init__(self, parent, name, selector=('', '')):
+        super(TypeDeclaration, self).__init__(parent)
+        self.name = name
+        self.selector = selector
+        self.attrspec = []
+        self.entity_decls = []
+
+    def tostr(self):
+        length, kind = self.selector
+        text = self.name.upper()
+        if self.name == 'character':
+            if length and kind:
+                text += '(LEN={0}, KIND={1})'.format(length, kind)
+            elif length:
+                text += '(LEN={0})'.format(length)
+            elif kind:
+                text += '(KIND={0})'.format(kind)
+        elif self.name == 'type':
+            text += '({0})'.format(kind)
+        else:
+            if length:
+                text += '*' + length
+            if kind:
+                text += '(KIND={0})'.format(kind)
+        if self.attrspec:
+            text += ', ' + ', '.join(self.attrspec)
+        if self.attrspec or '=' in str(self.entity_decls):
+            text += ' ::'
+        if self.entity_decls:
+            text += ' ' + ', '.join(self.entity_decls)
+        return text
+
+
+class Call(Statement):
+    '''
+    A Fortran call statement.
+
+    :param parent: the statement containing the call.
+    :type parent: :py:class:`psyclone.fortran_text.Statement`
+    :param str designator: the name of the routine to call.
+    :param items: the arguments of the call.
+    :type items: list of str
+
+    '''
+    def __init__(self, parent, designator, items):
+        super(Call, self).__init__(parent)
+        self.designator = designator
+        self.items = items
+
+    def tostr(self):
+        text = 'CALL ' + str(self.designator)
+        if self.items:
+            text += '(' + ', '.join(map(str, self.items)) + ')'
+        return text
+
+
+class Allocate(Statement):
+    '''
+    A Fortran allocate statement.
+
+    :param parent: the statement containing the allocate.
+    :type parent: :py:class:`psyclone.fortran_text.Statement`
+    :param items: the quantities to allocate.
+    :type items: list of str
+
+    '''
+    def __init__(self, parent, items):
+        super(Allocate, self).__init__(parent)
+        self.items = items
+
+    def tostr(self):
+        return 'ALLOCATE ({0})'.format(', '.join(self.items))
+
+
+class Deallocate(Allocate):
+    ''' A Fortran deallocate statement. '''
+    def tostr(self):
+        return 'DEALLOCATE ({0})'.format(', '.join(self.items))
+
+
+class Assignment(Statement):
+    '''
+    A Fortran (pointer) assignment.
+
+    :param parent: the statement containing the assignment.
+    :type parent: :py:class:`psyclone.fortran_text.Statement`
+    :param str variable: the left-hand side of the assignment.
+    :param str expr: the right-hand side of the assignment.
+    :param bool pointer: whether this is a pointer assignment.
+
+    '''
+    def __init__(self, parent, variable, expr, pointer=False):
+        super(Assignment, self).__init__(parent)
+        self.variable = variable
+        self.expr = expr
+        self.sign = '=>' if pointer else '='
+
+    def tostr(self):
+        return '{0} {1} {2}'.format(self.variable, self.sign, self.expr)
+
+
+class Do(BeginStatement):
+    '''
+    A Fortran do loop.
+
+    :param parent: the statement containing the loop.
+    :type parent: :py:class:`psyclone.fortran_text.Statement`
+    :param str loopcontrol: the loop control (e.g. 'i=1,n').
+
+    '''
+    def __init__(self, parent, loopcontrol):
+        super(Do, self).__init__(parent, 'do')
+        self.loopcontrol = loopcontrol
+
+    def tostr(self):
+        return 'DO ' + self.loopcontrol
+
+
+class IfThen(BeginStatement):
+    '''
+    A Fortran if-then block.
+
+    :param parent: the statement containing the block.
+    :type parent: :py:class:`psyclone.fortran_text.Statement`
+    :param str expr: the condition.
+
+    '''
+    def __init__(self, parent, expr):
+        super(IfThen, self).__init__(parent, 'if')
+        self.expr = expr
+
+    def tostr(self):
+        return 'IF ({0}) THEN'.format(self.expr)
+
+
+class Select(BeginStatement):
+    '''
+    A Fortran select case or select type block.
+
+    :param parent: the statement containing the block.
+    :type parent: :py:class:`psyclone.fortran_text.Statement`
+    :param str expr: the selector expression.
+    :param bool typeselect: whether this is a select type block.
+
+    '''
+    def __init__(self, parent, expr, typeselect=False):
+        super(Select, self).__init__(parent, 'select')
+        self.expr = expr
+        self.typeselect = typeselect
+
+    def tostr(self):
+        return 'SELECT {0} ( {1} )'.format(
+            'TYPE' if self.typeselect else 'CASE', self.expr)
+
+
+class Case(Statement):
+    '''
+    A case of a select block.
+
+    :param parent: the select block.
+    :type parent: :py:class:`psyclone.fortran_text.Select`
+    :param items: the values selecting this case, or None for the \
+                  default case.
+    :type items: list of list of str or NoneType
+
+    '''
+    def __init__(self, parent, items=None):
+        super(Case, self).__init__(parent)
+        self.items = items
+
+    def tostr(self):
+        typeselect = self.parent.typeselect
+        if self.items:
+            text = 'TYPE IS' if typeselect else 'CASE'
+            text += ' ( {0} )'.format(', '.join(
+                (' : '.join(item)).strip() for item in self.items))
+        else:
+            text = 'CLASS DEFAULT' if typeselect else 'CASE DEFAULT'
+        return text
+
+
+class Raw(Statement):
+    '''
+    Holds an existing fparser1 statement (e.g. the subroutine of a kernel
+    that is being inlined) and writes it out with the indentation of its
+    position in this tree.
+
+    :param parent: the statement containing this one.
+    :type parent: :py:class:`psyclone.fortran_text.Statement`
+    :param ast: the fparser1 statement.
+    :type ast: :py:class:`fparser.common.base_classes.Statement`
+
+    '''
+    def __init__(self, parent, ast):
+        super(Raw, self).__init__(parent)
+        self.ast = ast
+
+    def tofortran(self, isfix=None):
+        old_tab = self.ast.get_indent_tab(isfix=False)
+        new_tab = self.get_indent_tab()
+        lines = []
+        for line in self.ast.tofortran(isfix=False).split('\n'):
+            if line.startswith(old_tab):
+                line = new_tab + line[len(old_tab):]
+            lines.append(line)
+        return '\n'.join(lines)
@@ -0,0 +1,219 @@
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''Module providing a cache of generated code so that an algorithm file
+need not be processed again if none of its inputs have changed.
+
+An entry is keyed on the content and location of the algorithm file
+(kernels are searched for relative to it), the PSyclone and fparser
+versions, the configuration file in use and the options
+passed to :func:`psyclone.generator.generate`. It holds the generated
+algorithm and PSy-layer code, any transformed kernels that were written
+and the hash of every other file that was read (the kernel sources, the
+transformation script and the modules it imports). An entry is only
+used if all of those files are unchanged.
+
+Entries are stored in the kernel cache (see
+:py:mod:`psyclone.parse.kernel_cache`) and the generation cache is
+enabled by setting CACHE_GENERATED_CODE in the [DEFAULT] section of the
+configuration file (in addition to KERNEL_CACHE_DIR).
+
+'''
+
+from __future__ import absolute_import
+
+import hashlib
+import io
+import os
+
+from psyclone.configuration import Config
+from psyclone.file_dependencies import FileDependencies
+from psyclone.parse.kernel_cache import KernelCache
+
+
+def _file_hash(path):
+    '''
+    :param str path: a file.
+
+    :returns: the SHA256 hash of the content of the file or None if it \
+              cannot be read.
+    :rtype: str or NoneType
+
+    '''
+    try:
+        with io.open(path, "rb") as ifile:
+            return hashlib.sha256(ifile.read()).hexdigest()
+    except (IOError, OSError):
+        return None
+
+
+class GenerationCache(object):
+    '''Cache of the code generated for algorithm files.
+
+    :param kernel_cache: the cache in which to store entries.
+    :type kernel_cache: :py:class:`psyclone.parse.kernel_cache.KernelCache`
+
+    For example:
+
+    >>> cache = GenerationCache.create()
+    >>> key = cache.key("alg.f90", {"api": "gocean1.0"})
+    >>> code = cache.lookup(key, "kernels_dir")
+    >>> if code is None:
+    ...     with FileDependencies() as deps:
+    ...         alg, psy = generate("alg.f90", api="gocean1.0")
+    ...     cache.store(key, str(alg), str(psy), deps, "kernels_dir")
+
+    '''
+    def __init__(self, kernel_cache):
+        self._kernel_cache = kernel_cache
+
+    @staticmethod
+    def create():
+        '''Create a GenerationCache as specified by the current
+        configuration.
+
+        :returns: a generation cache or None if caching of generated \
+                  code is not enabled.
+        :rtype: :py:class:`psyclone.generation_cache.GenerationCache` or \
+                NoneType
+
+        '''
+        if not Config.get().cache_generated_code:
+            return None
+        kernel_cache = KernelCache.create()
+        if kernel_cache is None:
+            return None
+        return GenerationCache(kernel_cache)
+
+    @staticmethod
+    def key(filename, options):
+        '''Compute the key of the cache entry for an algorithm file.
+
+        :param str filename: the algorithm file.
+        :param options: the options that affect the generated code (such \
+                        as the API and transformation script).
+        :type options: dict of str to object
+
+        :returns: the key of the cache entry.
+        :rtype: str
+
+        '''
+        from psyclone.profiler import Profiler
+        options = dict(options)
+        # The kernels (and any relative paths) are found relative to the
+        # location of the algorithm file or the current directory, so
+        # identical algorithm files in different directories may give
+        # different code.
+        options["filename"] = os.path.abspath(filename)
+        for name in ["kernel_path", "script_name", "kern_out_path"]:
+            if options.get(name):
+                options[name] = os.path.abspath(options[name])
+        # Options that are held by PSyclone rather than being passed to
+        # generate() but also affect the generated code.
+        options["include_paths"] = [os.path.abspath(path) for path in
+                                    Config.get().include_paths]
+        options["profile"] = sorted(Profiler.get_options())
+        return KernelCache.key(filename, "generation",
+                               repr(sorted(options.items())))
+
+    def lookup(self, key, kern_out_path):
+        '''Look up the code generated for an algorithm file. An entry is
+        only used if none of the files it was generated from have changed
+        and if any transformed kernels can be written without
+        overwriting different files. The transformed kernels are
+        restored and all inputs and outputs are recorded with any active
+        :py:class:`psyclone.file_dependencies.FileDependencies`.
+
+        :param str key: the key of the entry as returned by `key()`.
+        :param str kern_out_path: the directory to which to write any \
+                                  transformed kernels.
+
+        :returns: the algorithm and PSy-layer code or None if there is no \
+                  valid entry.
+        :rtype: (str, str) or NoneType
+
+        '''
+        entry = self._kernel_cache.load(key)
+        if entry is None:
+            return None
+        for path, file_hash in entry["inputs"]:
+            if _file_hash(path) != file_hash:
+                return None
+        outputs = []
+        for name, content in entry["kernels"]:
+            path = os.path.join(kern_out_path, name)
+            if os.path.exists(path):
+                with io.open(path, "r", encoding="utf-8") as kfile:
+                    if kfile.read() != content:
+                        return None
+            outputs.append((path, content))
+        for path, content in outputs:
+            if not os.path.exists(path):
+                with io.open(path, "w", encoding="utf-8") as kfile:
+                    kfile.write(content)
+        for path, _ in entry["inputs"]:
+            FileDependencies.add_input(path)
+        for path, _ in outputs:
+            FileDependencies.add_output(path)
+        return entry["alg"], entry["psy"]
+
+    def store(self, key, alg, psy, deps, kern_out_path):
+        '''Add the code generated for an algorithm file to the cache. No
+        entry is created if any of the files read or written cannot be
+        read now.
+
+        :param str key: the key of the entry as returned by `key()`.
+        :param str alg: the transformed algorithm code.
+        :param str psy: the generated PSy-layer code.
+        :param deps: the files read and written while generating the code.
+        :type deps: :py:class:`psyclone.file_dependencies.FileDependencies`
+        :param str kern_out_path: the directory to which transformed \
+                                  kernels were written.
+
+        '''
+        inputs = []
+        for path in deps.inputs:
+            file_hash = _file_hash(path)
+            if file_hash is None:
+                return
+            inputs.append((path, file_hash))
+        kernels = []
+        for path in deps.outputs:
+            try:
+                with io.open(path, "r", encoding="utf-8") as kfile:
+                    content = kfile.read()
+            except (IOError, OSError):
+                return
+            kernels.append((os.path.relpath(path, kern_out_path), content))
+        self._kernel_cache.store(key, {"inputs": inputs, "alg": alg,
+                                       "psy": psy, "kernels": kernels})
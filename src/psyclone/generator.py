@@ -50,7 +50,6 @@ import argparse
 import sys
 import os
 import traceback
-from psyclone.parse.algorithm import parse
 from psyclone.parse.utils import ParseError
 from psyclone.psyGen import PSyFactory, GenerationError
 from psyclone.alg_gen import NoInvokesError
@@ -59,6 +58,8 @@ from psyclone.profiler import Profiler
 from psyclone.version import __VERSION__
 from psyclone import configuration
 from psyclone.configuration import Config, ConfigurationError
+from psyclone.file_dependencies import FileDependencies, is_user_module, \
+    source_file, user_modules
 
 # Those APIs that do not have a separate Algorithm layer
 API_WITHOUT_ALGORITHM = ["nemo"]
@@ -97,6 +98,7 @@ def handle_script(script_name, psy):
             raise GenerationError(
                 "generator: expected the script file '{0}' to have "
                 "the '.py' extension".format(filename))
+        old_modules = set(sys.modules.keys())
         try:
             transmod = __import__(filename)
         except ImportError:
@@ -112,6 +114,20 @@ def handle_script(script_name, psy):
         if callable(getattr(transmod, 'trans', None)):
             try:
                 psy = transmod.trans(psy)
+                # Record the script and any (user) modules that it
+                # uses as inputs. These may have been imported while
+                # processing an earlier algorithm file (e.g. in batch
+                # mode) so we also look for the modules reachable from
+                # the script, not just those imported by it now.
+                FileDependencies.add_input(source_file(transmod))
+                modules = user_modules(transmod)
+                for name in set(sys.modules.keys()) - old_modules:
+                    module = sys.modules[name]
+                    if is_user_module(name, module) and \
+                       module not in modules:
+                        modules.append(module)
+                for module in modules:
+                    FileDependencies.add_input(source_file(module))
             except Exception:
                 exc_type, exc_value, exc_traceback = sys.exc_info()
                 lines = traceback.format_exception(exc_type, exc_value,
@@ -140,7 +156,8 @@ def generate(filename, api="", kernel_path="", script_name=None,
              line_length=False,
              distributed_memory=None,
              kern_out_path="",
-             kern_naming="multiple"):
+             kern_naming="multiple",
+             jobs=1):
     # pylint: disable=too-many-arguments
     '''Takes a PSyclone algorithm specification as input and outputs the
     associated generated algorithm and psy codes suitable for
@@ -171,6 +188,9 @@ def generate(filename, api="", kernel_path="", script_name=None,
                               kernel code.
     :param bool kern_naming: the scheme to use when re-naming transformed \
                              kernels.
+    :param int jobs: the number of processes to use when parsing the \
+                     kernels referenced by the algorithm specification \
+                     and when writing any transformed kernels.
     :return: 2-tuple containing fparser1 ASTs for the algorithm code and \
              the psy code.
     :rtype: (:py:class:`fparser.one.block_statements.BeginSource`, \
@@ -215,15 +235,23 @@ def generate(filename, api="", kernel_path="", script_name=None,
         raise IOError("file '{0}' not found".format(filename))
     if kernel_path and not os.access(kernel_path, os.R_OK):
         raise IOError("kernel search path '{0}' not found".format(kernel_path))
+    FileDependencies.add_input(filename)
+    if Config.get().filename:
+        FileDependencies.add_input(Config.get().filename)
     try:
         from psyclone.alg_gen import Alg
+        from psyclone.parse.algorithm import parse
         ast, invoke_info = parse(filename, api=api, invoke_name="invoke",
                                  kernel_path=kernel_path,
-                                 line_length=line_length)
+                                 line_length=line_length, jobs=jobs)
         psy = PSyFactory(api, distributed_memory=distributed_memory)\
             .create(invoke_info)
         if script_name is not None:
             handle_script(script_name, psy)
+        if jobs > 1:
+            # Write any transformed kernels concurrently (rather than one
+            # at a time as the PSy-layer code is generated).
+            psy.write_kernels(jobs)
 
         if api not in API_WITHOUT_ALGORITHM:
             alg_gen = Alg(ast, psy).gen
@@ -235,6 +263,252 @@ def generate(filename, api="", kernel_path="", script_name=None,
     return alg_gen, psy.gen
 
 
+def cached_generate(filename, **kwargs):
+    '''Wrapper around :func:`generate` that uses the cache of generated
+    code (if it is enabled in the configuration file) so that an
+    algorithm file is only processed if it or any of the files used to
+    generate its code (kernels, transformation script, configuration
+    file) have changed. Any transformed kernels are restored from the
+    cache. Code is not cached for algorithm files that contain no invokes.
+
+    :param str filename: the file containing the algorithm specification.
+    :param kwargs: the remaining arguments to :func:`generate`.
+
+    :returns: the algorithm and PSy code (as strings if they come from \
+              the cache).
+    :rtype: 2-tuple of str or of fparser1 ASTs (see :func:`generate`)
+
+    '''
+    from psyclone.generation_cache import GenerationCache
+    cache = GenerationCache.create()
+    if cache is None or not os.path.isfile(filename):
+        return generate(filename, **kwargs)
+    # The number of jobs does not affect the generated code
+    options = dict((name, value) for name, value in kwargs.items()
+                   if name != "jobs")
+    key = cache.key(filename, options)
+    kern_out_path = os.path.abspath(kwargs.get("kern_out_path") or
+                                    os.getcwd())
+    code = cache.lookup(key, kern_out_path)
+    if code is not None:
+        return code
+    with FileDependencies() as deps:
+        alg, psy = generate(filename, **kwargs)
+    alg_str = str(alg) if alg is not None else None
+    psy_str = str(psy)
+    cache.store(key, alg_str, psy_str, deps, kern_out_path)
+    return alg_str, psy_str
+
+
+def read_manifest(manifest):
+    '''Reads a batch-mode manifest file. Each line of the file names an
+    algorithm file optionally followed by the names of the files to
+    which the transformed algorithm code and the generated PSy code are
+    to be written. Blank lines and anything following a '#' are ignored.
+
+    :param str manifest: the name of the manifest file.
+
+    :returns: the algorithm file and algorithm and PSy output files \
+              (None if not specified) for each entry in the manifest.
+    :rtype: list of (str, str, str)
+
+    :raises IOError: if the manifest file cannot be read.
+    :raises GenerationError: if an entry in the manifest has more than \
+                             three fields.
+
+    '''
+    import shlex
+    entries = []
+    with open(manifest, "r") as manifest_file:
+        for line_no, line in enumerate(manifest_file, 1):
+            fields = shlex.split(line, comments=True)
+            if not fields:
+                continue
+            if len(fields) > 3:
+                raise GenerationError(
+                    "generator: line {0} of batch manifest '{1}' should "
+                    "contain an algorithm file optionally followed by "
+                    "algorithm and PSy output files but found '{2}'".
+                    format(line_no, manifest, line.strip()))
+            fields += [None] * (3 - len(fields))
+            entries.append(tuple(fields))
+    return entries
+
+
+def _init_batch_worker(config_file, api, include_paths, profile):
+    '''Initialises a process used to process algorithm files in batch
+    mode so that it has the same configuration as the parent process.
+
+    :param str config_file: the configuration file used by the parent.
+    :param str api: the API to use.
+    :param include_paths: the search path(s) for Fortran INCLUDE files.
+    :type include_paths: list of str
+    :param profile: the automatic profiling options or None.
+    :type profile: list of str or NoneType
+
+    '''
+    config = Config.get(do_not_load_file=True)
+    if not config.filename:
+        config.load(config_file)
+    config.api = api
+    config.include_paths = include_paths
+    Profiler.set_options(profile)
+
+
+def _batch_generate(job):
+    '''Processes a single algorithm file in batch mode. Errors are
+    returned rather than raised so that the rest of the batch is still
+    processed.
+
+    :param job: the algorithm file, the algorithm and PSy output files \
+                (or None) and the remaining arguments to :func:`generate`.
+    :type job: (str, str, str, dict)
+
+    :returns: the code to print (for any output without a file name) \
+              and a description of the error (or None if there was none).
+    :rtype: (str, str)
+
+    '''
+    filename, oalg, opsy, kwargs = job
+    kwargs = dict(kwargs)
+    line_length = kwargs.pop("limit")
+    depfile = kwargs.pop("depfile", False)
+    targets = [name for name in [oalg, opsy] if name]
+    if depfile and not targets:
+        return "", ("cannot write a dependency file as no output files are "
+                    "specified")
+    output = ""
+    deps = FileDependencies()
+    try:
+        try:
+            with deps:
+                alg, psy = cached_generate(filename, line_length=line_length,
+                                           **kwargs)
+        except NoInvokesError as err:
+            # Output the original algorithm code and no PSy code.
+            output += "Warning: {0}\n".format(str(err))
+            with open(filename, "r") as alg_file:
+                alg = alg_file.read()
+            psy = ""
+        alg_str, psy_str = str(alg), str(psy)
+        if oalg is not None:
+            _write_code(alg_str, oalg, line_length)
+        else:
+            output += "Transformed algorithm code:\n{0}\n".format(
+                _format_code(alg_str, line_length))
+        if psy_str and opsy is not None:
+            _write_code(psy_str, opsy, line_length)
+        elif psy_str:
+            output += "Generated psy layer code:\n {0}\n".format(
+                _format_code(psy_str, line_length))
+        if depfile:
+            deps.write_dependency_file(_depfile_name(targets), targets)
+    except (OSError, IOError, ParseError, GenerationError,
+            RuntimeError) as err:
+        return "", str(err)
+    except Exception as err:  # pylint: disable=broad-except
+        return "", "unexpected exception ({0}): {1}".format(
+            type(err).__name__, str(err))
+    return output, None
+
+
+def run_batch(entries, jobs, profile, **kwargs):
+    '''Processes the algorithm files listed in a batch manifest, using a
+    pool of processes if more than one job is requested. A failure to
+    process one file is reported but does not stop the remaining files
+    from being processed.
+
+    :param entries: the algorithm file and output files of each entry \
+                    of the manifest (see :func:`read_manifest`).
+    :type entries: list of (str, str, str)
+    :param int jobs: the number of files to process concurrently.
+    :param profile: the automatic profiling options or None.
+    :type profile: list of str or NoneType
+    :param kwargs: the arguments to pass to :func:`generate` (with \
+                   'limit' in place of 'line_length') and 'depfile', \
+                   whether to write a dependency file for each entry.
+
+    :returns: the names of the files that could not be processed and \
+              the associated errors, in manifest order.
+    :rtype: list of (str, str)
+
+    '''
+    work = [(filename, oalg, opsy, kwargs)
+            for filename, oalg, opsy in entries]
+    if jobs > 1 and len(work) > 1:
+        import multiprocessing
+        config = Config.get()
+        pool = multiprocessing.Pool(
+            processes=min(jobs, len(work)),
+            initializer=_init_batch_worker,
+            initargs=(config.filename, config.api, config.include_paths,
+                      profile))
+        try:
+            results = pool.map(_batch_generate, work)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_batch_generate(job) for job in work]
+
+    failures = []
+    for (filename, _, _), (output, error) in zip(entries, results):
+        if output:
+            print(output, end="")
+        if error is not None:
+            failures.append((filename, error))
+    return failures
+
+
+def _depfile_name(targets):
+    '''
+    :param targets: the algorithm and/or PSy output files.
+    :type targets: list of str
+
+    :returns: the default name of the dependency file for the supplied \
+              output files: that of the PSy output file (or the algorithm \
+              output file if there is none) with the extension '.d'.
+    :rtype: str
+
+    '''
+    return os.path.splitext(targets[-1])[0] + ".d"
+
+
+def _format_code(code, line_length):
+    '''Limits the line length of the supplied generated code if requested.
+
+    :param str code: the generated (algorithm or PSy) code.
+    :param bool line_length: whether to limit the line length to 132 \
+                             characters.
+
+    :returns: the code with any long lines wrapped.
+    :rtype: str
+
+    '''
+    if line_length:
+        return FortLineLength().process(code)
+    return code
+
+
+def _write_code(code, filename, line_length):
+    '''Writes the supplied generated code to a file, limiting the line
+    length if requested. The wrapped lines are written as they are
+    produced so that a second copy of the (possibly very large) code is
+    never held in memory.
+
+    :param str code: the generated (algorithm or PSy) code.
+    :param str filename: the name of the file to write.
+    :param bool line_length: whether to limit the line length to 132 \
+                             characters.
+
+    '''
+    with open(filename, "w") as code_file:
+        if line_length:
+            FortLineLength().write(code, code_file)
+        else:
+            code_file.write(code)
+
+
 def main(args):
     '''
     Parses and checks the command line arguments, calls the generate
@@ -263,7 +537,20 @@ def main(args):
                              'default \'{1}\'.'
                         .format(str(Config.get().supported_apis),
                                 Config.get().default_api))
-    parser.add_argument('filename', help='algorithm-layer source code')
+    parser.add_argument('filename', nargs='?',
+                        help='algorithm-layer source code')
+    parser.add_argument(
+        '--batch', metavar='MANIFEST',
+        help='process all of the algorithm files listed in MANIFEST (one '
+        'per line, optionally followed by the algorithm and PSy output '
+        'files) in a single run')
+    parser.add_argument(
+        '--serve', metavar='SOCKET',
+        help='run a PSyclone server listening on the Unix socket SOCKET '
+        '(see the psyclonec script)')
+    parser.add_argument(
+        '--stop-server', metavar='SOCKET',
+        help='stop the PSyclone server listening on SOCKET')
     parser.add_argument('-s', '--script', help='filename of a PSyclone'
                         ' optimisation script')
     parser.add_argument(
@@ -277,6 +564,20 @@ def main(args):
     parser.add_argument(
         '-l', '--limit', dest='limit', action='store_true', default=False,
         help='limit the fortran line length to 132 characters')
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=1,
+        help='number of processes to use when parsing kernels and writing '
+        'transformed kernels (or when processing files in batch mode), '
+        'default 1')
+    parser.add_argument(
+        '-MD', dest='depfile', action='store_true',
+        help='write a Makefile rule listing the files used to generate '
+        'the code (algorithm file, kernels, script and the modules it '
+        'imports, config file) to a dependency file with the name of the '
+        'PSy (or algorithm) output file and the extension .d')
+    parser.add_argument(
+        '-MF', metavar='FILE', dest='depfile_name',
+        help='write the dependency file to FILE (implies -MD)')
     parser.add_argument(
         '-dm', '--dist_mem', dest='dist_mem', action='store_true',
         help='generate distributed memory code')
@@ -307,6 +608,42 @@ def main(args):
 
     if args.version:
         print("PSyclone version: {0}".format(__VERSION__))
+        if args.filename is None and args.batch is None and \
+           args.serve is None and args.stop_server is None:
+            # Nothing else to do
+            return
+
+    if args.serve is not None or args.stop_server is not None:
+        from psyclone import server
+        try:
+            if args.serve is not None:
+                server.serve(args.serve)
+            else:
+                server.stop_server(args.stop_server)
+        except (OSError, IOError) as err:
+            print(str(err), file=sys.stderr)
+            exit(1)
+        return
+
+    if args.batch is None and args.filename is None:
+        parser.error("the following arguments are required: filename "
+                     "(or --batch MANIFEST)")
+    if args.batch is not None and (args.filename is not None or
+                                   args.oalg is not None or
+                                   args.opsy is not None):
+        parser.error("--batch cannot be combined with an algorithm file or "
+                     "with -oalg/-opsy (output files are specified in the "
+                     "manifest)")
+    if args.depfile_name is not None:
+        if args.batch is not None:
+            parser.error("-MF cannot be used with --batch (the dependency "
+                         "file for each entry is named after its output "
+                         "files)")
+        args.depfile = True
+    if args.depfile and args.batch is None and args.oalg is None and \
+       args.opsy is None:
+        parser.error("-MD/-MF require -oalg and/or -opsy (the targets of "
+                     "the dependency rule)")
 
     if args.script is not None and args.profile is not None:
         print("Error: use of automatic profiling in combination with an\n"
@@ -386,14 +723,38 @@ def main(args):
         print(str(err), file=sys.stderr)
         exit(1)
 
+    if args.batch is not None:
+        try:
+            entries = read_manifest(args.batch)
+        except (OSError, IOError, GenerationError) as err:
+            print(str(err), file=sys.stderr)
+            exit(1)
+        failures = run_batch(
+            entries, args.jobs, args.profile or args.force_profile,
+            api=api, kernel_path=args.directory, script_name=args.script,
+            limit=args.limit, distributed_memory=args.dist_mem,
+            kern_out_path=kern_out_path, kern_naming=args.kernel_renaming,
+            depfile=args.depfile)
+        for filename, error in failures:
+            print("Error processing '{0}':\n{1}".format(filename, error),
+                  file=sys.stderr)
+        if failures:
+            print("{0} of {1} algorithm files could not be processed.".
+                  format(len(failures), len(entries)), file=sys.stderr)
+            exit(1)
+        return
+
+    deps = FileDependencies()
     try:
-        alg, psy = generate(args.filename, api=api,
-                            kernel_path=args.directory,
-                            script_name=args.script,
-                            line_length=args.limit,
-                            distributed_memory=args.dist_mem,
-                            kern_out_path=kern_out_path,
-                            kern_naming=args.kernel_renaming)
+        with deps:
+            alg, psy = cached_generate(args.filename, api=api,
+                                       kernel_path=args.directory,
+                                       script_name=args.script,
+                                       line_length=args.limit,
+                                       distributed_memory=args.dist_mem,
+                                       kern_out_path=kern_out_path,
+                                       kern_naming=args.kernel_renaming,
+                                       jobs=args.jobs)
     except NoInvokesError:
         _, exc_value, _ = sys.exc_info()
         print("Warning: {0}".format(exc_value))
@@ -420,29 +781,26 @@ def main(args):
         print("Stacktrace ...", file=sys.stderr)
         traceback.print_tb(exc_tb, limit=20, file=sys.stderr)
         exit(1)
-    if args.limit:
-        fll = FortLineLength()
-        psy_str = fll.process(str(psy))
-        alg_str = fll.process(str(alg))
-    else:
-        psy_str = str(psy)
-        alg_str = str(alg)
+    alg_str, psy_str = str(alg), str(psy)
     if args.oalg is not None:
-        my_file = open(args.oalg, "w")
-        my_file.write(alg_str)
-        my_file.close()
+        _write_code(alg_str, args.oalg, args.limit)
     else:
-        print("Transformed algorithm code:\n%s" % alg_str)
+        print("Transformed algorithm code:\n%s" %
+              _format_code(alg_str, args.limit))
 
     if not psy_str:
         # empty file so do not output anything
         pass
     elif args.opsy is not None:
-        my_file = open(args.opsy, "w")
-        my_file.write(psy_str)
-        my_file.close()
+        _write_code(psy_str, args.opsy, args.limit)
     else:
-        print("Generated psy layer code:\n", psy_str)
+        print("Generated psy layer code:\n",
+              _format_code(psy_str, args.limit))
+
+    if args.depfile:
+        targets = [name for name in [args.oalg, args.opsy] if name]
+        deps.write_dependency_file(
+            args.depfile_name or _depfile_name(targets), targets)
 
 
 if __name__ == "__main__":
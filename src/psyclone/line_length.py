@@ -11,19 +11,36 @@ to allow the code to conform to the maximum line length limits (132
 for f90 free format is the default)'''
 
 
-def find_break_point(line, max_index, key_list):
-    ''' find the most appropriate break point for a fortran line '''
+def find_break_point(line, max_index, key_list, start=0):
+    ''' find the most appropriate break point for a fortran line. If
+    start is supplied then only the part of the line beginning at that
+    index is considered (max_index is relative to it) but the index
+    that is returned is always an index into the whole line. '''
 
     for key in key_list:
-        idx = line.rfind(key, 0, max_index)
-        if idx > 0:
+        idx = line.rfind(key, start, start+max_index)
+        if idx > start:
             return idx+len(key)
     raise Exception(
         "Error in find_break_point. No suitable break point found"
-        " for line '" + line[:max_index] + "' and keys '" +
+        " for line '" + line[start:start+max_index] + "' and keys '" +
         str(key_list) + "'")
 
 
+def split_lines(fortran_in):
+    ''' generator that yields the lines of the supplied string (without
+    their newline characters) in the same way as fortran_in.split('\n')
+    but without creating a list containing a copy of all of them '''
+
+    start = 0
+    end = fortran_in.find('\n')
+    while end >= 0:
+        yield fortran_in[start:end]
+        start = end + 1
+        end = fortran_in.find('\n', start)
+    yield fortran_in[start:]
+
+
 class FortLineLength(object):
 
     ''' This class take a free format fortran code as a string and
@@ -72,32 +89,52 @@ class FortLineLength(object):
         ''' takes fortran code as a string as input and output fortran
         code as a string with any long lines wrapped appropriately '''
 
-        fortran_out = ""
-        for line in fortran_in.split('\n'):
-            if len(line) > self._line_length:
-                line_type = self._get_line_type(line)
-
-                c_start = self._cont_start[line_type]
-                c_end = self._cont_end[line_type]
-                key_list = self._key_lists[line_type]
-
+        return "\n".join(self.wrap_lines(split_lines(fortran_in)))
+
+    def write(self, fortran_in, out_file):
+        ''' writes the supplied fortran code (a string) to the supplied
+        file object with any long lines wrapped appropriately. What is
+        written is the same as the result of process() but the wrapped
+        code is never held in memory as a whole. '''
+
+        first = True
+        for line in self.wrap_lines(split_lines(fortran_in)):
+            if not first:
+                out_file.write("\n")
+            out_file.write(line)
+            first = False
+
+    def wrap_lines(self, lines):
+        ''' generator that takes the lines of some fortran code (without
+        their newline characters) from the supplied iterable and yields
+        the lines of the same code with any long lines wrapped
+        appropriately '''
+
+        for line in lines:
+            if len(line) <= self._line_length:
+                yield line
+                continue
+            line_type = self._get_line_type(line)
+
+            c_start = self._cont_start[line_type]
+            c_end = self._cont_end[line_type]
+            key_list = self._key_lists[line_type]
+
+            # Work with the index of the start of the remainder of the
+            # line rather than slicing it so that the cost is linear
+            # in the length of the line.
+            break_point = find_break_point(
+                line, self._line_length-len(c_end), key_list)
+            yield line[:break_point] + c_end
+            start = break_point
+            while len(line) - start + len(c_start) > self._line_length:
                 break_point = find_break_point(
-                    line, self._line_length-len(c_end), key_list)
-                fortran_out += line[:break_point] + c_end + "\n"
-                line = line[break_point:]
-                while len(line) + len(c_start) > self._line_length:
-                    break_point = find_break_point(
-                        line, self._line_length-len(c_end)-len(c_start),
-                        key_list)
-                    fortran_out += c_start + line[:break_point] + c_end + "\n"
-                    line = line[break_point:]
-                if line:
-                    fortran_out += c_start + line + "\n"
-            else:
-                fortran_out += line + "\n"
-
-        # We add an extra newline so remove it when we return
-        return fortran_out[:-1]
+                    line, self._line_length-len(c_end)-len(c_start),
+                    key_list, start)
+                yield c_start + line[start:break_point] + c_end
+                start = break_point
+            if start < len(line):
+                yield c_start + line[start:]
 
     def _get_line_type(self, line):
         ''' Classes lines into diffrent types. This is required as
@@ -347,11 +347,13 @@ class NemoKern(CodedKern):
         # pylint: disable=super-init-not-called
         from psyclone.psyGen import KernelSchedule
         self._name = ""
-        self._parent = parent
+        self.parent = parent
         # The corresponding set of nodes in the fparser2 parse tree
         self._ast = parse_tree
         # Create a kernel schedule
         self._kern_schedule = KernelSchedule(self._name)
+        # Changes to it change the variables accessed by this kernel
+        self._kern_schedule._kernel = self
         # Attach the PSyIR sub-tree to it
         self._kern_schedule.children = psyir_nodes[:]
         # Update the parent info for each node we've moved
@@ -360,6 +362,18 @@ class NemoKern(CodedKern):
         # A Kernel is a leaf in the PSyIR that then has its own KernelSchedule.
         # We therefore don't have any children.
         self._children = []
+        # Reductions are not supported in NEMO kernels
+        self._reduction = False
+        self._reduction_arg = None
+
+    @property
+    def args(self):
+        '''
+        :returns: the arguments of this kernel. A NEMO kernel has no \
+            arguments, its accesses are provided by reference_accesses().
+        :rtype: list
+        '''
+        return []
 
     @staticmethod
     def match(node):
@@ -380,12 +394,12 @@ class NemoKern(CodedKern):
         if not isinstance(node, Schedule):
             raise InternalError("Expected 'Schedule' in 'match', got '{0}'.".
                                 format(type(node)))
-        nodes = node.walk((CodeBlock, NemoLoop))
+        nodes = node.iter_walk((CodeBlock, NemoLoop))
 
         # A kernel cannot contain loops or other unrecognised code (including
         # IO operations and routine calls) or loops. So if there is any
         # node in the result of the walk, this node can not be a kernel.
-        return len(nodes) == 0
+        return next(nodes, None) is None
 
     def local_vars(self):
         '''
@@ -411,7 +425,7 @@ class NemoKern(CodedKern):
         :type var_accesses: \
             :py:class:`psyclone.core.access_info.VariablesAccessInfo`
         '''
-        self._kern_schedule.reference_accesses(var_accesses)
+        self._kern_schedule.collect_accesses(var_accesses)
 
     @property
     def ast(self):
@@ -436,6 +450,8 @@ class NemoLoop(Loop):
     :param str variable_name: optional name of the loop iterator \
         variable. Defaults to an empty string.
     '''
+    __slots__ = ()
+
     def __init__(self, parent=None, variable_name=''):
         valid_loop_types = Config.get().api_conf("nemo").get_valid_loop_types()
         Loop.__init__(self, parent=parent,
@@ -475,6 +491,8 @@ class NemoImplicitLoop(NemoLoop):
     :type parent: :py:class:`psyclone.psyGen.Node`
 
     '''
+    __slots__ = ()
+
     def __init__(self, ast, parent=None):
         # pylint: disable=super-init-not-called, non-parent-init-called
         valid_loop_types = Config.get().api_conf("nemo").get_valid_loop_types()
@@ -52,6 +52,7 @@ from fparser.two.Fortran2003 import Main_Program, Module, \
 # pylint: enable=no-name-in-module
 
 from psyclone.configuration import Config
+from psyclone.file_dependencies import FileDependencies
 from psyclone.parse.utils import check_api, check_line_length, ParseError, \
     parse_fp2
 from psyclone.psyGen import InternalError
@@ -61,7 +62,7 @@ from psyclone.psyGen import InternalError
 
 # pylint: disable=too-many-arguments
 def parse(alg_filename, api="", invoke_name="invoke", kernel_path="",
-          line_length=False):
+          line_length=False, jobs=1):
     '''Takes a PSyclone conformant algorithm file as input and outputs a
     parse tree of the code contained therein and an object containing
     information about the 'invoke' calls in the algorithm file and any
@@ -81,6 +82,9 @@ def parse(alg_filename, api="", invoke_name="invoke", kernel_path="",
                              and kernel) code is checked to make sure \
                              that it conforms and an error raised if \
                              not. The default is False.
+    :param int jobs: the number of processes to use when parsing the \
+                     kernels referenced by the algorithm code. The \
+                     default is 1 (no parallel parsing).
 
     :returns: 2-tuple consisting of the fparser2 parse tree of the \
               Algorithm file and an object holding details of the \
@@ -98,7 +102,8 @@ def parse(alg_filename, api="", invoke_name="invoke", kernel_path="",
 
     # Parsing is encapsulated in the Parser class. We keep this
     # function for compatibility.
-    my_parser = Parser(api, invoke_name, kernel_path, line_length)
+    my_parser = Parser(api, invoke_name, kernel_path, line_length,
+                       jobs=jobs)
     return my_parser.parse(alg_filename)
 
 
@@ -121,6 +126,13 @@ class Parser(object):
                              to make sure that it conforms and an
                              error raised if not. The default is
                              False.
+    :param int jobs: the number of processes to use to parse the
+                     kernels referenced by the algorithm code. If this
+                     is greater than one then all kernels are found and
+                     parsed concurrently before the invoke calls are
+                     processed. The default is 1.
+
+    :raises ParseError: if jobs is less than one.
 
     For example:
 
@@ -131,12 +143,21 @@ class Parser(object):
     '''
 
     def __init__(self, api="", invoke_name="invoke", kernel_path="",
-                 line_length=False):
+                 line_length=False, jobs=1):
 
         self._invoke_name = invoke_name
         self._kernel_path = kernel_path
         self._line_length = line_length
 
+        if jobs < 1:
+            raise ParseError(
+                "algorithm.py:Parser:__init__: the number of jobs must be "
+                "at least one but got {0}".format(jobs))
+        self._jobs = jobs
+        # Kernel metadata parsed ahead of time, indexed by
+        # (module name, kernel name).
+        self._kernel_types = {}
+
         _config = Config.get()
         if not api:
             api = _config.default_api
@@ -202,6 +223,10 @@ class Parser(object):
                 "subroutine not found in parse tree for file "
                 "'{0}'".format(alg_filename))
 
+        self._kernel_types = {}
+        if self._jobs > 1:
+            self._kernel_types = self.parse_kernels(alg_parse_tree)
+
         self._unique_invoke_labels = []
         self._arg_name_to_module_name = {}
         invoke_calls = []
@@ -222,6 +247,80 @@ class Parser(object):
 
         return alg_parse_tree, FileInfo(container_name, invoke_calls)
 
+    def parse_kernels(self, alg_parse_tree):
+        '''Finds all of the coded kernels referenced by the invoke calls in
+        the supplied algorithm parse tree and parses them concurrently
+        using a pool of self._jobs processes. Any kernel that fails to
+        parse is omitted from the result so that the error is reported
+        (in order) when the invoke calls are subsequently processed.
+
+        :param alg_parse_tree: the fparser2 parse tree of the algorithm \
+                               code.
+        :type alg_parse_tree: :py:class:`fparser.two.Fortran2003.Program`
+
+        :returns: API-specific kernel metadata indexed by the tuple \
+                  (module name, kernel name in lower case).
+        :rtype: dict of (str, str) to \
+                subclass of :py:class:`psyclone.parse.kernel.KernelType`
+
+        '''
+        self._arg_name_to_module_name = {}
+        kernels = []
+        for statement in walk_ast(alg_parse_tree.content):
+            if isinstance(statement, Use_Stmt):
+                self.update_arg_to_module_map(statement)
+            if not isinstance(statement, Call_Stmt) or \
+               str(statement.items[0]).lower() != self._invoke_name.lower():
+                continue
+            if isinstance(statement.items[1], Actual_Arg_Spec_List):
+                argument_list = statement.items[1].items
+            else:
+                argument_list = [statement.items[1]]
+            for argument in argument_list:
+                if not isinstance(argument, (Data_Ref, Part_Ref)):
+                    continue
+                try:
+                    kernel_name, _ = get_kernel(argument, self._alg_filename)
+                except ParseError:
+                    continue
+                kernel_name = kernel_name.lower()
+                if kernel_name in self._builtin_name_map or \
+                   kernel_name not in self._arg_name_to_module_name:
+                    continue
+                key = (self._arg_name_to_module_name[kernel_name],
+                       kernel_name)
+                if key not in kernels:
+                    kernels.append(key)
+
+        if len(kernels) < 2:
+            # Not worth starting any processes.
+            return {}
+
+        import multiprocessing
+        config = Config.get()
+        work = [(module_name, kernel_name, self._alg_filename,
+                 self._kernel_path, self._line_length, self._api)
+                for module_name, kernel_name in kernels]
+        pool = multiprocessing.Pool(
+            processes=min(self._jobs, len(kernels)),
+            initializer=_init_kernel_worker,
+            initargs=(config.filename, config.kernel_cache_dir))
+        try:
+            # map() returns the results in the same order as the work
+            # list so the outcome is independent of scheduling.
+            results = pool.map(_get_kernel_type, work)
+        finally:
+            pool.close()
+            pool.join()
+        ktypes = {}
+        for key, (ktype, inputs) in zip(kernels, results):
+            # Record the files read by the worker in this process.
+            for path in inputs:
+                FileDependencies.add_input(path)
+            if ktype is not None:
+                ktypes[key] = ktype
+        return ktypes
+
     def create_invoke_call(self, statement):
         '''Takes the part of a parse tree containing an invoke call and
         returns an InvokeCall object which captures the required
@@ -368,13 +467,13 @@ class Parser(object):
                        list(self._arg_name_to_module_name.values()),
                        list(self._builtin_name_map.keys())))
 
-        from psyclone.parse.kernel import get_kernel_ast
-        modast = get_kernel_ast(module_name, self._alg_filename,
-                                self._kernel_path, self._line_length)
-        from psyclone.parse.kernel import KernelTypeFactory
-        return KernelCall(module_name,
-                          KernelTypeFactory(api=self._api).create(
-                              modast, name=kernel_name), args)
+        ktype = self._kernel_types.get((module_name, kernel_name.lower()))
+        if ktype is None:
+            from psyclone.parse.kernel import get_kernel_type
+            ktype = get_kernel_type(module_name, kernel_name,
+                                    self._alg_filename, self._kernel_path,
+                                    self._line_length, api=self._api)
+        return KernelCall(module_name, ktype, args)
 
     def update_arg_to_module_map(self, statement):
         '''Takes a use statement and adds its contents to the internal
@@ -436,6 +535,50 @@ class Parser(object):
 # Section 2: Support functions
 
 
+def _init_kernel_worker(config_file, kernel_cache_dir):
+    '''Initialises a process used to parse kernels in parallel (see
+    Parser.parse_kernels) so that it uses the same configuration as
+    the parent process.
+
+    :param str config_file: the configuration file used by the parent.
+    :param str kernel_cache_dir: the kernel cache directory used by the \
+                                 parent.
+
+    '''
+    config = Config.get(do_not_load_file=True)
+    if not config.filename:
+        config.load(config_file)
+    config.kernel_cache_dir = kernel_cache_dir
+
+
+def _get_kernel_type(work):
+    '''Parses a kernel in a worker process (see Parser.parse_kernels).
+
+    :param work: the module name, kernel name, algorithm filename, \
+                 kernel search path, line-length flag and API of the \
+                 kernel to parse.
+    :type work: (str, str, str, str, bool, str)
+
+    :returns: API-specific information about the kernel metadata (or \
+              None if the kernel could not be parsed) and the files read.
+    :rtype: (subclass of :py:class:`psyclone.parse.kernel.KernelType` \
+            or NoneType, list of str)
+
+    '''
+    from psyclone.parse.kernel import get_kernel_type
+    module_name, kernel_name, alg_filename, kernel_path, line_length, \
+        api = work
+    with FileDependencies() as deps:
+        try:
+            ktype = get_kernel_type(module_name, kernel_name, alg_filename,
+                                    kernel_path, line_length, api=api)
+        except Exception:  # pylint: disable=broad-except
+            # The error is reported when the kernel is parsed again by the
+            # parent process.
+            ktype = None
+    return ktype, deps.inputs
+
+
 def get_builtin_defs(api):
     '''Get the names of the supported built-in operations and the file
     containing the associated meta-data for the supplied API
@@ -39,13 +39,17 @@ PSyclone-conformant kernel code.
 
 '''
 
+from collections import OrderedDict
+import copy
+import hashlib
 import os
 from pyparsing import ParseException
 import fparser
 
 from fparser.two.parser import ParserFactory
 from fparser.two import Fortran2003
-from fparser.two.utils import walk_ast
+from fparser.two.utils import walk_ast, Base
+from fparser.common.readfortran import FortranStringReader
 
 from fparser import one as fparser1
 from fparser import api as fpapi
@@ -54,7 +58,127 @@ from fparser.one import parsefortran
 import psyclone.expression as expr
 from psyclone.psyGen import InternalError
 from psyclone.configuration import Config
-from psyclone.parse.utils import check_api, check_line_length, ParseError
+from psyclone.parse.utils import check_api, check_line_length, \
+    read_fortran_source, ParseError
+from psyclone.parse.kernel_cache import KernelCache
+from psyclone.file_dependencies import FileDependencies
+
+
+class KernelSearchIndex(object):
+    '''An index of the Fortran source files found in a kernel search path
+    (and all of its subdirectories), mapping the lower-cased name of each
+    file to the location(s) at which it is found. The directory tree is
+    therefore only walked once per process rather than once per kernel
+    lookup. Indexes are shared by all users within a process via the
+    `get` method. If an on-disk kernel cache is configured (see
+    :py:class:`psyclone.parse.kernel_cache.KernelCache`) then the index
+    is also stored there and re-used by subsequent processes as long as
+    the modification times of all directories in the tree are unchanged.
+
+    :param str root: the directory at the root of the search path.
+
+    '''
+    # Class variable holding the index for each search path (keyed on the
+    # absolute path of its root directory).
+    _indexes = {}
+
+    def __init__(self, root):
+        self._root = os.path.abspath(root)
+        # Map from lower-cased file name to list of paths
+        self._files = {}
+        # Map from directory to its modification time when indexed
+        self._dir_mtimes = {}
+        self.build()
+
+    @staticmethod
+    def get(root):
+        '''Return the index of the supplied search path, creating it (or
+        re-building it if the directory tree has changed) if required.
+
+        :param str root: the directory at the root of the search path.
+
+        :returns: the index of the search path.
+        :rtype: :py:class:`psyclone.parse.kernel.KernelSearchIndex`
+
+        '''
+        root = os.path.abspath(root)
+        index = KernelSearchIndex._indexes.get(root)
+        if index:
+            # Files may have been added to (or removed from) the tree since
+            # the index was created, e.g. by a build system between the
+            # requests handled by a long-running process.
+            if not index.is_up_to_date():
+                index.build()
+            return index
+        cache = KernelCache.create()
+        if cache:
+            key = cache.key(None, "kernel-search-index", root)
+            index = cache.load(key)
+            if not isinstance(index, KernelSearchIndex) or \
+               not index.is_up_to_date():
+                index = KernelSearchIndex(root)
+                cache.store(key, index)
+        else:
+            index = KernelSearchIndex(root)
+        KernelSearchIndex._indexes[root] = index
+        return index
+
+    @staticmethod
+    def clear():
+        '''Discard all of the indexes held in this process.'''
+        KernelSearchIndex._indexes = {}
+
+    def build(self):
+        '''(Re-)create the index by walking the directory tree.'''
+        self._files = {}
+        self._dir_mtimes = {}
+        for root, _, filenames in os.walk(self._root):
+            try:
+                self._dir_mtimes[root] = os.path.getmtime(root)
+            except OSError:
+                # The directory has been removed since it was listed
+                continue
+            for filename in filenames:
+                # We are only interested in files with a .f90 or .F90
+                # suffix
+                lower_name = filename.lower()
+                if lower_name.endswith(".f90"):
+                    self._files.setdefault(lower_name, []).append(
+                        os.path.join(root, filename))
+
+    def is_up_to_date(self):
+        '''
+        :returns: whether the index still reflects the content of the \
+                  directory tree. (Adding or removing a file or directory \
+                  changes the modification time of its parent directory.)
+        :rtype: bool
+
+        '''
+        for directory, mtime in self._dir_mtimes.items():
+            try:
+                if os.path.getmtime(directory) != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def find(self, filename):
+        '''Find all files in the search path with the supplied name. The
+        match is case insensitive. If no match is found, or one of the
+        indexed files has since been removed, then the index is re-built
+        before returning the result in case the directory tree has changed.
+
+        :param str filename: the name of the file to search for.
+
+        :returns: the paths of the matching files.
+        :rtype: list of str
+
+        '''
+        matches = self._files.get(filename.lower(), [])
+        if not matches or not all(os.path.isfile(path) for path in matches):
+            self.build()
+            matches = self._files.get(filename.lower(), [])
+        return matches[:]
 
 
 def get_kernel_filepath(module_name, kernel_path, alg_filename):
@@ -64,7 +188,9 @@ def get_kernel_filepath(module_name, kernel_path, alg_filename):
 
     Look in the directories and all subdirectories associated with the
     supplied kernel paths or in the same directory as the algorithm
-    file if the kernel path is empty.
+    file if the kernel path is empty. The kernel path is searched using
+    a :py:class:`psyclone.parse.kernel.KernelSearchIndex` so that the
+    directory tree is only walked once.
 
     Return the filepath if the file is found.
 
@@ -108,13 +234,9 @@ def get_kernel_filepath(module_name, kernel_path, alg_filename):
                 "kernel.py:get_kernel_filepath: Supplied kernel search path "
                 "does not exist or cannot be read: {0}".format(cdir))
 
-        # Recursively search down through the directory tree starting
-        # at the specified path.
-        for root, _, filenames in os.walk(cdir):
-            for filename in filenames:
-                # perform a case insensitive match
-                if filename.lower() == search_string.lower():
-                    matches.append(os.path.join(root, filename))
+        # Use the index of the directory tree starting at the
+        # specified path.
+        matches = KernelSearchIndex.get(cdir).find(search_string)
     else:
         # Look *only* in the directory that contained the algorithm
         # file.
@@ -137,9 +259,108 @@ def get_kernel_filepath(module_name, kernel_path, alg_filename):
             "file '{0}.[fF]90' found!".
             format(module_name))
     # There is a single match
+    FileDependencies.add_input(matches[0])
     return matches[0]
 
 
+# The fparser2 parse trees of the kernel modules most recently parsed in
+# this process (least-recently-used first), keyed on a hash of the Fortran
+# that was parsed. These are never modified: each kernel is given its own
+# copy (see get_kernel_fp2_ast).
+_FP2_KERNEL_ASTS = OrderedDict()
+
+# The maximum number of entries in _FP2_KERNEL_ASTS
+_FP2_KERNEL_ASTS_SIZE = 64
+
+
+def clear_kernel_fp2_asts():
+    '''Discard the fparser2 parse trees of the kernel modules held in this
+    process (see `get_kernel_fp2_ast`).'''
+    _FP2_KERNEL_ASTS.clear()
+
+
+def _copy_fp2_tree(node):
+    '''Create a copy of an fparser2 parse tree. This is much cheaper than
+    parsing the Fortran again (and fparser2 nodes do not support
+    copy.deepcopy). The node objects are copied but any leaf strings and
+    the (read-only) source-line information are shared with the original.
+
+    :param node: the root of the tree (or a leaf item) to copy.
+    :type node: :py:class:`fparser.two.utils.Base` or str or NoneType
+
+    :returns: a copy of the tree.
+    :rtype: :py:class:`fparser.two.utils.Base` or str or NoneType
+
+    '''
+    if not isinstance(node, Base):
+        return node
+    new_node = object.__new__(type(node))
+    new_node.__dict__.update(node.__dict__)
+    for attr in ["items", "content"]:
+        children = getattr(node, attr, None)
+        if isinstance(children, (list, tuple)):
+            new_children = [_copy_fp2_tree(child) for child in children]
+            for child in new_children:
+                if isinstance(child, Base) and \
+                   getattr(child, "parent", None) is node:
+                    child.parent = new_node
+            setattr(new_node, attr, type(children)(new_children))
+    return new_node
+
+
+def get_kernel_fp2_ast(ktype):
+    '''Return the fparser2 parse tree of the module containing the supplied
+    kernel. Each kernel module is normally only parsed once per process
+    and the result shared by all kernels that refer to it: every caller
+    receives its own copy of the shared tree so that it may be
+    transformed independently. Only the most recently used trees are
+    kept.
+
+    :param ktype: the meta-data of the kernel.
+    :type ktype: :py:class:`psyclone.parse.kernel.KernelType`
+
+    :returns: fparser2 parse tree of the kernel module.
+    :rtype: :py:class:`fparser.two.Fortran2003.Program`
+
+    '''
+    # The fparser2 tree is created from the Fortran generated from the
+    # fparser1 tree (rather than from the original source) so that the
+    # naming conventions of fparser1 (e.g. lower-case names) are preserved
+    # and any change to the fparser1 tree is taken into account. The tree
+    # is therefore keyed on that Fortran rather than on the source file.
+    fortran = ktype.ast.tofortran()
+    key = hashlib.sha256(fortran.encode("utf-8")).hexdigest()
+    if key in _FP2_KERNEL_ASTS:
+        # Record that this entry is the most recently used
+        tree = _FP2_KERNEL_ASTS.pop(key)
+    else:
+        parser = ParserFactory().create()
+        tree = parser(FortranStringReader(fortran))
+        while len(_FP2_KERNEL_ASTS) >= _FP2_KERNEL_ASTS_SIZE:
+            del _FP2_KERNEL_ASTS[next(iter(_FP2_KERNEL_ASTS))]
+    _FP2_KERNEL_ASTS[key] = tree
+    return _copy_fp2_tree(tree)
+
+
+def fparser1_parse(filepath):
+    '''Parse the supplied Fortran file with fparser1. The file is read
+    with :py:func:`psyclone.parse.utils.read_fortran_source` so that
+    fparser does not create a temporary copy of it.
+
+    :param str filepath: the file to parse.
+
+    :returns: the fparser1 parse tree of the file.
+    :rtype: :py:class:`fparser.one.block_statements.BeginSource`
+
+    '''
+    source, source_format = read_fortran_source(filepath)
+    # Search the directory containing the file for any INCLUDE files, as
+    # fparser does when it is given a file name.
+    return fpapi.parse(source, isfree=source_format.is_free,
+                       isstrict=source_format.is_strict,
+                       include_dirs=[os.path.dirname(filepath), "."])
+
+
 def get_kernel_parse_tree(filepath):
     '''Parse the file in filepath with fparser1 and return a parse tree.
 
@@ -156,7 +377,7 @@ def get_kernel_parse_tree(filepath):
     parsefortran.FortranParser.cache.clear()
     fparser.logging.disable(fparser.logging.CRITICAL)
     try:
-        parse_tree = fpapi.parse(filepath)
+        parse_tree = fparser1_parse(filepath)
         # parse_tree includes an extra comment line which contains
         # file details. This line can be long which can cause line
         # length issues. Therefore set the information (name) to be
@@ -197,6 +418,56 @@ def get_kernel_ast(module_name, alg_filename, kernel_path, line_length):
     return parse_tree
 
 
+# pylint: disable=too-many-arguments
+def get_kernel_type(module_name, kernel_name, alg_filename, kernel_path,
+                    line_length, api=""):
+    '''Search for the kernel source code containing a module with the name
+    'module_name' (as described in `get_kernel_ast`) and return the
+    API-specific information about the metadata of the kernel
+    'kernel_name' that it contains. If an on-disk kernel cache has
+    been configured (KERNEL_CACHE_DIR in the config file) then the
+    result is taken from the cache if the kernel source is unchanged
+    since it was last parsed. Otherwise the source is parsed and the
+    result added to the cache.
+
+    :param str module_name: the name of the module to search for.
+    :param str kernel_name: the name of the kernel (the Fortran type \
+                            holding its metadata).
+    :param str alg_filename: the name of the algorithm file.
+    :param str kernel_path: directory in which to search for the module \
+    file.
+    :param bool line_length: whether to check that the kernel code \
+    conforms to the 132 character line length limit (True) or not \
+    (False).
+    :param str api: the API of the kernel. If it is not supplied then the \
+                    default API is used.
+
+    :returns: API-specific information about the kernel metadata.
+    :rtype: subclass of :py:class:`psyclone.parse.kernel.KernelType`
+
+    '''
+    factory = KernelTypeFactory(api=api)
+    filepath = get_kernel_filepath(module_name, kernel_path, alg_filename)
+    if line_length:
+        check_line_length(filepath)
+    ktype = None
+    cache = KernelCache.create()
+    if cache:
+        key = cache.key(filepath, factory.api, kernel_name.lower())
+        ktype = cache.load(key)
+    if ktype is None:
+        ktype = factory.create(get_kernel_parse_tree(filepath),
+                               name=kernel_name)
+        ktype.source_file = filepath
+        if cache:
+            cache.store(key, ktype)
+    # A cached entry may have been created from an identical copy of the
+    # kernel source in a different location.
+    ktype.source_file = filepath
+    return ktype
+# pylint: enable=too-many-arguments
+
+
 # pylint: disable=too-few-public-methods
 class KernelTypeFactory(object):
     '''Factory to create the required API-specific information about
@@ -215,6 +486,15 @@ class KernelTypeFactory(object):
             check_api(api)
             self._type = api
 
+    @property
+    def api(self):
+        '''
+        :returns: the API for which this factory creates Kernel information.
+        :rtype: str
+
+        '''
+        return self._type
+
     def create(self, parse_tree, name=None):
         '''Create API-specific information about the kernel metadata and a
         reference to its code. The API is set when the factory is
@@ -294,11 +574,21 @@ class BuiltInKernelTypeFactory(KernelTypeFactory):
                 "Built-in but cannot find file '{1}' containing the meta-data "
                 "describing the Built-in operations for API '{2}'"
                 .format(name, fname, self._type))
+        # The same built-in definitions are parsed for every built-in call
+        # so use the on-disk kernel cache if one has been configured.
+        cache = KernelCache.create()
+        if cache:
+            key = cache.key(fname, self._type, name)
+            ktype = cache.load(key)
+            if ktype is not None:
+                ktype.source_file = fname
+                return ktype
+
         # Attempt to parse the meta-data
         try:
             parsefortran.FortranParser.cache.clear()
             fparser.logging.disable(fparser.logging.CRITICAL)
-            parse_tree = fpapi.parse(fname)
+            parse_tree = fparser1_parse(fname)
         except Exception:
             raise ParseError(
                 "BuiltInKernelTypeFactory:create: Failed to parse the meta-"
@@ -306,7 +596,11 @@ class BuiltInKernelTypeFactory(KernelTypeFactory):
 
         # Now we have the parse tree, call our parent class to create \
         # the object
-        return KernelTypeFactory.create(self, parse_tree, name)
+        ktype = KernelTypeFactory.create(self, parse_tree, name)
+        ktype.source_file = fname
+        if cache:
+            cache.store(key, ktype)
+        return ktype
 # pylint: enable=too-few-public-methods
 
 
@@ -487,6 +781,9 @@ class KernelProcedure(object):
     def __init__(self, ktype_ast, ktype_name, modast):
         self._ast, self._name = KernelProcedure.get_procedure(
             ktype_ast, ktype_name, modast)
+        # The KernelType that re-creates the parse tree if this object
+        # has been restored from the kernel cache (see KernelType).
+        self._kernel_type = None
 
     # pylint: disable=too-many-branches
     @staticmethod
@@ -572,13 +869,15 @@ class KernelProcedure(object):
         :rtype: :py:class:`fparser.one.block_statements.Subroutine`
 
         '''
+        if self._ast is None and self._kernel_type:
+            self._kernel_type.restore_parse_tree()
         return self._ast
 
     def __repr__(self):
         return "KernelProcedure({0})".format(self.name)
 
     def __str__(self):
-        return str(self._ast)
+        return str(self.ast)
 
 
 def get_kernel_metadata(name, ast):
@@ -621,6 +920,10 @@ class KernelType(object):
     :type ast: :py:class:`fparser.one.block_statements.BeginSource`
     :param str name: name of the Fortran derived type describing the kernel.
 
+    When pickled (e.g. to store it in the kernel cache) only the
+    meta-data is kept: the parse tree is re-created from the kernel
+    source file (see `source_file`) if it is subsequently required.
+
     :raises ParseError: if the supplied AST does not contain a Fortran \
     module.
     :raises ParseError: if the module name is too short to contain \
@@ -668,6 +971,81 @@ class KernelType(object):
         self._procedure = KernelProcedure(self._ktype, name, ast)
         self._inits = self.getkerneldescriptors(self._ktype)
         self._arg_descriptors = []  # this is set up by the subclasses
+        # The file from which the parse tree was created
+        self._source_file = None
+
+    def __getstate__(self):
+        '''
+        :returns: the state of this object without the fparser1 parse \
+                  trees, which are large and not safely picklable.
+        :rtype: dict
+
+        '''
+        state = self.__dict__.copy()
+        state["_ast"] = None
+        state["_ktype"] = None
+        procedure = copy.copy(self._procedure)
+        procedure._ast = None
+        procedure._kernel_type = None
+        state["_procedure"] = procedure
+        return state
+
+    def __setstate__(self, state):
+        '''Restore this object from the supplied state (as returned by
+        `__getstate__`).
+
+        :param dict state: the state of the object.
+
+        '''
+        self.__dict__.update(state)
+        self._procedure._kernel_type = self
+
+    def restore_parse_tree(self):
+        '''Re-create the parse trees of the kernel module, meta-data and
+        procedure if they were discarded when this object was pickled.
+
+        :raises InternalError: if the parse tree is required but the \
+                               source file of the kernel is not known.
+
+        '''
+        if self._ast is not None:
+            return
+        if not self._source_file:
+            raise InternalError(
+                "The parse tree of kernel '{0}' is not available and its "
+                "source file is not known.".format(self._name))
+        self._ast = get_kernel_parse_tree(self._source_file)
+        self._ktype = get_kernel_metadata(self._name, self._ast)
+        self._procedure._ast, _ = KernelProcedure.get_procedure(
+            self._ktype, self._name, self._ast)
+
+    @property
+    def ast(self):
+        '''
+        :returns: the parse tree of the kernel module.
+        :rtype: :py:class:`fparser.one.block_statements.BeginSource`
+
+        '''
+        self.restore_parse_tree()
+        return self._ast
+
+    @property
+    def source_file(self):
+        '''
+        :returns: the file containing the kernel source or None if it \
+                  is not known.
+        :rtype: str or NoneType
+
+        '''
+        return self._source_file
+
+    @source_file.setter
+    def source_file(self, filepath):
+        '''
+        :param str filepath: the file containing the kernel source.
+
+        '''
+        self._source_file = filepath
 
     def getkerneldescriptors(self, ast, var_name='meta_args'):
         '''Get the required argument metadata information for a
@@ -798,6 +1176,7 @@ class KernelType(object):
         '''
         # Ensure the Fortran2003 parser is initialised
         _ = ParserFactory().create()
+        self.restore_parse_tree()
 
         for statement, _ in fpapi.walk(self._ktype, -1):
             if isinstance(statement, fparser1.typedecl_statements.Integer):
@@ -831,6 +1210,7 @@ class KernelType(object):
         '''
         # Ensure the classes are setup for the Fortran2003 parser
         _ = ParserFactory().create()
+        self.restore_parse_tree()
 
         for statement, _ in fpapi.walk(self._ktype, -1):
             if not isinstance(statement, fparser1.typedecl_statements.Integer):
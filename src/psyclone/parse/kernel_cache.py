@@ -0,0 +1,447 @@
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# -----------------------------------------------------------------------------
+
+'''Module providing a persistent, on-disk cache of parsed kernel code.
+
+Parsing a kernel module with fparser1 and extracting its meta-data is
+one of the most expensive parts of processing an algorithm file and,
+in a typical build, the same (unchanged) kernels are parsed again for
+every algorithm file that references them. The cache stores the
+pickled API-specific meta-data object (but not the parse tree, which
+is re-created from the source only if it is required) in a file
+whose name is a hash of the kernel source, the API, the kernel name and
+anything else that affects the result (PSyclone and fparser
+installations, the configuration file in use). An unchanged kernel
+therefore maps to
+the same cache entry and a modified one to a new entry. The total size
+of the cache is bounded: when it is exceeded, the least-recently-used
+entries are removed until the size is well within the limit (so that
+the directory need not be scanned every time an entry is added).
+
+The cache is enabled by specifying KERNEL_CACHE_DIR in the [DEFAULT]
+section of the PSyclone configuration file. Since the entries are
+un-pickled, the cache directory must be owned by the current user and
+must not be writable by anyone else. A long-running process
+(such as the PSyclone server) may additionally keep entries in memory
+by calling `KernelCache.enable_memory_cache()`, in which case the
+cache is used even if no directory is configured.
+
+'''
+
+from __future__ import absolute_import
+
+import hashlib
+import io
+from collections import OrderedDict
+import os
+import pickle
+import stat
+import sys
+import tempfile
+
+from psyclone.configuration import Config, ConfigurationError
+from psyclone.version import __VERSION__
+
+# Suffix of the files holding cache entries
+CACHE_FILE_SUFFIX = ".pkl"
+
+# Pickle protocol used for cache entries. Protocol 2 is the highest
+# supported by both Python 2 and 3.
+_PICKLE_PROTOCOL = 2
+
+# Fraction of the maximum size to which a cache directory is reduced
+# when it has grown beyond that size.
+_EVICT_FRACTION = 0.9
+
+# Identifies the PSyclone source in use (see _psyclone_source_id).
+_SOURCE_ID = []
+
+
+def _psyclone_source_id():
+    '''The version number of PSyclone is not changed by every modification
+    of its source (e.g. in a development installation) so we identify
+    the source in use by the names, sizes and modification times of all
+    of its Python files. This is only computed once per process.
+
+    :returns: a hash identifying the PSyclone source files.
+    :rtype: str
+
+    '''
+    if not _SOURCE_ID:
+        sha = hashlib.sha256()
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for dirpath, dirnames, filenames in os.walk(root):
+            # Walk the tree in a reproducible order and skip the tests.
+            dirnames[:] = sorted(name for name in dirnames
+                                 if name != "tests")
+            for name in sorted(filenames):
+                if not name.endswith(".py"):
+                    continue
+                path = os.path.join(dirpath, name)
+                file_stat = os.stat(path)
+                sha.update("{0}:{1}:{2}".format(
+                    os.path.relpath(path, root), file_stat.st_size,
+                    file_stat.st_mtime).encode("utf-8"))
+        _SOURCE_ID.append(sha.hexdigest())
+    return _SOURCE_ID[0]
+
+
+class KernelCache(object):
+    '''Persistent, size-bounded cache of parsed kernels, keyed on the
+    content of the kernel source.
+
+    :param cache_dir: the directory in which to store cache entries. \
+                      This is created if it does not exist. If it is \
+                      None then entries are only held in memory.
+    :type cache_dir: str or NoneType
+    :param int max_size: the maximum total size of the cache entries in \
+                         bytes. A value of zero means unbounded.
+
+    :raises ConfigurationError: if the cache directory is not owned by \
+                                the current user or may be written by \
+                                other users.
+
+    For example:
+
+    >>> cache = KernelCache("/tmp/psyclone_cache", 10*1024*1024)
+    >>> key = cache.key("my_kernel_mod.f90", "dynamo0.3", "my_kernel_type")
+    >>> ktype = cache.load(key)
+    >>> if ktype is None:
+    ...     ktype = expensive_parse()
+    ...     cache.store(key, ktype)
+
+    '''
+    # Pickled cache entries held in memory (least-recently-used first)
+    # or None if entries are only held on disk.
+    _memory = None
+    # Total size of the entries in _memory
+    _memory_size = 0
+    # Total size of the entries in each cache directory (in bytes), as
+    # far as is known to this process.
+    _dir_sizes = {}
+
+    def __init__(self, cache_dir, max_size=0):
+        self._cache_dir = None
+        if cache_dir:
+            self._cache_dir = os.path.abspath(cache_dir)
+        self._max_size = max_size
+        if self._cache_dir and not os.path.isdir(self._cache_dir):
+            try:
+                os.makedirs(self._cache_dir, 0o700)
+            except OSError:
+                # The directory may have been created concurrently by
+                # another PSyclone process.
+                if not os.path.isdir(self._cache_dir):
+                    raise
+        if self._cache_dir:
+            self._check_owner()
+
+    def _check_owner(self):
+        '''Un-pickling an entry can execute arbitrary code so we only use
+        a cache directory if no other user can have created its entries.
+
+        :raises ConfigurationError: if the cache directory is not owned \
+                                    by the current user or is group or \
+                                    world writable.
+
+        '''
+        if not hasattr(os, "getuid"):
+            # Ownership cannot be checked on this platform
+            return
+        dir_stat = os.stat(self._cache_dir)
+        if dir_stat.st_uid != os.getuid():
+            raise ConfigurationError(
+                "Kernel cache directory '{0}' is not owned by the current "
+                "user.".format(self._cache_dir))
+        if dir_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            raise ConfigurationError(
+                "Kernel cache directory '{0}' must not be writable by other "
+                "users (permissions are {1}).".format(
+                    self._cache_dir, oct(stat.S_IMODE(dir_stat.st_mode))))
+
+    @staticmethod
+    def create():
+        '''Create a KernelCache as specified by the current configuration.
+
+        :returns: a kernel cache or None if caching is not enabled.
+        :rtype: :py:class:`psyclone.parse.kernel_cache.KernelCache` or \
+                NoneType
+
+        '''
+        config = Config.get()
+        if not config.kernel_cache_dir and KernelCache._memory is None:
+            return None
+        return KernelCache(config.kernel_cache_dir,
+                           config.kernel_cache_size*1024*1024)
+
+    @staticmethod
+    def enable_memory_cache(enable=True):
+        '''Keep cache entries in memory as well as (if a cache directory
+        is configured) on disk. This is only worthwhile in a process that
+        handles many algorithm files.
+
+        :param bool enable: whether to enable (True) or disable and \
+                            empty (False) the in-memory cache.
+
+        '''
+        if not enable:
+            KernelCache._memory = None
+        elif KernelCache._memory is None:
+            KernelCache._memory = OrderedDict()
+        else:
+            return
+        KernelCache._memory_size = 0
+
+    @property
+    def cache_dir(self):
+        '''
+        :returns: the directory holding the cache entries or None if \
+                  entries are only held in memory.
+        :rtype: str or NoneType
+
+        '''
+        return self._cache_dir
+
+    @staticmethod
+    def key(filepath, *qualifiers):
+        '''Compute the key of the cache entry for the supplied source file.
+        The key depends on the content of the file (not its name or
+        modification time), on the PSyclone and fparser installations in
+        use and on any additional qualifiers supplied (such as the API and
+        kernel name).
+
+        :param filepath: the kernel source file or None for entries that \
+                         are not derived from the content of a file.
+        :type filepath: str or NoneType
+        :param qualifiers: additional strings that distinguish entries \
+                           derived from the same source.
+        :type qualifiers: list of str
+
+        :returns: the key of the cache entry.
+        :rtype: str
+
+        '''
+        import fparser
+        config = Config.get()
+        sha = hashlib.sha256()
+        # fparser does not provide a version number so we use the location
+        # and modification time of its installation to detect any change.
+        fparser_id = "{0}:{1}".format(fparser.__file__,
+                                      os.path.getmtime(fparser.__file__))
+        for item in [__VERSION__, _psyclone_source_id(), fparser_id,
+                     str(sys.version_info[0])] + list(qualifiers):
+            sha.update(item.encode("utf-8"))
+            sha.update(b"\0")
+        if config.filename and os.path.isfile(config.filename):
+            # The content of the configuration file (e.g. the access
+            # mappings) affects the meta-data we extract.
+            with io.open(config.filename, "rb") as cfile:
+                sha.update(cfile.read())
+        if filepath:
+            with io.open(filepath, "rb") as sfile:
+                sha.update(sfile.read())
+        return sha.hexdigest()
+
+    def _path(self, key):
+        '''
+        :param str key: the key of a cache entry.
+
+        :returns: the path of the file holding the specified cache entry.
+        :rtype: str
+
+        '''
+        return os.path.join(self._cache_dir, key + CACHE_FILE_SUFFIX)
+
+    def load(self, key):
+        '''Look up an entry in the cache.
+
+        :param str key: the key of the entry as returned by `key()`.
+
+        :returns: the cached object or None if there is no (valid) entry.
+
+        '''
+        memory = KernelCache._memory
+        if memory is not None and key in memory:
+            data = memory.pop(key)
+            memory[key] = data
+            # Each caller gets a new copy of the object.
+            return pickle.loads(data)
+        if not self._cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            with io.open(path, "rb") as cfile:
+                data = cfile.read()
+            obj = pickle.loads(data)
+        except (IOError, OSError):
+            # No entry for this key
+            return None
+        except Exception:  # pylint: disable=broad-except
+            # The entry is corrupt (e.g. truncated). Remove it so that it
+            # is re-created.
+            self._remove(path)
+            return None
+        # Record that this entry has been used so that it is not evicted
+        # in preference to entries that have not been used recently.
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        self._store_in_memory(key, data)
+        return obj
+
+    def store(self, key, obj):
+        '''Add an entry to the cache, evicting old entries if the cache
+        has grown beyond its maximum size. Failure to write an entry (for
+        example because the object cannot be pickled) is not an error as
+        the cache is just an optimisation.
+
+        :param str key: the key of the entry as returned by `key()`.
+        :param obj: the object to store.
+
+        '''
+        try:
+            data = pickle.dumps(obj, _PICKLE_PROTOCOL)
+        except Exception:  # pylint: disable=broad-except
+            return
+        self._store_in_memory(key, data)
+        if not self._cache_dir:
+            return
+        # Write to a temporary file and then rename it so that concurrent
+        # PSyclone processes never see a partially-written entry.
+        try:
+            fdesc, tmp_path = tempfile.mkstemp(dir=self._cache_dir,
+                                               suffix=".tmp")
+            with os.fdopen(fdesc, "wb") as cfile:
+                cfile.write(data)
+            os.rename(tmp_path, self._path(key))
+        except (IOError, OSError):
+            return
+        if not self._max_size:
+            return
+        # Keep a running total of the size of the directory so that it is
+        # only scanned when it (probably) needs to be reduced.
+        dir_sizes = KernelCache._dir_sizes
+        if self._cache_dir in dir_sizes:
+            dir_sizes[self._cache_dir] += len(data)
+        else:
+            dir_sizes[self._cache_dir] = sum(
+                entry[1] for entry in self.entries())
+        if dir_sizes[self._cache_dir] > self._max_size:
+            self.evict()
+
+    def _store_in_memory(self, key, data):
+        '''Add a pickled entry to the in-memory cache (if it is enabled),
+        evicting the least-recently-used entries if the total size
+        exceeds the limit of this cache.
+
+        :param str key: the key of the entry.
+        :param bytes data: the pickled object.
+
+        '''
+        memory = KernelCache._memory
+        if memory is None:
+            return
+        old_data = memory.pop(key, None)
+        if old_data is not None:
+            KernelCache._memory_size -= len(old_data)
+        memory[key] = data
+        KernelCache._memory_size += len(data)
+        if self._max_size:
+            while (KernelCache._memory_size > self._max_size and
+                   len(memory) > 1):
+                _, value = memory.popitem(last=False)
+                KernelCache._memory_size -= len(value)
+
+    def entries(self):
+        '''
+        :returns: the cache entries as (last-used time, size, path) \
+                  tuples, least-recently-used first.
+        :rtype: list of (float, int, str)
+
+        '''
+        entries = []
+        if not self._cache_dir:
+            return entries
+        for name in os.listdir(self._cache_dir):
+            if not name.endswith(CACHE_FILE_SUFFIX):
+                continue
+            path = os.path.join(self._cache_dir, name)
+            try:
+                file_stat = os.stat(path)
+            except OSError:
+                # Removed by another process
+                continue
+            entries.append((file_stat.st_mtime, file_stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def evict(self):
+        '''If the total size of the cache directory exceeds its limit,
+        remove the least-recently-used entries until the size is within
+        a fraction (_EVICT_FRACTION) of the limit.'''
+        if not self._max_size:
+            return
+        entries = self.entries()
+        total = sum(entry[1] for entry in entries)
+        if total > self._max_size:
+            for _, size, path in entries:
+                if total <= self._max_size*_EVICT_FRACTION:
+                    break
+                self._remove(path)
+                total -= size
+        if self._cache_dir:
+            KernelCache._dir_sizes[self._cache_dir] = total
+
+    def clear(self):
+        '''Remove all entries from the cache.'''
+        if KernelCache._memory is not None:
+            KernelCache._memory.clear()
+            KernelCache._memory_size = 0
+        for _, _, path in self.entries():
+            self._remove(path)
+        KernelCache._dir_sizes.pop(self._cache_dir, None)
+
+    @staticmethod
+    def _remove(path):
+        '''Remove the specified file, ignoring any failure (the file may
+        already have been removed by another process).
+
+        :param str path: the file to remove.
+
+        '''
+        try:
+            os.remove(path)
+        except OSError:
+            pass
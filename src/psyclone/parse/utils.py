@@ -40,12 +40,11 @@ the parser modules.
 
 import io
 
+import six
 from psyclone.configuration import Config
 from psyclone.line_length import FortLineLength
 from psyclone.psyGen import InternalError
-from fparser.two.parser import ParserFactory
-from fparser.common.readfortran import FortranFileReader
-from fparser.two.utils import FortranSyntaxError
+from fparser.common.sourceinfo import get_source_info
 
 # Exceptions
 
@@ -109,6 +108,31 @@ def check_line_length(filename):
             "length limit".format(str(fll.length)))
 
 
+def read_fortran_source(filename):
+    '''Read the content of a Fortran source file so that it can be passed
+    to fparser as a string. (Given a file name, fparser creates a
+    temporary copy of the file that is only removed when the reader, and
+    therefore the parse tree, is destroyed. A process forked while such a
+    tree exists would then also remove the file.) As in fparser, any
+    invalid characters in the file are skipped.
+
+    :param str filename: the file to read.
+
+    :returns: the content of the file and its source format (e.g. free \
+              or fixed form, as determined from its suffix and content).
+    :rtype: (str, :py:class:`fparser.common.sourceinfo.FortranFormat`)
+
+    :raises IOError: if the file cannot be read.
+
+    '''
+    with io.open(filename, "r", encoding="utf8", errors="ignore") as ffile:
+        source = ffile.read()
+    if six.PY2:
+        # fparser expects an encoded string
+        source = source.encode("utf-8")
+    return source, get_source_info(filename)
+
+
 def parse_fp2(filename):
     '''Parse a Fortran source file contained in the file 'filename' using
     fparser2.
@@ -119,16 +143,23 @@ def parse_fp2(filename):
     :raises ParseError: if the file could not be parsed.
 
     '''
+    # fparser2 is only imported when it is needed so that e.g.
+    # 'psyclone -v' does not load it.
+    from fparser.two.parser import ParserFactory
+    from fparser.common.readfortran import FortranStringReader
+    from fparser.two.utils import FortranSyntaxError
     parser = ParserFactory().create()
     # We get the directories to search for any Fortran include files from
     # our configuration object.
     config = Config.get()
     try:
-        reader = FortranFileReader(filename, include_dirs=config.include_paths)
+        source, source_format = read_fortran_source(filename)
     except IOError as error:
         raise ParseError(
             "algorithm.py:parse_fp2: Failed to parse file '{0}'. Error "
             "returned was ' {1} '.".format(filename, error))
+    reader = FortranStringReader(source, include_dirs=config.include_paths)
+    reader.set_format(source_format)
     try:
         parse_tree = parser(reader)
     except FortranSyntaxError as msg:
@@ -38,7 +38,6 @@
     generated by PSyclone. '''
 
 from __future__ import absolute_import, print_function
-from psyclone.f2pygen import CallGen, TypeDeclGen, UseGen
 from psyclone.psyGen import colored, GenerationError, Kern, NameSpace, \
      NameSpaceFactory, Node, SCHEDULE_COLOUR_MAP
 
@@ -85,6 +84,14 @@ class Profiler(object):
         # Store options so they can be queried later
         Profiler._options = options
 
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def get_options():
+        '''Returns the automatic profiling options that have been set.
+        :return: a copy of the options selected by the user.
+        :rtype: list of str'''
+        return list(Profiler._options)
+
     # -------------------------------------------------------------------------
     @staticmethod
     def profile_kernels():
@@ -112,6 +119,10 @@ class Profiler(object):
         :param loop_class: The loop class (e.g. GOLoop, DynLoop) to instrument.
         :type loop_class: :py::class::`psyclone.psyGen.Loop` or derived class.
         '''
+        if not Profiler._options:
+            # Avoid importing the transformations (and with them the
+            # back-ends of every API) if there is nothing to do.
+            return
 
         from psyclone.transformations import ProfileRegionTrans
         profile_trans = ProfileRegionTrans()
@@ -200,6 +211,7 @@ class ProfileNode(Node):
         of this node.
         :param parent: The parent of this node.
         :type parent: :py:class:`psyclone.psyGen.Node`.'''
+        from psyclone.f2pygen import CallGen, TypeDeclGen, UseGen
 
         if self._module_name is None or self._region_name is None:
             # Find the first kernel and use its name. In an untransformed
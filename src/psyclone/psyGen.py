@@ -42,11 +42,13 @@
 from __future__ import print_function, absolute_import
 from enum import Enum
 import abc
+import bisect
 from collections import OrderedDict
+import itertools
 import six
-from fparser.two import Fortran2003
 from psyclone.configuration import Config
 from psyclone.core.access_info import VariablesAccessInfo, AccessType
+from psyclone.file_dependencies import FileDependencies
 
 # We use the termcolor module (if available) to enable us to produce
 # coloured, textual representations of Invoke schedules. If it's not
@@ -75,11 +77,6 @@ except ImportError:
 # may have
 FORTRAN_INTENT_NAMES = ["inout", "out", "in"]
 
-# The list of Fortran instrinsic functions that we know about (and can
-# therefore distinguish from array accesses). These are taken from
-# fparser.
-FORTRAN_INTRINSICS = Fortran2003.Intrinsic_Name.function_names
-
 # OMP_OPERATOR_MAPPING is used to determine the operator to use in the
 # reduction clause of an OpenMP directive. All code for OpenMP
 # directives exists in psyGen.py so this mapping should not be
@@ -121,6 +118,167 @@ SCHEDULE_COLOUR_MAP = {"Schedule": "white",
 # Default indentation string
 INDENTATION_STRING = "    "
 
+# Name of the directory (within the kernel output directory) holding the
+# index of the transformed kernels that have been written
+KERNEL_INDEX_DIR = ".psyclone_kernel_index"
+
+
+def _kernel_index_key(base_name, code):
+    '''
+    :param str base_name: the name of the original kernel module (without \
+                          any "_mod").
+    :param str code: the code of the transformed kernel before it is renamed.
+
+    :returns: the key of the kernel-index entry for this transformed kernel.
+    :rtype: str
+
+    '''
+    import hashlib
+    from psyclone.version import __VERSION__
+    sha = hashlib.sha256()
+    for item in [__VERSION__, base_name, code]:
+        sha.update(item.encode("utf-8"))
+        sha.update(b"\0")
+    return sha.hexdigest()
+
+
+def _file_hash(path):
+    '''
+    :param str path: the file to hash.
+
+    :returns: the hash of the content of the file.
+    :rtype: str
+
+    '''
+    import hashlib
+    import io
+    with io.open(path, "rb") as hfile:
+        return hashlib.sha256(hfile.read()).hexdigest()
+
+
+def _read_kernel_index(kernel_output_dir, key):
+    '''
+    Look up a transformed kernel in the index of the kernel output
+    directory. An entry is only valid if the kernel file that it refers
+    to still has the content that was written.
+
+    :param str kernel_output_dir: the kernel output directory.
+    :param str key: the key of the entry as returned by `_kernel_index_key`.
+
+    :returns: the name of the file (within the kernel output directory) \
+              holding the same transformed kernel or None if there is none.
+    :rtype: str or NoneType
+
+    '''
+    import os
+    try:
+        with open(os.path.join(kernel_output_dir, KERNEL_INDEX_DIR,
+                               key)) as ifile:
+            name, file_hash = ifile.read().split()
+        if _file_hash(os.path.join(kernel_output_dir, name)) == file_hash:
+            return name
+    except (IOError, OSError, ValueError):
+        # No (valid) entry for this kernel or its file has been removed
+        pass
+    return None
+
+
+def _write_kernel_index(kernel_output_dir, key, name):
+    '''
+    Add an entry to the index of the kernel output directory. The entry is
+    written to a temporary file and then renamed so that concurrent
+    PSyclone processes never see a partially-written entry. Failure to
+    write an entry is not an error as the index is just an optimisation.
+
+    :param str kernel_output_dir: the kernel output directory.
+    :param str key: the key of the entry as returned by `_kernel_index_key`.
+    :param str name: the name of the file (within the kernel output \
+                     directory) holding the transformed kernel.
+
+    '''
+    import os
+    import tempfile
+    index_dir = os.path.join(kernel_output_dir, KERNEL_INDEX_DIR)
+    try:
+        if not os.path.isdir(index_dir):
+            try:
+                os.makedirs(index_dir)
+            except OSError:
+                # The directory may have been created concurrently by
+                # another PSyclone process.
+                if not os.path.isdir(index_dir):
+                    raise
+        entry = "{0} {1}\n".format(
+            name, _file_hash(os.path.join(kernel_output_dir, name)))
+        fdesc, tmp_path = tempfile.mkstemp(dir=index_dir, suffix=".tmp")
+        with os.fdopen(fdesc, "w") as ifile:
+            ifile.write(entry)
+        os.rename(tmp_path, os.path.join(index_dir, key))
+    except (IOError, OSError):
+        pass
+
+
+# The transformed kernels being written by PSy.write_kernels(). The worker
+# processes are forked and so inherit this list (fparser2 parse trees
+# cannot be pickled).
+_KERNELS_TO_WRITE = []
+
+
+def _kernel_index_key_worker(idx):
+    '''Computes the kernel-index key of a transformed kernel in a worker
+    process (see PSy.write_kernels).
+
+    :param int idx: the index of the kernel in _KERNELS_TO_WRITE.
+
+    :returns: the key of the kernel-index entry for the kernel.
+    :rtype: str
+
+    '''
+    kern = _KERNELS_TO_WRITE[idx]
+    return _kernel_index_key(kern._output_base_name(), str(kern.ast))
+
+
+def _write_kernel_worker(work):
+    '''Generates the code of a (renamed) transformed kernel, limiting the
+    line lengths, and writes it to file in a worker process (see
+    PSy.write_kernels).
+
+    :param work: the index of the kernel in _KERNELS_TO_WRITE and the \
+                 path of the (new, empty) file to which to write it.
+    :type work: (int, str)
+
+    '''
+    from psyclone.line_length import FortLineLength
+    idx, path = work
+    with open(path, "w") as ffile:
+        FortLineLength().write(str(_KERNELS_TO_WRITE[idx].ast), ffile)
+
+
+def _map_kernels(func, work, jobs):
+    '''Applies the supplied function to each item of work using a pool of
+    forked processes.
+
+    :param func: the function to apply.
+    :type func: function
+    :param list work: the items of work.
+    :param int jobs: the maximum number of processes to use.
+
+    :returns: the results in the same order as the work list (so that \
+              the outcome is independent of scheduling).
+    :rtype: list
+
+    '''
+    import multiprocessing
+    context = multiprocessing
+    if hasattr(multiprocessing, "get_context"):
+        context = multiprocessing.get_context("fork")
+    pool = context.Pool(processes=min(jobs, len(work)))
+    try:
+        return pool.map(func, work)
+    finally:
+        pool.close()
+        pool.join()
+
 
 def object_index(alist, item):
     '''
@@ -370,6 +528,79 @@ class PSy(object):
                         inlined_kernel_names.append(kernel.name.lower())
                         module.add_raw_subroutine(kernel._kernel_code)
 
+    def write_kernels(self, jobs=1):
+        '''
+        Renames and writes to file all of the transformed (Fortran) kernels
+        called from this PSy layer (see `CodedKern.rename_and_write`). This
+        is otherwise done as each kernel call is generated. If more than one
+        job is requested, the code of the kernels is generated, line-wrapped
+        and written concurrently by a pool of processes. The new names of
+        the kernels are still chosen by this process, in the order in which
+        the kernels are called, so that they do not depend on the
+        scheduling of the work.
+
+        :param int jobs: the number of processes to use.
+
+        '''
+        import os
+        kernels = [kern for invoke in self.invokes.invoke_list
+                   for kern in invoke.schedule.coded_kernels()
+                   if kern.modified and not kern.root.opencl]
+        if jobs < 2 or len(kernels) < 2 or not hasattr(os, "fork"):
+            for kern in kernels:
+                kern.rename_and_write()
+            return
+
+        config = Config.get()
+        _KERNELS_TO_WRITE[:] = kernels
+        claims = []
+        written = False
+        try:
+            if config.kernel_naming == "multiple":
+                index_keys = _map_kernels(_kernel_index_key_worker,
+                                          list(range(len(kernels))), jobs)
+            else:
+                index_keys = [None] * len(kernels)
+
+            # Choose the name of each kernel (and claim any new files). Any
+            # kernel that is identical to one that is to be written by this
+            # call is given the same name.
+            new_names = {}
+            for kern, index_key in zip(kernels, index_keys):
+                new_path, fdesc = kern._claim_output_file(
+                    index_key, new_names.get(index_key))
+                if fdesc:
+                    os.close(fdesc)
+                    if index_key:
+                        new_names[index_key] = os.path.basename(new_path)
+                claims.append((new_path, fdesc is not None))
+
+            # The pool is created after the kernels have been renamed.
+            work = [(idx, new_path) for idx, (new_path, new_file) in
+                    enumerate(claims) if new_file]
+            if work:
+                _map_kernels(_write_kernel_worker, work, jobs)
+            written = True
+
+            for kern, index_key, (new_path, new_file) in zip(
+                    kernels, index_keys, claims):
+                if new_file:
+                    FileDependencies.add_output(new_path)
+                    if index_key:
+                        _write_kernel_index(config.kernel_output_dir,
+                                            index_key,
+                                            os.path.basename(new_path))
+                else:
+                    kern._write_output_file(new_path, None, index_key)
+        finally:
+            del _KERNELS_TO_WRITE[:]
+            if not written:
+                # Do not leave behind any (empty or partially written)
+                # files that have been claimed for the kernels.
+                for new_path, new_file in claims:
+                    if new_file and os.path.exists(new_path):
+                        os.remove(new_path)
+
 
 class Invokes(object):
     '''Manage the invoke calls
@@ -505,20 +736,87 @@ class NameSpaceFactory(object):
 
 class NameSpace(object):
     '''keeps a record of reserved names and used names for clashes and
-        provides a new name if there is a clash. '''
+        provides a new name if there is a clash. Name spaces may be
+        nested (e.g. a subroutine within a module) by creating a new
+        scope with :py:meth:`new_scope`. A name created in a scope is
+        never one that is already in use in that scope, in any of its
+        ancestors or in any of its nested scopes, but sibling scopes
+        may return the same name.
+
+    :param bool case_sensitive: whether names that differ only in case \
+                                are distinct.
+    :param parent: the enclosing name space, if any.
+    :type parent: :py:class:`psyclone.psyGen.NameSpace`
 
-    def __init__(self, case_sensitive=False):
-        self._reserved_names = []
-        self._added_names = []
+    '''
+    def __init__(self, case_sensitive=False, parent=None):
+        if parent is not None:
+            case_sensitive = parent._case_sensitive
+        self._reserved_names = set()
+        self._added_names = set()
+        # Names reserved and created in nested scopes
+        self._nested_reserved_names = set()
+        self._nested_added_names = set()
         self._context = {}
+        # The last suffix used for each root name
+        self._counters = {}
         self._case_sensitive = case_sensitive
+        self._parent = parent
+
+    @property
+    def parent(self):
+        '''
+        :returns: the enclosing name space or None if this is the \
+                  outermost scope.
+        :rtype: :py:class:`psyclone.psyGen.NameSpace` or NoneType
+
+        '''
+        return self._parent
+
+    def new_scope(self):
+        '''
+        :returns: a new name space nested within this one.
+        :rtype: :py:class:`psyclone.psyGen.NameSpace`
+
+        '''
+        return NameSpace(parent=self)
+
+    def _ancestors(self):
+        '''
+        :returns: this name space followed by each enclosing one.
+        :rtype: generator of :py:class:`psyclone.psyGen.NameSpace`
+
+        '''
+        scope = self
+        while scope is not None:
+            yield scope
+            scope = scope._parent
+
+    def _in_use(self, name):
+        '''
+        :param str name: a (normalised) name.
+
+        :returns: whether the name is reserved or has already been \
+                  returned by this name space, an enclosing one or one \
+                  nested within it.
+        :rtype: bool
+
+        '''
+        if name in self._nested_added_names or \
+                name in self._nested_reserved_names:
+            return True
+        for scope in self._ancestors():
+            if name in scope._added_names or name in scope._reserved_names:
+                return True
+        return False
 
     def create_name(self, root_name=None, context=None, label=None):
         '''Returns a unique name. If root_name is supplied, the name returned
             is based on this name, otherwise one is made up.  If
             context and label are supplied and a previous create_name
-            has been called with the same context and label then the
-            name provided by the previous create_name is returned.
+            has been called with the same context and label (in this
+            or an enclosing scope) then the name provided by the
+            previous create_name is returned.
         '''
         # make up a base name if one has not been supplied
         if root_name is None:
@@ -543,28 +841,30 @@ class NameSpace(object):
             if not self._case_sensitive:
                 label = label.lower()
                 context = context.lower()
-            if context in self._context:
-                if label in self._context[context]:
+            for scope in self._ancestors():
+                if label in scope._context.get(context, {}):
                     # context and label have already been supplied
-                    return self._context[context][label]
-            else:
-                # initialise the context so we can add the label value later
-                self._context[context] = {}
+                    return scope._context[context][label]
+            # initialise the context so we can add the label value later
+            self._context.setdefault(context, {})
 
-        # create our name
-        if lname not in self._reserved_names and \
-                lname not in self._added_names:
+        # create our name. Names are never removed so any suffix up to
+        # the last one used for this root name is still in use.
+        if not self._in_use(lname):
             proposed_name = lname
         else:
-            count = 1
+            count = self._counters.get(lname, 0) + 1
             proposed_name = lname + "_" + str(count)
-            while proposed_name in self._reserved_names or \
-                    proposed_name in self._added_names:
+            while self._in_use(proposed_name):
                 count += 1
                 proposed_name = lname+"_"+str(count)
+            self._counters[lname] = count
 
         # store our name
-        self._added_names.append(proposed_name)
+        self._added_names.add(proposed_name)
+        for scope in self._ancestors():
+            if scope is not self:
+                scope._nested_added_names.add(proposed_name)
         if context is not None and label is not None:
             self._context[context][label] = proposed_name
 
@@ -577,12 +877,19 @@ class NameSpace(object):
         else:
             lname = name
         # silently ignore if this is already a reserved name
-        if lname not in self._reserved_names:
-            if lname in self._added_names:
-                raise RuntimeError(
-                    "attempted to add a reserved name to a namespace that"
-                    " has already used that name")
-            self._reserved_names.append(lname)
+        if any(lname in scope._reserved_names
+               for scope in self._ancestors()):
+            return
+        if lname in self._nested_added_names or \
+                any(lname in scope._added_names
+                    for scope in self._ancestors()):
+            raise RuntimeError(
+                "attempted to add a reserved name to a namespace that"
+                " has already used that name")
+        self._reserved_names.add(lname)
+        for scope in self._ancestors():
+            if scope is not self:
+                scope._nested_reserved_names.add(lname)
 
     def add_reserved_names(self, names):
         ''' adds a list of reserved names '''
@@ -921,6 +1228,177 @@ class Invoke(object):
         parent.add(invoke_sub)
 
 
+# Source of the versions of PSyIR trees. The root of each tree stores a
+# version that is replaced by a new value from this counter whenever the
+# structure of the tree changes (a list of children is modified or a node
+# is given a new parent). Values computed from the structure of a tree
+# (the absolute positions of its nodes) are cached along with the version
+# of its root and are only used while it is unchanged. As every version is
+# unique, a value cached in one tree is never valid in another.
+_TREE_VERSIONS = itertools.count(1)
+
+
+def _tree_modified(node, nodes=()):
+    '''
+    Record that the structure of the PSyIR tree containing a node has
+    changed.
+
+    :param node: a node in the tree that has changed.
+    :type node: :py:class:`psyclone.psyGen.Node`
+    :param nodes: the nodes that have been added to or removed from a \
+                  list of children (or moved within it).
+    :type nodes: list of :py:class:`psyclone.psyGen.Node`
+
+    '''
+    root = node.root
+    root._tree_version = next(_TREE_VERSIONS)
+    if nodes and root._dependency_graph is not None:
+        root._dependency_graph.modified(nodes)
+
+
+# The number of nodes that hold the accesses to the variables in their
+# sub-tree (see Node.var_accesses). While it is zero, there is nothing to
+# invalidate when a tree is modified.
+_CACHED_VAR_ACCESSES = [0]
+
+
+class ChildrenList(list):
+    '''
+    The list of the children of a PSyIR Node. It behaves exactly like a
+    list but also stores the index of each child in the list in the
+    child itself (and so the position of a node relative to its parent
+    is found in constant time). The indices are updated whenever the list
+    is modified (only the children that move are updated), the depth of
+    any child that is added is brought up to date (see Node.depth) and the
+    accesses to variables cached by the node to which the list belongs
+    (and by its ancestors) are discarded.
+
+    :param iterable: the initial children.
+    :type iterable: iterable of :py:class:`psyclone.psyGen.Node`
+    :param node: the node whose children these are.
+    :type node: :py:class:`psyclone.psyGen.Node` or NoneType
+
+    '''
+    __slots__ = ("_node",)
+
+    def __init__(self, iterable=(), node=None):
+        super(ChildrenList, self).__init__(iterable)
+        self._node = node
+        self._renumber(0, changed=self)
+
+    def _renumber(self, start, stop=None, changed=()):
+        ''' Update the indices stored in the children from index start
+        (up to but not including stop, or to the end of the list).
+
+        :param int start: the index of the first child to update.
+        :param stop: the index after that of the last child to update.
+        :type stop: int or NoneType
+        :param changed: the children that have been added, removed or \
+                        reordered (rather than just shifted).
+        :type changed: list of :py:class:`psyclone.psyGen.Node`
+
+        '''
+        if self._node is not None:
+            _tree_modified(self._node, changed)
+            if changed:
+                self._node.invalidate_var_accesses()
+        for child in changed:
+            if isinstance(child, Node):
+                # The parent of the child may have been set before its
+                # own depth changed.
+                child._update_depth()
+        if stop is None:
+            stop = len(self)
+        for idx in range(max(start, 0), stop):
+            child = list.__getitem__(self, idx)
+            try:
+                child._position = idx
+            except AttributeError:
+                # Not a Node (e.g. created by a test)
+                pass
+
+    @staticmethod
+    def _start(index, length):
+        '''
+        :param index: an index or slice of a list.
+        :type index: int or slice
+        :param int length: the length of the list before it is modified.
+
+        :returns: the first index of the list affected by the index.
+        :rtype: int
+        '''
+        if isinstance(index, slice):
+            return index.indices(length)[0] if index.step in (None, 1) else 0
+        return index + length if index < 0 else index
+
+    def append(self, child):
+        super(ChildrenList, self).append(child)
+        self._renumber(len(self) - 1, changed=[child])
+
+    def insert(self, index, child):
+        start = min(self._start(index, len(self)), len(self))
+        super(ChildrenList, self).insert(index, child)
+        self._renumber(start, changed=[child])
+
+    def extend(self, iterable):
+        start = len(self)
+        super(ChildrenList, self).extend(iterable)
+        self._renumber(start, changed=self[start:])
+
+    def __iadd__(self, iterable):
+        self.extend(iterable)
+        return self
+
+    def remove(self, child):
+        # Remove the child itself rather than one that compares equal
+        for idx, other in enumerate(self):
+            if other is child:
+                self.pop(idx)
+                return
+        super(ChildrenList, self).remove(child)
+
+    def pop(self, index=-1):
+        start = self._start(index, len(self))
+        child = super(ChildrenList, self).pop(index)
+        self._renumber(start, changed=[child])
+        return child
+
+    def __setitem__(self, index, value):
+        start = self._start(index, len(self))
+        if isinstance(index, slice):
+            value = list(value)
+            changed = self[index] + value
+        else:
+            changed = [self[index], value]
+        super(ChildrenList, self).__setitem__(index, value)
+        if isinstance(index, slice):
+            self._renumber(start, changed=changed)
+        else:
+            self._renumber(start, start + 1, changed=changed)
+
+    def __delitem__(self, index):
+        start = self._start(index, len(self))
+        if isinstance(index, slice):
+            changed = self[index]
+        else:
+            changed = [self[index]]
+        super(ChildrenList, self).__delitem__(index)
+        self._renumber(start, changed=changed)
+
+    def reverse(self):
+        super(ChildrenList, self).reverse()
+        self._renumber(0, changed=self)
+
+    def sort(self, *args, **kwargs):
+        super(ChildrenList, self).sort(*args, **kwargs)
+        self._renumber(0, changed=self)
+
+    def __reduce_ex__(self, protocol):
+        # Copy and pickle as a ChildrenList (rather than as a list with
+        # extra attributes).
+        return (ChildrenList, (list(self), self._node))
+
+
 class Node(object):
     '''
     Base class for a node in the PSyIR (schedule).
@@ -941,19 +1419,55 @@ class Node(object):
     # the tree (absolute or relative to a parent).
     START_POSITION = 0
 
+    # The nodes of a PSyIR tree can number hundreds of thousands (e.g. for
+    # a large NEMO source file) so Node and the sub-classes that are
+    # created in large numbers define __slots__ rather than having a
+    # __dict__. _position is the index of this node in the list of
+    # children of its parent (maintained by
+    # :py:class:`psyclone.psyGen.ChildrenList`) and _depth the number of
+    # its ancestors (maintained when its parent is set or it is added to
+    # a list of children). _tree_version is the version of the tree of
+    # which this node is the root (see _tree_modified()) and
+    # _dependency_graph the DependencyGraph of that tree once it has been
+    # requested. _abs_position is the cached
+    # absolute position of this node and _abs_version the version of the
+    # root of its tree for which it is valid. _var_accesses holds the
+    # accesses to variables in the sub-tree of this node once they have
+    # been requested.
+    __slots__ = ("_child_list", "_parent", "_ast", "_ast_end", "_annotations",
+                 "_position", "_depth", "_tree_version", "_dependency_graph",
+                 "_abs_position", "_abs_version", "_var_accesses")
+
+    def __new__(cls, *args, **kwargs):
+        # pylint: disable=unused-argument
+        # The cached values are initialised here as not all sub-classes
+        # call Node.__init__() (e.g. built-ins before they are loaded).
+        node = super(Node, cls).__new__(cls)
+        node._parent = None
+        node._position = None
+        node._depth = 0
+        node._tree_version = next(_TREE_VERSIONS)
+        node._dependency_graph = None
+        node._abs_position = None
+        node._abs_version = None
+        node._var_accesses = None
+        return node
+
     def __init__(self, ast=None, children=None, parent=None):
         if not children:
             self._children = []
         else:
             self._children = children
         self._parent = parent
+        self._update_depth()
         # Reference into fparser2 AST (if any)
         self._ast = ast
         # Ref. to last fparser2 parse tree node associated with this Node.
         # This is required when adding directives.
         self._ast_end = None
-        # List of tags that provide additional information about this Node.
-        self._annotations = []
+        # List of tags that provide additional information about this Node
+        # (only created if there are any as most nodes have none).
+        self._annotations = None
 
     def __str__(self):
         raise NotImplementedError("Please implement me")
@@ -1003,6 +1517,9 @@ class Node(object):
         :return: List of anotations
         :rtype: list of str
         '''
+        if self._annotations is None:
+            # Only nodes that are annotated need a list
+            self._annotations = []
         return self._annotations
 
     def dag(self, file_name='dag', file_format='svg'):
@@ -1253,12 +1770,27 @@ class Node(object):
         :returns: depth of the Node in the tree
         :rtype: int
         '''
-        my_depth = self.START_DEPTH
-        node = self
-        while node is not None:
-            node = node.parent
-            my_depth += 1
-        return my_depth
+        return self.START_DEPTH + 1 + self._depth
+
+    def _update_depth(self):
+        '''
+        Bring the depth of this node up to date with that of its parent
+        and, if it has changed, update the depths of its descendants.
+
+        '''
+        depth = 0 if self._parent is None else self._parent._depth + 1
+        if depth == self._depth:
+            return
+        self._depth = depth
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            # The children may not have been set yet (e.g. if a sub-class
+            # sets the parent of a node first).
+            for child in getattr(node, "_child_list", None) or ():
+                if isinstance(child, Node) and child._parent is node:
+                    child._depth = node._depth + 1
+                    stack.append(child)
 
     @abc.abstractmethod
     def view(self, indent=0):
@@ -1299,6 +1831,25 @@ class Node(object):
         else:
             self._children.append(child)
 
+    @property
+    def _children(self):
+        return self._child_list
+
+    @_children.setter
+    def _children(self, my_children):
+        # Store a list of children as a ChildrenList so that the position
+        # of each child is maintained.
+        old_children = getattr(self, "_child_list", None)
+        if isinstance(my_children, ChildrenList):
+            my_children._node = self
+            my_children._renumber(0, changed=my_children)
+        elif isinstance(my_children, list):
+            my_children = ChildrenList(my_children, self)
+        self._child_list = my_children
+        if old_children:
+            _tree_modified(self, old_children)
+            self.invalidate_var_accesses()
+
     @property
     def children(self):
         return self._children
@@ -1313,7 +1864,15 @@ class Node(object):
 
     @parent.setter
     def parent(self, my_parent):
+        if self._parent is not None:
+            # This node (and its sub-tree) leaves the tree it was in
+            _tree_modified(self._parent)
         self._parent = my_parent
+        if my_parent is not None:
+            # This node is no longer the root of a tree
+            self._dependency_graph = None
+        self._update_depth()
+        _tree_modified(self)
 
     @property
     def position(self):
@@ -1324,9 +1883,18 @@ class Node(object):
         :returns: relative position of a Node to its parent
         :rtype: int
         '''
-        if self.parent is None:
+        if self._parent is None:
             return self.START_POSITION
-        return self.parent.children.index(self)
+        siblings = self._parent.children
+        position = self._position
+        if position is None or position >= len(siblings) or \
+           siblings[position] is not self:
+            # This node is not where it was last recorded (e.g. it has
+            # been moved to a new parent whose children were modified
+            # before its parent was updated) so search for it.
+            position = siblings.index(self)
+            self._position = position
+        return position
 
     @property
     def abs_position(self):
@@ -1340,14 +1908,24 @@ class Node(object):
 
         :raises InternalError: if the absolute position cannot be found
         '''
-        if self.root == self and isinstance(self.root, Schedule):
-            return self.START_POSITION
-        found, position = self._find_position(self.root.children,
-                                              self.START_POSITION)
-        if not found:
+        root = self.root
+        if self._abs_version == root._tree_version:
+            return self._abs_position
+        if root is self and not isinstance(root, Schedule):
             raise InternalError("Error in search for Node position "
                                 "in the tree")
-        return position
+        # Number every node in the tree in one traversal so that the
+        # positions of the other nodes are also known until the tree
+        # changes.
+        version = root._tree_version
+        for position, node in enumerate(root.iter_walk(Node),
+                                        self.START_POSITION):
+            node._abs_position = position
+            node._abs_version = version
+        if self._abs_version != version:
+            raise InternalError("Error in search for Node position "
+                                "in the tree")
+        return self._abs_position
 
     def _find_position(self, children, position):
         '''
@@ -1392,25 +1970,71 @@ class Node(object):
             return True
         return False
 
-    def walk(self, my_type):
+    def walk(self, my_type, stop_type=None, max_depth=None):
         ''' Recurse through the PSyIR tree and return all objects that are
         an instance of 'my_type', which is either a single class or a tuple
         of classes. In the latter case all nodes are returned that are
-        instances of any classes in the tuple.
+        instances of any classes in the tuple. See :func:`iter_walk` for
+        the optional arguments.
 
         :param my_type: the class(es) for which the instances are collected.
         :type my_type: either a single :py:class:`psyclone.Node` class\
             or a tuple of such classes.
+        :param stop_type: class(es) of node below which not to search.
+        :type stop_type: a :py:class:`psyclone.Node` class, a tuple of such \
+            classes or NoneType
+        :param max_depth: the maximum number of levels below this node to \
+            search or None for no limit.
+        :type max_depth: int or NoneType
         :return: list with all nodes that are instances of my_type \
             starting at and including this node.
         :rtype: list of :py:class:`psyclone.Node` instances.
         '''
-        local_list = []
-        if isinstance(self, my_type):
-            local_list.append(self)
-        for child in self.children:
-            local_list += child.walk(my_type)
-        return local_list
+        return list(self.iter_walk(my_type, stop_type, max_depth))
+
+    def iter_walk(self, my_type, stop_type=None, max_depth=None):
+        ''' Generator that traverses the PSyIR tree (depth first, in the
+        same order as the code) and yields all nodes that are an instance
+        of 'my_type'. Since nodes are produced on demand, a caller that only
+        needs the first match (or to know whether there is one) does not
+        traverse the rest of the tree. The tree must not be modified while
+        it is being traversed.
+
+        :param my_type: the class(es) of the nodes to yield.
+        :type my_type: either a single :py:class:`psyclone.Node` class\
+            or a tuple of such classes.
+        :param stop_type: class(es) of node whose descendants are not \
+            searched (the node itself is yielded if it matches my_type).
+        :type stop_type: a :py:class:`psyclone.Node` class, a tuple of such \
+            classes or NoneType
+        :param max_depth: the maximum number of levels below this node to \
+            search (0 means only this node) or None for no limit.
+        :type max_depth: int or NoneType
+        :return: the nodes that are instances of my_type starting at and \
+            including this node.
+        :rtype: generator of :py:class:`psyclone.Node` instances.
+        '''
+        if max_depth is None:
+            # Explicit stack (rather than recursion) with the children
+            # pushed in reverse so that they are popped in order.
+            stack = [self]
+            while stack:
+                node = stack.pop()
+                if isinstance(node, my_type):
+                    yield node
+                if node.children and not (stop_type and
+                                          isinstance(node, stop_type)):
+                    stack.extend(reversed(node.children))
+        else:
+            stack = [(self, 0)]
+            while stack:
+                node, level = stack.pop()
+                if isinstance(node, my_type):
+                    yield node
+                if level < max_depth and node.children and \
+                   not (stop_type and isinstance(node, stop_type)):
+                    stack.extend((child, level + 1) for child in
+                                 reversed(node.children))
 
     def ancestor(self, my_type, excluding=None):
         '''
@@ -1454,9 +2078,12 @@ class Node(object):
         :rtype: :func:`list` of :py:class:`psyclone.psyGen.Node`
 
         '''
-        all_nodes = self.root.walk(Node)
-        position = all_nodes.index(self)
-        return all_nodes[position+1:]
+        nodes = self.root.iter_walk(Node)
+        for node in nodes:
+            if node is self:
+                break
+        # The nodes remaining in the traversal are those that follow me
+        return list(nodes)
 
     def preceding(self, reverse=None):
         '''Return all :py:class:`psyclone.psyGen.Node` nodes before me in the
@@ -1470,9 +2097,11 @@ class Node(object):
         :rtype: :func:`list` of :py:class:`psyclone.psyGen.Node`
 
         '''
-        all_nodes = self.root.walk(Node)
-        position = all_nodes.index(self)
-        nodes = all_nodes[:position]
+        nodes = []
+        for node in self.root.iter_walk(Node):
+            if node is self:
+                break
+            nodes.append(node)
         if reverse:
             nodes.reverse()
         return nodes
@@ -1544,7 +2173,60 @@ class Node(object):
             :py:class:`psyclone.core.access_info.VariablesAccessInfo`
         '''
         for child in self._children:
-            child.reference_accesses(var_accesses)
+            child.collect_accesses(var_accesses)
+
+    @property
+    def var_accesses(self):
+        '''
+        :returns: the accesses to variables in this node and its \
+                  descendants. They are collected (re-using those \
+                  already collected for any of the descendants) when \
+                  first requested and are then kept until this node or \
+                  one of its descendants is modified, so the returned \
+                  object must not be changed.
+        :rtype: :py:class:`psyclone.core.access_info.VariablesAccessInfo`
+        '''
+        if self._var_accesses is None:
+            var_accesses = VariablesAccessInfo()
+            self.reference_accesses(var_accesses)
+            self._var_accesses = var_accesses
+            _CACHED_VAR_ACCESSES[0] += 1
+        return self._var_accesses
+
+    def collect_accesses(self, var_accesses):
+        '''Adds the accesses to variables in this node and its descendants
+        to var_accesses. This is equivalent to calling
+        reference_accesses() but uses the accesses held by this node if
+        they have already been requested through var_accesses.
+
+        :param var_accesses: Stores the output results.
+        :type var_accesses: \
+            :py:class:`psyclone.core.access_info.VariablesAccessInfo`
+        '''
+        if self._var_accesses is None:
+            self.reference_accesses(var_accesses)
+        else:
+            var_accesses.extend(self._var_accesses)
+
+    def invalidate_var_accesses(self):
+        '''Discards the accesses to variables held by this node and its
+        ancestors (see var_accesses). This is called whenever a list of
+        children is modified and must be called if a node is changed in
+        any other way that affects the variables it accesses.
+        '''
+        if not _CACHED_VAR_ACCESSES[0]:
+            return
+        node = self
+        while node is not None:
+            if node._var_accesses is not None:
+                node._var_accesses = None
+                _CACHED_VAR_ACCESSES[0] -= 1
+            parent = getattr(node, "_parent", None)
+            if parent is None:
+                # The root of a kernel schedule may belong to a kernel
+                # in another tree
+                parent = getattr(node, "_kernel", None)
+            node = parent
 
 
 class Schedule(Node):
@@ -2458,22 +3140,46 @@ class OMPParallelDirective(OMPDirective):
         :returns: list of variables to declare as thread private.
         :rtype: list of str
 
+        :raises InternalError: if a Kernel has local variable(s) but they \
+                               aren't named.
+        '''
+        return OMPParallelDirective.private_variables([self])
+
+    @staticmethod
+    def private_variables(nodes):
+        '''
+        Returns the variable names used for any loops within a parallel
+        region containing the supplied nodes and any variables that have
+        been declared private by a Kernel within them.
+
+        :param nodes: the consecutive nodes in the parallel region.
+        :type nodes: list of :py:class:`psyclone.psyGen.Node`
+
+        :returns: list of variables to declare as thread private.
+        :rtype: list of str
+
         :raises InternalError: if a Kernel has local variable(s) but they \
                                aren't named.
         '''
         result = set()
-        # get variable names from all calls that are a child of this node
-        for call in self.kernels():
-            for variable_name in call.local_vars():
-                if variable_name == "":
-                    raise InternalError(
-                        "call '{0}' has a local variable but its "
-                        "name is not set.".format(call.name))
-                result.add(variable_name.lower())
+        # get variable names from all calls that are a child of the nodes
+        for node in nodes:
+            for call in node.kernels():
+                for variable_name in call.local_vars():
+                    if variable_name == "":
+                        raise InternalError(
+                            "call '{0}' has a local variable but its "
+                            "name is not set.".format(call.name))
+                    result.add(variable_name.lower())
 
         # Now determine scalar variables that must be private:
-        var_accesses = VariablesAccessInfo()
-        self.reference_accesses(var_accesses)
+        if len(nodes) == 1:
+            var_accesses = nodes[0].var_accesses
+        else:
+            var_accesses = VariablesAccessInfo()
+            for node in nodes:
+                node.collect_accesses(var_accesses)
+                var_accesses.next_location()
         for var_name in var_accesses.all_vars:
             accesses = var_accesses[var_name].all_accesses
             # Ignore variables that have indices, we only look at scalar
@@ -2509,8 +3215,7 @@ class OMPParallelDirective(OMPDirective):
             is an error on the part of the user. '''
         # We need to recurse down through all our children and check
         # whether any of them are an OMPDirective.
-        node_list = self.walk(OMPDirective)
-        if not node_list:
+        if next(self.iter_walk(OMPDirective), None) is None:
             # TODO raise a warning here so that the user can decide
             # whether or not this is OK.
             pass
@@ -2543,7 +3248,10 @@ class OMPParallelDirective(OMPDirective):
         try:
             start_idx = object_index(self._parent.ast.content,
                                      self._children[0].ast)
+            # If our last child is itself a directive then its last node
+            # in the AST is the end of that directive
             end_idx = object_index(self._parent.ast.content,
+                                   self._children[-1].ast_end or
                                    self._children[-1].ast)
         except (IndexError, ValueError):
             raise InternalError("Failed to find locations to insert "
@@ -2578,10 +3286,12 @@ class OMPDoDirective(OMPDirective):
     :param str omp_schedule: the OpenMP schedule to use.
     :param bool reprod: whether or not to generate code for run-reproducible \
                         OpenMP reductions.
+    :param bool nowait: whether or not to add a 'nowait' clause, i.e. to \
+                        omit the barrier at the end of the loop.
 
     '''
     def __init__(self, children=None, parent=None, omp_schedule="static",
-                 reprod=None):
+                 reprod=None, nowait=False):
 
         if children is None:
             children = []
@@ -2592,6 +3302,7 @@ class OMPDoDirective(OMPDirective):
             self._reprod = reprod
 
         self._omp_schedule = omp_schedule
+        self._nowait = nowait
 
         # Call the init method of the base class once we've stored
         # the OpenMP schedule
@@ -2615,6 +3326,8 @@ class OMPDoDirective(OMPDirective):
             reprod = "[reprod={0}]".format(self._reprod)
         else:
             reprod = ""
+        if self._nowait:
+            reprod += "[nowait]"
         print(self.indent(indent) + self.coloured_text +
               "[OMP do]{0}".format(reprod))
 
@@ -2636,6 +3349,22 @@ class OMPDoDirective(OMPDirective):
         ''' returns whether reprod has been set for this object or not '''
         return self._reprod
 
+    @property
+    def omp_schedule(self):
+        '''
+        :returns: the OpenMP schedule used by this directive.
+        :rtype: str
+        '''
+        return self._omp_schedule
+
+    @property
+    def nowait(self):
+        '''
+        :returns: whether the barrier at the end of this loop is omitted.
+        :rtype: bool
+        '''
+        return self._nowait
+
     def gen_code(self, parent):
         '''
         Generate the f2pygen AST entries in the Schedule for this OpenMP do
@@ -2676,9 +3405,65 @@ class OMPDoDirective(OMPDirective):
 
         # make sure the directive occurs straight after the loop body
         position = parent.previous_loop()
-        parent.add(DirectiveGen(parent, "omp", "end", "do", ""),
+        parent.add(DirectiveGen(parent, "omp", "end", "do",
+                                "nowait" if self._nowait else ""),
                    position=["after", position])
 
+    def update(self):
+        '''
+        Updates the fparser2 AST by inserting nodes for this OpenMP do.
+
+        :raises GenerationError: if this "!$omp do" is not enclosed within \
+                                 an OMP Parallel region.
+        :raises GenerationError: if this directive does not have exactly \
+                                 one child.
+        '''
+        from fparser.common.readfortran import FortranStringReader
+        from fparser.two.Fortran2003 import Comment
+
+        # As in gen_code(), an orphaned loop directive must be within an
+        # OpenMP parallel region.
+        if not self.ancestor(OMPParallelDirective,
+                             excluding=[OMPParallelDoDirective]):
+            raise GenerationError("OMPOrphanLoopDirective must have an "
+                                  "OMPRegionDirective as ancestor")
+
+        # Ensure the fparser2 AST is up-to-date for all of our children
+        Node.update(self)
+
+        # Check that we haven't already been called
+        if self.ast:
+            return
+
+        if len(self._children) != 1:
+            raise GenerationError(
+                "An OpenMP DO can only be applied to a single loop "
+                "but this Node has {0} children: {1}".
+                format(len(self._children), self._children))
+
+        # Our parent may be a directive which has no associated entry in
+        # the fparser2 parse tree so use the parent of our child instead.
+        fp_parent = self._children[0].ast._parent
+        start_idx = object_index(fp_parent.content, self._children[0].ast)
+
+        startdir = Comment(FortranStringReader(
+            "!$omp do schedule({0})".format(self._omp_schedule),
+            ignore_comments=False))
+        text = "!$omp end do"
+        if self._nowait:
+            text += " nowait"
+        enddir = Comment(FortranStringReader(text, ignore_comments=False))
+        # Retro-fit parent information (see Directive._add_region())
+        startdir._parent = fp_parent
+        enddir._parent = fp_parent
+        fp_parent.content.insert(start_idx+1, enddir)
+        self.ast_end = enddir
+
+        # Insert the start directive (do this second so we don't have
+        # to correct the location)
+        self.ast = startdir
+        fp_parent.content.insert(start_idx, self.ast)
+
 
 class OMPParallelDoDirective(OMPParallelDirective, OMPDoDirective):
     ''' Class for the !$OMP PARALLEL DO directive. This inherits from
@@ -3061,6 +3846,10 @@ class Loop(Node):
 
     '''
 
+    __slots__ = ("_field", "_field_name", "_field_space", "_id",
+                 "_iterates_over", "_iteration_space", "_kern", "_loop_type",
+                 "_valid_loop_types", "_variable_name")
+
     def __init__(self, parent=None, variable_name="", valid_loop_types=None):
         Node.__init__(self, parent=parent)
 
@@ -3338,13 +4127,13 @@ class Loop(Node):
         var_accesses.add_access(self.variable_name, AccessType.READ, self)
 
         # Accesses of the start/stop/step expressions
-        self.start_expr.reference_accesses(var_accesses)
-        self.stop_expr.reference_accesses(var_accesses)
-        self.step_expr.reference_accesses(var_accesses)
+        self.start_expr.collect_accesses(var_accesses)
+        self.stop_expr.collect_accesses(var_accesses)
+        self.step_expr.collect_accesses(var_accesses)
         var_accesses.next_location()
 
         for child in self.loop_body.children:
-            child.reference_accesses(var_accesses)
+            child.collect_accesses(var_accesses)
             var_accesses.next_location()
 
     def has_inc_arg(self):
@@ -3756,7 +4545,7 @@ class CodedKern(Kern):
                                         call.ktype.procedure.name,
                                         KernelArguments(call, self))
         self._module_name = call.module_name
-        self._module_code = call.ktype._ast
+        self._kernel_type = call.ktype
         self._kernel_code = call.ktype.procedure
         self._fp2_ast = None  # The fparser2 AST for the kernel
         self._kern_schedule = None  # PSyIR schedule for the kernel
@@ -3793,6 +4582,18 @@ class CodedKern(Kern):
     def __str__(self):
         return "kern call: " + self._name
 
+    @property
+    def _module_code(self):
+        '''
+        :returns: the fparser1 parse tree of the module containing this \
+                  kernel. This is only created (from the kernel source) \
+                  when first required if the kernel meta-data was taken \
+                  from the kernel cache.
+        :rtype: :py:class:`fparser.one.block_statements.BeginSource`
+
+        '''
+        return self._kernel_type.ast
+
     @property
     def module_name(self):
         '''
@@ -3920,18 +4721,13 @@ class CodedKern(Kern):
         :returns: fparser2 AST of the Fortran file containing this kernel.
         :rtype: :py:class:`fparser.two.Fortran2003.Program`
         '''
-        from fparser.common.readfortran import FortranStringReader
-        from fparser.two import parser
+        from psyclone.parse.kernel import get_kernel_fp2_ast
         # If we've already got the AST then just return it
         if self._fp2_ast:
             return self._fp2_ast
-        # Use the fparser1 AST to generate Fortran source
-        fortran = self._module_code.tofortran()
-        # Create an fparser2 Fortran2003 parser
-        my_parser = parser.ParserFactory().create()
-        # Parse that Fortran using our parser
-        reader = FortranStringReader(fortran)
-        self._fp2_ast = my_parser(reader)
+        # Obtain our own copy of the fparser2 AST of the kernel module. The
+        # module is only parsed once, no matter how many kernels refer to it.
+        self._fp2_ast = get_kernel_fp2_ast(self._kernel_type)
         return self._fp2_ast
 
     @staticmethod
@@ -3957,7 +4753,13 @@ class CodedKern(Kern):
         'modified' flag to False. By default (config.kernel_naming ==
         "multiple"), the kernel is re-named so as to be unique within
         the kernel output directory stored within the configuration
-        object. Alternatively, if config.kernel_naming is "single"
+        object. However, if an identical transformed kernel has already
+        been written to that directory (by this or an earlier or concurrent
+        invocation of PSyclone) then the kernel is given the same name and
+        no new file is written. This is determined using an index (in the
+        KERNEL_INDEX_DIR sub-directory of the kernel output directory)
+        keyed on a hash of the transformed kernel code.
+        Alternatively, if config.kernel_naming is "single"
         then no re-naming and output is performed if there is already
         a transformed copy of the kernel in the output dir. (In this
         case a check is performed that the transformed kernel already
@@ -3971,28 +4773,82 @@ class CodedKern(Kern):
                                      is also flagged for module-inlining.
 
         '''
-        import os
-        from psyclone.line_length import FortLineLength
-
         # If this kernel has not been transformed we do nothing
         if not self.modified and not self.root.opencl:
             return
 
-        # Remove any "_mod" if the file follows the PSyclone naming convention
+        new_kern_code = None
+        if self.root.opencl:
+            from psyclone.psyir.backend.opencl import OpenCLWriter
+            ocl_writer = OpenCLWriter()
+            new_kern_code = ocl_writer(self.get_kernel_schedule())
+
+        # With the "multiple" kernel-renaming scheme, identical transformed
+        # kernels are written to the same file. An index in the kernel output
+        # directory maps a hash of the transformed (but not yet renamed)
+        # kernel to the file that holds it.
+        index_key = None
+        if Config.get().kernel_naming == "multiple":
+            index_key = _kernel_index_key(
+                self._output_base_name(),
+                new_kern_code if self.root.opencl else str(self.ast))
+
+        new_path, fdesc = self._claim_output_file(index_key)
+        self._write_output_file(new_path, fdesc, index_key, new_kern_code)
+
+    def _output_base_name(self):
+        '''
+        :returns: the name of the module of this kernel without any \
+                  "_mod" (if it follows the PSyclone naming convention).
+        :rtype: str
+
+        '''
         orig_mod_name = self.module_name[:]
         if orig_mod_name.endswith("_mod"):
-            old_base_name = orig_mod_name[:-4]
-        else:
-            old_base_name = orig_mod_name[:]
+            return orig_mod_name[:-4]
+        return orig_mod_name
 
-        # We could create a hash of a string built from the name of the
-        # Algorithm (module), the name/position of the Invoke and the
+    def _claim_output_file(self, index_key, new_name=None):
+        '''
+        Determines the file to which this transformed kernel is to be
+        written (see `rename_and_write`), renames the kernel accordingly
+        and resets the 'modified' flag to False.
+
+        :param index_key: the key of the kernel-index entry for this \
+                          kernel or None if the index is not used.
+        :type index_key: str or NoneType
+        :param new_name: the name of a file (within the kernel output \
+                         directory) that is known to hold this kernel or \
+                         None if the kernel index is to be consulted.
+        :type new_name: str or NoneType
+
+        :returns: the path of the file and, if it has been newly created \
+                  by this call, an open file descriptor for it.
+        :rtype: (str, int or NoneType)
+
+        :raises NotImplementedError: if the kernel has been transformed but \
+                                     is also flagged for module-inlining.
+
+        '''
+        import os
+        config = Config.get()
+        old_base_name = self._output_base_name()
+        if not new_name and index_key:
+            new_name = _read_kernel_index(config.kernel_output_dir,
+                                          index_key)
+
+        # Otherwise, we could create a hash of a string built from the name
+        # of the Algorithm (module), the name/position of the Invoke and the
         # index of this kernel within that Invoke. However, that creates
         # a very long name so we simply ensure that kernel names are unique
         # within the user-supplied kernel-output directory.
-        name_idx = -1
         fdesc = None
-        while not fdesc:
+        if new_name:
+            new_suffix = os.path.splitext(new_name)[0][len(old_base_name):]
+            if new_suffix.endswith("_mod"):
+                new_suffix = new_suffix[:-4]
+        name_idx = -1
+        while not new_name:
             name_idx += 1
             new_suffix = "_{0}".format(name_idx)
             if self.root.opencl:
@@ -4004,15 +4860,16 @@ class CodedKern(Kern):
                 # Atomically attempt to open the new kernel file (in case
                 # this is part of a parallel build)
                 fdesc = os.open(
-                    os.path.join(Config.get().kernel_output_dir, new_name),
+                    os.path.join(config.kernel_output_dir, new_name),
                     os.O_CREAT | os.O_WRONLY | os.O_EXCL)
             except (OSError, IOError):
                 # The os.O_CREATE and os.O_EXCL flags in combination mean
                 # that open() raises an error if the file exists
-                if Config.get().kernel_naming == "single":
+                if config.kernel_naming == "single":
                     # If the kernel-renaming scheme is such that we only ever
                     # create one copy of a transformed kernel then we're done
                     break
+                new_name = None
                 continue
 
         # Use the suffix we have determined to rename all relevant quantities
@@ -4033,26 +4890,57 @@ class CodedKern(Kern):
             # TODO #229. We cannot currently inline transformed kernels
             # (because that requires an fparser1 AST and we only have an
             # fparser2 AST of the modified kernel) so raise an error.
+            if fdesc:
+                os.close(fdesc)
             raise NotImplementedError("Cannot module-inline a transformed "
                                       "kernel ({0})".format(self.name))
 
-        if self.root.opencl:
-            from psyclone.psyir.backend.opencl import OpenCLWriter
-            ocl_writer = OpenCLWriter()
-            new_kern_code = ocl_writer(self.get_kernel_schedule())
-        else:
-            # Generate the Fortran for this transformed kernel, ensuring that
-            # we limit the line lengths
+        return os.path.join(config.kernel_output_dir, new_name), fdesc
+
+    def _write_output_file(self, new_path, fdesc, index_key,
+                           new_kern_code=None):
+        '''
+        Writes this (renamed) transformed kernel to the file returned by
+        `_claim_output_file` or, if that file already existed, checks that
+        it can be used.
+
+        :param str new_path: the path of the file.
+        :param fdesc: an open file descriptor for the file if it has just \
+                      been created or None.
+        :type fdesc: int or NoneType
+        :param index_key: the key of the kernel-index entry for this \
+                          kernel or None if the index is not used.
+        :type index_key: str or NoneType
+        :param new_kern_code: the code of the kernel or None to generate \
+                              it (with limited line lengths) from the \
+                              Fortran AST.
+        :type new_kern_code: str or NoneType
+
+        :raises GenerationError: if config.kernel_naming == "single" and a \
+                                 different, transformed version of this \
+                                 kernel is already in the output directory.
+
+        '''
+        import os
+        from psyclone.line_length import FortLineLength
+        config = Config.get()
+        fll = None
+        if new_kern_code is None:
             fll = FortLineLength()
-            new_kern_code = fll.process(str(self.ast))
+            new_kern_code = str(self.ast)
 
-        if not fdesc:
+        if index_key and not fdesc:
+            # An identical transformed kernel has already been written
+            FileDependencies.add_output(new_path)
+        elif not fdesc:
             # If we've not got a file descriptor at this point then that's
             # because the file already exists and the kernel-naming scheme
             # ("single") means we're not creating a new one.
             # Check that what we've got is the same as what's in the file
-            with open(os.path.join(Config.get().kernel_output_dir,
-                                   new_name), "r") as ffile:
+            FileDependencies.add_output(new_path)
+            if fll:
+                new_kern_code = fll.process(new_kern_code)
+            with open(new_path, "r") as ffile:
                 kern_code = ffile.read()
                 if kern_code != new_kern_code:
                     raise GenerationError(
@@ -4064,13 +4952,22 @@ class CodedKern(Kern):
                         "kernel that is transformed then use "
                         "'--kernel-renaming multiple'.)".
                         format(self._module_name+".f90",
-                               Config.get().kernel_output_dir,
-                               Config.get().kernel_naming))
+                               config.kernel_output_dir,
+                               config.kernel_naming))
         else:
-            # Write the modified AST out to file
-            os.write(fdesc, new_kern_code.encode())
-            # Close the new kernel file
-            os.close(fdesc)
+            # Write the modified AST out to file (this also closes the
+            # new kernel file)
+            with os.fdopen(fdesc, "w") as ffile:
+                if fll:
+                    fll.write(new_kern_code, ffile)
+                else:
+                    ffile.write(new_kern_code)
+            FileDependencies.add_output(new_path)
+            if index_key:
+                # Only now that it is complete can other PSyclone
+                # processes re-use the new kernel file.
+                _write_kernel_index(config.kernel_output_dir, index_key,
+                                    os.path.basename(new_path))
 
     def _rename_ast(self, suffix):
         '''
@@ -4081,6 +4978,7 @@ class CodedKern(Kern):
 
         :param str suffix: the string to insert into the quantity names.
         '''
+        from fparser.two import Fortran2003
         from fparser.two.utils import walk_ast
 
         # Use the suffix we have determined to create a new kernel name.
@@ -4429,6 +5327,209 @@ class DataAccess(object):
         return self._covered
 
 
+class DependencyGraph(object):
+    '''An index of the arguments of the nodes (Kern, HaloExchange and
+    GlobalSum or subclasses thereof) in a PSyIR tree. For each argument
+    name it holds the nodes with an argument of that name in schedule
+    order so that the nodes that may have a dependence with an argument
+    are found without visiting every node in the tree. As two
+    arguments can only depend on each other if they have the same name
+    (see `Argument._depends_on()` and `DataAccess.overlaps()`) these
+    are the only nodes that need be examined.
+
+    The graph is kept up to date as the tree is transformed: every
+    :py:class:`psyclone.psyGen.ChildrenList` reports the nodes added to,
+    removed from or reordered within it and only the entries for those
+    nodes (and their descendants) are updated. The graph is stored in
+    the root of the tree (see `DependencyGraph.get()`) and so is discarded
+    along with the tree.
+
+    :param root: the root of the tree.
+    :type root: :py:class:`psyclone.psyGen.Node`
+
+    '''
+    def __init__(self, root):
+        self._root = root
+        # The nodes that have been modified since the graph was updated
+        self._modified = []
+        # The nodes with an argument of a given name in schedule order
+        self._nodes = {}
+        self._size = 0
+        for node in root.iter_walk((Kern, HaloExchange, GlobalSum)):
+            self._add(node)
+            self._size += 1
+
+    @staticmethod
+    def get(node):
+        '''
+        :param node: a node in a PSyIR tree.
+        :type node: :py:class:`psyclone.psyGen.Node`
+
+        :returns: the (up-to-date) dependency graph of the tree \
+                  containing the node.
+        :rtype: :py:class:`psyclone.psyGen.DependencyGraph`
+
+        '''
+        root = node.root
+        graph = root._dependency_graph
+        if graph is None:
+            graph = DependencyGraph(root)
+            root._dependency_graph = graph
+        else:
+            graph._update()
+        return graph
+
+    def modified(self, nodes):
+        '''Record that nodes have been added to, removed from or moved
+        within a list of children. The graph is updated when it is
+        next used.
+
+        :param nodes: the nodes.
+        :type nodes: list of :py:class:`psyclone.psyGen.Node`
+
+        '''
+        self._modified.extend(nodes)
+        if len(self._modified) > self._size:
+            # It is cheaper to create a new graph when it is next needed
+            # than to update this one.
+            self._root._dependency_graph = None
+
+    def _add(self, node):
+        '''Add a node to the end of the lists of the names of its
+        arguments.
+
+        :param node: the node.
+        :type node: :py:class:`psyclone.psyGen.Node`
+
+        :returns: the names of the arguments of the node.
+        :rtype: set of str
+
+        '''
+        names = set()
+        for arg in node.args:
+            if arg.name not in names:
+                names.add(arg.name)
+                self._nodes.setdefault(arg.name, []).append(node)
+        return names
+
+    def _update(self):
+        '''Update the entries of the nodes that have been modified (and of
+        their descendants) and restore the schedule order of the lists
+        that they are in.'''
+        if not self._modified:
+            return
+        nodes = {}
+        for modified in self._modified:
+            if isinstance(modified, Node):
+                for node in modified.iter_walk((Kern, HaloExchange,
+                                                GlobalSum)):
+                    nodes[id(node)] = node
+        self._modified = []
+        # The arguments of a node do not change so these are the names
+        # of any entries the nodes have.
+        names = set(arg.name for node in nodes.values() for arg in node.args)
+        for name in names:
+            if name in self._nodes:
+                self._nodes[name] = [node for node in self._nodes[name]
+                                     if id(node) not in nodes]
+        for node in nodes.values():
+            if node.root is self._root:
+                try:
+                    DependencyGraph._schedule_order(node)
+                except ValueError:
+                    # The node has a parent but is not one of its children
+                    continue
+                self._add(node)
+        for name in names:
+            if name in self._nodes:
+                self._nodes[name].sort(key=DependencyGraph._schedule_order)
+
+    @staticmethod
+    def _schedule_order(node):
+        '''
+        :param node: a node in a tree.
+        :type node: :py:class:`psyclone.psyGen.Node`
+
+        :returns: the position of the node and of each of its ancestors \
+                  (starting at the root), which orders nodes as a \
+                  depth-first traversal of the tree does.
+        :rtype: list of int
+
+        :raises ValueError: if the node (or an ancestor) is not one of \
+                            the children of its parent.
+
+        '''
+        order = []
+        while node.parent is not None:
+            order.append(node.position)
+            node = node.parent
+        order.reverse()
+        return order
+
+    def _search(self, node, name, after):
+        '''
+        :param node: a node in the tree.
+        :type node: :py:class:`psyclone.psyGen.Node`
+        :param str name: the name of an argument.
+        :param bool after: whether to skip the entry of node itself (if \
+                           it has one).
+
+        :returns: the index in the list of nodes with an argument \
+                  called `name` at which `node` is or would be.
+        :rtype: int
+
+        '''
+        entries = self._nodes[name]
+        try:
+            key = DependencyGraph._schedule_order(node)
+        except ValueError:
+            # A node that has a parent but is not one of its children
+            # is treated as being at the end of the tree.
+            return len(entries)
+        low = 0
+        high = len(entries)
+        while low < high:
+            mid = (low + high) // 2
+            if DependencyGraph._schedule_order(entries[mid]) < key:
+                low = mid + 1
+            else:
+                high = mid
+        if after and low < len(entries) and entries[low] is node:
+            low += 1
+        return low
+
+    def following(self, node, name):
+        '''
+        :param node: a node in the tree.
+        :type node: :py:class:`psyclone.psyGen.Node`
+        :param str name: the name of an argument.
+
+        :returns: the nodes after `node` in schedule order that have \
+                  an argument called `name`.
+        :rtype: :func:`list` of :py:class:`psyclone.psyGen.Node`
+
+        '''
+        if not self._nodes.get(name):
+            return []
+        return self._nodes[name][self._search(node, name, True):]
+
+    def preceding(self, node, name):
+        '''
+        :param node: a node in the tree.
+        :type node: :py:class:`psyclone.psyGen.Node`
+        :param str name: the name of an argument.
+
+        :returns: the nodes before `node` that have an argument called \
+                  `name`, closest first.
+        :rtype: :func:`list` of :py:class:`psyclone.psyGen.Node`
+
+        '''
+        if not self._nodes.get(name):
+            return []
+        end = self._search(node, name, False)
+        return self._nodes[name][end-1::-1] if end else []
+
+
 class Argument(object):
     ''' Argument base class '''
 
@@ -4562,7 +5663,8 @@ class Argument(object):
         :rtype: :py:class:`psyclone.psyGen.Argument`
 
         '''
-        nodes = self._call.preceding(reverse=True)
+        nodes = DependencyGraph.get(self._call).preceding(self._call,
+                                                          self.name)
         return self._find_argument(nodes)
 
     def backward_write_dependencies(self, ignore_halos=False):
@@ -4578,7 +5680,8 @@ class Argument(object):
         :rtype: :func:`list` of :py:class:`psyclone.psyGen.Argument`
 
         '''
-        nodes = self._call.preceding(reverse=True)
+        nodes = DependencyGraph.get(self._call).preceding(self._call,
+                                                          self.name)
         results = self._find_write_arguments(nodes, ignore_halos=ignore_halos)
         return results
 
@@ -4592,7 +5695,8 @@ class Argument(object):
         :rtype: :py:class:`psyclone.psyGen.Argument`
 
         '''
-        nodes = self._call.following()
+        nodes = DependencyGraph.get(self._call).following(self._call,
+                                                          self.name)
         return self._find_argument(nodes)
 
     def forward_read_dependencies(self):
@@ -4606,7 +5710,8 @@ class Argument(object):
         :rtype: :func:`list` of :py:class:`psyclone.psyGen.Argument`
 
         '''
-        nodes = self._call.following()
+        nodes = DependencyGraph.get(self._call).following(self._call,
+                                                          self.name)
         return self._find_read_arguments(nodes)
 
     def _find_argument(self, nodes):
@@ -4943,12 +6048,15 @@ class IfBlock(Node):
         Fortran 'case' or C 'switch' syntactic constructs.
     :raises InternalError: when initialised with invalid parameters.
     '''
+
+    __slots__ = ()
+
     valid_annotations = ('was_elseif', 'was_single_stmt', 'was_case')
 
     def __init__(self, parent=None, annotation=None):
         super(IfBlock, self).__init__(parent=parent)
         if annotation in IfBlock.valid_annotations:
-            self._annotations.append(annotation)
+            self._annotations = [annotation]
         elif annotation:
             raise InternalError(
                 "IfBlock with unrecognized annotation '{0}', valid annotations"
@@ -5043,13 +6151,13 @@ class IfBlock(Node):
         '''
 
         # The first child is the if condition - all variables are read-only
-        self.condition.reference_accesses(var_accesses)
+        self.condition.collect_accesses(var_accesses)
         var_accesses.next_location()
-        self.if_body.reference_accesses(var_accesses)
+        self.if_body.collect_accesses(var_accesses)
         var_accesses.next_location()
 
         if self.else_body:
-            self.else_body.reference_accesses(var_accesses)
+            self.else_body.collect_accesses(var_accesses)
             var_accesses.next_location()
 
 
@@ -5174,6 +6282,9 @@ class SymbolInterface(object):
                    None (if unknown).
     :type access: :py:class:`psyclone.psyGen.SymbolAccess`
     '''
+
+    __slots__ = ("_access",)
+
     def __init__(self, access=None):
         self._access = None
         # Use the setter as that has error checking
@@ -5206,6 +6317,11 @@ class SymbolInterface(object):
         self._access = value
 
 
+# Incremented whenever the interface of a Symbol changes so that the views
+# cached by a SymbolTable can tell that they are out of date.
+_SYMBOL_VERSION = [0]
+
+
 class Symbol(object):
     '''
     Symbol item for the Symbol Table. It contains information about: the name,
@@ -5239,6 +6355,10 @@ class Symbol(object):
     :raises ValueError: Provided parameters contain invalid values.
 
     '''
+
+    __slots__ = ("_name", "_datatype", "_shape", "_constant_value",
+                 "_interface")
+
     ## Tuple with the valid datatypes.
     valid_data_types = ('real',  # Floating point
                         'integer',
@@ -5275,6 +6395,8 @@ class Symbol(object):
         :param access: how the symbol is accessed within the local scope.
         :type access: :py:class:`psyclone.psyGen.Symbol.Access`
         '''
+        __slots__ = ("_pass_by_value",)
+
         def __init__(self, access=None):
             super(Symbol.Argument, self).__init__(access=access)
             self._pass_by_value = False
@@ -5295,6 +6417,8 @@ class Symbol(object):
                        access is Symbol.Access.UNKNOWN.
         :type access: :py:class:`psyclone.psyGen.Symbol.Access` or None.
         '''
+        __slots__ = ("_module_name",)
+
         def __init__(self, module_use, access=None):
             self._module_name = ""
             super(Symbol.FortranGlobal, self).__init__(access=access)
@@ -5450,6 +6574,7 @@ class Symbol(object):
                             "SymbolInterface or None but got '{0}'".
                             format(type(value)))
         self._interface = value
+        _SYMBOL_VERSION[0] += 1
 
     @property
     def is_constant(self):
@@ -5598,29 +6723,75 @@ class Symbol(object):
         self._shape = symbol_in.shape[:]
         self._constant_value = symbol_in.constant_value
         self._interface = symbol_in.interface
+        _SYMBOL_VERSION[0] += 1
 
 
 class SymbolTable(object):
     '''
     Encapsulates the symbol table and provides methods to add new symbols
-    and look up existing symbols. It is implemented as a single scope
-    symbol table (nested scopes not supported).
+    and look up existing symbols. As in Fortran, symbol names are not case
+    sensitive. A symbol table may be nested within the symbol table of an
+    enclosing scope (e.g. a block within a routine within a container).
+    Symbols that are not found in a symbol table are then looked up in
+    the enclosing scopes and a symbol may hide one with the same name in
+    an enclosing scope.
 
     :param kernel: Reference to the KernelSchedule to which this symbol table \
         belongs.
     :type kernel: :py:class:`psyclone.psyGen.KernelSchedule` or NoneType
+    :param parent: the symbol table of the enclosing scope, if any.
+    :type parent: :py:class:`psyclone.psyGen.SymbolTable` or NoneType
     '''
     # TODO: (Issue #321) Explore how the SymbolTable overlaps with the
     # NameSpace class functionality.
-    def __init__(self, kernel=None):
-        # Dict of Symbol objects with the symbol names as keys. Make
-        # this ordered so that different versions of Python always
-        # produce code with declarations in the same order.
+    def __init__(self, kernel=None, parent=None):
+        # Dict of Symbol objects with the lower-cased symbol names as
+        # keys. Make this ordered so that different versions of Python
+        # always produce code with declarations in the same order.
         self._symbols = OrderedDict()
         # Ordered list of the arguments.
         self._argument_list = []
         # Reference to KernelSchedule to which this symbol table belongs.
         self._kernel = kernel
+        # Symbol table of the enclosing scope
+        self._parent = parent
+        # Incremented whenever symbols are added to this table or swapped
+        self._version = 0
+        # Views of this table (e.g. the local symbols) that have already
+        # been computed, with the state of the table they were computed for
+        self._views = {}
+
+    @property
+    def parent(self):
+        '''
+        :returns: the symbol table of the enclosing scope or None.
+        :rtype: :py:class:`psyclone.psyGen.SymbolTable` or NoneType
+        '''
+        return self._parent
+
+    def _cached_view(self, key, compute):
+        '''
+        Returns a view of this symbol table, only computing it if the
+        symbols, their interfaces or the argument list have changed
+        since it was last computed.
+
+        :param str key: the name of the view.
+        :param compute: function (taking no arguments) that computes \
+                        the view.
+        :type compute: function
+
+        :returns: the view.
+
+        '''
+        state = (self._version, _SYMBOL_VERSION[0])
+        if key in self._views:
+            cached_state, arg_list, value = self._views[key]
+            # The argument list may have been replaced directly
+            if cached_state == state and arg_list is self._argument_list:
+                return value
+        value = compute()
+        self._views[key] = (state, self._argument_list, value)
+        return value
 
     def add(self, new_symbol):
         '''Add a new symbol to the symbol table.
@@ -5631,10 +6802,27 @@ class SymbolTable(object):
         :raises KeyError: If the symbol name is already in use.
 
         '''
-        if new_symbol.name in self._symbols:
-            raise KeyError("Symbol table already contains a symbol with"
-                           " name '{0}'.".format(new_symbol.name))
-        self._symbols[new_symbol.name] = new_symbol
+        self.add_symbols([new_symbol])
+
+    def add_symbols(self, new_symbols):
+        '''Add a list of new symbols to the symbol table. Either all of
+        the symbols are added or, if there is an error, none of them are.
+
+        :param new_symbols: The symbols to add to the symbol table.
+        :type new_symbols: list of :py:class:`psyclone.psyGen.Symbol`
+
+        :raises KeyError: If the name of a symbol is already in use.
+
+        '''
+        new_entries = OrderedDict()
+        for symbol in new_symbols:
+            key = symbol.name.lower()
+            if key in self._symbols or key in new_entries:
+                raise KeyError("Symbol table already contains a symbol with"
+                               " name '{0}'.".format(symbol.name))
+            new_entries[key] = symbol
+        self._symbols.update(new_entries)
+        self._version += 1
 
     def swap_symbol_properties(self, symbol1, symbol2):
         '''Swaps the properties of symbol1 and symbol2 apart from the symbol
@@ -5656,7 +6844,7 @@ class SymbolTable(object):
             if not isinstance(symbol, Symbol):
                 raise TypeError("Arguments should be of type 'Symbol' but "
                                 "found '{0}'.".format(type(symbol).__name__))
-            if symbol.name not in self._symbols:
+            if symbol.name.lower() not in self._symbols:
                 raise KeyError("Symbol '{0}' is not in the symbol table."
                                "".format(symbol.name))
         if symbol1.name == symbol2.name:
@@ -5678,6 +6866,7 @@ class SymbolTable(object):
             self._argument_list[index1] = symbol2
         if index2 is not None:
             self._argument_list[index2] = symbol1
+        self._version += 1
 
     def specify_argument_list(self, argument_symbols):
         '''
@@ -5693,29 +6882,51 @@ class SymbolTable(object):
         '''
         self._validate_arg_list(argument_symbols)
         self._argument_list = argument_symbols[:]
+        self._version += 1
+
+    def _find(self, name):
+        '''
+        :param str name: Name of the symbol.
+
+        :returns: the symbol with the given name (ignoring case) in this \
+                  symbol table or in the nearest enclosing scope that \
+                  contains it, or None if there is no such symbol.
+        :rtype: :py:class:`psyclone.psyGen.Symbol` or NoneType
+
+        '''
+        key = name.lower()
+        table = self
+        while table is not None:
+            symbol = table._symbols.get(key)
+            if symbol is not None:
+                return symbol
+            table = table._parent
+        return None
 
     def lookup(self, name):
         '''
-        Look up a symbol in the symbol table.
+        Look up a symbol in the symbol table and then in the symbol tables
+        of the enclosing scopes.
 
-        :param str name: Name of the symbol
+        :param str name: Name of the symbol (not case sensitive).
         :raises KeyError: If the given name is not in the Symbol Table.
 
         '''
-        try:
-            return self._symbols[name]
-        except KeyError:
+        symbol = self._find(name)
+        if symbol is None:
             raise KeyError("Could not find '{0}' in the Symbol Table."
                            "".format(name))
+        return symbol
 
     def __contains__(self, key):
-        '''Check if the given key is part of the Symbol Table.
+        '''Check if the given key is part of the Symbol Table or of the
+        symbol table of an enclosing scope.
 
-        :param str key: key to check for existance.
+        :param str key: key to check for existance (not case sensitive).
         :returns: Whether the Symbol Table contains the given key.
         :rtype: bool
         '''
-        return key in self._symbols
+        return self._find(key) is not None
 
     @property
     def argument_list(self):
@@ -5731,14 +6942,29 @@ class SymbolTable(object):
 
         '''
         try:
-            self._validate_arg_list(self._argument_list)
-            self._validate_non_args()
+            self._cached_view("valid", self._validate)
         except ValueError as err:
             # If the SymbolTable is inconsistent at this point then
             # we have an InternalError.
             raise InternalError(str(err.args))
         return self._argument_list
 
+    def _validate(self):
+        '''
+        Checks that the argument list and the other entries of the
+        SymbolTable are consistent.
+
+        :returns: True.
+        :rtype: bool
+
+        :raises ValueError: If the entries of the SymbolTable are not \
+                            self-consistent.
+
+        '''
+        self._validate_arg_list(self._argument_list)
+        self._validate_non_args()
+        return True
+
     @staticmethod
     def _validate_arg_list(arg_list):
         '''
@@ -5779,8 +7005,9 @@ class SymbolTable(object):
                             has a Symbol.Argument interface.
 
         '''
+        arguments = set(id(symbol) for symbol in self._argument_list)
         for symbol in self._symbols.values():
-            if symbol not in self._argument_list:
+            if id(symbol) not in arguments:
                 # Symbols not in the argument list must not have a
                 # Symbol.Argument interface
                 if symbol.interface and isinstance(symbol.interface,
@@ -5804,7 +7031,10 @@ class SymbolTable(object):
         :returns:  List of local symbols.
         :rtype: list of :py:class:`psyclone.psyGen.Symbol`
         '''
-        return [sym for sym in self._symbols.values() if sym.scope == "local"]
+        return list(self._cached_view(
+            "local_symbols",
+            lambda: [sym for sym in self._symbols.values()
+                     if sym.scope == "local"]))
 
     @property
     def iteration_indices(self):
@@ -5854,6 +7084,9 @@ class KernelSchedule(Schedule):
         super(KernelSchedule, self).__init__(sequence=None, parent=None)
         self._name = name
         self._symbol_table = SymbolTable(self)
+        # The kernel node (in the PSyIR of the PSy layer) whose variable
+        # accesses are those of this schedule, if any
+        self._kernel = None
 
     @property
     def name(self):
@@ -5912,6 +7145,9 @@ class CodeBlock(Node):
     :param parent: the parent node of this code block in the PSyIR.
     :type parent: :py:class:`psyclone.psyGen.Node`
     '''
+
+    __slots__ = ("_statements",)
+
     def __init__(self, statements, parent=None):
         super(CodeBlock, self).__init__(parent=parent)
         # Store a list of the parser objects holding the code associated
@@ -5961,6 +7197,9 @@ class Assignment(Node):
     :param parent: the parent node of this Assignment in the PSyIR.
     :type parent: :py:class:`psyclone.psyGen.Node`
     '''
+
+    __slots__ = ()
+
     def __init__(self, ast=None, parent=None):
         super(Assignment, self).__init__(ast=ast, parent=parent)
 
@@ -6037,7 +7276,7 @@ class Assignment(Node):
         # since a check in 'change_read_to_write' makes sure that there
         # is only one access to the variable!
         accesses_left = VariablesAccessInfo()
-        self.lhs.reference_accesses(accesses_left)
+        self.lhs.collect_accesses(accesses_left)
 
         # Now change the (one) access to the assigned variable to be WRITE:
         var_info = accesses_left[self.lhs.name]
@@ -6054,7 +7293,7 @@ class Assignment(Node):
 
         # Merge the data (that shows now WRITE for the variable) with the
         # parameter to this function:
-        self.rhs.reference_accesses(var_accesses)
+        self.rhs.collect_accesses(var_accesses)
         var_accesses.merge(accesses_left)
         var_accesses.next_location()
 
@@ -6068,6 +7307,9 @@ class Reference(Node):
     :param parent: the parent node of this Reference in the PSyIR.
     :type parent: :py:class:`psyclone.psyGen.Node`
     '''
+
+    __slots__ = ("_reference",)
+
     def __init__(self, reference_name, parent):
         super(Reference, self).__init__(parent=parent)
         self._reference = reference_name
@@ -6132,6 +7374,9 @@ class Operation(Node):
                        self.Operator.
 
     '''
+
+    __slots__ = ("_operator",)
+
     # Must be overridden in sub-class to hold an Enumeration of the Operators
     # that it can represent.
     Operator = None
@@ -6205,6 +7450,9 @@ class UnaryOperation(Operation):
     :type parent: :py:class:`psyclone.psyGen.Node`
 
     '''
+
+    __slots__ = ()
+
     Operator = Enum('Operator', [
         # Arithmetic Operators
         'MINUS', 'PLUS', 'SQRT', 'EXP', 'LOG', 'LOG10',
@@ -6243,6 +7491,9 @@ class BinaryOperation(Operation):
     :type parent: :py:class:`psyclone.psyGen.Node`
 
     '''
+
+    __slots__ = ()
+
     Operator = Enum('Operator', [
         # Arithmetic Operators. ('REM' is remainder AKA 'MOD' in Fortran.)
         'ADD', 'SUB', 'MUL', 'DIV', 'REM', 'POW', 'SUM',
@@ -6280,6 +7531,9 @@ class NaryOperation(Operation):
     :type parent: :py:class:`psyclone.psyGen.Node`
 
     '''
+
+    __slots__ = ()
+
     Operator = Enum('Operator', [
         # Arithmetic Operators
         'MAX', 'MIN', 'SUM'
@@ -6309,6 +7563,9 @@ class Array(Reference):
     :type parent: :py:class:`psyclone.psyGen.Node`
 
     '''
+
+    __slots__ = ()
+
     def __init__(self, reference_name, parent):
         super(Array, self).__init__(reference_name, parent=parent)
 
@@ -6354,7 +7611,7 @@ class Array(Reference):
         # this stage no index information has been stored:
         list_indices = []
         for child in self._children:
-            child.reference_accesses(var_accesses)
+            child.collect_accesses(var_accesses)
             list_indices.append(child)
 
         if list_indices:
@@ -6372,6 +7629,9 @@ class Literal(Node):
     :param parent: the parent node of this Literal in the PSyIR.
     :type parent: :py:class:`psyclone.psyGen.Node`
     '''
+
+    __slots__ = ("_value",)
+
     def __init__(self, value, parent=None):
         super(Literal, self).__init__(parent=parent)
         self._value = value
@@ -6418,6 +7678,9 @@ class Return(Node):
     :param parent: the parent node of this Return in the PSyIR.
     :type parent: :py:class:`psyclone.psyGen.Node`
     '''
+
+    __slots__ = ()
+
     def __init__(self, parent=None):
         super(Return, self).__init__(parent=parent)
 
@@ -6501,6 +7764,7 @@ class Fparser2ASTProcessor(object):
         ('sum', NaryOperation.Operator.SUM)])
 
     def __init__(self):
+        from fparser.two import Fortran2003
         from fparser.two import utils
         # Map of fparser2 node types to handlers (which are class methods)
         self.handlers = {
@@ -6559,8 +7823,11 @@ class Fparser2ASTProcessor(object):
         :rtype: (list of str, list of str, list of str)
         '''
         from fparser.two.Fortran2003 import Assignment_Stmt, Part_Ref, \
-            Data_Ref, If_Then_Stmt, Array_Section
+            Data_Ref, If_Then_Stmt, Array_Section, Intrinsic_Name
         from fparser.two.utils import walk_ast
+        # The Fortran intrinsic functions (which are distinguished from
+        # array accesses)
+        intrinsics = Intrinsic_Name.function_names
         readers = set()
         writers = set()
         readwrites = set()
@@ -6583,7 +7850,7 @@ class Fparser2ASTProcessor(object):
                 for node2 in walk_ast([rhs]):
                     if isinstance(node2, Part_Ref):
                         name = node2.items[0].string
-                        if name.upper() not in FORTRAN_INTRINSICS:
+                        if name.upper() not in intrinsics:
                             if name not in writers:
                                 readers.add(name)
                     if isinstance(node2, Data_Ref):
@@ -6611,7 +7878,7 @@ class Fparser2ASTProcessor(object):
                 array_refs = walk_ast([node], [Part_Ref])
                 for ref in array_refs:
                     name = ref.items[0].string
-                    if name.upper() not in FORTRAN_INTRINSICS:
+                    if name.upper() not in intrinsics:
                         if name not in writers:
                             readers.add(name)
             elif isinstance(node, Part_Ref):
@@ -6619,7 +7886,7 @@ class Fparser2ASTProcessor(object):
                 # haven't missed anything. Once #309 is done we should be
                 # able to get rid of this check.
                 name = node.items[0].string
-                if name.upper() not in FORTRAN_INTRINSICS and \
+                if name.upper() not in intrinsics and \
                    name not in all_array_refs:
                     all_array_refs[name] = node
             elif node:
@@ -6683,6 +7950,8 @@ class Fparser2ASTProcessor(object):
         :raises GenerationError: Unable to generate a kernel schedule from the
                                  provided fpaser2 parse tree.
         '''
+        from fparser.two import Fortran2003
+
         def first_type_match(nodelist, typekind):
             '''
             Returns the first instance of the specified type in the given
@@ -6774,6 +8043,7 @@ class Fparser2ASTProcessor(object):
                   represents a scalar.
         :rtype: list
         '''
+        from fparser.two import Fortran2003
         from fparser.two.utils import walk_ast
         shape = []
 
@@ -6830,6 +8100,7 @@ class Fparser2ASTProcessor(object):
         :raises GenerationError: If the parse tree for a USE statement does \
                                  not have the expected structure.
         '''
+        from fparser.two import Fortran2003
         from fparser.two.utils import walk_ast
 
         def iterateitems(nodes):
@@ -6872,12 +8143,12 @@ class Fparser2ASTProcessor(object):
                 # transformation. See #315.
                 continue
             mod_name = str(decl.items[2])
-            for name in iterateitems(decl.items[4]):
-                # Create an entry in the SymbolTable for each symbol named
-                # in the ONLY clause.
-                parent.symbol_table.add(
-                    Symbol(str(name), datatype='deferred',
-                           interface=Symbol.FortranGlobal(mod_name)))
+            # Create an entry in the SymbolTable for each symbol named
+            # in the ONLY clause.
+            parent.symbol_table.add_symbols(
+                [Symbol(str(name), datatype='deferred',
+                        interface=Symbol.FortranGlobal(mod_name))
+                 for name in iterateitems(decl.items[4])])
 
         for decl in walk_ast(nodes, [Fortran2003.Type_Declaration_Stmt]):
             (type_spec, attr_specs, entities) = decl.items
@@ -7220,6 +8491,7 @@ class Fparser2ASTProcessor(object):
             structure.
         '''
 
+        from fparser.two import Fortran2003
         # Check that the fparser2 parsetree has the expected structure
         if not isinstance(node.content[0], Fortran2003.If_Then_Stmt):
             raise InternalError(
@@ -7344,6 +8616,7 @@ class Fparser2ASTProcessor(object):
             unsupported structure and should be placed in a CodeBlock.
 
         '''
+        from fparser.two import Fortran2003
         # Check that the fparser2 parsetree has the expected structure
         if not isinstance(node.content[0], Fortran2003.Select_Case_Stmt):
             raise InternalError(
@@ -7530,6 +8803,7 @@ class Fparser2ASTProcessor(object):
         :type parent: :py:class:`psyclone.psyGen.Node`
 
         '''
+        from fparser.two import Fortran2003
         node._parent = node_parent  # Retrofit parent information
 
         if isinstance(node, Fortran2003.Case_Value_Range):
@@ -7861,6 +9135,7 @@ class Fparser2ASTProcessor(object):
         :rtype: :py:class:`psyclone.psyGen.Array`
 
         '''
+        from fparser.two import Fortran2003
         reference_name = node.items[0].string.lower()
 
         if hasattr(parent.root, 'symbol_table'):
@@ -37,7 +37,9 @@
 back ends.
 
 '''
-# pylint: disable=eval-used
+
+import inspect
+import weakref
 
 from psyclone.psyGen import Node
 
@@ -75,6 +77,11 @@ class PSyIRVisitor(object):
     is not a string, or initial_indent_depth is not an integer.
 
     '''
+    # For each visitor class, the name of the method to call for each
+    # type of node (or None if there is not one). Entries are added the
+    # first time that an instance of the class meets a type of node.
+    _dispatch_tables = weakref.WeakKeyDictionary()
+
     def __init__(self, skip_nodes=False, indent_string="  ",
                  initial_indent_depth=0):
 
@@ -98,6 +105,18 @@ class PSyIRVisitor(object):
         self._skip_nodes = skip_nodes
         self._indent = indent_string
         self._depth = initial_indent_depth
+        # The dispatch table of this visitor. This is shared by all the
+        # instances of its class (visitors are often created for a single
+        # use) unless methods are added to this instance (see
+        # _check_instance_methods).
+        try:
+            self._dispatch_table = PSyIRVisitor._dispatch_tables[type(self)]
+        except KeyError:
+            self._dispatch_table = {}
+            PSyIRVisitor._dispatch_tables[type(self)] = self._dispatch_table
+        # The number of attributes of this instance when it was last
+        # checked for methods of its own.
+        self._checked_attributes = 0
 
     @property
     def _nindent(self):
@@ -128,7 +147,11 @@ class PSyIRVisitor(object):
         until there are no more parent classes. Names are not
         modified, other than making them lower case, apart from the
         `Return` class which is changed to `return_node` because
-        `return` is a Python keyword.
+        `return` is a Python keyword. The method to use for each class
+        of node is looked up the first time that such a node is visited
+        by an instance of a visitor class and recorded for use by all
+        instances of that class (apart from those that have methods of
+        their own).
 
         :param node: A PSyIR node.
         :type node: :py:class:`psyclone.psyGen.Node`
@@ -144,28 +167,22 @@ class PSyIRVisitor(object):
                 "Expected argument to be of type 'Node' but found '{0}'."
                 "".format(type(node).__name__))
 
-        # Make a list of the node's ancestor classes (including
-        # itself) in method resolution order (mro), apart from the
-        # base "object" class.
-        import inspect
-        possible_method_names = [curr_class.__name__.lower()+"_node"
-                                 for curr_class in inspect.getmro(type(node))]
-        possible_method_names.remove("object_node")
-
-        # Try to call methods using the class names in the order of
-        # the class hierarchy (starting from the current class name).
-        for method_name in possible_method_names:
+        if len(self.__dict__) != self._checked_attributes:
+            self._check_instance_methods()
+        node_type = type(node)
+        try:
+            method_name = self._dispatch_table[node_type]
+        except KeyError:
+            method_name = self._find_method(node_type)
+            self._dispatch_table[node_type] = method_name
+
+        if method_name:
             try:
-                return eval("self.{0}(node)".format(method_name))
+                return getattr(self, method_name)(node)
             except AttributeError as excinfo:
-                if "attribute '{0}'".format(method_name) in str(excinfo):
-                    # This attribute error is because the method that
-                    # was tried does not exist.
-                    pass
-                else:
-                    # The method does exist but it has raised an
-                    # attribute error so re-raise it here.
-                    raise AttributeError(excinfo)
+                # Re-raise any attribute error raised by the method so
+                # that it is not mistaken for a missing method.
+                raise AttributeError(excinfo)
 
         if self._skip_nodes:
             for child in node.children:
@@ -173,4 +190,49 @@ class PSyIRVisitor(object):
         else:
             raise VisitorError(
                 "Unsupported node '{0}' found: method names attempted were "
-                "{1}.".format(type(node).__name__, str(possible_method_names)))
+                "{1}.".format(node_type.__name__,
+                              str(self._method_names(node_type))))
+
+    def _check_instance_methods(self):
+        '''Call back methods may be added to (or replaced in) a visitor
+        instance, in which case the methods found for the instance may
+        differ from those found for its class and so it uses a dispatch
+        table of its own. This is checked whenever the number of
+        attributes of the instance has changed.
+
+        '''
+        if any(name.endswith("_node") for name in self.__dict__):
+            self._dispatch_table = {}
+        self._checked_attributes = len(self.__dict__)
+
+    @staticmethod
+    def _method_names(node_type):
+        '''
+        :param type node_type: a PSyIR node class.
+
+        :returns: the names of the candidate call back methods for the \
+                  class, i.e. the lower case names of the class and of \
+                  its ancestor classes (apart from "object") in method \
+                  resolution order (mro), with "_node" appended.
+        :rtype: list of str
+
+        '''
+        return [curr_class.__name__.lower()+"_node"
+                for curr_class in inspect.getmro(node_type)
+                if curr_class is not object]
+
+    def _find_method(self, node_type):
+        '''
+        :param type node_type: a PSyIR node class.
+
+        :returns: the name of the first candidate call back method for \
+                  the class that this visitor provides (including one \
+                  added to this instance), or None if it provides none \
+                  of them.
+        :rtype: str or NoneType
+
+        '''
+        for method_name in self._method_names(node_type):
+            if hasattr(self, method_name):
+                return method_name
+        return None
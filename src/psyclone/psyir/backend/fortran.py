@@ -39,8 +39,13 @@ already has a gen() method to generate Fortran.
 
 '''
 
+from fparser.two.Fortran2003 import Intrinsic_Name
 from psyclone.psyir.backend.base import PSyIRVisitor, VisitorError
-from psyclone.psyGen import FORTRAN_INTRINSICS
+
+# The list of Fortran instrinsic functions that we know about (and can
+# therefore distinguish from array accesses). These are taken from
+# fparser.
+FORTRAN_INTRINSICS = Intrinsic_Name.function_names
 
 
 def gen_intent(symbol):
@@ -0,0 +1,335 @@
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''Module providing a long-running PSyclone server and a thin client
+for it.
+
+Most of the time taken to process a single algorithm file is spent
+starting Python, importing PSyclone and fparser, reading the
+configuration file and parsing kernels. The server (started with
+``psyclone --serve SOCKET``) does this once and then processes
+requests, each of which is equivalent to running the ``psyclone``
+script with a given set of arguments, received over a local (Unix
+domain) socket. Parsed kernels are kept in memory between requests.
+The ``psyclonec`` script is a drop-in replacement for ``psyclone``
+that forwards its arguments to a running server (or, if there is no
+server, processes them itself). Only the user who started the server
+may connect to its socket.
+
+Each request is a single line of JSON holding the command-line
+arguments, the working directory and any PSyclone environment
+variables of the client. The reply is a single line of JSON holding
+the exit status and the text written to stdout and stderr.
+Requests are processed one at a time.
+
+'''
+
+from __future__ import absolute_import, print_function
+
+import json
+import os
+import socket
+import sys
+import traceback
+
+import six
+from six.moves import socketserver
+
+from psyclone.file_dependencies import is_user_module
+
+# Environment variable holding the socket of the server to be used by
+# the client.
+SERVER_ENV_VAR = "PSYCLONE_SERVER"
+
+# Environment variables of the client that are passed to the server.
+FORWARDED_ENV_VARS = ["PSYCLONE_CONFIG"]
+
+
+def reset_state():
+    '''Discard the state that PSyclone keeps in this process from one
+    algorithm file to the next (other than the kernel meta-data in the
+    kernel cache, which is keyed on the content of the kernel source) so
+    that each request is processed as if by a new process. This includes
+    the configuration, which is changed by the options of a request (e.g.
+    ``-nodm``) and is re-loaded from the configuration file of the next
+    request.'''
+    from psyclone.configuration import Config
+    from psyclone.parse.kernel import KernelSearchIndex, \
+        clear_kernel_fp2_asts
+    from psyclone.psyGen import NameSpaceFactory
+    Config._instance = None
+    KernelSearchIndex.clear()
+    clear_kernel_fp2_asts()
+    NameSpaceFactory(reset=True)
+
+
+def run_request(request):
+    '''Process a single request in this process as if the ``psyclone``
+    script had been run with the supplied arguments in the supplied
+    directory. The state of the process (working directory, environment,
+    stdout and stderr) is restored afterwards.
+
+    :param dict request: the request with keys 'args' (the command-line \
+                         arguments), 'cwd' (the working directory) and \
+                         'env' (a dictionary of environment variables).
+
+    :returns: the reply with keys 'status' (the exit status), 'stdout' \
+              and 'stderr' (the output of PSyclone).
+    :rtype: dict
+
+    '''
+    from psyclone.generator import main
+    from psyclone.profiler import Profiler
+
+    old_cwd = os.getcwd()
+    old_env = dict((name, os.environ.get(name))
+                   for name in FORWARDED_ENV_VARS)
+    old_stdout, old_stderr = sys.stdout, sys.stderr
+    old_modules = set(sys.modules.keys())
+    stdout = six.StringIO()
+    stderr = six.StringIO()
+    status = 0
+    try:
+        os.chdir(request["cwd"])
+        for name in FORWARDED_ENV_VARS:
+            value = request.get("env", {}).get(name)
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        sys.stdout, sys.stderr = stdout, stderr
+        reset_state()
+        # Options that main() only sets if they are specified.
+        Profiler.set_options(None)
+        main(request["args"])
+    except SystemExit as err:
+        if err.code is None:
+            status = 0
+        elif isinstance(err.code, int):
+            status = err.code
+        else:
+            print(err.code, file=stderr)
+            status = 1
+    except Exception:  # pylint: disable=broad-except
+        traceback.print_exc(file=stderr)
+        status = 1
+    finally:
+        sys.stdout, sys.stderr = old_stdout, old_stderr
+        # Forget any user modules (e.g. transformation scripts) that
+        # were imported so that they are re-imported if they change.
+        for name in set(sys.modules.keys()) - old_modules:
+            if is_user_module(name, sys.modules[name]):
+                del sys.modules[name]
+        for name, value in old_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        os.chdir(old_cwd)
+    return {"status": status, "stdout": stdout.getvalue(),
+            "stderr": stderr.getvalue()}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    '''Handles a single connection to the PSyclone server.'''
+
+    def handle(self):
+        '''Read a request from the client, process it and send the
+        reply.'''
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line.decode("utf-8"))
+        except ValueError:
+            reply = {"status": 1, "stdout": "",
+                     "stderr": "PSyclone server: invalid request\n"}
+        else:
+            if request.get("shutdown"):
+                reply = {"status": 0, "stdout": "", "stderr": ""}
+                self.server.shutdown_requested = True
+            else:
+                reply = run_request(request)
+        self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+
+
+class PSycloneServer(socketserver.UnixStreamServer):
+    '''Server that processes PSyclone requests received over a Unix
+    domain socket until it receives a shutdown request.
+
+    :param str socket_path: the path of the socket on which to listen.
+
+    :raises IOError: if there is already a server listening on the socket.
+
+    '''
+    def __init__(self, socket_path):
+        if os.path.exists(socket_path):
+            if server_running(socket_path):
+                raise IOError("a PSyclone server is already listening on "
+                              "'{0}'".format(socket_path))
+            # Left behind by a server that did not shut down cleanly.
+            os.remove(socket_path)
+        socketserver.UnixStreamServer.__init__(self, socket_path,
+                                               _RequestHandler)
+        self.shutdown_requested = False
+
+    def server_bind(self):
+        '''Create the socket so that only the current user may connect to
+        it (as a request runs arbitrary transformation scripts).'''
+        old_umask = os.umask(0o177)
+        try:
+            socketserver.UnixStreamServer.server_bind(self)
+        finally:
+            os.umask(old_umask)
+
+    def serve_until_shutdown(self):
+        '''Process requests until a shutdown request is received and then
+        remove the socket.'''
+        try:
+            while not self.shutdown_requested:
+                self.handle_request()
+        finally:
+            self.server_close()
+            if os.path.exists(self.server_address):
+                os.remove(self.server_address)
+
+
+def warm_up():
+    '''Import the PSyclone API modules and create the fparser2 parser so
+    that this is not done while processing the first request. Parsed
+    kernels are kept in memory.'''
+    # pylint: disable=unused-variable
+    from fparser.two.parser import ParserFactory
+    from psyclone import dynamo0p1, dynamo0p3, gocean0p1, gocean1p0, \
+        nemo, transformations, alg_gen
+    from psyclone.parse.kernel_cache import KernelCache
+    ParserFactory().create()
+    KernelCache.enable_memory_cache()
+
+
+def serve(socket_path):
+    '''Run a PSyclone server listening on the supplied socket until it
+    is sent a shutdown request (see :func:`stop_server`).
+
+    :param str socket_path: the path of the socket on which to listen.
+
+    '''
+    server = PSycloneServer(socket_path)
+    warm_up()
+    print("PSyclone server listening on '{0}'".format(socket_path),
+          file=sys.stderr)
+    server.serve_until_shutdown()
+
+
+def send_request(socket_path, request):
+    '''Send a request to the PSyclone server and wait for the reply.
+
+    :param str socket_path: the socket on which the server is listening.
+    :param dict request: the request (see :func:`run_request`).
+
+    :returns: the reply (see :func:`run_request`).
+    :rtype: dict
+
+    :raises socket.error: if the server cannot be contacted.
+
+    '''
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    finally:
+        sock.close()
+    return json.loads(data.decode("utf-8"))
+
+
+def server_running(socket_path):
+    '''
+    :param str socket_path: the socket of a PSyclone server.
+
+    :returns: whether a server is listening on the supplied socket.
+    :rtype: bool
+
+    '''
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except socket.error:
+        return False
+    finally:
+        sock.close()
+    return True
+
+
+def stop_server(socket_path):
+    '''Ask the PSyclone server listening on the supplied socket to shut
+    down.
+
+    :param str socket_path: the socket on which the server is listening.
+
+    :raises socket.error: if the server cannot be contacted.
+
+    '''
+    send_request(socket_path, {"shutdown": True})
+
+
+def client_main(args):
+    '''Entry point of the ``psyclonec`` script. The arguments are the same
+    as those of the ``psyclone`` script and are processed by the server
+    whose socket is given by the PSYCLONE_SERVER environment variable.
+    If that is not set, or no server is listening on the socket, the
+    arguments are processed by this process instead.
+
+    :param list args: the command-line arguments.
+
+    '''
+    socket_path = os.environ.get(SERVER_ENV_VAR)
+    if socket_path:
+        request = {"args": args, "cwd": os.getcwd(),
+                   "env": dict((name, os.environ[name])
+                               for name in FORWARDED_ENV_VARS
+                               if name in os.environ)}
+        try:
+            reply = send_request(socket_path, request)
+        except (socket.error, ValueError):
+            # No (working) server so fall back to running PSyclone here.
+            pass
+        else:
+            sys.stdout.write(reply["stdout"])
+            sys.stderr.write(reply["stderr"])
+            sys.exit(reply["status"])
+    from psyclone.generator import main
+    main(args)
@@ -516,6 +516,72 @@ def test_incl_path_errors(tmpdir):
     assert "does_not_exist' does not exist" in str(cerr)
 
 
+def test_kernel_cache_settings(tmpdir, monkeypatch):
+    ''' Check that the settings for the on-disk kernel cache are read
+    from the DEFAULT section of the config file. '''
+    # Caching is disabled by default
+    config_file = tmpdir.join("config")
+    with config_file.open(mode="w") as new_cfg:
+        new_cfg.write(_CONFIG_CONTENT)
+    config = Config()
+    config.load(config_file=str(config_file))
+    assert not config.kernel_cache_dir
+    assert config.kernel_cache_size == 256
+
+    # Environment variables in the directory name are expanded
+    monkeypatch.setitem(os.environ, "PSY_CACHE_TEST", str(tmpdir))
+    content = _CONFIG_CONTENT.replace(
+        "[dynamo0.3]", "KERNEL_CACHE_DIR = $PSY_CACHE_TEST/cache\n"
+        "KERNEL_CACHE_SIZE = 10\n[dynamo0.3]")
+    with config_file.open(mode="w") as new_cfg:
+        new_cfg.write(content)
+    config.load(config_file=str(config_file))
+    assert config.kernel_cache_dir == os.path.join(str(tmpdir), "cache")
+    assert config.kernel_cache_size == 10
+    config.kernel_cache_dir = ""
+    assert not config.kernel_cache_dir
+
+    # The size must be a non-negative integer
+    for value, msg in [("big", "error while parsing KERNEL_CACHE_SIZE"),
+                       ("-1", "KERNEL_CACHE_SIZE must be non-negative but "
+                        "got -1")]:
+        with config_file.open(mode="w") as new_cfg:
+            new_cfg.write(re.sub(r"^KERNEL_CACHE_SIZE = .*$",
+                                 "KERNEL_CACHE_SIZE = " + value, content,
+                                 flags=re.MULTILINE))
+        with pytest.raises(ConfigurationError) as err:
+            config.load(config_file=str(config_file))
+        assert msg in str(err.value)
+
+
+def test_cache_generated_code_setting(tmpdir):
+    ''' Check that the setting for caching generated code is read from
+    the DEFAULT section of the config file. '''
+    config_file = tmpdir.join("config")
+    with config_file.open(mode="w") as new_cfg:
+        new_cfg.write(_CONFIG_CONTENT)
+    config = Config()
+    config.load(config_file=str(config_file))
+    assert not config.cache_generated_code
+    config.cache_generated_code = True
+    assert config.cache_generated_code
+
+    for value, expected in [("true", True), ("no", False)]:
+        with config_file.open(mode="w") as new_cfg:
+            new_cfg.write(_CONFIG_CONTENT.replace(
+                "[dynamo0.3]",
+                "CACHE_GENERATED_CODE = {0}\n[dynamo0.3]".format(value)))
+        config.load(config_file=str(config_file))
+        assert config.cache_generated_code == expected
+
+    with config_file.open(mode="w") as new_cfg:
+        new_cfg.write(_CONFIG_CONTENT.replace(
+            "[dynamo0.3]", "CACHE_GENERATED_CODE = sometimes\n[dynamo0.3]"))
+    with pytest.raises(ConfigurationError) as err:
+        config.load(config_file=str(config_file))
+    assert "error while parsing CACHE_GENERATED_CODE" in str(err.value)
+
+
 def test_mappings():
     '''Test the definition of a mapping in the config file.'''
     mapping = APISpecificConfig.create_dict_from_string("k1:v1, k2:v2")
@@ -570,3 +636,36 @@ def test_default_access_mapping(tmpdir):
         api_config = config.api_conf("dynamo0.3")
         for access_mode in api_config.get_access_mapping().values():
             assert isinstance(access_mode, AccessType)
+
+
+def test_psy_layer_writer_setting(tmpdir):
+    ''' Check that the way of writing the PSy layer is read from the
+    DEFAULT section of the config file and that unrecognised values are
+    rejected. '''
+    from psyclone import configuration
+    config_file = tmpdir.join("config")
+    with config_file.open(mode="w") as new_cfg:
+        new_cfg.write(_CONFIG_CONTENT)
+    config = Config()
+    config.load(config_file=str(config_file))
+    assert config.psy_layer_writer == "fparser1"
+    config.psy_layer_writer = "direct"
+    assert config.psy_layer_writer == "direct"
+    with pytest.raises(ValueError) as err:
+        config.psy_layer_writer = "fparser2"
+    assert ("psy_layer_writer must be one of {0} but got 'fparser2'".
+            format(configuration.VALID_PSY_LAYER_WRITERS) in str(err.value))
+
+    with config_file.open(mode="w") as new_cfg:
+        new_cfg.write(_CONFIG_CONTENT.replace(
+            "[dynamo0.3]", "PSY_LAYER_WRITER = direct\n[dynamo0.3]"))
+    config.load(config_file=str(config_file))
+    assert config.psy_layer_writer == "direct"
+
+    with config_file.open(mode="w") as new_cfg:
+        new_cfg.write(_CONFIG_CONTENT.replace(
+            "[dynamo0.3]", "PSY_LAYER_WRITER = text\n[dynamo0.3]"))
+    with pytest.raises(ConfigurationError) as err:
+        config.load(config_file=str(config_file))
+    assert ("PSY_LAYER_WRITER must be one of {0} but got 'text'".format(
+        configuration.VALID_PSY_LAYER_WRITERS) in str(err.value))
@@ -68,6 +68,8 @@ def pytest_addoption(parser):
                      help="run tests for code compilation")
     parser.addoption("--compileopencl", action="store_true", default=False,
                      help="run tests for compilation of OpenCL code")
+    parser.addoption("--timing", action="store_true", default=False,
+                     help="run tests that check wall-clock time budgets")
 
 
 @pytest.fixture
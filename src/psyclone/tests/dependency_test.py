@@ -381,3 +381,77 @@ def test_location(parser):
     assert x_accesses[0].access_type == AccessType.READ
     assert x_accesses[1].access_type == AccessType.WRITE
     assert x_accesses[0].location == x_accesses[1].location
+
+
+def test_cached_var_accesses(parser):
+    '''Test that the accesses held by a node are re-used by its ancestors
+    and are only discarded when the node or one of its descendants is
+    modified.
+    '''
+    reader = FortranStringReader('''program test_prog
+                                 a = b
+                                 if (a .eq. b) then
+                                    p(i) = q(i)
+                                 else
+                                   q(i) = r(i)
+                                 endif
+                                 do jj=1, n
+                                    do ji=1, 10
+                                       s(ji, jj)=t(ji, jj)+1
+                                    enddo
+                                 enddo
+                                 x = x + 1
+                                 end program test_prog''')
+    ast = parser(reader)
+    psy = PSyFactory(API).create(ast)
+    schedule = psy.invokes.get("test_prog").schedule
+    if_block = schedule.children[1]
+    loop = schedule.children[2]
+
+    def summary(var_accesses):
+        ''' The details of each access. '''
+        return [(name, access.access_type, access.location, access.node,
+                 access.indices)
+                for name in var_accesses.all_vars
+                for access in var_accesses[name].all_accesses]
+
+    expected = VariablesAccessInfo()
+    schedule.reference_accesses(expected)
+    # Request the accesses of the if block and of the loop and then
+    # those of the schedule (which uses them)
+    if_accesses = if_block.var_accesses
+    loop_accesses = loop.var_accesses
+    assert schedule.var_accesses is schedule.var_accesses
+    assert summary(schedule.var_accesses) == summary(expected)
+    assert schedule.var_accesses.location == expected.location
+
+    # Removing a statement only discards the accesses of the schedule
+    schedule.children.pop()
+    assert "x" not in schedule.var_accesses.all_vars
+    assert if_block.var_accesses is if_accesses
+    assert loop.var_accesses is loop_accesses
+
+    # Modifying the kernel schedule of the NEMO kernel in the loop
+    # discards the accesses of the loop and the schedule
+    kernel = loop.walk(nemo.NemoKern)[0]
+    kernel.get_kernel_schedule().children.pop()
+    assert loop.var_accesses is not loop_accesses
+    assert "s" not in loop.var_accesses.all_vars
+    assert "s" not in schedule.var_accesses.all_vars
+    assert if_block.var_accesses is if_accesses
+
+    # The accesses of a copied tree are discarded when it is modified
+    import copy
+    from psyclone.psyGen import Literal, Reference, Schedule
+    schedule = Schedule()
+    assignment = Assignment(parent=schedule)
+    assignment.addchild(Reference("a", parent=assignment))
+    assignment.addchild(Literal("1", parent=assignment))
+    schedule.addchild(assignment)
+    assert schedule.var_accesses.all_vars == ["a"]
+    new_schedule = copy.deepcopy(schedule)
+    assert new_schedule.var_accesses.all_vars == ["a"]
+    new_assignment = new_schedule.children[0]
+    new_assignment.children[0] = Reference("b", parent=new_assignment)
+    assert new_schedule.var_accesses.all_vars == ["b"]
+    assert schedule.var_accesses.all_vars == ["a"]
@@ -49,12 +49,13 @@ from psyclone.transformations import TransformationError, \
     Dynamo0p3OMPLoopTrans, \
     DynamoOMPParallelLoopTrans, \
     DynamoLoopFuseTrans, \
+    OMPParallelDoMergeTrans, \
     KernelModuleInlineTrans, \
     MoveTrans, \
     Dynamo0p3RedundantComputationTrans, \
     Dynamo0p3AsyncHaloExchangeTrans, \
     Dynamo0p3KernelConstTrans
-from psyclone.configuration import Config
+from psyclone.configuration import Config, VALID_PSY_LAYER_WRITERS
 from dynamo0p3_build import Dynamo0p3Build
 
 
@@ -7608,3 +7609,191 @@ def test_kern_const_invalid_make_constant2():
     assert ("Expected entry to be a scalar integer argument but found "
             "'ndf_w1: <real, Scalar, global=Argument("
             "pass-by-value=False)>'.") in str(excinfo.value)
+
+
+def test_omp_pdo_merge(tmpdir, dist_mem):
+    '''Check that OMPParallelDoMergeTrans merges all parallel do directives
+    of an invoke into one parallel region and adds 'nowait' to the loops
+    that no following loop depends on.
+
+    '''
+    _, info = parse(os.path.join(BASE_PATH,
+                                 "15.14.1_multi_aX_plus_Y_builtin.f90"),
+                    api=TEST_API)
+    psy = PSyFactory(TEST_API, distributed_memory=dist_mem).create(info)
+    schedule = psy.invokes.invoke_list[0].schedule
+    for loop in schedule.loops():
+        DynamoOMPParallelLoopTrans().apply(loop)
+    trans = OMPParallelDoMergeTrans()
+    assert str(trans) == ("Merge consecutive OpenMP PARALLEL DO directives "
+                          "into one OpenMP PARALLEL region")
+    assert trans.name == "OMPParallelDoMergeTrans"
+    new_schedule, _ = trans.apply(schedule)
+    assert new_schedule is schedule
+    assert len(schedule.children) == 1
+    region = schedule.children[0]
+    assert isinstance(region, psyGen.OMPParallelDirective)
+    assert all(isinstance(child, psyGen.OMPDoDirective) and
+               not isinstance(child, psyGen.OMPParallelDoDirective)
+               for child in region.children)
+    # The first three loops read f3, which is written by the fourth
+    # loop, which is read by all following loops. The last loop does
+    # not need a 'nowait' as the parallel region ends after it.
+    assert [child.nowait for child in region.children] == \
+        [False, False, False, False, True, True, False]
+    code = str(psy.gen)
+    assert code.count("!$omp parallel default(shared), private(df)") == 1
+    assert code.count("!$omp do schedule(static)") == 7
+    assert code.count("!$omp end do nowait") == 2
+    assert code.count("!$omp end do\n") == 5
+    assert "parallel do" not in code
+    assert Dynamo0p3Build(tmpdir).code_compiles(psy)
+
+
+def test_omp_pdo_merge_halo_exchange(tmpdir):
+    '''Check that halo exchanges separate the merged parallel regions
+    and that the dependence analysis only considers the loops within the
+    same parallel region.
+
+    '''
+    _, info = parse(
+        os.path.join(BASE_PATH, "15.1.2_builtin_and_normal_kernel_invoke.f90"),
+        api=TEST_API)
+    psy = PSyFactory(TEST_API, distributed_memory=True).create(info)
+    schedule = psy.invokes.invoke_list[0].schedule
+    for loop in schedule.loops():
+        DynamoOMPParallelLoopTrans().apply(loop)
+    OMPParallelDoMergeTrans().apply(schedule)
+    types = [psyGen.OMPParallelDirective, psyGen.HaloExchange,
+             psyGen.OMPParallelDirective, psyGen.HaloExchange,
+             psyGen.HaloExchange, psyGen.OMPParallelDoDirective]
+    assert len(schedule.children) == len(types)
+    for child, node_type in zip(schedule.children, types):
+        assert isinstance(child, node_type)
+    assert not isinstance(schedule.children[0],
+                          psyGen.OMPParallelDoDirective)
+    # f5 is only read by a loop in the second region
+    assert schedule.children[0].children[0].nowait
+    assert not schedule.children[0].children[1].nowait
+    code = str(psy.gen)
+    assert ("      !$omp end parallel\n"
+            "      CALL f2_proxy%halo_exchange(depth=1)\n" in code)
+    assert Dynamo0p3Build(tmpdir).code_compiles(psy)
+
+
+def test_omp_pdo_merge_reductions(dist_mem):
+    '''Check that OMPParallelDoMergeTrans preserves reductions: a loop
+    with a reduction has no 'nowait', global sums separate the regions
+    and a reduction variable is only used once in a region.
+
+    '''
+    _, info = parse(os.path.join(BASE_PATH,
+                                 "15.19.1_three_builtins_two_reductions.f90"),
+                    api=TEST_API)
+    psy = PSyFactory(TEST_API, distributed_memory=dist_mem).create(info)
+    schedule = psy.invokes.invoke_list[0].schedule
+    for loop in schedule.loops():
+        DynamoOMPParallelLoopTrans().apply(loop)
+    OMPParallelDoMergeTrans().apply(schedule)
+    code = str(psy.gen)
+    if dist_mem:
+        # The global sum of asum follows the first loop
+        assert isinstance(schedule.children[0],
+                          psyGen.OMPParallelDoDirective)
+        assert isinstance(schedule.children[1], psyGen.GlobalSum)
+        region = schedule.children[2]
+        assert [child.nowait for child in region.children] == [True, False]
+    else:
+        region = schedule.children[0]
+        assert [child.nowait for child in region.children] == \
+            [False, True, False]
+        assert ("      asum = 0.0_r_def\n"
+                "      bsum = 0.0_r_def\n"
+                "      !\n"
+                "      !$omp parallel default(shared), private(df)\n"
+                "      !$omp do schedule(static), reduction(+:asum)\n"
+                in code)
+    assert "!$omp do schedule(static), reduction(+:bsum)" in code
+
+    # Two loops with the same reduction variable must not be merged
+    _, info = parse(os.path.join(BASE_PATH,
+                                 "15.15.1_two_same_builtin_reductions.f90"),
+                    api=TEST_API)
+    psy = PSyFactory(TEST_API, distributed_memory=False).create(info)
+    schedule = psy.invokes.invoke_list[0].schedule
+    for loop in schedule.loops():
+        DynamoOMPParallelLoopTrans().apply(loop)
+    with pytest.raises(TransformationError) as excinfo:
+        OMPParallelDoMergeTrans().apply(schedule.children[:])
+    assert ("A reduction variable can only be used once in a parallel "
+            "region." in str(excinfo.value))
+    OMPParallelDoMergeTrans().apply(schedule)
+    assert all(isinstance(child, psyGen.OMPParallelDoDirective)
+               for child in schedule.children)
+
+
+def test_omp_pdo_merge_errors(monkeypatch):
+    '''Check the validation of the arguments of OMPParallelDoMergeTrans.'''
+    _, info = parse(os.path.join(BASE_PATH,
+                                 "15.14.1_multi_aX_plus_Y_builtin.f90"),
+                    api=TEST_API)
+    psy = PSyFactory(TEST_API, distributed_memory=False).create(info)
+    schedule = psy.invokes.invoke_list[0].schedule
+    trans = OMPParallelDoMergeTrans()
+    for nodes in [schedule.children[0], [], schedule.children[0:2]]:
+        with pytest.raises(TransformationError) as excinfo:
+            trans.apply(nodes)
+        assert ("The argument must be an InvokeSchedule or a list of "
+                "OMPParallelDoDirectives but got" in str(excinfo.value))
+    for loop in schedule.loops():
+        DynamoOMPParallelLoopTrans().apply(loop)
+    with pytest.raises(TransformationError) as excinfo:
+        trans.apply([schedule.children[0], schedule.children[2]])
+    assert ("The directives must be consecutive children of the same "
+            "parent." in str(excinfo.value))
+    # Merge two of the directives
+    trans.apply(schedule.children[1:3])
+    assert isinstance(schedule.children[1], psyGen.OMPParallelDirective)
+    assert len(schedule.children) == 6
+    # The code of a directive has already been generated
+    monkeypatch.setattr(schedule.children[0], "_ast", "generated")
+    with pytest.raises(TransformationError) as excinfo:
+        trans.apply(schedule)
+    assert ("The code for the directives has already been generated." in
+            str(excinfo.value))
+
+
+@pytest.mark.parametrize("algfile", ["1_single_invoke.f90",
+                                     "15.14.1_multi_aX_plus_Y_builtin.f90",
+                                     "15.19.1_three_builtins_two_reductions"
+                                     ".f90"])
+def test_direct_psy_layer_writer(algfile, dist_mem):
+    '''Check that the "direct" PSy-layer writer produces the same code as
+    the fparser1 one for invokes with colouring, OpenMP directives,
+    module-inlined kernels, halo exchanges and global sums.
+
+    '''
+    _, info = parse(os.path.join(BASE_PATH, algfile), api=TEST_API)
+    config = Config.get()
+    old_writer = config.psy_layer_writer
+    code = {}
+    try:
+        for writer in VALID_PSY_LAYER_WRITERS:
+            config.psy_layer_writer = writer
+            psy = PSyFactory(TEST_API,
+                             distributed_memory=dist_mem).create(info)
+            schedule = psy.invokes.invoke_list[0].schedule
+            for loop in schedule.loops():
+                if loop.loop_type == "":
+                    schedule, _ = Dynamo0p3ColourTrans().apply(loop)
+            for loop in schedule.loops():
+                if loop.loop_type in ["dofs", "colour"]:
+                    schedule, _ = DynamoOMPParallelLoopTrans().apply(loop)
+            for kern in schedule.coded_kernels():
+                KernelModuleInlineTrans().apply(kern)
+            OMPParallelDoMergeTrans().apply(schedule)
+            code[writer] = str(psy.gen)
+    finally:
+        config.psy_layer_writer = old_writer
+    assert "!$omp parallel" in code["direct"]
+    assert code["direct"] == code["fparser1"]
@@ -899,6 +899,63 @@ def test_progunit_multiple_use3():
     assert funcnames == ["c", "d"]
 
 
+def test_progunitgen_declaration_index():
+    '''Check that declarations and use statements added with an explicit
+    position are taken into account when removing duplicates from
+    those that are subsequently added automatically.
+
+    '''
+    module = ModuleGen(name="testmodule")
+    sub = SubroutineGen(module, name="testsubroutine")
+    module.add(sub)
+    sub.add(DeclGen(sub, datatype="integer", entity_decls=["i1"]),
+            position=["first"])
+    sub.add(UseGen(sub, name="fred", only=True, funcnames=["astaire"]),
+            position=["first"])
+    sub.add(DeclGen(sub, datatype="integer", entity_decls=["I1", "i2"]))
+    sub.add(UseGen(sub, name="fred", only=True,
+                   funcnames=["Astaire", "rogers"]))
+    assert count_lines(sub.root, "INTEGER i2") == 1
+    assert count_lines(sub.root, "INTEGER I1") == 0
+    assert count_lines(sub.root, "USE fred, ONLY: rogers") == 1
+    # A generic use of a module makes any later use of it redundant
+    sub.add(UseGen(sub, name="ginger"))
+    sub.add(UseGen(sub, name="ginger", only=True, funcnames=["a"]))
+    sub.add(UseGen(sub, name="ginger"))
+    assert count_lines(sub.root, "USE ginger") == 1
+
+
+def test_progunitgen_declaration_position():
+    '''Check that new declarations are placed after any use statements,
+    implicit none and declarations with an intent, including when use
+    statements and declarations with an intent are added between
+    them.
+
+    '''
+    module = ModuleGen(name="testmodule")
+    sub = SubroutineGen(module, name="testsubroutine", implicitnone=True)
+    module.add(sub)
+    sub.add(DeclGen(sub, datatype="integer", entity_decls=["arg1"],
+                    intent="in"))
+    sub.add(DeclGen(sub, datatype="integer", entity_decls=["local1"]))
+    sub.add(UseGen(sub, name="fred"))
+    sub.add(DeclGen(sub, datatype="real", entity_decls=["arg2"],
+                    intent="inout"))
+    sub.add(DeclGen(sub, datatype="real", entity_decls=["local2"]))
+    sub.add(UseGen(sub, name="ginger"))
+    sub.add(DeclGen(sub, datatype="real", entity_decls=["local3"]))
+    expected = (
+        "      USE ginger\n"
+        "      USE fred\n"
+        "      IMPLICIT NONE\n"
+        "      INTEGER, intent(in) :: arg1\n"
+        "      REAL, intent(inout) :: arg2\n"
+        "      REAL local3\n"
+        "      REAL local2\n"
+        "      INTEGER local1\n")
+    assert expected in str(sub.root)
+
+
 def test_adduse_empty_only():
     ''' Test that the adduse module method works correctly when we specify
     that we want it to be specific but then don't provide a list of
@@ -1439,3 +1496,146 @@ def test_basegen_previous_loop_no_loop():
     with pytest.raises(RuntimeError) as err:
         sub.previous_loop()
     assert "no loop found - there is no previous loop" in str(err)
+
+
+@pytest.fixture(name="direct_writer")
+def direct_writer_fixture():
+    ''' Selects the "direct" PSy-layer writer for the duration of a
+    test. '''
+    from psyclone.configuration import Config
+    config = Config.get()
+    old_writer = config.psy_layer_writer
+    config.psy_layer_writer = "direct"
+    yield config
+    config.psy_layer_writer = old_writer
+
+
+def create_all_statements():
+    '''
+    Create a module that uses every type of statement supported by
+    f2pygen.
+
+    :returns: the module.
+    :rtype: :py:class:`psyclone.f2pygen.ModuleGen`
+
+    '''
+    from psyclone.f2pygen import SelectionGen, adduse
+    module = ModuleGen(name="testmodule")
+    module.add(UseGen(module, name="fred"))
+    module.add(TypeDeclGen(module, datatype="field_type",
+                           entity_decls=["fld"], save=True))
+    sub = SubroutineGen(module, name="testsubroutine", args=["a", "b"],
+                        implicitnone=True)
+    module.add(sub)
+    sub.add(UseGen(sub, name="ginger", only=True, funcnames=["x", "y"]))
+    sub.add(UseGen(sub, name="ginger", only=True, funcnames=["Y", "z"]))
+    sub.add(UseGen(sub, name="astaire", funcnames=["step"]))
+    sub.add(DeclGen(sub, datatype="integer", entity_decls=["a"],
+                    intent="in"))
+    sub.add(DeclGen(sub, datatype="real", kind="r_def", pointer=True,
+                    entity_decls=["b(:)"], intent="inout"))
+    sub.add(DeclGen(sub, datatype="logical", entity_decls=["l1", "l2"],
+                    initial_values=[".true.", "l1"]))
+    sub.add(DeclGen(sub, datatype="real", entity_decls=["r"],
+                    dimension="10", allocatable=True, target=True))
+    sub.add(CharDeclGen(sub, entity_decls=["c1"], length="10"))
+    sub.add(CharDeclGen(sub, entity_decls=["c2"], kind="c_def",
+                        initial_values=["'hello'"]))
+    sub.add(CharDeclGen(sub, entity_decls=["c3"], length="*",
+                        kind="c_def"))
+    sub.add(TypeDeclGen(sub, datatype="field_type", entity_decls=["f1"],
+                        intent="in"))
+    sub.add(TypeDeclGen(sub, datatype="field_type", entity_decls=["F1"]))
+    sub.add(CommentGen(sub, ""))
+    sub.add(CommentGen(sub, " A comment"))
+    sub.add(AllocateGen(sub, "r(10)"))
+    sub.add(DirectiveGen(sub, "omp", "begin", "parallel do",
+                         "private(i)"))
+    outer = DoGen(sub, "i", "1", "n")
+    sub.add(outer)
+    inner = DoGen(outer, "j", "n", "1", step="-1")
+    outer.add(inner)
+    inner.add(DeclGen(inner, datatype="integer", entity_decls=["i", "j"]))
+    call = CallGen(inner, "kern", ["i", "j", "b"])
+    inner.add(call)
+    sub.add(DirectiveGen(sub, "omp", "end", "parallel do", ""),
+            position=["after", sub.previous_loop()])
+    loop, position = call.start_parent_loop()
+    loop.add(CommentGen(loop, " Before the loop"),
+             position=["before", position])
+    ifthen = IfThenGen(sub, "a > 1")
+    sub.add(ifthen)
+    ifthen.add(AssignGen(ifthen, lhs="b(1)", rhs="a + 1.0"))
+    ifthen.add(CallGen(ifthen, "fld%halo_exchange"))
+    ifthen.add(UseGen(ifthen, name="rogers"))
+    sub.add(DirectiveGen(sub, "acc", "begin", "enter data", "copyin(b)"))
+    sub.add(AssignGen(sub, lhs="p", rhs="fld%get_proxy()", pointer=True))
+    sub.add(DeallocateGen(sub, ["r"]))
+    sub.add(DeclGen(sub, datatype="integer", entity_decls=["last"]),
+            position=["after", sub.last_declaration()])
+    for typeselect in [False, True]:
+        select = SelectionGen(sub, expr="a", typeselect=typeselect)
+        sub.add(select)
+        select.addcase(["1", "2"], [AssignGen(select, lhs="b(2)",
+                                              rhs="0.0")])
+        select.adddefault()
+    adduse("kelly", sub.root, only=True, funcnames=["gene"])
+    module.add(SubroutineGen(module, name="empty"))
+    return module
+
+
+def test_direct_writer(direct_writer):
+    ''' Check that f2pygen produces the same code with the "direct"
+    PSy-layer writer as with the fparser1 one, without creating any
+    fparser1 statements. '''
+    from fparser.common.base_classes import Statement
+    from psyclone import fortran_text
+    module = create_all_statements()
+    direct_code = str(module.root)
+    assert isinstance(module.root, fortran_text.Module)
+    assert not any(isinstance(stmt, Statement) for stmt in
+                   module.root.content[-2].content)
+    bare_module = ModuleGen(name="bare", contains=False, implicitnone=False)
+    direct_bare_code = str(bare_module.root)
+    direct_writer.psy_layer_writer = "fparser1"
+    module = create_all_statements()
+    assert isinstance(module.root, Statement)
+    assert str(module.root) == direct_code
+    bare_module = ModuleGen(name="bare", contains=False, implicitnone=False)
+    assert str(bare_module.root) == direct_bare_code
+    assert ("      USE ginger, ONLY: z\n"
+            "      USE ginger, ONLY: x, y\n"
+            "      IMPLICIT NONE\n"
+            "      INTEGER, intent(in) :: a\n"
+            "      REAL(KIND=r_def), intent(inout), pointer :: b(:)\n"
+            "      TYPE(field_type), intent(in) :: f1\n"
+            "      INTEGER i, j\n" in direct_code)
+    assert ("      ! Before the loop\n"
+            "      !$omp parallel do private(i)\n"
+            "      DO i=1,n\n"
+            "        DO j=n,1,-1\n"
+            "          CALL kern(i, j, b)\n"
+            "        END DO \n"
+            "      END DO \n"
+            "      !$omp end parallel do\n" in direct_code)
+
+
+def test_direct_writer_errors(direct_writer):
+    ''' Check that the "direct" PSy-layer writer rejects the same
+    unsupported directives as the fparser1 one. '''
+    # pylint: disable=unused-argument
+    module = ModuleGen(name="testmodule")
+    sub = SubroutineGen(module, name="testsubroutine")
+    module.add(sub)
+    with pytest.raises(RuntimeError) as err:
+        DirectiveGen(sub, "omp", "begin", "dosomething", "")
+    assert "unrecognised directive type 'dosomething'" in str(err.value)
+    with pytest.raises(RuntimeError) as err:
+        DirectiveGen(sub, "acc", "middle", "loop", "")
+    assert "unrecognised position 'middle'" in str(err.value)
+    with pytest.raises(RuntimeError) as err:
+        DirectiveGen(sub, "ocl", "begin", "loop", "")
+    assert "unsupported directive language" in str(err.value)
+    with pytest.raises(RuntimeError) as err:
+        CallGen(sub, "testcall").start_parent_loop()
+    assert "This node has no enclosing Do loop" in str(err.value)
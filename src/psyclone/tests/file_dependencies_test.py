@@ -0,0 +1,150 @@
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# -----------------------------------------------------------------------------
+
+''' Module containing tests for the recording of the files read and
+written by PSyclone. '''
+
+from __future__ import absolute_import
+import os
+import pytest
+from psyclone.configuration import Config
+from psyclone.file_dependencies import FileDependencies, is_user_module, \
+    source_file, user_modules
+from psyclone.generator import generate
+
+BASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "test_files", "dynamo0p3")
+
+
+def test_nested_recorders(tmpdir):
+    ''' Check that files are only recorded while a recorder is active,
+    that nested recorders see every file and that each file is only
+    recorded once. '''
+    FileDependencies.add_input("ignored.f90")
+    with FileDependencies() as outer:
+        FileDependencies.add_input("a.f90")
+        with FileDependencies() as inner:
+            FileDependencies.add_input(str(tmpdir.join("b.f90")))
+            FileDependencies.add_input("a.f90")
+            FileDependencies.add_output("c.f90")
+        FileDependencies.add_output("d.f90")
+    FileDependencies.add_output("ignored.f90")
+    cwd = os.getcwd()
+    assert outer.inputs == [os.path.join(cwd, "a.f90"),
+                            str(tmpdir.join("b.f90"))]
+    assert outer.outputs == [os.path.join(cwd, "c.f90"),
+                             os.path.join(cwd, "d.f90")]
+    assert inner.inputs == [str(tmpdir.join("b.f90")),
+                            os.path.join(cwd, "a.f90")]
+    assert inner.outputs == [os.path.join(cwd, "c.f90")]
+    assert not FileDependencies._active
+
+
+def test_user_module():
+    ''' Check that only modules that are not part of PSyclone, fparser or
+    the Python installation are considered to be user modules and that
+    the source of a module is found. '''
+    import sys
+    import psyclone_test_utils
+    assert not is_user_module("os", os)
+    assert not is_user_module("sys", sys)
+    assert not is_user_module("psyclone.file_dependencies",
+                              __import__("psyclone.file_dependencies"))
+    assert is_user_module("psyclone_test_utils", psyclone_test_utils)
+    assert source_file(psyclone_test_utils).endswith(
+        "psyclone_test_utils.py")
+
+
+def test_user_modules(tmpdir, monkeypatch):
+    ''' Check that the user modules reachable from a module, whether
+    imported directly or through a function imported from them, are
+    found (including those reachable from them) but that other modules
+    are not. '''
+    import sys
+    tmpdir.join("deps_helper_a.py").write("import deps_helper_b\n")
+    tmpdir.join("deps_helper_b.py").write("import os\n")
+    tmpdir.join("deps_helper_c.py").write("def func():\n    pass\n")
+    tmpdir.join("deps_script.py").write(
+        "import os\nimport deps_helper_a\nfrom deps_helper_c import func\n")
+    monkeypatch.syspath_prepend(str(tmpdir))
+    names = ["deps_script", "deps_helper_a", "deps_helper_b",
+             "deps_helper_c"]
+    try:
+        script = __import__("deps_script")
+        assert sorted(module.__name__ for module in user_modules(script)) \
+            == names[1:]
+        assert user_modules(sys.modules["deps_helper_c"]) == []
+    finally:
+        for name in names:
+            sys.modules.pop(name, None)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_generate_dependencies(jobs):
+    ''' Check that the algorithm file, the kernels and the transformation
+    script (and the modules it imports) are recorded when code is
+    generated, including when the kernels are parsed in parallel. '''
+    alg_file = os.path.join(BASE_PATH, "4.8_multikernel_invokes.f90")
+    script = os.path.join(BASE_PATH, "null_trans.py")
+    with FileDependencies() as deps:
+        generate(alg_file, api="dynamo0.3", script_name=script, jobs=jobs)
+    assert deps.inputs[0] == alg_file
+    assert os.path.join(BASE_PATH, "testkern.F90") in deps.inputs
+    assert os.path.join(BASE_PATH, "ru_kernel_mod.f90") in deps.inputs
+    assert deps.inputs[1] == Config.get().filename
+    assert script in deps.inputs
+    assert not deps.outputs
+
+
+def test_write_dependency_file(tmpdir, monkeypatch):
+    ''' Check that the recorded files are written as a Makefile rule,
+    with paths relative to the current directory where possible and
+    special characters escaped. '''
+    monkeypatch.chdir(str(tmpdir))
+    with FileDependencies() as deps:
+        FileDependencies.add_input("alg.x90")
+        FileDependencies.add_input("/other/kern mod.f90")
+        FileDependencies.add_input("lib/$kern#2.f90")
+        FileDependencies.add_output("psy.f90")
+        FileDependencies.add_output(str(tmpdir.join("kern_0_mod.f90")))
+    deps.write_dependency_file("deps.d", ["alg.f90", "psy.f90"])
+    assert tmpdir.join("deps.d").read() == (
+        "alg.f90 psy.f90 kern_0_mod.f90: \\\n"
+        " alg.x90 \\\n"
+        " /other/kern\\ mod.f90 \\\n"
+        " lib/$$kern\\#2.f90\n"
+        "\n"
+        "/other/kern\\ mod.f90:\n"
+        "\n"
+        "lib/$$kern\\#2.f90:\n")
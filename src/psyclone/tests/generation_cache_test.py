@@ -0,0 +1,275 @@
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# -----------------------------------------------------------------------------
+
+''' Module containing tests for the cache of generated code. '''
+
+from __future__ import absolute_import
+import os
+import shutil
+import sys
+import pytest
+from psyclone.configuration import Config
+from psyclone.file_dependencies import FileDependencies
+from psyclone import generator
+from psyclone.generation_cache import GenerationCache
+from psyclone.psyGen import KERNEL_INDEX_DIR
+
+GOCEAN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "test_files", "gocean1p0")
+
+# A transformation script that adds an "!$acc routine" directive to every
+# kernel and so causes a transformed kernel to be written.
+SCRIPT = '''
+def trans(psy):
+    from psyclone.transformations import ACCRoutineTrans
+    for invoke in psy.invokes.invoke_list:
+        for kern in invoke.schedule.coded_kernels():
+            ACCRoutineTrans().apply(kern)
+    return psy
+'''
+
+
+@pytest.fixture(name="gen_cache")
+def gen_cache_fixture(tmpdir, monkeypatch):
+    '''Enable the caching of generated code, using a temporary kernel
+    cache directory. The original settings are restored at the end of
+    the test.
+
+    :returns: the generation cache.
+    :rtype: :py:class:`psyclone.generation_cache.GenerationCache`
+
+    '''
+    config = Config.get()
+    monkeypatch.setattr(config, "kernel_cache_dir",
+                        str(tmpdir.join("kernel_cache")))
+    monkeypatch.setattr(config, "cache_generated_code", True)
+    return GenerationCache.create()
+
+
+@pytest.fixture(name="sources")
+def sources_fixture(tmpdir):
+    '''Copy a GOcean algorithm file and its kernel to a temporary
+    directory (so that they can be modified) and create a transformation
+    script and output directory for transformed kernels there.
+
+    :returns: the algorithm file, the kernel file, the transformation \
+              script and the kernel output directory.
+    :rtype: (str, str, str, str)
+
+    '''
+    src_dir = tmpdir.mkdir("src")
+    for name in ["single_invoke.f90", "compute_cu_mod.f90"]:
+        shutil.copy(os.path.join(GOCEAN_PATH, name), str(src_dir))
+    # Use a module name that is unique to this test so that it is
+    # imported from this directory.
+    script = src_dir.join("gen_cache_{0}.py".format(
+        os.path.basename(str(tmpdir))))
+    script.write(SCRIPT)
+    yield (str(src_dir.join("single_invoke.f90")),
+           str(src_dir.join("compute_cu_mod.f90")), str(script),
+           str(tmpdir.mkdir("kernels")))
+    sys.modules.pop(os.path.splitext(script.basename)[0], None)
+
+
+def test_cache_create(monkeypatch, tmpdir):
+    ''' Check that a generation cache is only created if it is enabled
+    and there is a kernel cache to hold its entries. '''
+    config = Config.get()
+    monkeypatch.setattr(config, "kernel_cache_dir", "")
+    monkeypatch.setattr(config, "cache_generated_code", True)
+    assert GenerationCache.create() is None
+    monkeypatch.setattr(config, "kernel_cache_dir", str(tmpdir))
+    assert isinstance(GenerationCache.create(), GenerationCache)
+    monkeypatch.setattr(config, "cache_generated_code", False)
+    assert GenerationCache.create() is None
+
+
+def test_cache_key(gen_cache, sources):
+    ''' Check that the key depends on the algorithm file and the
+    options. '''
+    alg_file, kernel_file, _, _ = sources
+    key = gen_cache.key(alg_file, {"api": "gocean1.0"})
+    assert key == gen_cache.key(alg_file, {"api": "gocean1.0"})
+    assert key != gen_cache.key(kernel_file, {"api": "gocean1.0"})
+    assert key != gen_cache.key(alg_file, {"api": "gocean1.0",
+                                           "line_length": True})
+
+
+def test_cache_key_location(gen_cache, sources, tmpdir):
+    ''' Check that the key depends on the location of the algorithm file
+    (as its kernels are searched for relative to it) and on the
+    locations given by relative paths. '''
+    alg_file, _, _, _ = sources
+    other_dir = tmpdir.mkdir("other")
+    shutil.copy(alg_file, str(other_dir))
+    other_alg_file = str(other_dir.join(os.path.basename(alg_file)))
+    key = gen_cache.key(alg_file, {"api": "gocean1.0"})
+    assert key != gen_cache.key(other_alg_file, {"api": "gocean1.0"})
+    old_cwd = tmpdir.chdir()
+    try:
+        key = gen_cache.key(alg_file, {"kernel_path": "src"})
+        assert key == gen_cache.key(alg_file,
+                                    {"kernel_path": str(tmpdir.join("src"))})
+        other_dir.chdir()
+        assert key != gen_cache.key(alg_file, {"kernel_path": "src"})
+    finally:
+        old_cwd.chdir()
+
+
+def test_cached_generate_location(gen_cache, sources, tmpdir):
+    ''' Check that identical algorithm files in different directories do
+    not share an entry, as they may use different kernels. '''
+    # pylint: disable=unused-argument
+    alg_file, kernel_file, _, _ = sources
+    other_dir = tmpdir.mkdir("other")
+    shutil.copy(alg_file, str(other_dir))
+    with open(kernel_file) as kfile:
+        kernel_code = kfile.read()
+    # The kernel in the other directory has a different subroutine name
+    other_kernel_file = str(other_dir.join(os.path.basename(kernel_file)))
+    with open(other_kernel_file, "w") as kfile:
+        kfile.write(kernel_code.replace("compute_cu_code",
+                                        "compute_cu_codx"))
+    other_alg_file = str(other_dir.join(os.path.basename(alg_file)))
+    _, psy = generator.cached_generate(alg_file, api="gocean1.0")
+    assert "CALL compute_cu_code(" in psy
+    with FileDependencies() as deps:
+        _, psy = generator.cached_generate(other_alg_file, api="gocean1.0")
+    assert "CALL compute_cu_codx(" in psy
+    assert other_alg_file in deps.inputs
+    assert other_kernel_file in deps.inputs
+    assert alg_file not in deps.inputs
+
+
+def test_cached_generate(gen_cache, sources, monkeypatch):
+    ''' Check that generated code and transformed kernels are restored
+    from the cache if none of the inputs have changed and that the code
+    is generated again if one of them has. '''
+    # pylint: disable=unused-argument
+    alg_file, kernel_file, script, kern_dir = sources
+    kwargs = {"api": "gocean1.0", "script_name": script,
+              "kern_out_path": kern_dir}
+    calls = []
+    generate = generator.generate
+
+    def counting_generate(*args, **kwargs):
+        calls.append(args[0])
+        return generate(*args, **kwargs)
+    monkeypatch.setattr(generator, "generate", counting_generate)
+
+    with FileDependencies() as deps:
+        alg, psy = generator.cached_generate(alg_file, **kwargs)
+    assert len(calls) == 1
+    assert "USE compute_cu_0_mod" in psy
+    kernels = [name for name in os.listdir(kern_dir)
+               if name != KERNEL_INDEX_DIR]
+    assert kernels == ["compute_cu_0_mod.f90"]
+    kernel_out = os.path.join(kern_dir, kernels[0])
+    with open(kernel_out) as kfile:
+        kernel_code = kfile.read()
+    assert "!$acc routine" in kernel_code
+    assert deps.inputs == [alg_file, Config.get().filename, kernel_file,
+                           script]
+    assert deps.outputs == [kernel_out]
+
+    # Second time around the code comes from the cache and the
+    # transformed kernel is re-created.
+    os.remove(kernel_out)
+    with FileDependencies() as cached_deps:
+        assert generator.cached_generate(alg_file, **kwargs) == (alg, psy)
+    assert len(calls) == 1
+    with open(kernel_out) as kfile:
+        assert kfile.read() == kernel_code
+    assert sorted(cached_deps.inputs) == sorted(deps.inputs)
+    assert cached_deps.outputs == deps.outputs
+
+    # A different transformed kernel of the same name is not overwritten
+    # (so the code is generated again, with a new kernel name).
+    with open(kernel_out, "a") as kfile:
+        kfile.write("! modified")
+    _, psy = generator.cached_generate(alg_file, **kwargs)
+    assert len(calls) == 2
+    assert "USE compute_cu_1_mod" in psy
+    with open(kernel_out) as kfile:
+        assert kfile.read().endswith("! modified")
+    for name in os.listdir(kern_dir):
+        if name == KERNEL_INDEX_DIR:
+            shutil.rmtree(os.path.join(kern_dir, name))
+        else:
+            os.remove(os.path.join(kern_dir, name))
+
+    # A change to the kernel source means the code is generated again
+    generator.cached_generate(alg_file, **kwargs)
+    assert len(calls) == 2
+    with open(kernel_file, "a") as kfile:
+        kfile.write("! modified")
+    generator.cached_generate(alg_file, **kwargs)
+    assert len(calls) == 3
+    generator.cached_generate(alg_file, **kwargs)
+    assert len(calls) == 3
+
+    # As does a change to the transformation script
+    with open(script, "a") as sfile:
+        sfile.write("# modified")
+    generator.cached_generate(alg_file, **kwargs)
+    assert len(calls) == 4
+
+
+def test_no_caching(monkeypatch, sources):
+    ''' Check that generate() is called directly if caching is not
+    enabled. '''
+    alg_file, _, _, _ = sources
+    monkeypatch.setattr(Config.get(), "cache_generated_code", False)
+    alg, psy = generator.cached_generate(alg_file, api="gocean1.0")
+    assert not isinstance(alg, str)
+    assert "compute_cu_code" in str(psy)
+
+
+def test_store_unreadable(gen_cache, sources):
+    ''' Check that no entry is stored if one of the recorded files no
+    longer exists. '''
+    alg_file, _, _, kern_dir = sources
+    key = gen_cache.key(alg_file, {})
+    with FileDependencies() as deps:
+        FileDependencies.add_input("no_such_file.f90")
+    gen_cache.store(key, "alg", "psy", deps, kern_dir)
+    assert gen_cache.lookup(key, kern_dir) is None
+    with FileDependencies() as deps:
+        FileDependencies.add_output("no_such_file.f90")
+    gen_cache.store(key, "alg", "psy", deps, kern_dir)
+    assert gen_cache.lookup(key, kern_dir) is None
+    with FileDependencies() as deps:
+        FileDependencies.add_input(alg_file)
+    gen_cache.store(key, "alg", "psy", deps, kern_dir)
+    assert gen_cache.lookup(key, kern_dir) == ("alg", "psy")
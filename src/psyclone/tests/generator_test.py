@@ -43,6 +43,7 @@ functions.
 from __future__ import absolute_import
 import os
 import re
+import sys
 import pytest
 from psyclone.generator import generate, GenerationError, main
 from psyclone.parse.utils import ParseError
@@ -410,6 +411,235 @@ def test_main_version(capsys):
     assert "PSyclone version: {0}".format(__VERSION__) in output
 
 
+def test_main_jobs(capsys):
+    '''Tests that the -j command line flag gives the same output as
+    the default and that an invalid number of jobs is rejected.'''
+    filename = os.path.join(BASE_PATH, "dynamo0p3",
+                            "4.8_multikernel_invokes.f90")
+    main([filename])
+    output, _ = capsys.readouterr()
+    main(["-j", "2", filename])
+    par_output, _ = capsys.readouterr()
+    assert par_output == output
+
+    with pytest.raises(SystemExit):
+        main(["-j", "0", filename])
+    _, outerr = capsys.readouterr()
+    assert "the number of jobs must be at least one but got 0" in outerr
+
+
+def test_main_jobs_kernels(capsys, tmpdir):
+    '''Tests that the -j command line flag gives the same output and
+    transformed kernels as the default when a transformation script
+    modifies the kernels.'''
+    filename = os.path.join(BASE_PATH, "dynamo0p3",
+                            "4.5.2_multikernel_invokes.f90")
+    script = tmpdir.join("acc_routine_jobs_script.py")
+    script.write("def trans(psy):\n"
+                 "    from psyclone.transformations import ACCRoutineTrans\n"
+                 "    for invoke in psy.invokes.invoke_list:\n"
+                 "        for kern in invoke.schedule.coded_kernels():\n"
+                 "            ACCRoutineTrans().apply(kern)\n"
+                 "    return psy\n")
+    results = []
+    for jobs in ["1", "2"]:
+        kern_dir = tmpdir.mkdir("kernels" + jobs)
+        main(["-j", jobs, "-s", str(script), "-okern", str(kern_dir),
+              filename])
+        output, _ = capsys.readouterr()
+        kernels = dict((name, kern_dir.join(name).read()) for name in
+                       os.listdir(str(kern_dir)) if name.endswith(".f90"))
+        results.append((output, kernels))
+    assert "!$acc routine" in list(results[0][1].values())[0]
+    assert results[1] == results[0]
+    delete_module("acc_routine_jobs_script")
+
+
+def test_read_manifest(tmpdir):
+    '''Tests that a batch manifest file is read correctly and that an
+    invalid entry is rejected.'''
+    from psyclone.generator import read_manifest
+    manifest = str(tmpdir.join("manifest.txt"))
+    with open(manifest, "w") as mfile:
+        mfile.write("# A comment\n"
+                    "alg1.f90 alg1_out.f90 psy1.f90\n"
+                    "\n"
+                    "alg2.f90  # No output files\n"
+                    "'dir name/alg3.f90' alg3_out.f90\n")
+    assert read_manifest(manifest) == [
+        ("alg1.f90", "alg1_out.f90", "psy1.f90"),
+        ("alg2.f90", None, None),
+        ("dir name/alg3.f90", "alg3_out.f90", None)]
+    with open(manifest, "w") as mfile:
+        mfile.write("alg1.f90\nalg2.f90 a.f90 b.f90 c.f90\n")
+    with pytest.raises(GenerationError) as excinfo:
+        read_manifest(manifest)
+    assert ("line 2 of batch manifest '{0}' should contain an algorithm "
+            "file optionally followed by algorithm and PSy output files but "
+            "found 'alg2.f90 a.f90 b.f90 c.f90'".format(manifest)
+            in str(excinfo.value))
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_main_batch(capsys, tmpdir, jobs):
+    '''Tests that batch mode gives the same output as processing each
+    file separately and that a failure to process one of the files does
+    not prevent the others from being processed.'''
+    dyn_path = os.path.join(BASE_PATH, "dynamo0p3")
+    good_files = ["1_single_invoke.f90", "4.8_multikernel_invokes.f90"]
+    bad_file = os.path.join(dyn_path, "2_incorrect_number_of_args.f90")
+    manifest = str(tmpdir.join("manifest.txt"))
+    with open(manifest, "w") as mfile:
+        for idx, name in enumerate(good_files):
+            mfile.write("{0} {1} {2}\n".format(
+                os.path.join(dyn_path, name),
+                str(tmpdir.join("alg{0}.f90".format(idx))),
+                str(tmpdir.join("psy{0}.f90".format(idx)))))
+        mfile.write("{0}\n".format(bad_file))
+        # No output files so the code is written to stdout
+        mfile.write("{0}\n".format(os.path.join(dyn_path, good_files[0])))
+
+    with pytest.raises(SystemExit) as excinfo:
+        main(["-j", jobs, "--batch", manifest])
+    assert str(excinfo.value) == "1"
+    output, errors = capsys.readouterr()
+    assert ("Error processing '{0}':\n\"Parse Error: Kernel 'testkern_type' "
+            "called from the algorithm layer with an insufficient number of "
+            "arguments".format(bad_file) in errors)
+    assert "1 of 4 algorithm files could not be processed." in errors
+
+    main([os.path.join(dyn_path, good_files[0])])
+    expected, _ = capsys.readouterr()
+    assert output == expected
+
+    for idx, name in enumerate(good_files):
+        alg_file = str(tmpdir.join("alg_ref.f90"))
+        psy_file = str(tmpdir.join("psy_ref.f90"))
+        main(["-oalg", alg_file, "-opsy", psy_file,
+              os.path.join(dyn_path, name)])
+        for ref, out in [(alg_file, "alg{0}.f90"), (psy_file, "psy{0}.f90")]:
+            with open(ref) as ref_file, \
+                 open(str(tmpdir.join(out.format(idx)))) as out_file:
+                assert ref_file.read() == out_file.read()
+
+
+def test_main_batch_errors(capsys, tmpdir):
+    '''Tests that invalid combinations of batch-mode arguments and an
+    invalid manifest are rejected.'''
+    filename = os.path.join(BASE_PATH, "dynamo0p3", "1_single_invoke.f90")
+    with pytest.raises(SystemExit):
+        main([])
+    _, outerr = capsys.readouterr()
+    assert ("the following arguments are required: filename (or --batch "
+            "MANIFEST)" in outerr)
+    for args in [["--batch", "manifest.txt", filename],
+                 ["--batch", "manifest.txt", "-opsy", "psy.f90"]]:
+        with pytest.raises(SystemExit):
+            main(args)
+        _, outerr = capsys.readouterr()
+        assert "--batch cannot be combined with an algorithm file" in outerr
+    manifest = str(tmpdir.join("does_not_exist.txt"))
+    with pytest.raises(SystemExit) as excinfo:
+        main(["--batch", manifest])
+    assert str(excinfo.value) == "1"
+    _, outerr = capsys.readouterr()
+    assert "does_not_exist.txt" in outerr
+
+
+def test_main_depfile(capsys, tmpdir, monkeypatch):
+    '''Tests that the -MD and -MF options write a Makefile rule listing
+    the files used to generate the code.'''
+    monkeypatch.chdir(str(tmpdir))
+    dyn_path = os.path.join(BASE_PATH, "dynamo0p3")
+    filename = os.path.join(dyn_path, "4.8_multikernel_invokes.f90")
+    main(["-oalg", "alg.f90", "-opsy", "psy.f90", "-MD", filename])
+    lines = tmpdir.join("psy.d").read().split("\n")
+    assert lines[0] == "alg.f90 psy.f90: \\"
+    assert lines[1] == " " + filename + " \\"
+    assert lines[2] == " " + Config.get().filename + " \\"
+    for kernel in ["testkern.F90", "ru_kernel_mod.f90"]:
+        kernel = os.path.join(dyn_path, kernel)
+        assert " " + kernel + " \\" in lines or " " + kernel in lines
+        assert kernel + ":" in lines
+    assert filename + ":" not in lines
+
+    # The name of the file may be specified and there may be no PSy
+    # output file.
+    main(["-oalg", "alg.f90", "-MF", "deps.txt", filename])
+    assert tmpdir.join("deps.txt").read().startswith("alg.f90: \\\n")
+    main(["-oalg", "alg.f90", "-MD", filename])
+    assert tmpdir.join("alg.d").check()
+    capsys.readouterr()
+
+    # There must be an output file to act as the target
+    with pytest.raises(SystemExit):
+        main(["-MD", filename])
+    _, outerr = capsys.readouterr()
+    assert "-MD/-MF require -oalg and/or -opsy" in outerr
+
+
+def test_main_batch_depfile(capsys, tmpdir, monkeypatch):
+    '''Tests that -MD writes a dependency file for each entry in batch
+    mode and that -MF cannot be used in batch mode.'''
+    monkeypatch.chdir(str(tmpdir))
+    dyn_path = os.path.join(BASE_PATH, "dynamo0p3")
+    filename = os.path.join(dyn_path, "1_single_invoke.f90")
+    manifest = str(tmpdir.join("manifest.txt"))
+    with open(manifest, "w") as mfile:
+        mfile.write("{0} {1} {2}\n".format(
+            filename, str(tmpdir.join("alg.f90")),
+            str(tmpdir.join("psy.f90"))))
+        mfile.write("{0}\n".format(filename))
+    with pytest.raises(SystemExit):
+        main(["--batch", manifest, "-MD"])
+    _, outerr = capsys.readouterr()
+    assert ("Error processing '{0}':\ncannot write a dependency file as no "
+            "output files are specified".format(filename) in outerr)
+    assert "1 of 2 algorithm files could not be processed" in outerr
+    content = tmpdir.join("psy.d").read()
+    assert content.startswith("alg.f90 psy.f90: \\\n {0} \\\n".format(
+        filename))
+    assert os.path.join(dyn_path, "testkern.F90") in content
+
+    with pytest.raises(SystemExit):
+        main(["--batch", manifest, "-MF", "deps.d"])
+    _, outerr = capsys.readouterr()
+    assert "-MF cannot be used with --batch" in outerr
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_main_batch_depfile_helper(tmpdir, monkeypatch, jobs):
+    '''Tests that, in batch mode, a module imported by the transformation
+    script is recorded in the dependency file of every algorithm file
+    and not just in that of the first one (which imports the module).'''
+    monkeypatch.chdir(str(tmpdir))
+    dyn_path = os.path.join(BASE_PATH, "dynamo0p3")
+    helper = tmpdir.join("batch_helper_mod.py")
+    helper.write("def transform(psy):\n"
+                 "    return psy\n")
+    script = tmpdir.join("batch_helper_script.py")
+    script.write("from batch_helper_mod import transform\n"
+                 "def trans(psy):\n"
+                 "    return transform(psy)\n")
+    manifest = str(tmpdir.join("manifest.txt"))
+    with open(manifest, "w") as mfile:
+        for idx, name in enumerate(["1_single_invoke.f90",
+                                    "4.8_multikernel_invokes.f90"]):
+            mfile.write("{0} alg{1}.f90 psy{1}.f90\n".format(
+                os.path.join(dyn_path, name), idx))
+    monkeypatch.syspath_prepend(str(tmpdir))
+    try:
+        main(["-j", jobs, "-s", str(script), "--batch", manifest, "-MD"])
+        for idx in range(2):
+            content = tmpdir.join("psy{0}.d".format(idx)).read()
+            assert "batch_helper_script.py" in content
+            assert "batch_helper_mod.py" in content
+    finally:
+        for name in ["batch_helper_script", "batch_helper_mod"]:
+            if name in sys.modules:
+                delete_module(name)
+
+
 def test_main_profile(capsys):
     '''Tests that the profiling command line flags are working as expected.
     '''
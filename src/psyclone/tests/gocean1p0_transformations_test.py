@@ -42,7 +42,7 @@ import os
 import re
 import pytest
 from gocean1p0_build import GOcean1p0Build
-from psyclone.configuration import Config
+from psyclone.configuration import Config, VALID_PSY_LAYER_WRITERS
 from psyclone.parse.algorithm import parse
 from psyclone.psyGen import PSyFactory, Loop
 from psyclone.transformations import TransformationError, \
@@ -1209,6 +1209,30 @@ def test_module_inline_with_transformation(tmpdir):
     assert GOcean1p0Build(tmpdir).code_compiles(psy)
 
 
+def test_module_inline_direct_writer():
+    ''' Test that the "direct" PSy-layer writer produces the same code as
+    the fparser1 one when a kernel is module-inlined and OpenMP
+    directives are present. '''
+    config = Config.get()
+    old_writer = config.psy_layer_writer
+    code = {}
+    try:
+        for writer in VALID_PSY_LAYER_WRITERS:
+            config.psy_layer_writer = writer
+            psy, invoke = get_invoke("single_invoke_three_kernels.f90", API,
+                                     idx=0)
+            schedule = invoke.schedule
+            KernelModuleInlineTrans().apply(
+                schedule.children[1].loop_body[0].loop_body[0])
+            GOceanOMPParallelLoopTrans().apply(schedule.children[0])
+            code[writer] = str(psy.gen)
+    finally:
+        config.psy_layer_writer = old_writer
+    assert "SUBROUTINE compute_cv_code(i, j, cv, p, v)" in code["direct"]
+    assert "!$omp parallel do" in code["direct"]
+    assert code["direct"] == code["fparser1"]
+
+
 def test_module_no_inline_with_transformation(tmpdir):
     ''' Test that we can switch off the inlining of a kernel routine
     into the PSy layer module using a transformation. Relies on the
@@ -43,9 +43,11 @@ from fparser.two.utils import walk_ast
 from dynamo0p3_build import Dynamo0p3Build
 from psyclone_test_utils import get_invoke
 from psyclone.transformations import TransformationError, ACCRoutineTrans
-from psyclone.psyGen import Kern
+from psyclone.psyGen import Kern, KERNEL_INDEX_DIR
 from psyclone.generator import GenerationError
 from psyclone.configuration import Config
+from psyclone.file_dependencies import FileDependencies
+from psyclone import psyGen
 
 
 def setup_module():
@@ -201,7 +203,8 @@ def test_new_kernel_dir(tmpdir, monkeypatch):
     _, _ = rtrans.apply(kern)
     # Generate the code (this triggers the generation of a new kernel)
     _ = str(psy.gen)
-    file_list = os.listdir(str(tmpdir))
+    file_list = [name for name in os.listdir(str(tmpdir))
+                 if name != KERNEL_INDEX_DIR]
     assert len(file_list) == 1
     assert file_list[0] == 'continuity_0_mod.f90'
 
@@ -295,6 +298,71 @@ def test_new_same_kern_single(tmpdir, monkeypatch):
     old_cwd.chdir()
 
 
+def test_new_same_kern_multiple(tmpdir, monkeypatch):
+    ''' Check that identical transformed kernels are written to the same
+    file, both within and across PSyclone invocations, when kernel-naming
+    is 'multiple'. '''
+    config = Config.get()
+    monkeypatch.setattr(config, "_kernel_output_dir", str(tmpdir))
+    monkeypatch.setattr(config, "_kernel_naming", "multiple")
+    rtrans = ACCRoutineTrans()
+
+    def transform_and_write():
+        ''' Apply the same transformation to both (identical) kernels of
+        the invoke and write them out. '''
+        _, invoke = get_invoke("4_multikernel_invokes.f90",
+                               api="dynamo0.3", idx=0)
+        new_kernels = []
+        for kern in invoke.schedule.coded_kernels():
+            new_kern, _ = rtrans.apply(kern)
+            new_kern.rename_and_write()
+            new_kernels.append(new_kern)
+        return new_kernels
+
+    new_kernels = transform_and_write()
+    assert [kern.module_name for kern in new_kernels] == \
+        ["testkern_0_mod", "testkern_0_mod"]
+    assert [kern.name for kern in new_kernels] == \
+        ["testkern_0_code", "testkern_0_code"]
+    assert os.listdir(str(tmpdir.join(KERNEL_INDEX_DIR))) != []
+    # A subsequent invocation re-uses the same transformed kernel
+    new_kernels = transform_and_write()
+    assert new_kernels[1].module_name == "testkern_0_mod"
+    assert sorted(os.listdir(str(tmpdir))) == \
+        [KERNEL_INDEX_DIR, "testkern_0_mod.f90"]
+
+    # If the kernel file has been modified then it is not re-used
+    with open(str(tmpdir.join("testkern_0_mod.f90")), "a") as ffile:
+        ffile.write("! modified")
+    new_kernels = transform_and_write()
+    assert new_kernels[0].module_name == "testkern_1_mod"
+    assert new_kernels[1].module_name == "testkern_1_mod"
+    # Nor is it if its index entry is corrupt
+    for name in os.listdir(str(tmpdir.join(KERNEL_INDEX_DIR))):
+        with open(str(tmpdir.join(KERNEL_INDEX_DIR, name)), "w") as ifile:
+            ifile.write("garbage")
+    new_kernels = transform_and_write()
+    assert new_kernels[0].module_name == "testkern_2_mod"
+    assert sorted(os.listdir(str(tmpdir))) == \
+        [KERNEL_INDEX_DIR, "testkern_0_mod.f90", "testkern_1_mod.f90",
+         "testkern_2_mod.f90"]
+
+
+def test_new_kern_no_index(tmpdir, monkeypatch):
+    ''' Check that a failure to write the kernel index does not prevent
+    the transformed kernel from being written. '''
+    config = Config.get()
+    monkeypatch.setattr(config, "_kernel_output_dir", str(tmpdir))
+    monkeypatch.setattr(config, "_kernel_naming", "multiple")
+    # Prevent the creation of the index directory
+    tmpdir.join(KERNEL_INDEX_DIR).write("not a directory")
+    _, invoke = get_invoke("1_single_invoke.f90", api="dynamo0.3", idx=0)
+    new_kern, _ = ACCRoutineTrans().apply(invoke.schedule.coded_kernels()[0])
+    new_kern.rename_and_write()
+    assert new_kern.module_name == "testkern_0_mod"
+    assert tmpdir.join("testkern_0_mod.f90").check(file=1)
+
+
 def test_1kern_trans(tmpdir, monkeypatch):
     ''' Check that we generate the correct code when an invoke contains
     the same kernel more than once but only one of them is transformed. '''
@@ -360,6 +428,93 @@ def test_2kern_trans(tmpdir, monkeypatch):
     old_cwd.chdir()
 
 
+@pytest.mark.parametrize("kern_naming", ["multiple", "single"])
+def test_write_kernels_jobs(tmpdir, monkeypatch, kern_naming):
+    ''' Check that writing the transformed kernels of a PSy layer using
+    a pool of processes gives the same kernel names, files and PSy-layer
+    code as writing them one at a time as the code is generated. '''
+    config = Config.get()
+    monkeypatch.setattr(config, "_kernel_naming", kern_naming)
+    rtrans = ACCRoutineTrans()
+    results = []
+    for jobs in [1, 3]:
+        out_dir = tmpdir.mkdir("jobs{0}".format(jobs))
+        monkeypatch.setattr(config, "_kernel_output_dir", str(out_dir))
+        psy, _ = get_invoke("4.5.2_multikernel_invokes.f90",
+                            api="dynamo0.3", idx=0)
+        kernels = psy.invokes.invoke_list[0].schedule.coded_kernels()
+        for kern in kernels:
+            rtrans.apply(kern)
+        with FileDependencies() as deps:
+            psy.write_kernels(jobs)
+            assert not any(kern.modified for kern in kernels)
+            code = str(psy.gen)
+        files = {}
+        for name in os.listdir(str(out_dir)):
+            if name != KERNEL_INDEX_DIR:
+                files[name] = out_dir.join(name).read()
+        results.append(([kern.name for kern in kernels], code, files,
+                         [os.path.basename(path) for path in deps.outputs]))
+    assert results[0] == results[1]
+    names, _, files, _ = results[1]
+    # The transformed kernels that are identical share the same file
+    assert len(set(names)) == len(files) < len(names)
+    assert all("!$acc routine" in content for content in files.values())
+    if kern_naming == "multiple":
+        assert os.listdir(str(tmpdir.join("jobs3", KERNEL_INDEX_DIR)))
+
+
+def test_write_kernels_error(tmpdir, monkeypatch):
+    ''' Check that write_kernels() removes the files it has claimed for
+    the transformed kernels if they cannot be written. '''
+    config = Config.get()
+    monkeypatch.setattr(config, "_kernel_output_dir", str(tmpdir))
+    monkeypatch.setattr(config, "_kernel_naming", "single")
+
+    def fail(func, work, jobs):
+        ''' Writes the first kernel and then fails. '''
+        # pylint: disable=unused-argument
+        func(work[0])
+        raise IOError("disk full")
+
+    monkeypatch.setattr(psyGen, "_map_kernels", fail)
+    psy, _ = get_invoke("4.5.2_multikernel_invokes.f90", api="dynamo0.3",
+                        idx=0)
+    rtrans = ACCRoutineTrans()
+    for kern in psy.invokes.invoke_list[0].schedule.coded_kernels():
+        rtrans.apply(kern)
+    with pytest.raises(IOError) as err:
+        psy.write_kernels(2)
+    assert "disk full" in str(err.value)
+    assert tmpdir.listdir() == []
+    assert psyGen._KERNELS_TO_WRITE == []
+
+
+def test_write_kernels_serial(monkeypatch):
+    ''' Check that write_kernels() writes the transformed kernels one
+    at a time if only one job is requested, if there are fewer than two
+    kernels to write or if processes cannot be forked. '''
+    written = []
+    monkeypatch.setattr(psyGen.CodedKern, "rename_and_write",
+                        lambda kern: written.append(kern.name))
+    monkeypatch.setattr(psyGen, "_map_kernels", None)
+    psy, _ = get_invoke("4.5.2_multikernel_invokes.f90", api="dynamo0.3",
+                        idx=0)
+    kernels = psy.invokes.invoke_list[0].schedule.coded_kernels()
+    psy.write_kernels(4)
+    assert written == []
+    rtrans = ACCRoutineTrans()
+    rtrans.apply(kernels[1])
+    psy.write_kernels(4)
+    assert written == [kernels[1].name]
+    rtrans.apply(kernels[2])
+    psy.write_kernels(1)
+    assert written == [kernels[1].name, kernels[1].name, kernels[2].name]
+    monkeypatch.delattr(os, "fork")
+    psy.write_kernels(4)
+    assert len(written) == 5
+
+
 def test_builtin_no_trans():
     ''' Check that we reject attempts to transform built-in kernels. '''
     from psyclone.dynamo0p3_builtins import DynBuiltIn
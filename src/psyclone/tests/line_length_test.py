@@ -12,7 +12,7 @@
 from __future__ import absolute_import, print_function
 import os
 import pytest
-from psyclone.line_length import FortLineLength
+from psyclone.line_length import FortLineLength, split_lines
 from psyclone.generator import generate
 
 # functions
@@ -112,6 +112,42 @@ def test_wrapped():
     assert output_file == EXPECTED_OUTPUT, "output and expected output differ "
 
 
+def test_wrapped_write(tmpdir):
+    ''' Tests that writing code to a file with the FortLineLength class
+    gives the same result as processing it as a string. '''
+    fll = FortLineLength(line_length=30)
+    assert (list(fll.wrap_lines(INPUT_FILE.split("\n"))) ==
+            EXPECTED_OUTPUT.split("\n"))
+    for input_file in [INPUT_FILE, INPUT_FILE.rstrip("\n"), ""]:
+        filename = str(tmpdir.join("wrapped.f90"))
+        with open(filename, "w") as out_file:
+            fll.write(input_file, out_file)
+        with open(filename, "r") as out_file:
+            assert out_file.read() == fll.process(input_file)
+
+
+def test_split_lines():
+    ''' Tests that split_lines() gives the same lines as str.split(). '''
+    for text in ["", "\n", "a", "a\n", "\na\n\nb", INPUT_FILE]:
+        assert list(split_lines(text)) == text.split("\n")
+
+
+def test_wrapped_very_long_line():
+    ''' Tests that a statement that is very much longer than the
+    specified line length is wrapped into lines that are all within
+    the limit and that together contain the original statement. '''
+    line = "    CALL sub(" + ", ".join(["arg{0}".format(idx) for idx in
+                                        range(20000)]) + ")"
+    fll = FortLineLength(line_length=40)
+    output = fll.process(line).split("\n")
+    assert len(output) > 1000
+    assert all(len(out_line) <= 40 for out_line in output)
+    assert output[0].endswith("&")
+    assert "".join([out_line.rstrip("&") if idx == 0 else
+                    out_line[1:].rstrip("&") for idx, out_line in
+                    enumerate(output)]) == line
+
+
 def test_wrapped_lower():
     ''' Tests that a lower case file whose lines are longer than the
     specified line length is wrapped appropriately by the
@@ -241,3 +241,316 @@ def test_omp_do_within_if():
         "      !$omp end parallel do\n"
         "    END IF\n")
     assert expected in gen
+
+
+def test_omp_do_update():
+    ''' Check that an OpenMP parallel region containing OpenMP do
+    directives is inserted into the fparser2 AST. '''
+    from psyclone.transformations import OMPParallelTrans, OMPLoopTrans
+    from psyclone.psyGen import OMPDoDirective
+    _, invoke_info = parse(os.path.join(BASE_PATH, "imperfect_nest.f90"),
+                           api=API, line_length=False)
+    psy = PSyFactory(API, distributed_memory=False).create(invoke_info)
+    schedule = psy.invokes.get('imperfect_nest').schedule
+    loops = schedule.children[0].loop_body[2:4]
+    for loop in loops:
+        OMPLoopTrans().apply(loop)
+    OMPParallelTrans().apply(schedule.children[0].loop_body[2:4])
+    gen_code = str(psy.gen).lower()
+    assert ("    !$omp parallel default(shared), private(ji,jj,zabe1,zcof1,"
+            "zmsku)\n"
+            "    !$omp do schedule(static)\n"
+            "    do jj = 1, jpjm1\n" in gen_code)
+    assert ("      end do\n"
+            "    end do\n"
+            "    !$omp end do\n"
+            "    !$omp do schedule(static)\n"
+            "    do jj = 2, jpjm1\n" in gen_code)
+    assert ("      end do\n"
+            "    end do\n"
+            "    !$omp end do\n"
+            "    !$omp end parallel\n" in gen_code)
+    # Further calls to update() must not change the AST
+    directive = loops[0].parent
+    assert isinstance(directive, OMPDoDirective)
+    old_ast = directive.ast
+    directive.update()
+    assert old_ast is directive.ast
+
+
+def test_omp_do_update_errs():
+    ''' Check the errors raised when an OpenMP do directive is not within
+    a parallel region or has more than one child. '''
+    from psyclone.transformations import OMPParallelTrans, OMPLoopTrans
+    _, invoke_info = parse(os.path.join(BASE_PATH, "imperfect_nest.f90"),
+                           api=API, line_length=False)
+    psy = PSyFactory(API, distributed_memory=False).create(invoke_info)
+    schedule = psy.invokes.get('imperfect_nest').schedule
+    loop_body = schedule.children[0].loop_body
+    OMPLoopTrans().apply(loop_body[2])
+    with pytest.raises(GenerationError) as err:
+        _ = psy.gen
+    assert ("OMPOrphanLoopDirective must have an OMPRegionDirective as "
+            "ancestor" in str(err.value))
+    OMPParallelTrans().apply(loop_body[2])
+    # Add a second child to the OMPDoDirective
+    directive = loop_body[2].children[0]
+    directive.children.append(loop_body[3])
+    with pytest.raises(GenerationError) as err:
+        _ = psy.gen
+    assert ("An OpenMP DO can only be applied to a single loop but this "
+            "Node has 2 children:" in str(err.value))
+
+
+AUTO_OMP_CODE = '''program auto_omp
+  integer :: ji, jj, jk
+  integer, parameter :: jpi=16, jpj=16, jpk=8
+  real, dimension(jpi, jpj) :: a, b
+  real :: s
+  do jk = 1, jpk
+    do ji = 1, jpi
+      a(ji, jk) = b(ji, jk)
+    end do
+  end do
+  do ji = 1, jpi
+    b(ji, 1) = 0.0
+  end do
+  do jj = 2, jpj
+    do ji = 1, jpi
+      a(ji, jj) = a(ji, jj-1)
+    end do
+  end do
+  s = 0.0
+  do ji = 1, jpi
+    s = s + a(ji, 1)
+  end do
+  if (s > 0) then
+    do ji = 1, jpi
+      a(ji, 1) = 1.0
+    end do
+  end if
+  a(:, :) = 0.0
+end program auto_omp
+'''
+
+
+def test_nemo_auto_omp_trans(parser):
+    ''' Check that NemoAutoOMPTrans parallelises the outermost parallel
+    loop of each loop nest, merges consecutive parallel loops into one
+    parallel region and reports its decisions. '''
+    from fparser.common.readfortran import FortranStringReader
+    from psyclone.transformations import NemoAutoOMPTrans
+    psy = PSyFactory(API, distributed_memory=False).create(
+        parser(FortranStringReader(AUTO_OMP_CODE)))
+    schedule = psy.invokes.invoke_list[0].schedule
+    trans = NemoAutoOMPTrans()
+    assert str(trans) == ("Parallelise all loop nests of a NEMO invoke "
+                          "with OpenMP using dependence analysis")
+    assert trans.name == "NemoAutoOMPTrans"
+    trans.apply(schedule)
+    gen_code = str(psy.gen).lower()
+    assert ("  !$omp parallel default(shared), private(ji,jk)\n"
+            "  !$omp do schedule(static)\n"
+            "  do jk = 1, jpk\n" in gen_code)
+    assert ("  !$omp end do\n"
+            "  !$omp do schedule(static)\n"
+            "  do ji = 1, jpi\n"
+            "    b(ji, 1) = 0.0\n"
+            "  end do\n"
+            "  !$omp end do\n"
+            "  !$omp end parallel\n"
+            "  do jj = 2, jpj\n"
+            "    !$omp parallel do default(shared), private(ji), "
+            "schedule(static)\n"
+            "    do ji = 1, jpi\n" in gen_code)
+    assert ("  if (s > 0) then\n"
+            "    !$omp parallel do default(shared), private(ji), "
+            "schedule(static)\n" in gen_code)
+    assert gen_code.count("!$omp parallel") == 3
+    report = trans.report
+    assert report[0] == "Parallelised 'do jk = 1, jpk'."
+    assert report[1] == "Parallelised 'do ji = 1, jpi'."
+    assert report[2].startswith("Not parallelised 'do jj = 2, jpj': The "
+                                "array 'a' is written at 'a(ji,jj)'")
+    assert report[3] == "Parallelised 'do ji = 1, jpi'."
+    assert report[4].startswith("Not parallelised 'do ji = 1, jpi': The "
+                                "scalar variable 's'")
+    assert report[5] == "Parallelised 'do ji = 1, jpi'."
+    assert report[6] == ("Not parallelised 'a(:, :) = 0.0': it is an "
+                         "implicit loop (using array syntax), "
+                         "NemoExplicitLoopTrans can convert it into an "
+                         "explicit loop.")
+    assert report[7] == ("Created one parallel region for the 2 loops "
+                         "'do jk = 1, jpk', 'do ji = 1, jpi'.")
+    assert len(report) == 8
+
+
+def test_nemo_auto_omp_trans_errors(parser):
+    ''' Check the validation of NemoAutoOMPTrans. '''
+    from fparser.common.readfortran import FortranStringReader
+    from psyclone.transformations import NemoAutoOMPTrans, \
+        TransformationError
+    with pytest.raises(TransformationError) as err:
+        NemoAutoOMPTrans(omp_schedule="invalid")
+    assert "Valid OpenMP schedules are" in str(err.value)
+
+    psy = PSyFactory(API, distributed_memory=False).create(
+        parser(FortranStringReader(AUTO_OMP_CODE)))
+    schedule = psy.invokes.invoke_list[0].schedule
+    trans = NemoAutoOMPTrans()
+    with pytest.raises(TransformationError) as err:
+        trans.apply(schedule.children[0])
+    assert ("Cannot apply NemoAutoOMPTrans to something that is not a "
+            "NemoInvokeSchedule" in str(err.value))
+    trans.apply(schedule)
+    with pytest.raises(TransformationError) as err:
+        trans.apply(schedule)
+    assert ("Cannot apply NemoAutoOMPTrans to a schedule that already "
+            "contains OpenMP directives." in str(err.value))
+
+
+def test_nemo_auto_omp_trans_nowait(parser):
+    ''' Check that NemoAutoOMPTrans omits the barrier after a loop that
+    the following loops in the same parallel region do not depend on. '''
+    from fparser.common.readfortran import FortranStringReader
+    from psyclone.transformations import NemoAutoOMPTrans
+    code = '''program auto_omp
+      integer :: ji, jj
+      integer, parameter :: jpi=16, jpj=16
+      real, dimension(jpi, jpj) :: a, b, c
+      do jj = 1, jpj
+        do ji = 1, jpi
+          a(ji, jj) = 1.0
+        end do
+      end do
+      do jj = 1, jpj
+        do ji = 1, jpi
+          b(ji, jj) = 2.0
+        end do
+      end do
+      do jj = 1, jpj
+        do ji = 1, jpi
+          c(ji, jj) = a(ji, jj) + 1.0
+        end do
+      end do
+    end program auto_omp
+    '''
+    psy = PSyFactory(API, distributed_memory=False).create(
+        parser(FortranStringReader(code)))
+    schedule = psy.invokes.invoke_list[0].schedule
+    NemoAutoOMPTrans().apply(schedule)
+    gen_code = str(psy.gen).lower()
+    # Only the second loop is independent of all following loops
+    assert gen_code.count("!$omp end do\n") == 2
+    assert ("      b(ji, jj) = 2.0\n"
+            "    end do\n"
+            "  end do\n"
+            "  !$omp end do nowait\n" in gen_code)
+
+
+def test_nemo_auto_omp_trans_private(parser):
+    ''' Check that NemoAutoOMPTrans does not put a loop in the same
+    parallel region as another loop that shares one of its private
+    scalars, and does not parallelise a loop whose private scalar is
+    read after it. '''
+    from fparser.common.readfortran import FortranStringReader
+    from psyclone.transformations import NemoAutoOMPTrans
+    code = '''program auto_omp
+      integer :: ji
+      integer, parameter :: jpi=16
+      real, dimension(jpi) :: a, b, c
+      real :: x, y
+      do ji = 1, jpi
+        a(ji) = x
+      end do
+      do ji = 1, jpi
+        x = b(ji)
+        c(ji) = x
+      end do
+      do ji = 1, jpi
+        y = b(ji)
+        c(ji) = y
+      end do
+      a(1) = y
+    end program auto_omp
+    '''
+    psy = PSyFactory(API, distributed_memory=False).create(
+        parser(FortranStringReader(code)))
+    schedule = psy.invokes.invoke_list[0].schedule
+    trans = NemoAutoOMPTrans()
+    trans.apply(schedule)
+    gen_code = str(psy.gen).lower()
+    assert ("  !$omp parallel do default(shared), private(ji), "
+            "schedule(static)\n"
+            "  do ji = 1, jpi\n"
+            "    a(ji) = x\n" in gen_code)
+    assert ("  !$omp parallel do default(shared), private(ji,x), "
+            "schedule(static)\n"
+            "  do ji = 1, jpi\n"
+            "    x = b(ji)\n" in gen_code)
+    assert gen_code.count("!$omp parallel") == 2
+    assert trans.report[2] == (
+        "Not parallelised 'do ji = 1, jpi': The scalar variable 'y' is "
+        "written in each iteration and its value may be read after the "
+        "loop, so it can not be private.")
+
+
+def test_omp_pdo_merge_private(parser):
+    ''' Check that OMPParallelDoMergeTrans does not merge directives if a
+    scalar would be private in the merged region but shared in one of
+    the directives (or the other way round). '''
+    from fparser.common.readfortran import FortranStringReader
+    from psyclone.psyGen import OMPParallelDirective, OMPParallelDoDirective
+    from psyclone.transformations import OMPParallelDoMergeTrans, \
+        OMPParallelLoopTrans, TransformationError
+    code = '''program merge
+      integer :: ji
+      integer, parameter :: jpi=16
+      real, dimension(jpi) :: a, b, c
+      real :: x, y
+      do ji = 1, jpi
+        a(ji) = x
+      end do
+      do ji = 1, jpi
+        x = b(ji)
+        c(ji) = x
+      end do
+      do ji = 1, jpi
+        y = b(ji)
+        c(ji) = y
+      end do
+      do ji = 1, jpi
+        a(ji) = y
+      end do
+      do ji = 1, jpi
+        y = a(ji)
+        b(ji) = y
+      end do
+    end program merge
+    '''
+    psy = PSyFactory(API, distributed_memory=False).create(
+        parser(FortranStringReader(code)))
+    schedule = psy.invokes.invoke_list[0].schedule
+    for loop in schedule.children[:]:
+        OMPParallelLoopTrans().apply(loop)
+    trans = OMPParallelDoMergeTrans()
+    # x is only read in the first loop and is private in the second
+    with pytest.raises(TransformationError) as err:
+        trans.apply(schedule.children[0:2])
+    assert ("The variables 'x' would be private in the merged region but "
+            "shared in one of the directives, or the other way round."
+            in str(err.value))
+    # y is private in the third loop and only read in the fourth
+    with pytest.raises(TransformationError) as err:
+        trans.apply(schedule.children[2:4])
+    assert "The variables 'y' would be private" in str(err.value)
+    # Only the second and third loops can be merged
+    trans.apply(schedule)
+    assert [type(child) for child in schedule.children] == \
+        [OMPParallelDoDirective, OMPParallelDirective,
+         OMPParallelDoDirective, OMPParallelDoDirective]
+    gen_code = str(psy.gen).lower()
+    assert ("  !$omp parallel default(shared), private(ji,x,y)\n"
+            "  !$omp do schedule(static)\n"
+            "  do ji = 1, jpi\n"
+            "    x = b(ji)\n" in gen_code)
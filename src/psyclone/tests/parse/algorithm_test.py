@@ -37,6 +37,7 @@
 file. Some tests for this file are in parse_test.py. This file adds
 tests for code that is not covered there.'''
 
+import os
 import pytest
 
 from fparser.two.Fortran2003 import Part_Ref
@@ -50,6 +51,9 @@ from psyclone.psyGen import InternalError
 # pylint: disable=invalid-name
 # pylint: disable=too-few-public-methods
 
+DYN_TEST_PATH = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "test_files", "dynamo0p3")
+
 # class parser() tests
 
 
@@ -118,16 +122,17 @@ def test_parser_caseinsensitive2(monkeypatch):
     statement is case insensitive.
 
     '''
-    def dummy_func(arg1, arg2, arg3, arg4):
-        '''A dummy function used by monkeypatch to override the get_kernel_ast
-        function. We don't care about the arguments as we just want to
-        raise an exception.
+    def dummy_func(arg1, arg2, arg3):
+        '''A dummy function used by monkeypatch to override the
+        get_kernel_filepath function. We don't care about the arguments
+        as we just want to raise an exception.
 
         '''
         # pylint: disable=unused-argument
         raise NotImplementedError("test_parser_caseinsensitive2")
 
-    monkeypatch.setattr("psyclone.parse.kernel.get_kernel_ast", dummy_func)
+    monkeypatch.setattr("psyclone.parse.kernel.get_kernel_filepath",
+                        dummy_func)
     from fparser.two import Fortran2003 as f2003
     from fparser.two.parser import ParserFactory
     ParserFactory().create(std="f2003")
@@ -135,7 +140,7 @@ def test_parser_caseinsensitive2(monkeypatch):
     use = f2003.Use_Stmt("use my_mod, only : MY_KERN")
     parser.update_arg_to_module_map(use)
     with pytest.raises(NotImplementedError) as excinfo:
-        # We have monkeypatched the function 'get_kernel_ast' to
+        # We have monkeypatched the function 'get_kernel_filepath' to
         # return 'NotImplementedError' with a string associated with
         # this test so we know that we have got to this function if
         # this exception is raised. The case insensitive test we
@@ -146,6 +151,71 @@ def test_parser_caseinsensitive2(monkeypatch):
     # Sanity check that the exception is the monkeypatched one.
     assert str(excinfo.value) == "test_parser_caseinsensitive2"
 
+
+def test_parser_jobs_invalid():
+    '''Check that the Parser class raises the expected exception if the
+    number of jobs is less than one.
+
+    '''
+    with pytest.raises(ParseError) as excinfo:
+        _ = Parser(jobs=0)
+    assert "the number of jobs must be at least one but got 0" \
+        in str(excinfo.value)
+
+
+def test_parser_parallel():
+    '''Check that parsing the kernels in parallel gives the same result
+    as parsing them sequentially.
+
+    '''
+    alg_filename = os.path.join(DYN_TEST_PATH, "4.8_multikernel_invokes.f90")
+    _, info = Parser(api="dynamo0.3").parse(alg_filename)
+    parser = Parser(api="dynamo0.3", jobs=2)
+    _, par_info = parser.parse(alg_filename)
+    # The kernels were parsed ahead of the invokes
+    assert sorted(parser._kernel_types.keys()) == [
+        ("ru_kernel_mod", "ru_kernel_type"),
+        ("testkern", "testkern_type")]
+    assert len(info.calls) == len(par_info.calls) == 1
+    kcalls = info.calls[0].kcalls
+    par_kcalls = par_info.calls[0].kcalls
+    assert len(kcalls) == len(par_kcalls) == 5
+    for call, par_call in zip(kcalls, par_kcalls):
+        assert call.module_name == par_call.module_name
+        assert [str(arg) for arg in call.args] == \
+            [str(arg) for arg in par_call.args]
+        assert call.ktype.name == par_call.ktype.name
+        assert call.ktype.nargs == par_call.ktype.nargs
+        assert str(call.ktype.procedure) == str(par_call.ktype.procedure)
+
+
+def test_parser_parallel_error(tmpdir):
+    '''Check that an error in one of the kernels parsed in parallel is
+    reported in the same way as when the kernels are parsed
+    sequentially.
+
+    '''
+    alg_filename = str(tmpdir.join("alg.f90"))
+    with open(alg_filename, "w") as ffile:
+        ffile.write(
+            "program alg\n"
+            "  use testkern, only: testkern_type\n"
+            "  use testkern_qr, only: testkern_qr_type\n"
+            "  use missing_mod, only: missing_type\n"
+            "  call invoke(testkern_type(a, f1, f2, m1, m2), &\n"
+            "              testkern_qr_type(f1, f2, m1, a, m2, f3, qr), &\n"
+            "              missing_type(f1))\n"
+            "end program alg\n")
+    errors = []
+    for jobs in [1, 2]:
+        parser = Parser(api="dynamo0.3", kernel_path=DYN_TEST_PATH,
+                        jobs=jobs)
+        with pytest.raises(ParseError) as excinfo:
+            _ = parser.parse(alg_filename)
+        errors.append(str(excinfo.value))
+    assert "missing_mod" in errors[0]
+    assert errors[0] == errors[1]
+
 # function get_invoke_label() tests
 
 
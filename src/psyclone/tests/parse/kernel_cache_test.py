@@ -0,0 +1,297 @@
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# -----------------------------------------------------------------------------
+
+'''Module containing pytest tests for the on-disk cache of parsed
+kernels in parse/kernel_cache.py.'''
+
+from __future__ import absolute_import
+import os
+import pickle
+import pytest
+from psyclone.configuration import Config, ConfigurationError
+from psyclone.parse.algorithm import parse
+from psyclone.parse.kernel import KernelTypeFactory, \
+    get_kernel_parse_tree, get_kernel_type
+from psyclone.psyGen import InternalError
+from psyclone.parse.kernel_cache import KernelCache, CACHE_FILE_SUFFIX
+
+BASE_PATH = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "test_files", "dynamo0p3")
+KERNEL_FILE = os.path.join(BASE_PATH, "testkern.F90")
+
+
+@pytest.fixture(name="cache_dir")
+def cache_dir_fixture(tmpdir, monkeypatch):
+    '''Enable the kernel cache in the configuration object, using a
+    temporary directory. The original setting is restored at the end
+    of the test.
+
+    :returns: the cache directory.
+    :rtype: str
+
+    '''
+    cache_dir = str(tmpdir.join("kernel_cache"))
+    monkeypatch.setattr(Config.get(), "kernel_cache_dir", cache_dir)
+    return cache_dir
+
+
+def test_cache_create(cache_dir, monkeypatch):
+    '''Check that a cache is only created if enabled in the configuration
+    and that the cache directory is created.'''
+    cache = KernelCache.create()
+    assert cache.cache_dir == cache_dir
+    assert os.path.isdir(cache_dir)
+    # An existing directory is fine
+    assert KernelCache(cache_dir).cache_dir == cache_dir
+    # Only the current user may write to a new cache directory
+    assert not os.stat(cache_dir).st_mode & 0o077
+    monkeypatch.setattr(Config.get(), "kernel_cache_dir", "")
+    assert KernelCache.create() is None
+
+
+def test_cache_insecure_dir(cache_dir, monkeypatch):
+    '''Check that a cache directory that may be written by other users, or
+    that is owned by another user, is rejected as its entries could have
+    been created by someone else.'''
+    os.makedirs(cache_dir)
+    os.chmod(cache_dir, 0o777)
+    with pytest.raises(ConfigurationError) as err:
+        KernelCache.create()
+    assert "must not be writable by other users" in str(err.value)
+    os.chmod(cache_dir, 0o700)
+    assert KernelCache.create()
+    monkeypatch.setattr(os, "getuid", lambda: os.stat(cache_dir).st_uid+1)
+    with pytest.raises(ConfigurationError) as err:
+        KernelCache.create()
+    assert "is not owned by the current user" in str(err.value)
+
+
+def test_cache_key(tmpdir):
+    '''Check that the key depends on the content of the file and on the
+    qualifiers but not on the name of the file.'''
+    file1 = tmpdir.join("a_mod.f90")
+    file1.write("module a_mod\nend module a_mod\n")
+    file2 = tmpdir.join("b_mod.f90")
+    file2.write("module a_mod\nend module a_mod\n")
+    key = KernelCache.key(str(file1), "dynamo0.3", "a_type")
+    assert KernelCache.key(str(file2), "dynamo0.3", "a_type") == key
+    assert KernelCache.key(str(file1), "gocean1.0", "a_type") != key
+    assert KernelCache.key(str(file1), "dynamo0.3", "b_type") != key
+    file1.write("module a_mod\n  ! changed\nend module a_mod\n")
+    assert KernelCache.key(str(file1), "dynamo0.3", "a_type") != key
+
+
+def test_cache_key_source(monkeypatch, tmpdir):
+    '''Check that the key depends on the PSyclone source in use.'''
+    file1 = tmpdir.join("a_mod.f90")
+    file1.write("module a_mod\nend module a_mod\n")
+    key = KernelCache.key(str(file1))
+    monkeypatch.setattr("psyclone.parse.kernel_cache._SOURCE_ID",
+                        ["modified"])
+    assert KernelCache.key(str(file1)) != key
+
+
+def test_cache_metadata_only(cache_dir):
+    '''Check that only the meta-data of a kernel is stored in the cache
+    and that the parse tree is re-created from the source file when it
+    is required.'''
+    cache = KernelCache(cache_dir)
+    key = cache.key(KERNEL_FILE, "metadata")
+    assert cache.load(key) is None
+    tree = get_kernel_parse_tree(KERNEL_FILE)
+    ktype = KernelTypeFactory(api="dynamo0.3").create(tree,
+                                                      name="testkern_type")
+    ktype.source_file = KERNEL_FILE
+    cache.store(key, ktype)
+    with open(cache.entries()[0][2], "rb") as cfile:
+        data = cfile.read()
+    assert b"fparser" not in data
+    cached = cache.load(key)
+    assert cached._ast is None
+    assert cached.procedure._ast is None
+    assert cached.source_file == KERNEL_FILE
+    assert str(cached.procedure) == str(ktype.procedure)
+    assert cached.ast.tofortran() == tree.tofortran()
+    assert cached.get_integer_variable("iterates_over") == "cells"
+    # The parse tree cannot be re-created without the source file
+    cached = pickle.loads(pickle.dumps(ktype))
+    cached.source_file = None
+    with pytest.raises(InternalError) as err:
+        _ = cached.procedure.ast
+    assert ("parse tree of kernel 'testkern_type' is not available"
+            in str(err.value))
+
+
+def test_cache_unpicklable(cache_dir):
+    '''Check that failing to pickle an object is not an error.'''
+    cache = KernelCache(cache_dir)
+    cache.store("key", lambda x: x)
+    assert cache.load("key") is None
+    assert not cache.entries()
+
+
+def test_cache_corrupt_entry(cache_dir):
+    '''Check that a corrupt entry is treated as a miss and removed.'''
+    cache = KernelCache(cache_dir)
+    cache.store("key", [1, 2, 3])
+    assert cache.load("key") == [1, 2, 3]
+    path = os.path.join(cache_dir, "key" + CACHE_FILE_SUFFIX)
+    with open(path, "wb") as cfile:
+        cfile.write(b"not a pickle")
+    assert cache.load("key") is None
+    assert not os.path.exists(path)
+
+
+def test_cache_eviction(cache_dir, monkeypatch):
+    '''Check that the least-recently-used entries are removed when the
+    cache grows beyond its maximum size, until it is within a fraction
+    of that size, and that the cache directory is only scanned when
+    entries may have to be removed.'''
+    data = "x"*1000
+    cache = KernelCache(cache_dir)
+    for idx in range(3):
+        cache.store("key{0}".format(idx), data)
+    size = cache.entries()[0][1]
+    # Make 'key0' the most recently used entry and 'key1' the least.
+    for idx, key in enumerate(["key1", "key2", "key0"]):
+        path = os.path.join(cache_dir, key + CACHE_FILE_SUFFIX)
+        os.utime(path, (1000+idx, 1000+idx))
+    cache = KernelCache(cache_dir, max_size=3*size)
+    cache.evict()
+    assert len(cache.entries()) == 3
+    cache.store("key3", data)
+    for key in ["key1", "key2"]:
+        assert not os.path.exists(os.path.join(cache_dir,
+                                               key + CACHE_FILE_SUFFIX))
+    assert len(cache.entries()) == 2
+    # The size of the directory is now known so adding an entry that
+    # does not exceed the limit does not scan it.
+    scans = []
+    entries = KernelCache.entries
+
+    def count_scans(self):
+        ''' Counts the scans of the cache directory. '''
+        scans.append(1)
+        return entries(self)
+
+    monkeypatch.setattr(KernelCache, "entries", count_scans)
+    cache.store("key4", data)
+    assert not scans
+    cache.store("key5", data)
+    assert scans == [1]
+    assert len(cache.entries()) == 2
+    cache.clear()
+    assert not cache.entries()
+
+
+def test_memory_cache(monkeypatch):
+    '''Check that entries are held in memory if the in-memory cache is
+    enabled (even if no cache directory is configured), that each load
+    returns a new copy and that the least-recently-used entries are
+    removed when the limit is reached.'''
+    monkeypatch.setattr(Config.get(), "kernel_cache_dir", "")
+    monkeypatch.setattr(KernelCache, "_memory", None)
+    assert KernelCache.create() is None
+    KernelCache.enable_memory_cache()
+    cache = KernelCache.create()
+    assert cache.cache_dir is None
+    data = ["x"*1000]
+    cache.store("key0", data)
+    assert cache.load("key0") == data
+    assert cache.load("key0") is not cache.load("key0")
+    assert cache.entries() == []
+    size = len(KernelCache._memory["key0"])
+    cache = KernelCache(None, max_size=2*size)
+    cache.store("key1", data)
+    # Make 'key0' the most recently used entry.
+    assert cache.load("key0") == data
+    cache.store("key2", data)
+    assert cache.load("key1") is None
+    assert cache.load("key0") == data
+    KernelCache.enable_memory_cache(False)
+    assert cache.load("key0") is None
+
+
+def test_memory_cache_with_dir(cache_dir, monkeypatch):
+    '''Check that entries loaded from disk are added to the in-memory
+    cache.'''
+    monkeypatch.setattr(KernelCache, "_memory", None)
+    cache = KernelCache.create()
+    cache.store("key0", "data")
+    KernelCache.enable_memory_cache()
+    assert "key0" not in KernelCache._memory
+    assert cache.load("key0") == "data"
+    assert "key0" in KernelCache._memory
+    cache.clear()
+    assert not KernelCache._memory
+    assert not cache.entries()
+
+
+def test_get_kernel_type_cached(cache_dir, monkeypatch):
+    '''Check that get_kernel_type() stores the kernel metadata in the cache
+    and that the source is not parsed again when it is unchanged.'''
+    ktype = get_kernel_type("testkern", "testkern_type", KERNEL_FILE, "",
+                            False, api="dynamo0.3")
+    assert len(KernelCache.create().entries()) == 1
+
+    def dummy_parse(_):
+        '''Fail if the kernel is parsed.'''
+        raise NotImplementedError("kernel parsed")
+    monkeypatch.setattr("psyclone.parse.kernel.get_kernel_parse_tree",
+                        dummy_parse)
+    cached = get_kernel_type("testkern", "testkern_type", KERNEL_FILE, "",
+                             False, api="dynamo0.3")
+    assert cached is not ktype
+    assert cached.procedure.name == ktype.procedure.name
+    assert str(cached.arg_descriptors) == str(ktype.arg_descriptors)
+    # A different kernel type in the same file is a different entry
+    with pytest.raises(NotImplementedError):
+        get_kernel_type("testkern", "other_type", KERNEL_FILE, "", False,
+                        api="dynamo0.3")
+
+
+def test_parse_with_cache(cache_dir):
+    '''Check that parsing an algorithm file gives the same result with a
+    cold and a warm cache and that built-ins are cached too.'''
+    alg_file = os.path.join(BASE_PATH, "15.1.2_builtin_and_normal_kernel_"
+                            "invoke.f90")
+    _, info = parse(alg_file, api="dynamo0.3")
+    nentries = len(KernelCache.create().entries())
+    assert nentries > 1
+    _, cached_info = parse(alg_file, api="dynamo0.3")
+    assert len(KernelCache.create().entries()) == nentries
+    calls = info.calls[0].kcalls
+    cached_calls = cached_info.calls[0].kcalls
+    assert [str(call.ktype.arg_descriptors) for call in calls] == \
+        [str(call.ktype.arg_descriptors) for call in cached_calls]
@@ -41,7 +41,8 @@ import os
 import pytest
 from fparser.api import parse
 from psyclone.parse.kernel import KernelType, get_kernel_metadata, \
-    KernelProcedure, Descriptor, BuiltInKernelTypeFactory, get_kernel_filepath
+    KernelProcedure, Descriptor, BuiltInKernelTypeFactory, \
+    get_kernel_filepath, KernelSearchIndex
 from psyclone.parse.utils import ParseError
 
 # pylint: disable=invalid-name
@@ -131,6 +132,107 @@ def test_getkernelfilepath_caseinsensitive2(tmpdir):
     assert "tmp" in result
     assert "test_mod.f90" in result
 
+
+def test_getkernelfilepath_index(tmpdir, monkeypatch):
+    '''Test that the kernel search path is only walked once for multiple
+    lookups and that the index is updated if a file is not found.
+
+    '''
+    KernelSearchIndex.clear()
+    os.mkdir(str(tmpdir.join("tmp")))
+    for name in ["test_mod.f90", "other_mod.F90", "not_fortran.txt"]:
+        tmpdir.join("tmp", name).write("")
+    walks = []
+    real_walk = os.walk
+
+    def counting_walk(path):
+        '''Wrapper around os.walk that records the calls made.'''
+        walks.append(path)
+        return real_walk(path)
+    monkeypatch.setattr(os, "walk", counting_walk)
+
+    assert get_kernel_filepath("test_mod", str(tmpdir), None).endswith(
+        os.path.join("tmp", "test_mod.f90"))
+    assert get_kernel_filepath("OTHER_MOD", str(tmpdir), None).endswith(
+        "other_mod.F90")
+    assert len(walks) == 1
+    with pytest.raises(ParseError) as excinfo:
+        _ = get_kernel_filepath("not_fortran", str(tmpdir), None)
+    assert "Kernel file 'not_fortran.[fF]90' not found" in str(excinfo.value)
+    # A miss causes the index to be re-built
+    assert len(walks) == 2
+    # A file created after the index was built is found
+    tmpdir.join("new_mod.f90").write("")
+    assert get_kernel_filepath("new_mod", str(tmpdir), None) == \
+        str(tmpdir.join("new_mod.f90"))
+    # A file that has been removed is not returned
+    os.remove(str(tmpdir.join("tmp", "test_mod.f90")))
+    with pytest.raises(ParseError) as excinfo:
+        _ = get_kernel_filepath("test_mod", str(tmpdir), None)
+    assert "Kernel file 'test_mod.[fF]90' not found" in str(excinfo.value)
+    KernelSearchIndex.clear()
+
+
+def test_getkernelfilepath_index_new_duplicate(tmpdir):
+    '''Test that the in-memory index is re-built if the directory tree has
+    changed since it was created, so that a duplicate of a kernel file
+    that has already been found is detected.
+
+    '''
+    KernelSearchIndex.clear()
+    os.mkdir(str(tmpdir.join("a")))
+    os.mkdir(str(tmpdir.join("b")))
+    tmpdir.join("a", "test_mod.f90").write("")
+    assert get_kernel_filepath("test_mod", str(tmpdir), None) == \
+        str(tmpdir.join("a", "test_mod.f90"))
+    tmpdir.join("b", "test_mod.f90").write("")
+    # Make sure that the modification time of the directory has changed
+    # even if the file system has a coarse time resolution.
+    os.utime(str(tmpdir.join("b")), (0, 0))
+    with pytest.raises(ParseError) as excinfo:
+        _ = get_kernel_filepath("test_mod", str(tmpdir), None)
+    assert "More than one match for kernel file 'test_mod.[fF]90'" in \
+        str(excinfo.value)
+    KernelSearchIndex.clear()
+
+
+def test_kernelsearchindex_persistent(tmpdir, monkeypatch):
+    '''Test that the index of a kernel search path is stored in the
+    kernel cache (if one is configured) and is only re-used while the
+    directory tree is unchanged.
+
+    '''
+    from psyclone.configuration import Config
+    KernelSearchIndex.clear()
+    monkeypatch.setattr(Config.get(), "kernel_cache_dir",
+                        str(tmpdir.join("cache")))
+    src_dir = tmpdir.join("src")
+    os.makedirs(str(src_dir.join("sub")))
+    src_dir.join("sub", "test_mod.f90").write("")
+    index = KernelSearchIndex.get(str(src_dir))
+    assert index.is_up_to_date()
+    # Within a process the same index object is returned
+    assert KernelSearchIndex.get(str(src_dir)) is index
+    # A new process (simulated by clearing the in-memory indexes) uses the
+    # stored index without walking the tree
+    KernelSearchIndex.clear()
+    monkeypatch.setattr(KernelSearchIndex, "build", lambda _: None)
+    stored = KernelSearchIndex.get(str(src_dir))
+    assert stored is not index
+    assert stored.find("TEST_MOD.F90") == [
+        str(src_dir.join("sub", "test_mod.f90"))]
+    monkeypatch.undo()
+    # Adding a file modifies its directory so the stored index is stale
+    src_dir.join("sub", "another_mod.f90").write("")
+    os.utime(str(src_dir.join("sub")), (0, 0))
+    assert not stored.is_up_to_date()
+    monkeypatch.setattr(Config.get(), "kernel_cache_dir",
+                        str(tmpdir.join("cache")))
+    KernelSearchIndex.clear()
+    assert KernelSearchIndex.get(str(src_dir)).find("another_mod.f90")
+    KernelSearchIndex.clear()
+
+
 # function get_kernel_metadata
 
 def test_get_kernel_metadata_no_match():
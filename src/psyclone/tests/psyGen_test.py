@@ -59,9 +59,11 @@ from psyclone.psyGen import TransInfo, Transformation, PSyFactory, NameSpace, \
     KernelSchedule, Schedule, UnaryOperation, NaryOperation, Return
 from psyclone.psyGen import Fparser2ASTProcessor
 from psyclone.psyGen import GenerationError, FieldNotFoundError, \
-     InternalError, HaloExchange, Invoke, DataAccess
+     InternalError, HaloExchange, Invoke, DataAccess, DependencyGraph, \
+     GlobalSum, Kern
 from psyclone.psyGen import Symbol, SymbolTable
-from psyclone.dynamo0p3 import DynKern, DynKernMetadata, DynInvokeSchedule
+from psyclone.dynamo0p3 import DynKern, DynKernMetadata, DynInvokeSchedule, \
+    DynLoop
 from psyclone.parse.algorithm import parse, InvokeCall
 from psyclone.transformations import OMPParallelLoopTrans, \
     DynamoLoopFuseTrans, Dynamo0p3RedundantComputationTrans
@@ -426,6 +428,70 @@ def test_intern_name_clash_case_sensitive():
     assert name3 == anon_name.lower()+"_1"
 
 
+def test_name_counters():
+    ''' tests that the suffix used for a root name carries on from the
+    last one used and that names reserved later are still avoided '''
+    namespace = NameSpace()
+    names = [namespace.create_name(root_name="map") for _ in range(4)]
+    assert names == ["map", "map_1", "map_2", "map_3"]
+    namespace.add_reserved_name("map_5")
+    assert namespace.create_name(root_name="map") == "map_4"
+    assert namespace.create_name(root_name="map") == "map_6"
+    assert namespace._counters == {"map": 6}
+    # The names are stored in sets
+    assert namespace._added_names == set(names + ["map_4", "map_6"])
+    assert namespace._reserved_names == set(["map_5"])
+
+
+def test_name_space_scopes():
+    ''' tests that names created in nested scopes do not clash with
+    names in enclosing or nested scopes but may be repeated in sibling
+    scopes '''
+    module = NameSpace(case_sensitive=True)
+    module.add_reserved_name("Psy_Mod")
+    assert module.create_name(root_name="ndf", context="m", label="x") == \
+        "ndf"
+    sub1 = module.new_scope()
+    sub2 = module.new_scope()
+    assert sub1.parent is module
+    assert module.parent is None
+    # The case sensitivity is inherited
+    assert sub1._case_sensitive
+    # Names in the enclosing scope are not reused
+    assert sub1.create_name(root_name="Psy_Mod") == "Psy_Mod_1"
+    assert sub1.create_name(root_name="ndf") == "ndf_1"
+    # but those in sibling scopes may be
+    assert sub2.create_name(root_name="ndf") == "ndf_1"
+    # Names created in nested scopes are not used by the enclosing one
+    assert module.create_name(root_name="ndf") == "ndf_2"
+    # Names returned for a context and label are visible in nested scopes
+    assert sub1.create_name(root_name="ndf", context="m", label="x") == \
+        "ndf"
+    assert sub1.create_name(root_name="ndf", context="s", label="x") == \
+        "ndf_3"
+    assert module.create_name(root_name="ndf", context="s", label="x") == \
+        "ndf_4"
+    # The enclosing scope is searched for a context and label, not the
+    # sibling scope
+    assert sub2.create_name(root_name="ndf", context="s", label="x") == \
+        "ndf_4"
+    # Reserving a name that is reserved in an enclosing scope is ignored
+    sub1.add_reserved_name("Psy_Mod")
+    assert "Psy_Mod" not in sub1._reserved_names
+    # Names reserved in a nested scope are avoided by the enclosing one
+    sub2.add_reserved_names(["dofmap"])
+    assert module.create_name(root_name="dofmap") == "dofmap_1"
+    # but may be reserved again
+    module.add_reserved_name("dofmap")
+    # Names used in an enclosing or nested scope cannot be reserved
+    with pytest.raises(RuntimeError) as err:
+        sub1.add_reserved_name("ndf_2")
+    assert "has already used that name" in str(err.value)
+    with pytest.raises(RuntimeError) as err:
+        module.add_reserved_name("ndf_1")
+    assert "has already used that name" in str(err.value)
+
+
 # tests that the NameSpaceFactory class is working correctly
 
 def test_create():
@@ -1504,6 +1570,142 @@ def test_node_position():
             "in the tree") in str(excinfo.value)
 
 
+def test_node_slots():
+    '''Check that the nodes that are created in large numbers have no
+    instance dictionary, that the cached values of a node are initialised
+    even if Node.__init__ is not called and that the list of annotations
+    is only created when it is first used.
+
+    '''
+    ref = Reference("a", None)
+    lit = Literal("1", parent=ref)
+    for node in [ref, lit, Array("b", None), Return(), IfBlock(),
+                 BinaryOperation(BinaryOperation.Operator.ADD),
+                 Assignment(), CodeBlock([])]:
+        assert not hasattr(node, "__dict__")
+    with pytest.raises(AttributeError):
+        ref.not_an_attribute = 1
+    # A sub-class without __slots__ has a dictionary as usual
+    node = Schedule()
+    node.new_attribute = 1
+    # A node for which Node.__init__ has not been called
+    kern = DynKern()
+    assert kern._position is None
+    assert kern._abs_version is None
+    assert kern._abs_position is None
+    assert lit._annotations is None
+    assert ref.annotations == []
+    ref.annotations.append("was_single_stmt")
+    assert ref.annotations == ["was_single_stmt"]
+    assert IfBlock(annotation="was_elseif").annotations == ["was_elseif"]
+
+
+def test_children_list():
+    ''' Test that the ChildrenList of a node keeps the position of each
+    child up to date as it is modified and that the position, depth and
+    absolute position of a node are correct after the tree has been
+    modified (including by operations that bypass the ChildrenList). '''
+    import copy
+    from psyclone.psyGen import ChildrenList
+
+    def check(node):
+        ''' Check the recorded position of every child of node. '''
+        assert isinstance(node.children, ChildrenList)
+        for idx, child in enumerate(node.children):
+            assert child._position == idx
+            assert child.position == idx
+
+    sched = Schedule()
+    nodes = [Return(parent=sched) for _ in range(6)]
+    sched.children = nodes[:3]
+    check(sched)
+    sched.addchild(nodes[3], index=0)
+    check(sched)
+    sched.children.append(nodes[4])
+    sched.children.extend([nodes[5]])
+    check(sched)
+    assert sched.children == [nodes[3], nodes[0], nodes[1], nodes[2],
+                              nodes[4], nodes[5]]
+    sched.children.remove(nodes[0])
+    check(sched)
+    assert sched.children.pop(1) is nodes[1]
+    check(sched)
+    sched.children.insert(-1, nodes[0])
+    check(sched)
+    del sched.children[0]
+    check(sched)
+    sched.children[1:3] = [nodes[1], nodes[3], nodes[4]]
+    check(sched)
+    sched.children[0] = nodes[2]
+    check(sched)
+    sched.children.reverse()
+    check(sched)
+    sched.children += [Return(parent=sched)]
+    check(sched)
+    assert isinstance(copy.copy(sched.children), ChildrenList)
+
+    # A node that is in more than one list (as happens while it is being
+    # moved) still reports its position in the children of its parent.
+    inner = Schedule(parent=sched)
+    child = sched.children[2]
+    inner.children = [Return(parent=inner), Return(parent=inner), child]
+    child.parent = inner
+    assert child.position == 2
+    sched.children.remove(child)
+    assert child.position == 2
+    # As does a node in a list that is not a ChildrenList
+    sched._child_list = list(sched.children)
+    sched.children.insert(0, sched.children.pop())
+    for idx, node in enumerate(sched.children):
+        assert node.position == idx
+
+    # The depth and absolute position reflect changes to the tree
+    sched.children = [Return(parent=sched), inner]
+    inner.parent = sched
+    assert child.depth == 3
+    assert child.abs_position == 5
+    innermost = Schedule(parent=inner)
+    inner.children.insert(0, innermost)
+    assert child.abs_position == 6
+    innermost.addchild(child)
+    inner.children.remove(child)
+    child.parent = innermost
+    assert child.depth == 4
+    assert child.abs_position == 4
+
+    # Each tree has its own version so modifying one tree leaves the
+    # cached positions in another tree valid
+    other = Schedule()
+    other.children = [Return(parent=other)]
+    version = sched._tree_version
+    other.children.append(Return(parent=other))
+    assert sched._tree_version == version
+    assert child._abs_version == version
+    # but moving a sub-tree into another tree modifies both of them
+    sched.children.remove(inner)
+    other.addchild(inner)
+    inner.parent = other
+    assert sched._tree_version != version
+    assert child.abs_position == 5
+    assert child._abs_version == other._tree_version
+
+    # The depth of every node in a sub-tree is updated when the sub-tree
+    # is moved, and that of a node whose parent is set before it is
+    # added to the children of its parent when it is added.
+    assert child._depth == 3
+    assert child.depth == 4
+    inner.parent = None
+    assert child.depth == 3
+    inner.parent = other
+    loose = Schedule()
+    loose_child = Return(parent=loose)
+    loose.parent = innermost
+    innermost.children.append(loose)
+    assert loose.depth == 4
+    loose.children.append(loose_child)
+    assert loose_child.depth == 5
+
+
 def test_node_root():
     '''
     Test that the Node class root method returns the correct instance
@@ -2005,6 +2207,55 @@ def test_node_ancestor():
     assert node is sched.children[0].loop_body[0]
 
 
+def test_node_walk():
+    ''' Test the Node.walk() and Node.iter_walk() methods, including
+    the pruning of the traversal with the stop_type and max_depth
+    arguments. '''
+    import types
+    from psyclone.gocean1p0 import GOKern, GOLoop
+
+    def recursive_walk(node):
+        ''' Reference depth-first traversal. '''
+        nodes = [node]
+        for child in node.children:
+            nodes += recursive_walk(child)
+        return nodes
+
+    _, invoke = get_invoke("single_invoke.f90", "gocean1.0", idx=0)
+    sched = invoke.schedule
+    outer = sched.children[0]
+    inner = outer.loop_body[0]
+    kern = inner.loop_body[0]
+    assert sched.walk(Node) == recursive_walk(sched)
+    assert isinstance(sched.iter_walk(Node), types.GeneratorType)
+    assert list(sched.iter_walk(Node)) == sched.walk(Node)
+    assert sched.walk((GOKern, GOLoop)) == [outer, inner, kern]
+    assert sched.walk(Literal) == outer.children[0:3] + inner.children[0:3]
+
+    # The walk does not descend below a node of the stop type
+    assert sched.walk(GOLoop, stop_type=GOLoop) == [outer]
+    assert not sched.walk(GOKern, stop_type=GOLoop)
+    assert inner.walk(GOKern, stop_type=(Literal, GOLoop)) == []
+    assert outer.loop_body.walk(GOKern, stop_type=Literal) == [kern]
+
+    # Depth limits are relative to the starting node
+    assert sched.walk(Node, max_depth=0) == [sched]
+    assert sched.walk(Node, max_depth=1) == [sched, outer]
+    assert sched.walk(GOLoop, max_depth=2) == [outer]
+    assert sched.walk(GOLoop, max_depth=3) == [outer, inner]
+    assert sched.walk(Node, max_depth=5) == sched.walk(Node)
+    assert sched.walk(Node, stop_type=GOLoop, max_depth=5) == [sched, outer]
+
+    # following() and preceding() are consistent with the traversal
+    all_nodes = sched.walk(Node)
+    position = all_nodes.index(inner)
+    assert inner.following() == all_nodes[position+1:]
+    assert inner.preceding() == all_nodes[:position]
+    assert inner.preceding(reverse=True) == all_nodes[position-1::-1]
+    assert kern.following() == []
+    assert sched.preceding() == []
+
+
 def test_dag_names():
     '''test that the dag_name method returns the correct value for the
     node class and its specialisations'''
@@ -2352,6 +2603,82 @@ def test_find_w_args_hes_vec_idx(monkeypatch, annexed):
             in str(excinfo.value))
 
 
+def test_dependency_graph():
+    '''Check that the DependencyGraph of a schedule returns the nodes with
+    an argument of a given name before and after a node and that it is
+    kept up to date as the schedule is modified.
+
+    '''
+    _, invoke_info = parse(
+        os.path.join(BASE_PATH, "4.9_named_multikernel_invokes.f90"),
+        api="dynamo0.3")
+    psy = PSyFactory("dynamo0.3",
+                     distributed_memory=True).create(invoke_info)
+    schedule = psy.invokes.invoke_list[0].schedule
+
+    def check():
+        ''' Compare the graph with a search of the whole tree. '''
+        graph = DependencyGraph.get(schedule)
+        assert DependencyGraph.get(schedule.children[0]) is graph
+        for node in schedule.walk((Kern, HaloExchange, GlobalSum)):
+            for arg in node.args:
+                assert graph.following(node, arg.name) == \
+                    [other for other in node.following()
+                     if isinstance(other, (Kern, HaloExchange, GlobalSum))
+                     and arg.name in [oarg.name for oarg in other.args]]
+                assert graph.preceding(node, arg.name) == \
+                    [other for other in node.preceding(reverse=True)
+                     if isinstance(other, (Kern, HaloExchange, GlobalSum))
+                     and arg.name in [oarg.name for oarg in other.args]]
+        return graph
+
+    graph = check()
+    kern = schedule.walk(Kern)[0]
+    assert graph.following(kern, "not_an_arg") == []
+    assert graph.preceding(kern, "not_an_arg") == []
+    # Remove a loop, move a halo exchange and insert a new one
+    loop = schedule.walk(DynLoop)[1]
+    schedule.children.remove(loop)
+    check()
+    exchange = schedule.children[0]
+    schedule.children.remove(exchange)
+    schedule.children.insert(2, exchange)
+    exchange.parent = schedule
+    check()
+    new_exchange = HaloExchange(exchange.field, parent=schedule)
+    schedule.children.insert(len(schedule.children) - 1, new_exchange)
+    assert check() is graph
+    # A node whose parent does not contain it is treated as following
+    # every other node
+    loop.parent = schedule
+    field = loop.loop_body[0].args[0]
+    assert graph.following(loop.loop_body[0], field.name) == []
+    assert graph.preceding(loop.loop_body[0], field.name) == \
+        graph.following(schedule, field.name)[::-1]
+    # After many modifications the graph is discarded and a new one is
+    # created when it is next needed
+    for _ in range(len(schedule.walk(Node))):
+        schedule.children.append(schedule.children.pop(0))
+    assert schedule._dependency_graph is None
+    graph = check()
+    # A graph is created for a different tree and is kept in its root
+    # (so that the graph of each tree is maintained and is discarded
+    # along with the tree)
+    _, invoke_info = parse(os.path.join(BASE_PATH, "1_single_invoke.f90"),
+                           api="dynamo0.3")
+    psy = PSyFactory("dynamo0.3",
+                     distributed_memory=True).create(invoke_info)
+    other = psy.invokes.invoke_list[0].schedule
+    other_graph = DependencyGraph.get(other)
+    assert other_graph is not graph
+    assert other._dependency_graph is other_graph
+    assert DependencyGraph.get(schedule) is graph
+    # A tree that is added to another tree no longer has its own graph
+    other.parent = schedule
+    assert other._dependency_graph is None
+    assert DependencyGraph.get(other) is graph
+
+
 def test_find_w_args_hes_vec_no_dep():
     '''when _find_write_arguments, or _find_read_arguments, are called,
     halo exchanges with the same field but a different index should
@@ -2572,6 +2899,63 @@ def test_kern_ast():
     assert isinstance(kern.ast, Fortran2003.Program)
 
 
+def test_kern_ast_shared_parse(monkeypatch):
+    ''' Test that the kernel module is only parsed once by fparser2 when
+    more than one kernel refers to it but that each kernel gets its own
+    copy of the fparser2 AST. '''
+    from fparser.two import parser
+    from fparser.two.utils import walk_ast
+    from fparser.two import Fortran2003
+    from psyclone.parse import kernel
+    from psyclone.psyGen import CodedKern
+    monkeypatch.setattr(kernel, "_FP2_KERNEL_ASTS", {})
+    _, invoke = get_invoke("single_invoke_two_identical_kernels.f90",
+                           "gocean1.0", idx=0)
+    kernels = invoke.schedule.walk(CodedKern)
+    assert len(kernels) == 2
+    ast1 = kernels[0].ast
+    # Parsing again would be an error
+    monkeypatch.setattr(parser.ParserFactory, "create", None)
+    ast2 = kernels[1].ast
+    assert len(kernel._FP2_KERNEL_ASTS) == 1
+    assert ast1 is not ast2
+    assert str(ast1) == str(ast2)
+    # Modifying one copy does not affect the other
+    name = walk_ast(ast1.content, [Fortran2003.Name])[0]
+    name.string = "changed_mod"
+    assert "changed_mod" in str(ast1)
+    assert "changed_mod" not in str(ast2)
+    assert kernels[1].ast is ast2
+
+
+def test_kern_ast_shared_parse_bounded(monkeypatch):
+    ''' Test that the fparser2 ASTs of kernel modules are keyed on the
+    Fortran that is parsed (so that a modified fparser1 AST is parsed
+    again) and that only a limited number of ASTs are kept. '''
+    import fparser
+    from psyclone.parse import kernel
+    from psyclone.psyGen import CodedKern
+    monkeypatch.setattr(kernel, "_FP2_KERNEL_ASTS", kernel.OrderedDict())
+    monkeypatch.setattr(kernel, "_FP2_KERNEL_ASTS_SIZE", 1)
+    _, invoke = get_invoke("single_invoke_two_identical_kernels.f90",
+                           "gocean1.0", idx=0)
+    kernels = invoke.schedule.walk(CodedKern)
+    assert "SUBROUTINE compute_cu_code" in str(kernels[0].ast)
+    keys = list(kernel._FP2_KERNEL_ASTS.keys())
+    assert len(keys) == 1
+    # Edit the fparser1 AST of the second kernel: the shared fparser2
+    # AST must not be used for it and replaces the first one.
+    for child in kernels[1]._module_code.content[0].content:
+        if isinstance(child, fparser.one.block_statements.Subroutine):
+            monkeypatch.setattr(child, "name", "some_other_name")
+            monkeypatch.setattr(child.content[-1], "name",
+                                "some_other_name")
+    assert "SUBROUTINE compute_cu_code" not in str(kernels[1].ast)
+    assert "SUBROUTINE some_other_name" in str(kernels[1].ast)
+    assert len(kernel._FP2_KERNEL_ASTS) == 1
+    assert list(kernel._FP2_KERNEL_ASTS.keys()) != keys
+
+
 def test_dataaccess_vector():
     '''Test that the DataAccess class works as expected when we have a
     vector field argument that depends on more than one halo exchange
@@ -3817,6 +4201,91 @@ def test_symboltable_local_symbols():
     assert sym_table.lookup("var4") not in sym_table.local_symbols
 
 
+def test_symboltable_case_insensitive():
+    '''Test that symbol names are not case sensitive but that symbols
+    keep the name they were created with.'''
+    sym_table = SymbolTable()
+    sym_table.add(Symbol("Var1", "real", []))
+    assert sym_table.lookup("VAR1").name == "Var1"
+    assert "var1" in sym_table
+    with pytest.raises(KeyError) as error:
+        sym_table.add(Symbol("vAR1", "real"))
+    assert ("Symbol table already contains a symbol with name "
+            "'vAR1'.") in str(error.value)
+    sym_table.add(Symbol("var2", "real", []))
+    sym_table.swap_symbol_properties(sym_table.lookup("var1"),
+                                     Symbol("VAR2", "integer"))
+
+
+def test_symboltable_add_symbols():
+    '''Test that add_symbols adds all of the symbols or, if any of their
+    names are in use, none of them.'''
+    sym_table = SymbolTable()
+    sym_table.add_symbols([Symbol("var1", "real"), Symbol("var2", "real")])
+    assert [sym.name for sym in sym_table.symbols] == ["var1", "var2"]
+    for names in [["var3", "VAR2"], ["var3", "Var3"]]:
+        with pytest.raises(KeyError) as error:
+            sym_table.add_symbols([Symbol(name, "real") for name in names])
+        assert ("Symbol table already contains a symbol with name "
+                "'{0}'.".format(names[1])) in str(error.value)
+        assert [sym.name for sym in sym_table.symbols] == ["var1", "var2"]
+
+
+def test_symboltable_scopes():
+    '''Test that symbols are looked up in the symbol tables of the
+    enclosing scopes and that they may be hidden by symbols in a nested
+    scope.'''
+    container = SymbolTable()
+    routine = SymbolTable(parent=container)
+    block = SymbolTable(parent=routine)
+    assert block.parent is routine
+    assert container.parent is None
+    container.add(Symbol("var1", "real",
+                         interface=Symbol.FortranGlobal("some_mod")))
+    routine.add(Symbol("var2", "real"))
+    assert block.lookup("VAR1") is container.lookup("var1")
+    assert "var2" in block
+    assert "var2" not in container
+    with pytest.raises(KeyError) as error:
+        container.lookup("var2")
+    assert "Could not find 'var2' in the Symbol Table." in str(error.value)
+    # Symbols in nested scopes hide those in enclosing scopes
+    block.add(Symbol("var1", "integer"))
+    assert block.lookup("var1").datatype == "integer"
+    assert routine.lookup("var1").datatype == "real"
+    # Only the symbols of the scope itself are listed
+    assert block.symbols == [block.lookup("var1")]
+    assert block.local_symbols == [block.lookup("var1")]
+
+
+def test_symboltable_cached_views():
+    '''Test that the local symbols and the validity of the argument
+    list are recomputed when the symbols change.'''
+    sym_table = SymbolTable()
+    sym_table.add(Symbol("var1", "real", []))
+    sym_table.add(Symbol("var2", "real", []))
+    assert len(sym_table.local_symbols) == 2
+    assert sym_table.argument_list == []
+    # The cached view is not affected by changes to the returned list
+    sym_table.local_symbols.pop()
+    assert len(sym_table.local_symbols) == 2
+    sym_table.add(Symbol("var3", "real", []))
+    assert len(sym_table.local_symbols) == 3
+    # Changing the interface of a symbol invalidates the views
+    sym_v1 = sym_table.lookup("var1")
+    sym_v1.interface = Symbol.Argument(access=Symbol.Access.READWRITE)
+    assert sym_v1 not in sym_table.local_symbols
+    with pytest.raises(InternalError) as err:
+        _ = sym_table.argument_list
+    assert "is not listed as a kernel argument" in str(err.value)
+    sym_table.specify_argument_list([sym_v1])
+    assert sym_table.argument_list == [sym_v1]
+    # as does swapping the properties of two symbols
+    sym_table.swap_symbol_properties(sym_v1, sym_table.lookup("var2"))
+    assert sym_table.local_symbols == [sym_v1, sym_table.lookup("var3")]
+    assert sym_table.argument_list == [sym_table.lookup("var2")]
+
+
 def test_symboltable_abstract_properties():
     '''Test that the SymbolTable abstract properties raise the appropriate
     error.'''
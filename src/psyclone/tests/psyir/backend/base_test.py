@@ -253,3 +253,67 @@ def test_psyirvisitor_visit_return_node():
     assert ("Visitor Error: Unsupported node 'Return' found: method names "
             "attempted were ['return_node', 'node_node']."
             ""in str(excinfo))
+
+
+def test_psyirvisitor_dispatch_table():
+    '''Check that the method used for each class of node is looked up
+    once per visitor class, following the class hierarchy of the node,
+    that the instances of a class share its table and that methods added
+    to a visitor instance, or to a visitor class before it meets that
+    type of node, are called.
+
+    '''
+    class TestNode1(Node):
+        '''Node with no specific visitor method.'''
+
+    class TestNode2(TestNode1):
+        '''Sub-class of TestNode1.'''
+
+    class TestVisitor(PSyIRVisitor):
+        '''Visitor with a method for TestNode1 (and thus TestNode2).'''
+        def testnode1_node(self, node):
+            '''Return the name of the class of the node.'''
+            return type(node).__name__
+
+    class OtherVisitor(TestVisitor):
+        '''Visitor with a method for TestNode2.'''
+        def testnode2_node(self, _):
+            '''Return a fixed string.'''
+            return "other"
+
+    visitor = TestVisitor()
+    assert visitor(TestNode2()) == "TestNode2"
+    assert visitor(TestNode1()) == "TestNode1"
+    table = visitor._dispatch_table
+    assert table == {TestNode1: "testnode1_node",
+                     TestNode2: "testnode1_node"}
+    # Another instance shares the table of the class
+    other = TestVisitor(skip_nodes=True)
+    assert other(TestNode2()) == "TestNode2"
+    assert other._dispatch_table is table
+    # A sub-class of the visitor finds its own methods
+    other = OtherVisitor()
+    assert other(TestNode2()) == "other"
+    assert other(TestNode1()) == "TestNode1"
+    assert other._dispatch_table[TestNode2] == "testnode2_node"
+    # A missing method is recorded too
+    with pytest.raises(VisitorError):
+        visitor(Node())
+    assert table[Node] is None
+    # A method added to an instance is called (and the instance uses a
+    # table of its own)
+    other = TestVisitor()
+    other.testnode2_node = lambda node: "instance"
+    assert other(TestNode2()) == "instance"
+    assert other(TestNode1()) == "TestNode1"
+    assert other._dispatch_table is not table
+    assert table[TestNode2] == "testnode1_node"
+    # as is a method that replaces one in the class once it has been used
+    other.testnode1_node = lambda node: "replaced"
+    assert other(TestNode1()) == "replaced"
+    # A method added to the class for a type of node that the class has
+    # not met is used by a new visitor
+    class TestNode3(Node):
+        '''Node with no specific visitor method.'''
+    TestVisitor.testnode3_node = lambda self, node: "node3"
+    assert TestVisitor()(TestNode3()) == "node3"
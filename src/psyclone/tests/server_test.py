@@ -0,0 +1,209 @@
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''Module containing pytest tests for the PSyclone server and its client
+(server.py).'''
+
+from __future__ import absolute_import
+
+import os
+import sys
+import threading
+import pytest
+
+from psyclone import server
+from psyclone.generator import main
+
+BASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "test_files", "dynamo0p3")
+
+
+def client_env():
+    '''
+    :returns: the environment of the client to send with a request.
+    :rtype: dict
+
+    '''
+    return {"PSYCLONE_CONFIG": os.environ.get("PSYCLONE_CONFIG")}
+
+
+def test_run_request(capsys, tmpdir):
+    '''Test that a request gives the same output as the psyclone script
+    and that the state of the process is restored afterwards.'''
+    alg_file = os.path.join(BASE_PATH, "1_single_invoke.f90")
+    cwd = os.getcwd()
+    reply = server.run_request({"args": ["-opsy", "psy.f90", alg_file],
+                                "cwd": str(tmpdir), "env": client_env()})
+    assert os.getcwd() == cwd
+    assert reply["status"] == 0
+    assert reply["stderr"] == ""
+    # The PSy code is written relative to the directory of the request
+    assert os.path.isfile(str(tmpdir.join("psy.f90")))
+    main([alg_file])
+    output, _ = capsys.readouterr()
+    assert output.startswith(reply["stdout"])
+
+
+def test_run_request_errors(tmpdir):
+    '''Test that errors are reported with the same status and messages as
+    by the psyclone script.'''
+    alg_file = os.path.join(BASE_PATH, "2_incorrect_number_of_args.f90")
+    reply = server.run_request({"args": [alg_file], "cwd": str(tmpdir),
+                                "env": client_env()})
+    assert reply["status"] == 1
+    assert ("Kernel 'testkern_type' called from the algorithm layer with an "
+            "insufficient number of arguments" in reply["stderr"])
+    # Invalid arguments
+    reply = server.run_request({"args": ["-api", "invalid", alg_file],
+                                "cwd": str(tmpdir), "env": client_env()})
+    assert reply["status"] == 1
+    assert "Unsupported API 'invalid' specified" in reply["stderr"]
+    reply = server.run_request({"args": [], "cwd": str(tmpdir),
+                                "env": client_env()})
+    assert reply["status"] == 2
+    assert "the following arguments are required: filename" \
+        in reply["stderr"]
+
+
+def test_run_request_script(tmpdir):
+    '''Test that a transformation script is re-imported by every request
+    (so that any changes to it take effect).'''
+    alg_file = os.path.join(BASE_PATH, "1_single_invoke.f90")
+    script = tmpdir.join("server_test_script.py")
+    for message in ["first", "second"]:
+        script.write("def trans(psy):\n"
+                     "    print('{0}')\n"
+                     "    return psy\n".format(message))
+        reply = server.run_request(
+            {"args": ["-s", str(script), alg_file], "cwd": str(tmpdir),
+             "env": client_env()})
+        assert reply["status"] == 0
+        assert reply["stdout"].startswith(message + "\n")
+        assert "server_test_script" not in sys.modules
+
+
+def test_run_request_reset(tmpdir):
+    '''Test that the state kept by PSyclone between algorithm files is
+    discarded before each request.'''
+    from psyclone.parse import kernel
+    from psyclone.psyGen import NameSpaceFactory
+    alg_file = os.path.join(BASE_PATH, "1_single_invoke.f90")
+    name_space = NameSpaceFactory().create()
+    kernel.KernelSearchIndex.get(BASE_PATH)
+    kernel._FP2_KERNEL_ASTS["key"] = None
+    reply = server.run_request({"args": [alg_file], "cwd": str(tmpdir),
+                                "env": client_env()})
+    assert reply["status"] == 0
+    assert NameSpaceFactory().create() is not name_space
+    assert BASE_PATH not in kernel.KernelSearchIndex._indexes
+    assert "key" not in kernel._FP2_KERNEL_ASTS
+
+
+def test_run_request_config(tmpdir):
+    '''Test that the configuration changed by the options of a request
+    does not affect the next request.'''
+    alg_file = os.path.join(BASE_PATH, "1_single_invoke.f90")
+    halo_exchanges = []
+    for args in [[], ["-nodm"], []]:
+        reply = server.run_request({"args": args + [alg_file],
+                                    "cwd": str(tmpdir), "env": client_env()})
+        assert reply["status"] == 0
+        halo_exchanges.append("halo_exchange" in reply["stdout"])
+    assert halo_exchanges == [True, False, True]
+
+
+def test_server_client(capsys, monkeypatch, tmpdir):
+    '''Test that the client forwards its arguments to a running server
+    and reproduces its output and exit status.'''
+    socket_path = str(tmpdir.join("psyclone.sock"))
+    psy_server = server.PSycloneServer(socket_path)
+    thread = threading.Thread(target=psy_server.serve_until_shutdown)
+    thread.start()
+    try:
+        assert server.server_running(socket_path)
+        # Only the current user may connect to the server
+        assert os.stat(socket_path).st_mode & 0o777 == 0o600
+        with pytest.raises(IOError) as excinfo:
+            server.PSycloneServer(socket_path)
+        assert ("a PSyclone server is already listening on '{0}'".
+                format(socket_path) in str(excinfo.value))
+
+        monkeypatch.setenv(server.SERVER_ENV_VAR, socket_path)
+        alg_file = os.path.join(BASE_PATH, "1_single_invoke.f90")
+        with pytest.raises(SystemExit) as excinfo:
+            server.client_main([alg_file])
+        assert excinfo.value.code == 0
+        output, _ = capsys.readouterr()
+        main([alg_file])
+        expected, _ = capsys.readouterr()
+        assert output == expected
+
+        alg_file = os.path.join(BASE_PATH, "2_incorrect_number_of_args.f90")
+        with pytest.raises(SystemExit) as excinfo:
+            server.client_main([alg_file])
+        assert excinfo.value.code == 1
+        _, errors = capsys.readouterr()
+        assert "insufficient number of arguments" in errors
+    finally:
+        server.stop_server(socket_path)
+        thread.join()
+    assert not os.path.exists(socket_path)
+    assert not server.server_running(socket_path)
+
+
+def test_client_no_server(capsys, monkeypatch, tmpdir):
+    '''Test that the client processes its arguments itself if there is
+    no server.'''
+    alg_file = os.path.join(BASE_PATH, "1_single_invoke.f90")
+    main([alg_file])
+    expected, _ = capsys.readouterr()
+    monkeypatch.delenv(server.SERVER_ENV_VAR, raising=False)
+    server.client_main([alg_file])
+    output, _ = capsys.readouterr()
+    assert output == expected
+    monkeypatch.setenv(server.SERVER_ENV_VAR,
+                       str(tmpdir.join("no_server.sock")))
+    server.client_main([alg_file])
+    output, _ = capsys.readouterr()
+    assert output == expected
+
+
+def test_main_stop_server_error(capsys, tmpdir):
+    '''Test that the psyclone script reports an error if asked to stop a
+    server that is not running.'''
+    socket_path = str(tmpdir.join("no_server.sock"))
+    with pytest.raises(SystemExit) as excinfo:
+        main(["--stop-server", socket_path])
+    assert str(excinfo.value) == "1"
+    _, errors = capsys.readouterr()
+    assert errors
@@ -0,0 +1,142 @@
+# -----------------------------------------------------------------------------
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Science and Technology Facilities Council.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+'''Tests that check that the start-up of PSyclone only imports what is
+required by the selected API and (if the --timing option is given to
+pytest, as the result depends on the machine and its load) stays within
+a time budget. Each test runs PSyclone in a new Python interpreter so
+that it starts without any modules imported.'''
+
+from __future__ import absolute_import
+
+import json
+import os
+import subprocess
+import sys
+import time
+import pytest
+
+# Generous limits (in seconds) on the wall-clock time of a complete run,
+# including starting the interpreter. Typical times are an order of
+# magnitude smaller; these only catch gross regressions.
+VERSION_BUDGET = 2.0
+GOCEAN_BUDGET = 5.0
+
+# The modules of each API back-end (and the transformations, which
+# import those of several APIs).
+API_MODULES = ["psyclone.dynamo0p1", "psyclone.dynamo0p3",
+               "psyclone.dynamo0p3_builtins", "psyclone.gocean0p1",
+               "psyclone.gocean1p0", "psyclone.nemo",
+               "psyclone.transformations"]
+
+GOCEAN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "test_files", "gocean1p0")
+
+
+def run_psyclone(args, cwd):
+    '''Run the PSyclone main routine with the supplied arguments in a new
+    interpreter.
+
+    :param args: the command-line arguments.
+    :type args: list of str
+    :param str cwd: the directory in which to run PSyclone.
+
+    :returns: the elapsed time and the names of the PSyclone and \
+              fparser modules that were imported.
+    :rtype: (float, list of str)
+
+    '''
+    code = ("import json, sys\n"
+            "from psyclone.generator import main\n"
+            "main({0})\n"
+            "print(json.dumps(sorted(name for name in sys.modules\n"
+            "                        if name.startswith(('psyclone',\n"
+            "                                            'fparser')))))\n".
+            format(repr(args)))
+    start = time.time()
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=cwd,
+                                     stderr=subprocess.STDOUT)
+    elapsed = time.time() - start
+    modules = json.loads(output.decode("utf-8").splitlines()[-1])
+    return elapsed, modules
+
+
+def gocean_args(tmpdir):
+    '''
+    :param tmpdir: temporary directory for the generated code.
+    :type tmpdir: :py:class:`py._path.local.LocalPath`
+
+    :returns: the arguments to generate code for a gocean1.0 example.
+    :rtype: list of str
+
+    '''
+    return ["-api", "gocean1.0", "-opsy", str(tmpdir.join("psy.f90")),
+            "-oalg", os.devnull,
+            os.path.join(GOCEAN_PATH, "single_invoke.f90")]
+
+
+@pytest.fixture(name="timing")
+def timing_fixture(request):
+    '''Skip the test unless wall-clock time budgets are to be checked.'''
+    if not request.config.getoption("--timing"):
+        pytest.skip("time budgets are only checked with --timing")
+
+
+def test_startup_version(tmpdir):
+    '''Check that 'psyclone -v' does not import any API back-end, the
+    parsers of the algorithm and kernel code or fparser2.'''
+    _, modules = run_psyclone(["-v"], str(tmpdir))
+    for name in API_MODULES + ["psyclone.parse.algorithm",
+                               "psyclone.parse.kernel", "fparser.two"]:
+        assert name not in modules
+
+
+def test_startup_gocean(tmpdir):
+    '''Check that generating code for the gocean1.0 API does not import
+    the back-ends of any other API.'''
+    _, modules = run_psyclone(gocean_args(tmpdir), GOCEAN_PATH)
+    assert os.path.isfile(str(tmpdir.join("psy.f90")))
+    assert "psyclone.gocean1p0" in modules
+    for name in API_MODULES:
+        if name != "psyclone.gocean1p0":
+            assert name not in modules
+
+
+@pytest.mark.usefixtures("timing")
+def test_startup_time(tmpdir):
+    '''Check that 'psyclone -v' and generating code for the gocean1.0 API
+    stay within their time budgets.'''
+    elapsed, _ = run_psyclone(["-v"], str(tmpdir))
+    assert elapsed < VERSION_BUDGET
+    elapsed, _ = run_psyclone(gocean_args(tmpdir), GOCEAN_PATH)
+    assert elapsed < GOCEAN_BUDGET
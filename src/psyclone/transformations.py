@@ -46,7 +46,6 @@ import six
 from psyclone.psyGen import Transformation, InternalError, Schedule
 from psyclone.configuration import Config
 from psyclone.undoredo import Memento
-from psyclone.dynamo0p3 import VALID_ANY_SPACE_NAMES
 
 VALID_OMP_SCHEDULES = ["runtime", "static", "dynamic", "guided", "auto"]
 
@@ -115,9 +114,9 @@ class RegionTrans(Transformation):
 
         # Check that the proposed region contains only supported node types
         for child in node_list:
-            flat_list = [item for item in child.walk(object)
-                         if not isinstance(item, Schedule)]
-            for item in flat_list:
+            for item in child.iter_walk(object):
+                if isinstance(item, Schedule):
+                    continue
                 if not isinstance(item, self.valid_node_types):
                     raise TransformationError(
                         "Nodes of type '{0}' cannot be enclosed by a {1} "
@@ -164,8 +163,7 @@ def check_intergrid(node):
     if not node.children:
         return
     from psyclone.dynamo0p3 import DynKern
-    child_kernels = node.walk(DynKern)
-    for kern in child_kernels:
+    for kern in node.iter_walk(DynKern):
         if kern.is_intergrid:
             raise TransformationError(
                 "Transformations cannot currently be applied to nodes which "
@@ -1627,6 +1625,322 @@ class OMPParallelTrans(ParallelRegionTrans):
         super(OMPParallelTrans, self)._validate(node_list)
 
 
+class OMPParallelDoMergeTrans(Transformation):
+    '''
+    Merges consecutive OpenMP PARALLEL DO directives into a single OpenMP
+    PARALLEL region containing an OpenMP DO directive for each loop, so
+    that the threads are only forked and joined once. The barrier at the
+    end of a loop is removed (by adding a 'nowait' clause) if the
+    dependence analysis shows that none of the following loops in the
+    region depend on it. For example:
+
+    >>> from psyclone.parse.algorithm import parse
+    >>> from psyclone.psyGen import PSyFactory
+    >>> api = "dynamo0.3"
+    >>> ast, invokeInfo = parse("15.14.1_multi_aX_plus_Y_builtin.f90",
+    >>>                         api=api)
+    >>> psy = PSyFactory(api).create(invokeInfo)
+    >>> schedule = psy.invokes.invoke_list[0].schedule
+    >>>
+    >>> from psyclone.transformations import DynamoOMPParallelLoopTrans, \
+    >>>     OMPParallelDoMergeTrans
+    >>> for loop in schedule.loops():
+    >>>     DynamoOMPParallelLoopTrans().apply(loop)
+    >>> OMPParallelDoMergeTrans().apply(schedule)
+    >>> schedule.view()
+
+    The transformation can be applied to a list of consecutive OpenMP
+    PARALLEL DO directives that have the same parent, or to an
+    InvokeSchedule, in which case every sequence of at least two
+    consecutive directives is merged. Any other node between two
+    directives (e.g. a halo exchange or a global sum) separates them, so
+    the placement of these nodes is preserved. Since a reduction variable
+    can only be used once in a parallel region, a new region is started
+    for a directive whose reduction variable is already used in the
+    current region. As the private variables are those of the whole
+    region, a new region is also started for a directive if a variable
+    would otherwise be private in the region but shared in one of its
+    directives, or the other way round (e.g. a scalar that is only read
+    in one loop and is private in the next).
+
+    '''
+    def __str__(self):
+        return ("Merge consecutive OpenMP PARALLEL DO directives into one "
+                "OpenMP PARALLEL region")
+
+    @property
+    def name(self):
+        '''
+        :returns: the name of this transformation as a string.
+        :rtype: str
+        '''
+        return "OMPParallelDoMergeTrans"
+
+    def validate(self, nodes):
+        '''
+        Checks that the supplied nodes can be merged.
+
+        :param nodes: an InvokeSchedule or a list of OpenMP PARALLEL DO \
+            directives.
+        :type nodes: :py:class:`psyclone.psyGen.InvokeSchedule` or list \
+            of :py:class:`psyclone.psyGen.OMPParallelDoDirective`
+
+        :raises TransformationError: if the argument is neither an \
+            InvokeSchedule nor a list of OpenMP PARALLEL DO directives.
+        :raises TransformationError: if the directives are not consecutive \
+            children of the same parent.
+        :raises TransformationError: if two of the directives use the same \
+            reduction variable.
+        :raises TransformationError: if the private variables of the \
+            merged region would differ from those of the directives.
+        :raises TransformationError: if the code of a directive has already \
+            been inserted into the fparser2 parse tree.
+        '''
+        from psyclone.psyGen import InvokeSchedule, OMPParallelDoDirective
+        if isinstance(nodes, InvokeSchedule):
+            directives = nodes.walk(OMPParallelDoDirective)
+        else:
+            if not isinstance(nodes, list) or not nodes or \
+               not all(isinstance(node, OMPParallelDoDirective)
+                       for node in nodes):
+                raise TransformationError(
+                    "Error in {0} transformation. The argument must be an "
+                    "InvokeSchedule or a list of OMPParallelDoDirectives but "
+                    "got '{1}'.".format(self.name, nodes))
+            directives = nodes
+            parent = nodes[0].parent
+            position = nodes[0].position
+            for idx, node in enumerate(nodes):
+                if node.parent is not parent or \
+                   node.position != position + idx:
+                    raise TransformationError(
+                        "Error in {0} transformation. The directives must be "
+                        "consecutive children of the same parent.".
+                        format(self.name))
+            if len(self._split_reductions(nodes)) > 1:
+                raise TransformationError(
+                    "Error in {0} transformation. A reduction variable can "
+                    "only be used once in a parallel region.".
+                    format(self.name))
+            conflicts = self._private_conflicts(nodes)
+            if conflicts:
+                raise TransformationError(
+                    "Error in {0} transformation. The variables {1} would "
+                    "be private in the merged region but shared in one of "
+                    "the directives, or the other way round.".format(
+                        self.name,
+                        ", ".join("'{0}'".format(name)
+                                  for name in conflicts)))
+        for directive in directives:
+            if directive.ast:
+                raise TransformationError(
+                    "Error in {0} transformation. The code for the "
+                    "directives has already been generated.".
+                    format(self.name))
+
+    def apply(self, nodes):
+        '''
+        Merges the supplied OpenMP PARALLEL DO directives (or all
+        consecutive directives in the supplied InvokeSchedule).
+
+        :param nodes: an InvokeSchedule or a list of OpenMP PARALLEL DO \
+            directives.
+        :type nodes: :py:class:`psyclone.psyGen.InvokeSchedule` or list \
+            of :py:class:`psyclone.psyGen.OMPParallelDoDirective`
+
+        :returns: the modified schedule and a memento of the transformation.
+        :rtype: (:py:class:`psyclone.psyGen.Schedule`, \
+                 :py:class:`psyclone.undoredo.Memento`)
+
+        '''
+        from psyclone.psyGen import InvokeSchedule, OMPParallelDoDirective, \
+            Schedule
+        self.validate(nodes)
+
+        if isinstance(nodes, InvokeSchedule):
+            schedule = nodes
+            groups = []
+            for node in schedule.walk(Schedule):
+                group = []
+                for child in node.children:
+                    if isinstance(child, OMPParallelDoDirective):
+                        group.append(child)
+                    else:
+                        groups.extend(self._split(group))
+                        group = []
+                groups.extend(self._split(group))
+            groups = [group for group in groups if len(group) > 1]
+        else:
+            schedule = nodes[0].root
+            groups = [nodes]
+
+        keep = Memento(schedule, self)
+        for group in groups:
+            self._merge(group)
+        return schedule, keep
+
+    @staticmethod
+    def _private_conflicts(directives):
+        '''
+        The private variables of a parallel region are determined from
+        the accesses in the whole region, so merging directives can make
+        a variable that is private in one directive shared in the region
+        (e.g. if it is read before that directive) or the other way
+        round.
+
+        :param directives: consecutive OpenMP PARALLEL DO directives.
+        :type directives: list of \
+            :py:class:`psyclone.psyGen.OMPParallelDoDirective`
+
+        :returns: the sorted names of the variables that would be private \
+            in a region containing the directives but are shared in one \
+            of the directives that access them, or the other way round.
+        :rtype: list of str
+        '''
+        from psyclone.psyGen import OMPParallelDirective
+        region = set(OMPParallelDirective.private_variables(directives))
+        conflicts = set()
+        for directive in directives:
+            private = set(OMPParallelDirective.private_variables([directive]))
+            accessed = set(name.lower() for name in
+                           directive.var_accesses.all_vars)
+            conflicts |= (private - region) | ((region & accessed) - private)
+        return sorted(conflicts)
+
+    @staticmethod
+    def _split(directives):
+        '''
+        Splits a list of consecutive directives into groups that do not
+        use a reduction variable more than once and that keep the private
+        variables of the directives.
+
+        :param directives: the directives to split.
+        :type directives: list of \
+            :py:class:`psyclone.psyGen.OMPParallelDoDirective`
+
+        :returns: the groups of directives.
+        :rtype: list of list of \
+            :py:class:`psyclone.psyGen.OMPParallelDoDirective`
+        '''
+        groups = []
+        for reduction_group in \
+                OMPParallelDoMergeTrans._split_reductions(directives):
+            group = []
+            for directive in reduction_group:
+                if group and OMPParallelDoMergeTrans._private_conflicts(
+                        group + [directive]):
+                    groups.append(group)
+                    group = []
+                group.append(directive)
+            groups.append(group)
+        return groups
+
+    @staticmethod
+    def _split_reductions(directives):
+        '''
+        Splits a list of consecutive directives into groups that do not
+        use a reduction variable more than once.
+
+        :param directives: the directives to split.
+        :type directives: list of \
+            :py:class:`psyclone.psyGen.OMPParallelDoDirective`
+
+        :returns: the groups of directives.
+        :rtype: list of list of \
+            :py:class:`psyclone.psyGen.OMPParallelDoDirective`
+        '''
+        groups = [[]]
+        names = set()
+        for directive in directives:
+            reductions = set(call.reduction_arg.name
+                             for call in directive.reductions())
+            if reductions & names:
+                groups.append([])
+                names = set()
+            names |= reductions
+            groups[-1].append(directive)
+        return [group for group in groups if group]
+
+    @staticmethod
+    def _is_independent(directive, following):
+        '''
+        Checks that none of the following directives depend on the given
+        directive, i.e. the threads do not have to wait for each other
+        at the end of the loop.
+
+        :param directive: the directive to check.
+        :type directive: :py:class:`psyclone.psyGen.OMPParallelDoDirective`
+        :param following: the directives following it in the same region.
+        :type following: list of \
+            :py:class:`psyclone.psyGen.OMPParallelDoDirective`
+
+        :returns: whether none of the following directives depend on \
+            the given directive.
+        :rtype: bool
+        '''
+        from psyclone.psyGen import Loop
+        # The reduction result is only complete after the barrier
+        if directive.reductions():
+            return False
+        # The dependencies between the arguments of kernels (e.g. fields
+        # in the Dynamo API) ...
+        dependence = directive.forward_dependence()
+        if any(dependence is node for node in following):
+            return False
+        # ... and between all variables accessed (e.g. in the NEMO API).
+        # Loop variables are private to each thread.
+        loop_vars = set()
+        for node in [directive] + following:
+            loop_vars.update(loop.variable_name.lower()
+                             for loop in node.walk(Loop))
+        accesses = directive.var_accesses
+        written = set(name.lower() for name in accesses.all_vars
+                      if accesses.is_written(name))
+        used = set(name.lower() for name in accesses.all_vars)
+        for node in following:
+            other = node.var_accesses
+            for name in other.all_vars:
+                if name.lower() in loop_vars:
+                    continue
+                if name.lower() in written or \
+                   (other.is_written(name) and name.lower() in used):
+                    return False
+        return True
+
+    def _merge(self, directives):
+        '''
+        Replaces the supplied consecutive OpenMP PARALLEL DO directives
+        with one OpenMP PARALLEL directive containing OpenMP DO directives.
+
+        :param directives: the directives to merge.
+        :type directives: list of \
+            :py:class:`psyclone.psyGen.OMPParallelDoDirective`
+        '''
+        from psyclone.psyGen import OMPDoDirective, OMPParallelDirective
+        # The dependencies have to be determined in the original schedule
+        nowait = [self._is_independent(directive, directives[idx+1:])
+                  for idx, directive in enumerate(directives[:-1])]
+        # There is a barrier at the end of the parallel region anyway
+        nowait.append(False)
+
+        node_parent = directives[0].parent
+        node_position = directives[0].position
+        region = OMPParallelDirective(parent=node_parent)
+        for directive, no_barrier in zip(directives, nowait):
+            node_parent.children.remove(directive)
+            # A parallel do directive always uses the OpenMP reduction
+            # clause, so the new loop directive must not create
+            # reproducible reductions.
+            loop_directive = OMPDoDirective(
+                parent=region, children=directive.children[:],
+                omp_schedule=directive.omp_schedule, reprod=False,
+                nowait=no_barrier)
+            for child in loop_directive.children:
+                child.parent = loop_directive
+            region.addchild(loop_directive)
+        node_parent.addchild(region, index=node_position)
+
+
 class ACCParallelTrans(ParallelRegionTrans):
     '''
     Create an OpenACC parallel region by inserting directives. This parallel
@@ -2680,6 +2994,7 @@ class Dynamo0p3KernelConstTrans(Transformation):
                     "found '{0}'.".format(kernel.eval_shape))
 
         if element_order is not None:
+            from psyclone.dynamo0p3 import VALID_ANY_SPACE_NAMES
             # Modify the symbol table for degrees of freedom here.
             for info in arg_list_info.ndf_positions:
                 if info.function_space.lower() in (VALID_ANY_SPACE_NAMES +
@@ -2866,8 +3181,7 @@ class ACCEnterDataTrans(Transformation):
         :raises TransformationError: if passed something that is not a \
                          (subclass of) :py:class:`psyclone.psyGen.Schedule`.
         '''
-        from psyclone.psyGen import Directive, \
-            ACCDataDirective, ACCEnterDataDirective
+        from psyclone.psyGen import ACCDataDirective, ACCEnterDataDirective
         from psyclone.gocean1p0 import GOInvokeSchedule
 
         super(ACCEnterDataTrans, self)._validate(sched)
@@ -2883,10 +3197,8 @@ class ACCEnterDataTrans(Transformation):
                 "a schedule of type {0}".format(type(sched)))
 
         # Check that we don't already have a data region of any sort
-        directives = sched.walk(Directive)
-        if any(isinstance(ddir, (ACCDataDirective,
-                                 ACCEnterDataDirective))
-               for ddir in directives):
+        data_dirs = sched.iter_walk((ACCDataDirective, ACCEnterDataDirective))
+        if next(data_dirs, None) is not None:
             raise TransformationError("Schedule already has an OpenACC data "
                                       "region - cannot add an enter data.")
 
@@ -3102,7 +3414,7 @@ class ACCKernelsTrans(RegionTrans):
 
         # Check that we have at least one loop within the proposed region
         for node in node_list:
-            if node.walk(Loop):
+            if next(node.iter_walk(Loop), None) is not None:
                 break
         else:
             # Branch executed if loop does not exit with a break
@@ -3211,8 +3523,7 @@ class ACCDataTrans(RegionTrans):
         # Check that the Schedule to which the nodes belong does not already
         # have an 'enter data' directive.
         schedule = node_list[0].root
-        acc_dirs = schedule.walk(ACCEnterDataDirective)
-        if acc_dirs:
+        if next(schedule.iter_walk(ACCEnterDataDirective), None) is not None:
             raise TransformationError(
                 "Cannot add an OpenACC data region to a schedule that "
                 "already contains an 'enter data' directive.")
@@ -3450,6 +3761,203 @@ class NemoExplicitLoopTrans(Transformation):
                 "not a NemoImplicitLoop (got {0})".format(type(loop)))
 
 
+class NemoAutoOMPTrans(Transformation):
+    '''
+    Automatically parallelises all loop nests in a NemoInvokeSchedule with
+    OpenMP. In each loop nest the outermost loop that does not carry a
+    dependence between its iterations (as determined by
+    :py:class:`psyclone.core.dependency_tools.DependencyTools`) is
+    parallelised. Consecutive parallel loops are enclosed in a single
+    OpenMP PARALLEL region with an OpenMP DO directive for each loop (see
+    :py:class:`psyclone.transformations.OMPParallelDoMergeTrans`), in
+    order to minimise the fork/join overhead, unless a scalar that is
+    private to one of the loops is shared in another (the private
+    variables are those of the whole region). A parallel loop without any
+    parallel neighbour gets an OpenMP PARALLEL DO directive. For example:
+
+    >>> from psyclone.parse.algorithm import parse
+    >>> from psyclone.psyGen import PSyFactory
+    >>> api = "nemo"
+    >>> ast, invokeInfo = parse("tra_adv.F90", api=api)
+    >>> psy = PSyFactory(api).create(invokeInfo)
+    >>>
+    >>> from psyclone.transformations import NemoAutoOMPTrans
+    >>> auto_trans = NemoAutoOMPTrans()
+    >>> for invoke in psy.invokes.invoke_list:
+    >>>     auto_trans.apply(invoke.schedule)
+    >>>     print("\n".join(auto_trans.report))
+
+    The report lists all loops that were considered, and the reasons
+    why a loop was not parallelised.
+
+    :param str omp_schedule: the OpenMP schedule to use.
+
+    '''
+    def __init__(self, omp_schedule="static"):
+        # Use the OpenMP loop transformation to check the schedule
+        self._omp_schedule = OMPLoopTrans(omp_schedule).omp_schedule
+        self._report = []
+        super(NemoAutoOMPTrans, self).__init__()
+
+    def __str__(self):
+        return ("Parallelise all loop nests of a NEMO invoke with OpenMP "
+                "using dependence analysis")
+
+    @property
+    def name(self):
+        '''
+        :returns: the name of this transformation class.
+        :rtype: str
+        '''
+        return "NemoAutoOMPTrans"
+
+    @property
+    def report(self):
+        '''
+        :returns: the report of the last application of this \
+            transformation: one line for each loop that was considered \
+            and for each parallel region containing more than one loop.
+        :rtype: list of str
+        '''
+        return self._report[:]
+
+    def validate(self, schedule):
+        '''
+        Check that the supplied node is a valid target for this
+        transformation.
+
+        :param schedule: the schedule to validate.
+        :type schedule: :py:class:`psyclone.nemo.NemoInvokeSchedule`
+
+        :raises TransformationError: if the supplied node is not a \
+                                     NemoInvokeSchedule.
+        :raises TransformationError: if the schedule already contains \
+                                     OpenMP directives.
+        '''
+        from psyclone.nemo import NemoInvokeSchedule
+        from psyclone.psyGen import OMPDirective
+        if not isinstance(schedule, NemoInvokeSchedule):
+            raise TransformationError(
+                "Cannot apply NemoAutoOMPTrans to something that is not a "
+                "NemoInvokeSchedule (got {0})".format(type(schedule)))
+        if schedule.walk(OMPDirective):
+            raise TransformationError(
+                "Cannot apply NemoAutoOMPTrans to a schedule that already "
+                "contains OpenMP directives.")
+
+    def apply(self, schedule):
+        '''
+        Parallelise the loop nests of the supplied schedule.
+
+        :param schedule: the schedule to parallelise.
+        :type schedule: :py:class:`psyclone.nemo.NemoInvokeSchedule`
+
+        :returns: the modified schedule and a memento of the transformation.
+        :rtype: (:py:class:`psyclone.nemo.NemoInvokeSchedule`, \
+                 :py:class:`psyclone.undoredo.Memento`)
+
+        '''
+        from psyclone.core.dependency_tools import DependencyTools
+
+        self.validate(schedule)
+
+        keep = Memento(schedule, self)
+        self._report = []
+        self._parallelise(schedule, DependencyTools())
+        return schedule, keep
+
+    def _parallelise(self, node, dep_tools):
+        '''
+        Parallelise the outermost parallel loops of all loop nests in the
+        statements that are children of the supplied node.
+
+        :param node: the node whose children are processed.
+        :type node: :py:class:`psyclone.psyGen.Schedule`
+        :param dep_tools: the dependence analysis to use.
+        :type dep_tools: \
+            :py:class:`psyclone.core.dependency_tools.DependencyTools`
+
+        '''
+        from psyclone.psyGen import IfBlock, Loop
+
+        # Groups of consecutive loops that can be parallelised, and the
+        # (lower case) names of the scalars that are private to and
+        # shared by the loops of the last group
+        groups = [[]]
+        private = set()
+        shared = set()
+        for child in node.children:
+            if not isinstance(child, Loop):
+                if groups[-1]:
+                    groups.append([])
+                if isinstance(child, IfBlock):
+                    self._parallelise(child.if_body, dep_tools)
+                    if child.else_body:
+                        self._parallelise(child.else_body, dep_tools)
+                continue
+            description = self._describe(child)
+            if not child.variable_name:
+                reason = ("it is an implicit loop (using array syntax), "
+                          "NemoExplicitLoopTrans can convert it into an "
+                          "explicit loop.")
+            elif dep_tools.can_loop_be_parallelised(child):
+                self._report.append("Parallelised {0}.".format(description))
+                loop_private = set(name.lower() for name in
+                                   dep_tools.private_variables)
+                loop_private.add(child.variable_name.lower())
+                loop_shared = set(
+                    name.lower() for name in child.var_accesses.all_vars
+                    if name.lower() not in loop_private)
+                if groups[-1] and (loop_private & shared or
+                                   loop_shared & private):
+                    # The loop can not be in the same parallel region
+                    groups.append([])
+                if not groups[-1]:
+                    private = set()
+                    shared = set()
+                groups[-1].append(child)
+                private |= loop_private
+                shared |= loop_shared
+                continue
+            else:
+                reason = " ".join(dep_tools.get_all_messages())
+            self._report.append("Not parallelised {0}: {1}".format(
+                description, reason))
+            if groups[-1]:
+                groups.append([])
+            if child.variable_name:
+                self._parallelise(child.loop_body, dep_tools)
+
+        loop_trans = OMPParallelLoopTrans(self._omp_schedule)
+        for group in groups:
+            for loop in group:
+                loop_trans.apply(loop)
+            if len(group) > 1:
+                OMPParallelDoMergeTrans().apply([loop.parent
+                                                 for loop in group])
+                self._report.append(
+                    "Created one parallel region for the {0} loops {1}.".
+                    format(len(group), ", ".join(self._describe(loop)
+                                                 for loop in group)))
+
+    @staticmethod
+    def _describe(loop):
+        '''
+        :param loop: a loop.
+        :type loop: :py:class:`psyclone.psyGen.Loop`
+
+        :returns: a description of the loop for the report.
+        :rtype: str
+        '''
+        from psyclone.psyir.backend.fortran import FortranWriter
+        if not loop.variable_name:
+            return "'{0}'".format(str(loop.ast))
+        writer = FortranWriter()
+        return "'do {0} = {1}, {2}'".format(loop.variable_name,
+                                           writer(loop.start_expr),
+                                           writer(loop.stop_expr))
+
+
 class ExtractRegionTrans(RegionTrans):
     ''' Provides a transformation to extract code represented by a \
     subset of the Nodes in the PSyIR of a Schedule into a stand-alone \